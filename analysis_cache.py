@@ -0,0 +1,228 @@
+"""
+파일 내용 해시 기반 분석 결과 캐시
+
+- 키: CSV 파일 바이트의 SHA-256 해시 + 분석 파라미터(윈도우 크기, 임계값 테이블, 결과 형식 버전)
+- 값: save_columnar()로 저장한 npz 파일 (배치 통계 + 원시 시계열), 다시 올린 같은 파일은 재분석 없이 로드
+- 모티프 탐색은 분석 시 실행하지 않고 discover_motifs()로 요청할 때 한 번 실행하여 같은 항목에 다시 저장
+- 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU, 파일 수정 시각을 사용 시각으로 사용)
+- 업로드 원시 저장소도 같은 내용 해시(캐시 키)를 이름으로 저장하고 raw_store_max_bytes 한도로 같은 방식으로 삭제
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+
+from water_pump_analyzer import (
+    COLUMNAR_FORMAT_VERSION,
+    MOTIFS_NOT_COMPUTED,
+    RAW_STORE_DIR,
+    WaterPumpAnalyzer
+)
+
+ANALYSIS_CACHE_DIR = os.path.join('water_pump_data', 'analysis_cache')
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3
+DEFAULT_RAW_STORE_MAX_BYTES = 4 * 1024 ** 3
+
+_HASH_BLOCK_BYTES = 1024 ** 2
+
+
+class AnalysisCache:
+    """
+    분석 결과 디스크 캐시
+    같은 디렉터리를 쓰는 여러 세션(대시보드, 챗봇)이 캐시를 공유하며,
+    항목은 임시 파일에 쓴 뒤 교체하므로 읽는 중인 세션과 충돌하지 않음
+    """
+
+    def __init__(self, cache_dir=ANALYSIS_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 raw_store_dir=RAW_STORE_DIR, raw_store_max_bytes=DEFAULT_RAW_STORE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.raw_store_dir = raw_store_dir
+        self.raw_store_max_bytes = raw_store_max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, content, window_size=100, thresholds=None):
+        """파일 내용(bytes 또는 파일 객체)과 분석 파라미터로 캐시 키 생성"""
+        digest = hashlib.sha256()
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            digest.update(content)
+        else:
+            for block in iter(lambda: content.read(_HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+        params = {
+            'window_size': window_size,
+            'thresholds': WaterPumpAnalyzer(thresholds).thresholds,
+            'format_version': COLUMNAR_FORMAT_VERSION
+        }
+        digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def get(self, key, thresholds=None):
+        """캐시 항목을 분석기로 복원 (없으면 None), 사용 시각 갱신"""
+        path = self._entry_path(key)
+        try:
+            analyzer = WaterPumpAnalyzer(thresholds)
+            analyzer.load_columnar(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        analyzer.load_summary = {'records': len(analyzer.raw_values), 'cache_key': key, 'cache_hit': True}
+        return analyzer
+
+    def put(self, key, analyzer, data_source='uploaded_csv_file'):
+        """분석 결과를 캐시에 저장한 뒤 크기 한도에 맞게 오래된 항목 삭제"""
+        path = self._entry_path(key)
+        temp_path = os.path.join(self.cache_dir, f'.{key}.{os.getpid()}.tmp.npz')
+        analyzer.save_columnar(temp_path, data_source=data_source, file_format='npz')
+        os.replace(temp_path, path)
+        self.evict(keep=key)
+        return path
+
+    def invalidate(self, key=None):
+        """key 항목(None이면 전체) 삭제, 삭제한 항목 수 반환"""
+        keys = [entry['key'] for entry in self.entries()] if key is None else [key]
+        removed = 0
+        for entry_key in keys:
+            try:
+                os.remove(self._entry_path(entry_key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def entries(self):
+        """캐시 항목 목록 (최근 사용 순): key, path, bytes, last_used"""
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.startswith('.') or not file_name.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append({
+                'key': file_name[:-len('.npz')],
+                'path': path,
+                'bytes': stat.st_size,
+                'last_used': stat.st_mtime
+            })
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    def total_bytes(self):
+        return sum(entry['bytes'] for entry in self.entries())
+
+    def evict(self, keep=None):
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 항목 삭제 (keep 항목 제외)"""
+        return _evict_lru(self.entries(), self.max_bytes, keep, _remove_file)
+
+    def save_raw_store(self, analyzer, label=None):
+        """
+        분석기의 원시 시계열을 캐시 키(파일 내용 해시) 이름의 원시 저장소로 저장한 뒤 크기 한도에 맞게 오래된 저장소 삭제
+        같은 내용의 저장소가 이미 있으면 다시 쓰지 않고 사용 시각만 갱신, 반환: 저장소 경로
+        """
+        key = analyzer.load_summary['cache_key']
+        store_path = os.path.join(self.raw_store_dir, key)
+        header_path = os.path.join(store_path, 'header.json')
+        if os.path.isfile(header_path):
+            os.utime(header_path)
+        else:
+            analyzer.save_raw_store(key, store_dir=self.raw_store_dir, label=label)
+        self.evict_raw_stores(keep=key)
+        return store_path
+
+    def raw_store_entries(self):
+        """원시 저장소 목록 (최근 사용 순): key, path, bytes, last_used (헤더 수정 시각)"""
+        if not os.path.isdir(self.raw_store_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.raw_store_dir):
+            path = os.path.join(self.raw_store_dir, name)
+            try:
+                last_used = os.stat(os.path.join(path, 'header.json')).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            except FileNotFoundError:
+                continue
+            entries.append({'key': name, 'path': path, 'bytes': size, 'last_used': last_used})
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    def evict_raw_stores(self, keep=None):
+        """
+        원시 저장소 전체 크기가 raw_store_max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 저장소 삭제 (keep 저장소 제외)
+        이미 연결된 세션의 메모리 맵은 삭제 후에도 열린 파일을 계속 읽음
+        """
+        return _evict_lru(self.raw_store_entries(), self.raw_store_max_bytes, keep,
+                          lambda path: shutil.rmtree(path, ignore_errors=True))
+
+    def analyze_file(self, source, window_size=100, thresholds=None, data_source='uploaded_csv_file', profile=False):
+        """
+        CSV(경로 또는 업로드 파일 객체)를 캐시를 거쳐 분석 (profile=True면 새로 분석할 때 단계별 처리 시간 기록)
+        반환: (분석기, 캐시 적중 여부), 로드 실패 시 (None, False)
+        """
+        start = time.perf_counter()
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                content = f.read()
+        else:
+            source.seek(0)
+            content = source.read()
+        key = self.cache_key(content, window_size, thresholds)
+
+        analyzer = self.get(key, thresholds)
+        if analyzer is not None:
+            # 결과 형식이 바뀌기 전에 저장된 항목은 빠진 분석만 실행하고 다시 저장
+            if analyzer.run_extended_analyses(missing_only=True):
+                self.put(key, analyzer, data_source)
+            print(f"분석 캐시 적중: {key[:12]} ({(time.perf_counter() - start) * 1000:.0f}ms)")
+            return analyzer, True
+
+        analyzer = WaterPumpAnalyzer(thresholds, profile=profile)
+        if not analyzer.load_data(uploaded_file=io.BytesIO(content)):
+            return None, False
+        analyzer.analyze_temperature_characteristics(window_size)
+        analyzer.run_extended_analyses()
+        self.put(key, analyzer, data_source)
+        analyzer.load_summary['cache_key'] = key
+        analyzer.load_summary['cache_hit'] = False
+        return analyzer, False
+
+    def discover_motifs(self, analyzer, data_source='uploaded_csv_file'):
+        """
+        아직 탐색하지 않은 분석기만 모티프를 탐색하고, 캐시에서 가져오거나 저장한 분석기면 결과를 같은 항목에 다시 저장
+        (다음 캐시 적중에서는 저장된 결과를 그대로 사용)
+        반환: 화면 데이터에 합칠 모티프 메타데이터 (analyzer.motif_metadata())
+        """
+        if analyzer.matrix_profile_summary['status'] == MOTIFS_NOT_COMPUTED:
+            analyzer.discover_motifs()
+            key = analyzer.load_summary.get('cache_key')
+            if key is not None:
+                self.put(key, analyzer, data_source)
+        return analyzer.motif_metadata()
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _evict_lru(entries, max_bytes, keep, remove):
+    """최근 사용 순 entries에서 전체 크기가 max_bytes 이하가 될 때까지 오래된 항목부터 remove(path) 호출, 삭제 수 반환"""
+    total = sum(entry['bytes'] for entry in entries)
+    removed = 0
+    for entry in reversed(entries):
+        if total <= max_bytes:
+            break
+        if entry['key'] == keep:
+            continue
+        remove(entry['path'])
+        total -= entry['bytes']
+        removed += 1
+    return removed
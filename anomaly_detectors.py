@@ -0,0 +1,298 @@
+"""
+원시 시계열 이상 감지 (벡터화 + 스트리밍)
+
+- 기준선: 직전 window개 레코드의 평균/표준편차 (현재 레코드 제외, 누적합 차분으로 O(n))
+- rolling z-score: |x - 기준 평균| / 기준 표준편차 > z_threshold (배치 안의 급격한 점프)
+- EWMA 관리도: 지수 가중 평균이 기준 평균 ± ewma_limit * σ * sqrt(α / (2 - α))를 벗어나기 시작한 레코드
+  (한계 밖에 머무는 동안은 다시 감지하지 않음)
+- 양측 CUSUM: 표준화 잔차 r로 S+ = max(0, S+ + r - k), S- = max(0, S- - r - k)가 cusum_h를 넘으면 감지 후 0으로 리셋
+  블록 안에서는 Lindley 재귀 S_t = C_t - min(0, min C_j) (C는 S_0 + r - k의 누적합)로 반복문 없이 계산하고
+  경보가 난 위치에서 다음 블록을 시작
+- 감지된 레코드가 max_gap 이내로 이어지면 이벤트 하나로 묶어 시작/끝/최고점 시각과 감지기 목록을 보고
+- StreamingDetector는 레코드 하나씩 같은 점수를 O(1) 상태로 갱신 (실시간 append용)
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# 기본값은 5분 간격 센서 기준 (기준선 1일), 자기상관이 큰 온도 시계열에서 경보가 과도하지 않도록 조정
+DEFAULT_DETECTOR_PARAMS = {
+    'window': 288,         # 기준선 레코드 수
+    'z_threshold': 5.0,
+    'ewma_alpha': 0.3,
+    'ewma_limit': 5.0,
+    'cusum_k': 2.0,        # 허용 이동량 (표준편차 단위)
+    'cusum_h': 20.0,       # 경보 한계 (표준편차 단위)
+    'min_std': 0.1         # 기준 표준편차 하한 (°C), 일정한 구간에서 점수 폭주 방지
+}
+
+DETECTOR_NAMES = ('zscore', 'ewma', 'cusum')
+
+# 이벤트로 묶을 감지 레코드 간 최대 간격 (레코드 수)
+DEFAULT_EVENT_GAP = 12
+
+# CUSUM 블록 크기: 경보 후에는 작은 블록부터 다시 두 배씩 키움 (경보가 잦아도 낭비되는 계산이 작도록)
+_CUSUM_MIN_BLOCK = 256
+_CUSUM_MAX_BLOCK = 65_536
+
+
+def detector_params(overrides=None):
+    """기본 파라미터에 overrides를 덮어쓴 딕셔너리 (알 수 없는 키는 오류)"""
+    params = dict(DEFAULT_DETECTOR_PARAMS)
+    for key, value in (overrides or {}).items():
+        if key not in params:
+            raise ValueError(f"알 수 없는 감지 파라미터입니다: {key}")
+        params[key] = value
+    if params['window'] < 2:
+        raise ValueError("window는 2 이상이어야 합니다.")
+    if not 0 < params['ewma_alpha'] <= 1:
+        raise ValueError("ewma_alpha는 0과 1 사이여야 합니다.")
+    return params
+
+
+def _trailing_baseline(values, window, min_std):
+    """레코드 t의 기준선 = values[t-window:t]의 평균/표준편차 (처음 window개는 NaN)"""
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n <= window:
+        return mean, std
+
+    # 누적합 정밀도를 위해 전체 평균을 빼고 계산
+    shift = values.mean()
+    shifted = values - shift
+    prefix_sum = np.concatenate(([0.0], np.cumsum(shifted)))
+    prefix_sq = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    window_mean = (prefix_sum[window:n] - prefix_sum[:n - window]) / window
+    window_sq = (prefix_sq[window:n] - prefix_sq[:n - window]) / window
+    mean[window:] = window_mean + shift
+    std[window:] = np.maximum(np.sqrt(np.maximum(window_sq - window_mean * window_mean, 0.0)), min_std)
+    return mean, std
+
+
+def _cusum(increments, h):
+    """
+    S_t = max(0, S_{t-1} + d_t), S_t > h이면 경보 후 S = 0
+    반환: (S 배열(경보 위치는 리셋 전 값), 경보 여부 배열)
+    """
+    n = len(increments)
+    cusum = np.empty(n)
+    alarms = np.zeros(n, dtype=bool)
+    position, start_value, block = 0, 0.0, _CUSUM_MIN_BLOCK
+    while position < n:
+        end = min(position + block, n)
+        cumulative = start_value + np.cumsum(increments[position:end])
+        segment = cumulative - np.minimum(np.minimum.accumulate(cumulative), 0.0)
+        over = np.flatnonzero(segment > h)
+        if len(over):
+            hit = int(over[0])
+            cusum[position:position + hit + 1] = segment[:hit + 1]
+            alarms[position + hit] = True
+            position, start_value, block = position + hit + 1, 0.0, _CUSUM_MIN_BLOCK
+        else:
+            cusum[position:end] = segment
+            position, start_value, block = end, float(segment[-1]), min(block * 2, _CUSUM_MAX_BLOCK)
+    return cusum, alarms
+
+
+def score_series(values, params=None):
+    """
+    전체 시계열 점수와 감지 여부 (모두 values와 같은 길이의 배열)
+    반환 키: baseline_mean, baseline_std, zscore, ewma, ewma_lower, ewma_upper, cusum_pos, cusum_neg,
+            flags {'zscore', 'ewma', 'cusum'} (기준선이 없는 처음 window개는 감지하지 않음)
+    flags['ewma']는 한계를 벗어나기 시작한 레코드, flags['cusum']은 경보(리셋) 레코드만 True
+    """
+    params = detector_params(params)
+    values = np.asarray(values, dtype=np.float64)
+    mean, std = _trailing_baseline(values, params['window'], params['min_std'])
+    ready = ~np.isnan(mean)
+
+    residual = np.where(ready, (values - mean) / std, 0.0)
+    zscore = np.where(ready, residual, np.nan)
+
+    alpha = params['ewma_alpha']
+    ewma = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    width = params['ewma_limit'] * std * np.sqrt(alpha / (2 - alpha))
+
+    k = params['cusum_k']
+    cusum_pos, alarms_pos = _cusum(np.where(ready, residual - k, 0.0), params['cusum_h'])
+    cusum_neg, alarms_neg = _cusum(np.where(ready, -residual - k, 0.0), params['cusum_h'])
+
+    outside = ready & ((ewma > mean + width) | (ewma < mean - width))
+    flags = {
+        'zscore': ready & (np.abs(residual) > params['z_threshold']),
+        'ewma': outside & ~np.concatenate(([False], outside[:-1])),
+        'cusum': alarms_pos | alarms_neg
+    }
+    return {
+        'baseline_mean': mean,
+        'baseline_std': std,
+        'zscore': zscore,
+        'ewma': ewma,
+        'ewma_lower': mean - width,
+        'ewma_upper': mean + width,
+        'cusum_pos': cusum_pos,
+        'cusum_neg': cusum_neg,
+        'flags': flags
+    }
+
+
+def anomaly_events(scores, batch_starts=None, max_gap=DEFAULT_EVENT_GAP):
+    """
+    감지된 레코드를 연속 구간(사이 간격 max_gap 이하는 하나로)으로 묶은 이벤트 배열
+    반환: start/end/peak(레코드 위치), score(최대 |z|), detectors(감지기별 감지 레코드 수),
+         batch_index(최고점이 속한 배치 위치, batch_starts가 있을 때)
+    """
+    flags = scores['flags']
+    flagged = np.zeros(len(scores['zscore']), dtype=bool)
+    for name in DETECTOR_NAMES:
+        flagged |= flags[name]
+    positions = np.flatnonzero(flagged)
+    if len(positions) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {'start': empty, 'end': empty, 'peak': empty, 'score': np.empty(0),
+                'detectors': {name: empty for name in DETECTOR_NAMES}, 'batch_index': empty}
+
+    breaks = np.flatnonzero(np.diff(positions) > max_gap + 1) + 1
+    run_starts = np.concatenate(([0], breaks))
+    starts = positions[run_starts]
+    ends = positions[np.append(breaks - 1, len(positions) - 1)]
+
+    # 구간별 최대 |z| 위치 (구간을 레코드 위치 단위로 나눈 reduceat)
+    magnitude = np.nan_to_num(np.abs(scores['zscore']), nan=0.0)
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends + 1
+    if bounds[-1] == len(magnitude):
+        bounds = bounds[:-1]
+    peak_score = np.maximum.reduceat(magnitude, bounds)[0::2]
+    peaks = starts.copy()
+    for idx, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        peaks[idx] = start + int(np.argmax(magnitude[start:end + 1]))
+
+    detectors = {}
+    for name in DETECTOR_NAMES:
+        counts = np.add.reduceat(flags[name].astype(np.int64), bounds)[0::2]
+        detectors[name] = counts
+    batch_index = (np.searchsorted(batch_starts, peaks, side='right') - 1
+                   if batch_starts is not None else np.full(len(peaks), -1))
+    return {
+        'start': starts,
+        'end': ends,
+        'peak': peaks,
+        'score': peak_score,
+        'detectors': detectors,
+        'batch_index': batch_index
+    }
+
+
+class StreamingDetector:
+    """
+    레코드 하나씩 점수를 갱신하는 O(1) 상태 감지기 (score_series와 같은 점수)
+    상태: 직전 window개 값 링 버퍼와 합/제곱합, EWMA 값과 한계 밖 여부, CUSUM 두 값
+    """
+
+    def __init__(self, params=None):
+        self.params = detector_params(params)
+        self.window = self.params['window']
+        self.buffer = deque(maxlen=self.window)
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.ewma = None
+        self.ewma_outside = False
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.count = 0
+
+    def _recompute_sums(self):
+        """합/제곱합 누적 오차 제거 (window번 갱신마다 버퍼로 다시 계산, 분할상환 O(1))"""
+        shifted = np.asarray(self.buffer, dtype=np.float64) - self.shift
+        self.total = float(shifted.sum())
+        self.total_sq = float((shifted * shifted).sum())
+
+    def update(self, value):
+        """
+        값 하나 추가 후 점수 반환
+        반환: {'zscore', 'ewma', 'ewma_lower', 'ewma_upper', 'cusum_pos', 'cusum_neg', 'flags': [감지기 이름]}
+        """
+        value = float(value)
+        params = self.params
+        alpha = params['ewma_alpha']
+        if self.shift is None:
+            self.shift = value
+        self.ewma = value if self.ewma is None else alpha * value + (1 - alpha) * self.ewma
+
+        result = {'zscore': None, 'ewma': self.ewma, 'ewma_lower': None, 'ewma_upper': None,
+                  'cusum_pos': self.cusum_pos, 'cusum_neg': self.cusum_neg, 'flags': []}
+        if len(self.buffer) == self.window:
+            mean_shifted = self.total / self.window
+            variance = max(self.total_sq / self.window - mean_shifted * mean_shifted, 0.0)
+            mean = mean_shifted + self.shift
+            std = max(variance ** 0.5, params['min_std'])
+            residual = (value - mean) / std
+            width = params['ewma_limit'] * std * (alpha / (2 - alpha)) ** 0.5
+            self.cusum_pos = max(0.0, self.cusum_pos + residual - params['cusum_k'])
+            self.cusum_neg = max(0.0, self.cusum_neg - residual - params['cusum_k'])
+
+            result.update({
+                'zscore': residual, 'ewma_lower': mean - width, 'ewma_upper': mean + width,
+                'cusum_pos': self.cusum_pos, 'cusum_neg': self.cusum_neg
+            })
+            if abs(residual) > params['z_threshold']:
+                result['flags'].append('zscore')
+            outside = self.ewma > mean + width or self.ewma < mean - width
+            if outside and not self.ewma_outside:
+                result['flags'].append('ewma')
+            self.ewma_outside = outside
+            if self.cusum_pos > params['cusum_h'] or self.cusum_neg > params['cusum_h']:
+                result['flags'].append('cusum')
+                self.cusum_pos = 0.0 if self.cusum_pos > params['cusum_h'] else self.cusum_pos
+                self.cusum_neg = 0.0 if self.cusum_neg > params['cusum_h'] else self.cusum_neg
+
+            outgoing = self.buffer[0] - self.shift
+            self.total -= outgoing
+            self.total_sq -= outgoing * outgoing
+
+        self.buffer.append(value)
+        self.total += value - self.shift
+        self.total_sq += (value - self.shift) ** 2
+        self.count += 1
+        if self.count % self.window == 0:
+            self._recompute_sums()
+        return result
+
+    def update_many(self, values):
+        """여러 값을 순서대로 갱신하고 감지된 레코드의 (위치, 결과) 목록 반환"""
+        flagged = []
+        for idx, value in enumerate(values):
+            result = self.update(value)
+            if result['flags']:
+                flagged.append((idx, result))
+        return flagged
+
+    @classmethod
+    def from_series(cls, values, params=None, scores=None):
+        """
+        과거 시계열의 마지막 상태로 시작하는 감지기 (전체를 반복하지 않고 벡터 점수로 상태 복원)
+        같은 values/params로 이미 계산한 score_series 결과가 있으면 scores로 넘겨 재계산 생략
+        """
+        detector = cls(params)
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return detector
+        if scores is None:
+            scores = score_series(values, detector.params)
+        detector.buffer.extend(values[-detector.window:].tolist())
+        detector.shift = float(values[0])
+        detector._recompute_sums()
+        detector.ewma = float(scores['ewma'][-1])
+        detector.ewma_outside = bool(scores['ewma'][-1] > scores['ewma_upper'][-1]
+                                     or scores['ewma'][-1] < scores['ewma_lower'][-1])
+        # 경보 레코드의 S는 리셋 전 값이므로 다음 상태는 0
+        detector.cusum_pos = 0.0 if scores['cusum_pos'][-1] > detector.params['cusum_h'] else float(scores['cusum_pos'][-1])
+        detector.cusum_neg = 0.0 if scores['cusum_neg'][-1] > detector.params['cusum_h'] else float(scores['cusum_neg'][-1])
+        detector.count = len(values)
+        return detector
@@ -0,0 +1,379 @@
+"""
+배치 유사도 색인과 패턴 그룹화
+
+- 배치 특징 벡터: 통계(mean/median/std/min/max/range, 배치 전체 기준 표준화)
+  + 원시 값을 shape_points개 구간 평균(PAA)으로 줄인 모양 (배치별 z 정규화)
+  두 블록은 같은 비중이 되도록 차원 수로 나누어 가중
+- 그룹화: NumPy 미니배치 k-means (k-means++ 초기화, 무작위 배치 평균으로 중심 갱신)
+- 검색: 전체 배치 제곱 거리 한 번의 행렬-벡터 곱 (brute force) 또는
+  가까운 n_probe개 군집의 배치만 비교 (partitioned), argpartition으로 상위 k개만 정렬
+- 원시 데이터가 없으면(챗봇이 읽은 JSON 결과 등) 통계 특징만 사용
+"""
+
+import numpy as np
+
+from growable_array import GrowableArray
+
+DEFAULT_SIMILARITY_PARAMS = {
+    'n_clusters': 8,
+    'shape_points': 16,
+    'shape_weight': 1.0,
+    'batch_size': 1024,
+    'max_iter': 100,
+    'seed': 0
+}
+
+SIMILARITY_STAT_FIELDS = ('mean', 'median', 'std', 'min', 'max', 'range')
+
+# 거리 계산 시 한 번에 처리하는 행 수 (행 x 군집 수 임시 배열 크기 제한)
+_CHUNK_ROWS = 65536
+
+
+def similarity_params(overrides=None):
+    """기본 유사도 파라미터에 overrides를 덮어쓴 사본 (값 검증 포함)"""
+    params = dict(DEFAULT_SIMILARITY_PARAMS)
+    if overrides:
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"알 수 없는 유사도 파라미터입니다: {sorted(unknown)}")
+        params.update(overrides)
+    for key in ('n_clusters', 'shape_points', 'batch_size', 'max_iter'):
+        params[key] = int(params[key])
+        if params[key] < 1:
+            raise ValueError(f"{key}는 1 이상이어야 합니다: {params[key]}")
+    return params
+
+
+def shape_features(values, starts, ends, shape_points):
+    """
+    배치 [start, end) 구간을 shape_points개 구간 평균으로 줄이고 배치별 z 정규화한 (배치 수, shape_points) 배열
+    누적합 한 번으로 모든 배치를 계산하며, 레코드가 shape_points보다 적은 배치는 가까운 레코드 값을 반복
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(ends, dtype=np.int64) - starts
+    steps = np.arange(shape_points + 1)
+    bounds = starts[:, None] + (lengths[:, None] * steps) // shape_points
+    lower, upper = bounds[:, :-1], bounds[:, 1:]
+
+    cumulative = np.concatenate(([0.0], np.cumsum(np.nan_to_num(values))))
+    counts = upper - lower
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shape = (cumulative[upper] - cumulative[lower]) / counts
+    empty = counts == 0
+    if empty.any():
+        last = np.maximum(starts[:, None] + lengths[:, None] - 1, starts[:, None])
+        shape[empty] = values[np.minimum(lower, last)[empty]]
+
+    shape -= shape.mean(axis=1, keepdims=True)
+    scale = shape.std(axis=1, keepdims=True)
+    shape = np.divide(shape, scale, out=np.zeros_like(shape), where=scale > 1e-9)
+    return np.nan_to_num(shape)
+
+
+def batch_features(table, raw_values=None, params=None):
+    """
+    BatchTable(또는 같은 컬럼 딕셔너리)의 배치 특징 벡터 (float32, 배치 수 x 차원)와 통계 표준화 기준
+    raw_values와 raw_start/raw_end 컬럼이 있으면 모양 특징 추가
+    """
+    params = similarity_params(params)
+    stats = np.column_stack([np.asarray(table[name], dtype=np.float64) for name in SIMILARITY_STAT_FIELDS])
+    center = np.nanmean(stats, axis=0) if len(stats) else np.zeros(stats.shape[1])
+    scale = np.nanstd(stats, axis=0) if len(stats) else np.ones(stats.shape[1])
+    scale = np.where(scale > 1e-9, scale, 1.0)
+    blocks = [np.nan_to_num((stats - center) / scale) / np.sqrt(stats.shape[1])]
+
+    columns = getattr(table, 'columns', table)
+    has_shape = raw_values is not None and 'raw_start' in columns and len(stats)
+    if has_shape:
+        shape = shape_features(raw_values, columns['raw_start'], columns['raw_end'], params['shape_points'])
+        blocks.append(shape * np.sqrt(params['shape_weight'] / params['shape_points']))
+    scaling = {'center': center.tolist(), 'scale': scale.tolist(), 'has_shape': bool(has_shape)}
+    return np.ascontiguousarray(np.hstack(blocks), dtype=np.float32), scaling
+
+
+def _squared_distances(points, centers, center_norms=None):
+    """(행 수, 중심 수) 제곱 유클리드 거리 (|x|² - 2x·c + |c|², 음수 반올림 오차는 0)"""
+    if center_norms is None:
+        center_norms = np.einsum('ij,ij->i', centers, centers)
+    distances = np.einsum('ij,ij->i', points, points)[:, None] - 2.0 * points @ centers.T + center_norms
+    return np.maximum(distances, 0.0)
+
+
+def assign_clusters(features, centers):
+    """각 행의 가장 가까운 중심 번호와 제곱 거리 (_CHUNK_ROWS 단위로 계산)"""
+    labels = np.empty(len(features), dtype=np.int32)
+    distances = np.empty(len(features), dtype=np.float32)
+    center_norms = np.einsum('ij,ij->i', centers, centers)
+    for start in range(0, len(features), _CHUNK_ROWS):
+        block = _squared_distances(features[start:start + _CHUNK_ROWS], centers, center_norms)
+        labels[start:start + len(block)] = np.argmin(block, axis=1)
+        distances[start:start + len(block)] = block[np.arange(len(block)), labels[start:start + len(block)]]
+    return labels, distances
+
+
+def _kmeans_plus_plus(points, n_clusters, rng):
+    """k-means++ 초기 중심 (이미 뽑힌 중심과의 거리 제곱에 비례하여 다음 중심 선택)"""
+    centers = [points[rng.integers(len(points))]]
+    closest = _squared_distances(points, centers[0][None, :])[:, 0]
+    for _ in range(1, n_clusters):
+        total = closest.sum()
+        if total <= 0:
+            break
+        choice = rng.choice(len(points), p=closest / total)
+        centers.append(points[choice])
+        closest = np.minimum(closest, _squared_distances(points, points[choice][None, :])[:, 0])
+    return np.array(centers, dtype=np.float64)
+
+
+def minibatch_kmeans(features, n_clusters, batch_size=1024, max_iter=100, seed=0, tol=1e-4):
+    """
+    미니배치 k-means: 매 반복 무작위 batch_size개 행을 가까운 중심에 배정하고,
+    중심별 누적 배정 수에 반비례하는 학습률로 배정된 행 평균 쪽으로 이동
+    중심 이동량이 tol 미만이면 조기 종료, 반환: 중심 (float32), 행별 군집 번호, 제곱 거리
+    """
+    features = np.asarray(features, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, min(n_clusters, len(features)))
+    sample = features[rng.choice(len(features), min(len(features), 10 * batch_size), replace=False)]
+    centers = _kmeans_plus_plus(sample.astype(np.float64), n_clusters, rng)
+    counts = np.zeros(len(centers))
+
+    for _ in range(max_iter):
+        batch = features[rng.integers(0, len(features), min(batch_size, len(features)))].astype(np.float64)
+        nearest = np.argmin(_squared_distances(batch, centers), axis=1)
+        batch_counts = np.bincount(nearest, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, nearest, batch)
+        updated = batch_counts > 0
+        counts += batch_counts
+        rate = (batch_counts[updated] / counts[updated])[:, None]
+        previous = centers.copy()
+        centers[updated] += rate * (sums[updated] / batch_counts[updated, None] - centers[updated])
+        if np.max(np.abs(centers - previous)) < tol:
+            break
+
+    centers = centers.astype(np.float32)
+    labels, distances = assign_clusters(features, centers)
+    return centers, labels, distances
+
+
+class BatchSimilarityIndex:
+    """
+    배치 특징 벡터 색인
+    - labels/centers: 미니배치 k-means 결과 (패턴 그룹)
+    - similar(batch_id, k): 가장 비슷한 배치 k개 (n_probe를 주면 가까운 군집만 비교)
+    - add(table): append()로 새로 닫힌 배치를 기존 표준화 기준과 중심으로 색인에 추가
+    - 행 배열과 군집별 행/특징 사본은 늘어나는 버퍼라서 add() 비용은 추가한 배치 수에만 비례
+    """
+
+    def __init__(self, features, batch_ids, params=None, scaling=None):
+        self.params = similarity_params(params)
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        self.scaling = scaling
+        self.centers, labels, distances = minibatch_kmeans(
+            features, self.params['n_clusters'], self.params['batch_size'],
+            self.params['max_iter'], self.params['seed']
+        )
+        self._features = GrowableArray(features, np.float32)
+        self._batch_ids = GrowableArray(batch_ids, np.int64)
+        self._labels = GrowableArray(labels, np.int32)
+        self._distances = GrowableArray(distances, np.float32)
+        self._norms = GrowableArray(np.einsum('ij,ij->i', features, features), np.float32)
+        self.positions = {batch_id: row for row, batch_id in enumerate(self.batch_ids.tolist())}
+        self._slots = None
+
+    @classmethod
+    def from_table(cls, table, raw_values=None, params=None):
+        """BatchTable로 특징을 만들어 색인 생성 (raw_values가 있으면 모양 특징 포함)"""
+        params = similarity_params(params)
+        features, scaling = batch_features(table, raw_values, params)
+        return cls(features, table['batch_id'], params, scaling)
+
+    @property
+    def features(self):
+        return self._features.view()
+
+    @property
+    def batch_ids(self):
+        return self._batch_ids.view()
+
+    @property
+    def labels(self):
+        return self._labels.view()
+
+    @property
+    def distances(self):
+        return self._distances.view()
+
+    @property
+    def norms(self):
+        return self._norms.view()
+
+    def _cluster_slots(self):
+        """
+        군집별 행 번호/특징/제곱 노름 버퍼 (행 번호 오름차순, 처음 필요할 때 생성)
+        군집 비교 질의는 probe한 군집의 연속 버퍼만 읽음
+        """
+        if self._slots is None:
+            order = np.argsort(self.labels, kind='stable')
+            bounds = np.searchsorted(self.labels[order], np.arange(len(self.centers) + 1))
+            self._slots = []
+            for cluster in range(len(self.centers)):
+                members = order[bounds[cluster]:bounds[cluster + 1]]
+                self._slots.append({
+                    'rows': GrowableArray(members, np.int64),
+                    'features': GrowableArray(self.features[members], np.float32),
+                    'norms': GrowableArray(self.norms[members], np.float32)
+                })
+        return self._slots
+
+    def _place(self, rows):
+        """rows(오름차순)를 배정된 군집 버퍼 끝에 추가"""
+        if self._slots is None:
+            return
+        labels = self.labels[rows]
+        for cluster in np.unique(labels).tolist():
+            members = rows[labels == cluster]
+            slot = self._slots[cluster]
+            slot['rows'].extend(members)
+            slot['features'].extend(self.features[members])
+            slot['norms'].extend(self.norms[members])
+
+    def _unplace(self, rows):
+        """
+        rows를 군집 버퍼에서 제거 (열린 채 색인된 마지막 배치는 군집 버퍼 끝에 있으므로 잘라내기만 함)
+        버퍼 끝이 아닌 행이면 군집 버퍼를 버리고 다음 질의 때 다시 만듦
+        """
+        if self._slots is None:
+            return
+        for row in sorted(rows.tolist(), reverse=True):
+            slot = self._slots[int(self.labels[row])]
+            size = len(slot['rows'])
+            if size == 0 or slot['rows'].view()[-1] != row:
+                self._slots = None
+                return
+            for buffer in slot.values():
+                buffer.truncate(size - 1)
+
+    def __len__(self):
+        return len(self._batch_ids)
+
+    def features_for(self, table, raw_values=None):
+        """색인을 만들 때의 표준화 기준으로 새 배치의 특징 벡터 계산"""
+        stats = np.column_stack([np.asarray(table[name], dtype=np.float64) for name in SIMILARITY_STAT_FIELDS])
+        center, scale = np.asarray(self.scaling['center']), np.asarray(self.scaling['scale'])
+        blocks = [np.nan_to_num((stats - center) / scale) / np.sqrt(stats.shape[1])]
+        if self.scaling['has_shape']:
+            columns = getattr(table, 'columns', table)
+            shape = shape_features(raw_values, columns['raw_start'], columns['raw_end'], self.params['shape_points'])
+            blocks.append(shape * np.sqrt(self.params['shape_weight'] / self.params['shape_points']))
+        return np.hstack(blocks).astype(np.float32)
+
+    def add(self, table, raw_values=None):
+        """
+        배치를 가장 가까운 기존 군집에 배정하여 색인에 추가 (중심은 유지, 전체 재정렬 없음)
+        이미 있는 batch_id(열린 채 색인된 마지막 배치)는 특징과 군집을 새 값으로 교체
+        """
+        features = self.features_for(table, raw_values)
+        labels, distances = assign_clusters(features, self.centers)
+        norms = np.einsum('ij,ij->i', features, features)
+        batch_ids = np.asarray(table['batch_id'], dtype=np.int64)
+        existing = np.array([batch_id in self.positions for batch_id in batch_ids.tolist()], dtype=bool)
+        rows = np.array([self.positions[batch_id] for batch_id in batch_ids[existing].tolist()], dtype=np.int64)
+        if len(rows):
+            self._unplace(rows)
+            self.features[rows] = features[existing]
+            self.labels[rows] = labels[existing]
+            self.distances[rows] = distances[existing]
+            self.norms[rows] = norms[existing]
+            self._place(np.sort(rows))
+        new = ~existing
+        if new.any():
+            first_row = len(self._batch_ids)
+            self._features.extend(features[new])
+            self._batch_ids.extend(batch_ids[new])
+            self._labels.extend(labels[new])
+            self._distances.extend(distances[new])
+            self._norms.extend(norms[new])
+            added = np.arange(first_row, len(self._batch_ids))
+            self.positions.update(zip(batch_ids[new].tolist(), added.tolist()))
+            self._place(added)
+        return labels
+
+    def cluster_of(self, batch_id):
+        """batch_id의 군집 번호 (1부터, 색인에 없으면 None)"""
+        row = self.positions.get(batch_id)
+        return None if row is None else int(self.labels[row]) + 1
+
+    def similar(self, batch_id, k=5, n_probe=None):
+        """
+        batch_id와 가장 비슷한(특징 거리가 가까운) 배치 k개 [{'batch_id', 'distance', 'cluster_id'}]
+        n_probe: None이면 전체 비교, 정수면 질의와 가까운 n_probe개 군집의 배치만 비교
+        """
+        row = self.positions.get(batch_id)
+        if row is None:
+            raise KeyError(f"색인에 없는 배치입니다: {batch_id}")
+        query = self.features[row]
+        if n_probe is None or n_probe >= len(self.centers):
+            candidates = None
+            distances = self.norms - 2.0 * (self.features @ query) + self.norms[row]
+        else:
+            center_distances = _squared_distances(query[None, :], self.centers)[0]
+            probes = np.argsort(center_distances)[:max(int(n_probe), 1)]
+            slots = [self._cluster_slots()[probe] for probe in probes.tolist()]
+            candidates = np.concatenate([slot['rows'].view() for slot in slots])
+            distances = np.concatenate([
+                slot['norms'].view() - 2.0 * (slot['features'].view() @ query) for slot in slots
+            ]) + self.norms[row]
+
+        # 자기 자신은 제외하고 상위 k개만 부분 정렬
+        own = row if candidates is None else np.flatnonzero(candidates == row)
+        distances[own] = np.inf
+        k = min(k, len(distances) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        rows = top if candidates is None else candidates[top]
+        return [
+            {'batch_id': int(self.batch_ids[idx]), 'distance': float(np.sqrt(max(distance, 0.0))), 'cluster_id': int(self.labels[idx]) + 1}
+            for idx, distance in zip(rows.tolist(), distances[top].tolist())
+        ]
+
+    def cluster_summaries(self, table, representatives=5):
+        """
+        군집별 요약 목록 (크기 큰 순): cluster_id, size, share, 평균/최고 온도와 표준편차 평균,
+        가장 많은 온도 라벨/경고 수준/트렌드와 비율, 중심에 가장 가까운 대표 배치 representatives개
+        (table은 색인한 배치의 BatchTable, batch_id로 행을 맞춤)
+        """
+        table_rows = {batch_id: idx for idx, batch_id in enumerate(np.asarray(table['batch_id']).tolist())}
+        lookup = np.array([table_rows.get(batch_id, -1) for batch_id in self.batch_ids.tolist()], dtype=np.int64)
+        sizes = np.bincount(self.labels, minlength=len(self.centers))
+        slots = self._cluster_slots()
+        summaries = []
+        for cluster in np.argsort(-sizes, kind='stable').tolist():
+            members = slots[cluster]['rows'].view()
+            rows = lookup[members]
+            rows = rows[rows >= 0]
+            if len(rows) == 0:
+                continue
+            nearest = members[np.argsort(self.distances[members], kind='stable')[:representatives]]
+            summary = {
+                'cluster_id': cluster + 1,
+                'size': int(sizes[cluster]),
+                'share': float(sizes[cluster] / len(self.labels)),
+                'mean_temperature': float(np.nanmean(np.asarray(table['mean'])[rows])),
+                'max_temperature': float(np.nanmax(np.asarray(table['max'])[rows])),
+                'mean_std': float(np.nanmean(np.asarray(table['std'])[rows]))
+            }
+            for field in ('value_label', 'alert_level', 'trend'):
+                column = table[field]
+                codes = np.asarray(column.codes)[rows]
+                codes = codes[codes >= 0]
+                counts = np.bincount(codes, minlength=len(column.categories))
+                summary[field] = str(column.categories[int(np.argmax(counts))]) if len(codes) else None
+                summary[f'{field}_share'] = float(counts.max() / len(rows)) if len(codes) else 0.0
+            summary['representative_batches'] = self.batch_ids[nearest].tolist()
+            summaries.append(summary)
+        return summaries
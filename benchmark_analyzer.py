@@ -0,0 +1,1469 @@
+#!/usr/bin/env python3
+"""
+워터펌프 분석 엔진 벤치마크
+
+- window: 기존 방식(윈도우마다 iloc 슬라이스 + np.polyfit 반복)과 벡터화 엔진
+  (_window_statistics)의 속도와 결과 일치 여부 비교
+- raw-data: 배치별 raw_data 딕셔너리 즉시 생성('dict')과 컬럼형 오프셋('columnar')의
+  분석 시간 및 메모리 사용량 비교
+- stream: 전체 로드(load_data + analyze)와 청크 스트리밍(analyze_csv_stream)의
+  최대 메모리 비교 (CSV 크기가 커져도 스트리밍 메모리는 일정해야 함)
+- fleet: 다수 펌프 분석의 워커 수별 처리량(레코드/초) 비교
+- labels: 임계값 테이블 기반 벡터 분류(_classify_statistics)와 기존 if/elif 분류 비교
+- formats: 들여쓰기 JSON(save_to_json)과 컬럼형 결과(save_columnar: npz, pyarrow 설치 시
+  parquet/feather)의 저장/로드 시간 및 파일 크기 비교
+- raw-store: CSV 로드(load_data)와 원시 저장소 메모리 맵 연결(attach_raw_store)의
+  시간 및 메모리 비교, 연결 후 분석 시간
+- compact: 기본(float64) 분석과 compact 모드(float32 값, 레코드 배열 배치)의 레코드 100만 개당
+  유지/최대 메모리 비교 및 라벨 일치(허용 오차) 확인
+- export: 기존 일괄 json.dump(indent=2)와 스트리밍 JSON 내보내기 모드(들여쓰기/압축/통계만/
+  JSON Lines)의 시간, 최대 메모리, 파일 크기 비교 (스트리밍 메모리는 데이터 크기와 무관해야 함)
+- sketch: 전체 정렬(np.quantile)과 KLL 스케치의 중앙값/p95/p99 순위 오차 및 시간 비교,
+  일 단위 스케치 병합 결과가 전체 스케치와 같은 오차 범위인지 확인
+- rollups: 롤업 피라미드 생성 시간과 임의 시각 구간 집계(query_range)/확대 조회(zoom)를
+  원시 배열 재스캔과 비교 (결과 일치 및 사용 셀 수 확인), 작은 배치 추가(update) 비용이
+  레코드 수와 무관한지 확인
+- cache: 같은 CSV를 처음 분석(캐시 미스: 로드+분석+캐시 저장)할 때와 다시 올릴 때(캐시 적중)의
+  시간 비교 및 결과 일치 확인, 캐시 적중은 모티프를 탐색하지 않고 요청 시 탐색한 결과는 다음 적중에 그대로 로드되는지 확인
+- batch-table: 배치 딕셔너리 목록과 BatchTable(필드별 NumPy 컬럼)의 메모리 및 챗봇 집계
+  (경고 수준별 개수, 위험/주의 배치 목록) 시간 비교, 분석기 테이블을 다시 조회하면 변환 없이 재사용하는지 확인
+- wide-csv: 컬럼이 많은 히스토리언 내보내기 CSV(기본 60컬럼)를 전체 컬럼으로 읽을 때
+  (keep_all_columns=True)와 헤더/샘플로 timestamp/value 컬럼만 골라 읽을 때의 시간 및 메모리 비교
+- anomalies: 원시 시계열 이상 감지(z-score/EWMA/CUSUM)의 벡터화 점수 계산 시간과
+  StreamingDetector 레코드당 갱신 시간 비교 및 두 경로의 점수/감지 결과 일치 확인
+- forecast: 펌프 --pumps대의 임계 온도 도달 예측(선형/Holt) 일괄 적합/예측 시간, 전체 펌프 레코드 1개씩
+  증분 갱신 시간, 증분 갱신한 직선 모델이 같은 구간을 다시 적합한 결과와 일치하는지 확인,
+  Holt 모델로 생성한 시계열에서 Holt 예측 구간의 실제 포함률이 confidence와 맞는지 확인,
+  도달 시점(닫힌 형태/이분 탐색)이 전체 horizon을 훑은 결과와 같은지 확인
+- change-points: 평균/분산이 바뀌는 구간을 심은 시계열에서 binseg 변화점 탐지 시간과 심은 변화점 재현율,
+  2만 개 레코드 시계열에서 PELT(정확한 최소화)와 binseg 결과 비교,
+  작은 무작위 시계열에서 PELT 비용이 전체 동적 계획법(가지치기 없음) 최솟값과 같은지 확인,
+  변화점 없는 자기상관 잡음에서 거짓 변화점이 거의 없는지 확인
+- similarity: 배치 --sizes개의 유사도 색인(미니배치 k-means) 생성 시간과 "배치 N과 비슷한 배치" 질의 시간
+  (전체 비교/가까운 군집만 비교), 군집 비교 결과의 전체 비교 대비 재현율,
+  배치 추가(add) 비용이 색인 크기와 무관한지 확인
+- matrix-profile: 하루 모양이 다른 구간을 심은 --sizes개 레코드의 매트릭스 프로파일 모티프/디스코드 탐색 시간
+  (--workers 프로세스 수별, max_points보다 길면 구간 평균), 첫 디스코드가 심은 구간인지와
+  작은 시계열(값이 멈춘 구간 포함)에서 전체 거리 행렬 대비 오차, 행 구간을 나눈 계산과 한 번에 계산한 결과 일치 확인
+
+사용법:
+  python benchmark_analyzer.py                       # 1M, 10M 레코드
+  python benchmark_analyzer.py --sizes 100000 1000000
+  python benchmark_analyzer.py --bench raw-data --sizes 100000
+  python benchmark_analyzer.py --bench stream --sizes 100000 1000000
+  python benchmark_analyzer.py --bench fleet --pumps 800 --sizes 10000 --workers 1 2 4 8
+  python benchmark_analyzer.py --bench labels --sizes 1000000   # 윈도우 수
+  python benchmark_analyzer.py --bench formats --sizes 100000 1000000
+  python benchmark_analyzer.py --bench export --sizes 100000 1000000
+  python benchmark_analyzer.py --bench raw-store --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench compact --sizes 1000000
+  python benchmark_analyzer.py --bench sketch --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench rollups --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench cache --sizes 100000 1000000
+  python benchmark_analyzer.py --bench batch-table --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench wide-csv --sizes 100000 1000000
+  python benchmark_analyzer.py --bench anomalies --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench forecast --pumps 800 --sizes 10000
+  python benchmark_analyzer.py --bench change-points --sizes 1000000 10000000
+  python benchmark_analyzer.py --bench similarity --sizes 100000 500000   # 배치 수
+  python benchmark_analyzer.py --bench matrix-profile --sizes 20000 100000 1000000 --workers 1 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import AnalysisCache
+from anomaly_detectors import DETECTOR_NAMES, StreamingDetector, anomaly_events, score_series
+from batch_similarity import SIMILARITY_STAT_FIELDS, BatchSimilarityIndex, shape_features
+from change_points import _SegmentCost, _pelt, find_change_points
+from forecasting import ForecastState, holt_growth
+from quantile_sketch import KLLSketch, merge_sketches
+from rollup_pyramid import RollupPyramid
+from water_pump_analyzer import (
+    DEFAULT_THRESHOLDS,
+    MOTIFS_NOT_COMPUTED,
+    BatchTable,
+    WaterPumpAnalyzer,
+    WaterPumpFleetAnalyzer,
+    load_analysis_results,
+    _classify_statistics,
+    _label_lookups,
+    _matrix_profile,
+    _pyarrow_available,
+    _window_statistics,
+)
+
+
+def generate_series(n_rows, seed=42):
+    """재현 가능한 합성 온도 시계열 생성 (10분 간격)"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=n_rows, freq='10min')
+    # 하루 주기 변동 + 노이즈
+    daily = 5 * np.sin(np.arange(n_rows) * 2 * np.pi / 144)
+    values = 55 + daily + rng.normal(0, 2, n_rows)
+    return pd.DataFrame({'timestamp': timestamps, 'value': values})
+
+
+def legacy_window_statistics(data, window_size=100):
+    """기존 analyze_temperature_characteristics의 윈도우별 반복 계산 (비교 기준)"""
+    stats = {key: [] for key in ('mean', 'median', 'std', 'min', 'max', 'range', 'slope')}
+
+    for i in range(0, len(data), window_size):
+        window_data = data.iloc[i:i+window_size]
+        temp_values = window_data['value'].values
+
+        stats['mean'].append(np.mean(temp_values))
+        stats['median'].append(np.median(temp_values))
+        stats['std'].append(np.std(temp_values))
+        stats['min'].append(np.min(temp_values))
+        stats['max'].append(np.max(temp_values))
+        stats['range'].append(np.max(temp_values) - np.min(temp_values))
+        if len(temp_values) >= 2:
+            stats['slope'].append(np.polyfit(np.arange(len(temp_values)), temp_values, 1)[0])
+        else:
+            stats['slope'].append(np.nan)
+
+    return {key: np.array(values) for key, values in stats.items()}
+
+
+def timed(func, *args, **kwargs):
+    """함수 실행 시간(초)과 결과 반환"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def compare_results(legacy, vectorized):
+    """두 방식의 통계가 일치하는지 확인 (slope는 polyfit 수치 오차 허용)"""
+    mismatches = []
+    for key in ('mean', 'median', 'std', 'min', 'max', 'range'):
+        if not np.array_equal(legacy[key], vectorized[key]):
+            mismatches.append(key)
+    if not np.allclose(legacy['slope'], vectorized['slope'], rtol=1e-9, atol=1e-12, equal_nan=True):
+        mismatches.append('slope')
+    return mismatches
+
+
+def benchmark_window_engine(n_rows, window_size=100, run_legacy=True):
+    """한 데이터 크기에 대해 기존/벡터화 윈도우 엔진 비교"""
+    data = generate_series(n_rows)
+    values = data['value'].to_numpy(dtype=np.float64)
+
+    vectorized_time, vectorized = timed(_window_statistics, values, window_size)
+
+    result = {
+        'rows': n_rows,
+        'windows': len(vectorized['mean']),
+        'vectorized_sec': vectorized_time,
+        'legacy_sec': None,
+        'speedup': None,
+        'mismatches': None
+    }
+
+    if run_legacy:
+        legacy_time, legacy = timed(legacy_window_statistics, data, window_size)
+        result['legacy_sec'] = legacy_time
+        result['speedup'] = legacy_time / vectorized_time if vectorized_time > 0 else float('inf')
+        result['mismatches'] = compare_results(legacy, vectorized)
+
+    return result
+
+
+def print_result(result):
+    """벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 ({result['windows']:,}개 윈도우)")
+    print(f"   ⚡ 벡터화 엔진: {result['vectorized_sec']:.3f}초")
+    if result['legacy_sec'] is not None:
+        print(f"   🐢 기존 반복문: {result['legacy_sec']:.3f}초")
+        print(f"   🚀 속도 향상: {result['speedup']:.1f}배")
+        if result['mismatches']:
+            print(f"   ❌ 결과 불일치: {', '.join(result['mismatches'])}")
+        else:
+            print("   ✅ 결과 일치")
+
+
+def measure_memory(func, *args, **kwargs):
+    """함수 실행 시간(초)과 실행 중 최대 Python 메모리 할당량(바이트) 반환"""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmark_raw_data_modes(n_rows, window_size=100):
+    """raw_data_mode별 분석 시간과 메모리 비교"""
+    analyzer = WaterPumpAnalyzer()
+    analyzer.data = generate_series(n_rows)
+
+    result = {'rows': n_rows}
+    for mode in ('dict', 'columnar'):
+        elapsed, peak = measure_memory(
+            analyzer.analyze_temperature_characteristics, window_size, raw_data_mode=mode
+        )
+        result[mode] = {'sec': elapsed, 'peak_bytes': peak}
+    return result
+
+
+def print_raw_data_result(result):
+    """raw_data_mode 비교 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드")
+    for mode in ('dict', 'columnar'):
+        stats = result[mode]
+        print(f"   {mode:>8}: {stats['sec']:.3f}초, 최대 메모리 {stats['peak_bytes'] / 1024 ** 2:.1f}MB")
+    ratio = result['dict']['peak_bytes'] / max(result['columnar']['peak_bytes'], 1)
+    print(f"   💾 메모리 절감: {ratio:.1f}배")
+
+
+def benchmark_stream_ingestion(n_rows, window_size=100, chunksize=100_000):
+    """CSV 전체 로드와 청크 스트리밍의 시간/최대 메모리 비교"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'bench.csv')
+        generate_series(n_rows).to_csv(csv_path, index=False)
+
+        def full_load():
+            analyzer = WaterPumpAnalyzer()
+            analyzer.load_data(file_path=csv_path)
+            analyzer.analyze_temperature_characteristics(window_size)
+
+        def stream():
+            WaterPumpAnalyzer().analyze_csv_stream(csv_path, window_size, chunksize)
+
+        result = {'rows': n_rows, 'file_bytes': os.path.getsize(csv_path)}
+        for name, func in (('full', full_load), ('stream', stream)):
+            elapsed, peak = measure_memory(func)
+            result[name] = {'sec': elapsed, 'peak_bytes': peak}
+    return result
+
+
+def print_stream_result(result):
+    """스트리밍 비교 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 (CSV {result['file_bytes'] / 1024 ** 2:.1f}MB)")
+    for name, label in (('full', '전체 로드'), ('stream', '스트리밍')):
+        stats = result[name]
+        print(f"   {label}: {stats['sec']:.3f}초, 최대 메모리 {stats['peak_bytes'] / 1024 ** 2:.1f}MB")
+
+
+def generate_fleet(n_pumps, rows_per_pump, seed=42):
+    """pump_id 컬럼이 포함된 합성 플릿 데이터 생성"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2024-01-01', periods=rows_per_pump, freq='10min')
+    base = rng.uniform(45, 75, n_pumps)
+    return pd.DataFrame({
+        'pump_id': np.repeat([f"pump_{i:04d}" for i in range(n_pumps)], rows_per_pump),
+        'timestamp': np.tile(timestamps, n_pumps),
+        'value': np.repeat(base, rows_per_pump) + rng.normal(0, 2, n_pumps * rows_per_pump)
+    })
+
+
+def benchmark_fleet_scaling(n_pumps, rows_per_pump, workers, window_size=100, chunksize=4):
+    """워커 수별 플릿 분석 처리량 측정"""
+    fleet = WaterPumpFleetAnalyzer(window_size=window_size, chunksize=chunksize)
+    fleet.load_data(data=generate_fleet(n_pumps, rows_per_pump))
+
+    total_rows = n_pumps * rows_per_pump
+    results = []
+    for n_workers in workers:
+        fleet.max_workers = n_workers
+        elapsed, _ = timed(fleet.analyze)
+        results.append({'workers': n_workers, 'sec': elapsed, 'rows_per_sec': total_rows / elapsed})
+    return results
+
+
+def print_fleet_results(n_pumps, rows_per_pump, results):
+    """플릿 확장성 결과 출력"""
+    print(f"📊 펌프 {n_pumps}대 x {rows_per_pump:,}개 레코드 (CPU {os.cpu_count()}코어)")
+    baseline = results[0]['rows_per_sec']
+    for result in results:
+        print(f"   워커 {result['workers']:>3}개: {result['sec']:.2f}초, "
+              f"{result['rows_per_sec']:,.0f} 레코드/초 ({result['rows_per_sec'] / baseline:.2f}배)")
+
+
+def legacy_labels(mean, std, value_range, max_value, slope):
+    """기존 _generate_temperature_label / _analyze_trend / _analyze_stability / _determine_alert_level 분류"""
+    temp_category = "저온" if mean < 40 else "정상" if mean < 70 else "고온" if mean < 85 else "과열"
+    stability = "안정" if std < 2 else "보통" if std < 5 else "불안정"
+    range_category = "일정" if value_range < 5 else "변동" if value_range < 15 else "급변"
+
+    trend = "상승" if slope > 0.1 else "하강" if slope < -0.1 else "평형"
+
+    cv = std / mean if mean > 0 else 0
+    cv_label = "매우안정" if cv < 0.05 else "안정" if cv < 0.1 else "보통" if cv < 0.2 else "불안정"
+
+    if max_value > 90 or mean > 85:
+        alert = "위험"
+    elif max_value > 80 or mean > 75:
+        alert = "주의"
+    elif max_value > 70 or mean > 65:
+        alert = "관찰"
+    else:
+        alert = "정상"
+
+    return f"{temp_category}_{stability}_{range_category}", trend, cv_label, alert
+
+
+def benchmark_labeling(n_windows, seed=42):
+    """윈도우 n_windows개 분류 시간 비교 및 라벨 일치 확인"""
+    rng = np.random.default_rng(seed)
+    stats = {
+        'mean': rng.uniform(20, 100, n_windows),
+        'std': rng.uniform(0, 8, n_windows),
+        'range': rng.uniform(0, 25, n_windows),
+        'slope': rng.normal(0, 0.2, n_windows)
+    }
+    stats['max'] = stats['mean'] + stats['range'] / 2
+    record_counts = np.full(n_windows, 100)
+
+    vectorized_time, codes = timed(_classify_statistics, stats, record_counts, DEFAULT_THRESHOLDS)
+    lookups = _label_lookups(DEFAULT_THRESHOLDS)
+
+    columns = [stats[key].tolist() for key in ('mean', 'std', 'range', 'max', 'slope')]
+    legacy_time, legacy = timed(lambda: [legacy_labels(*row) for row in zip(*columns)])
+
+    fields = ('value_label', 'trend', 'stability', 'alert_level')
+    vectorized = zip(*[[lookups[field][code] for code in codes[field].tolist()] for field in fields])
+    matches = all(tuple(row) == expected for row, expected in zip(vectorized, legacy))
+
+    return {'windows': n_windows, 'vectorized_sec': vectorized_time, 'legacy_sec': legacy_time, 'matches': matches}
+
+
+def print_labeling_result(result):
+    """라벨 분류 비교 결과 출력"""
+    print(f"📊 윈도우 {result['windows']:,}개")
+    print(f"   ⚡ 테이블 기반 벡터 분류: {result['vectorized_sec'] * 1000:.1f}ms")
+    print(f"   🐢 기존 if/elif 분류: {result['legacy_sec'] * 1000:.1f}ms")
+    print("   ✅ 라벨 일치" if result['matches'] else "   ❌ 라벨 불일치")
+
+
+def benchmark_result_formats(n_rows, window_size=100):
+    """결과 파일 형식별 저장/로드 시간과 파일 크기 비교 (로드는 raw_data 포함 JSON 스키마 기준)"""
+    analyzer = WaterPumpAnalyzer()
+    analyzer.data = generate_series(n_rows)
+    analyzer.analyze_temperature_characteristics(window_size)
+
+    formats = ['json', 'npz']
+    if _pyarrow_available():
+        formats += ['parquet', 'feather']
+
+    result = {'rows': n_rows, 'batches': len(analyzer.analyzed_data), 'formats': {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format in formats:
+            path = os.path.join(tmp_dir, f'bench.{file_format}')
+            if file_format == 'json':
+                save_sec, _ = timed(analyzer.save_to_json, path)
+            else:
+                save_sec, _ = timed(analyzer.save_columnar, path, file_format=file_format)
+            load_sec, _ = timed(load_analysis_results, path, include_raw=False)
+            load_raw_sec, _ = timed(load_analysis_results, path)
+            result['formats'][file_format] = {
+                'save_sec': save_sec,
+                'load_sec': load_sec,
+                'load_raw_sec': load_raw_sec,
+                'file_bytes': os.path.getsize(path)
+            }
+    return result
+
+
+def print_format_result(result):
+    """결과 파일 형식 비교 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 ({result['batches']:,}개 배치)")
+    baseline = result['formats']['json']
+    for file_format, stats in result['formats'].items():
+        print(f"   {file_format:>8}: 저장 {stats['save_sec']:.3f}초, "
+              f"로드 {stats['load_sec']:.3f}초 (raw_data 포함 {stats['load_raw_sec']:.3f}초), "
+              f"크기 {stats['file_bytes'] / 1024 ** 2:.1f}MB")
+        if file_format != 'json':
+            print(f"            JSON 대비 저장 {baseline['save_sec'] / max(stats['save_sec'], 1e-9):.1f}배, "
+                  f"로드 {baseline['load_sec'] / max(stats['load_sec'], 1e-9):.1f}배 빠름")
+
+
+def benchmark_json_export(n_rows, window_size=100):
+    """JSON 내보내기 방식별 시간/최대 메모리/파일 크기 비교"""
+    analyzer = WaterPumpAnalyzer()
+    analyzer.data = generate_series(n_rows)
+    analyzer.analyze_temperature_characteristics(window_size)
+
+    def legacy_dump(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(analyzer.get_output_data(), f, ensure_ascii=False, indent=2)
+
+    modes = [
+        ('일괄 json.dump', 'json', legacy_dump),
+        ('스트리밍 들여쓰기', 'json', lambda path: analyzer.save_to_json(path)),
+        ('스트리밍 압축', 'json', lambda path: analyzer.save_to_json(path, indent=None)),
+        ('통계만 (압축)', 'json', lambda path: analyzer.save_to_json(path, indent=None, include_raw=False)),
+        ('JSON Lines', 'jsonl', lambda path: analyzer.save_to_json(path, lines=True))
+    ]
+
+    result = {'rows': n_rows, 'modes': []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, extension, func in modes:
+            path = os.path.join(tmp_dir, f'export.{extension}')
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, peak = measure_memory(func, path)
+            result['modes'].append({
+                'label': label, 'sec': elapsed, 'peak_bytes': peak, 'file_bytes': os.path.getsize(path)
+            })
+    return result
+
+
+def print_export_result(result):
+    """JSON 내보내기 비교 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드")
+    baseline = result['modes'][0]
+    for mode in result['modes']:
+        print(f"   {mode['label']:<12}: {mode['sec']:.3f}초, 최대 메모리 {mode['peak_bytes'] / 1024 ** 2:.1f}MB, "
+              f"크기 {mode['file_bytes'] / 1024 ** 2:.1f}MB (기존 대비 1/{baseline['file_bytes'] / mode['file_bytes']:.1f})")
+
+
+def benchmark_raw_store(n_rows, window_size=100):
+    """CSV 로드와 원시 저장소 연결의 시간/최대 메모리 비교"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'bench.csv')
+        generate_series(n_rows).to_csv(csv_path, index=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = WaterPumpAnalyzer()
+            writer.load_data(file_path=csv_path)
+            store_path = writer.save_raw_store('bench', store_dir=tmp_dir)
+            del writer
+
+            csv_analyzer = WaterPumpAnalyzer()
+            csv_sec, csv_peak = measure_memory(csv_analyzer.load_data, file_path=csv_path)
+            store_analyzer = WaterPumpAnalyzer()
+            attach_sec, attach_peak = measure_memory(store_analyzer.attach_raw_store, store_path)
+            analyze_sec, _ = timed(store_analyzer.analyze_temperature_characteristics, window_size)
+
+        store_bytes = sum(os.path.getsize(os.path.join(store_path, name)) for name in os.listdir(store_path))
+        return {
+            'rows': n_rows,
+            'csv': {'sec': csv_sec, 'peak_bytes': csv_peak, 'file_bytes': os.path.getsize(csv_path)},
+            'store': {'sec': attach_sec, 'peak_bytes': attach_peak, 'file_bytes': store_bytes},
+            'analyze_sec': analyze_sec
+        }
+
+
+def print_raw_store_result(result):
+    """원시 저장소 비교 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드")
+    for name, label in (('csv', 'CSV 로드'), ('store', '저장소 연결')):
+        stats = result[name]
+        print(f"   {label}: {stats['sec'] * 1000:.1f}ms, 최대 메모리 {stats['peak_bytes'] / 1024 ** 2:.1f}MB, "
+              f"파일 {stats['file_bytes'] / 1024 ** 2:.1f}MB")
+    print(f"   연결 후 윈도우 분석: {result['analyze_sec']:.3f}초")
+
+
+def benchmark_compact_mode(n_rows, window_size=100, label_tolerance=0.0, stat_tolerance=1e-3):
+    """
+    기본 모드와 compact 모드의 메모리 비교 및 라벨 일치 확인
+    - 유지 메모리: load_data + analyze 후 분석기가 보유한 Python/NumPy 할당량
+    - 라벨 불일치 비율은 label_tolerance 이하, 통계 최대 오차는 stat_tolerance(°C) 이하여야 통과
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'bench.csv')
+        generate_series(n_rows).to_csv(csv_path, index=False)
+
+        analyzers = {}
+        result = {'rows': n_rows}
+        for mode, compact in (('float64', False), ('compact', True)):
+            tracemalloc.start()
+            try:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    analyzer = WaterPumpAnalyzer(compact=compact)
+                    analyzer.load_data(file_path=csv_path)
+                    analyzer.analyze_temperature_characteristics(window_size)
+                elapsed = time.perf_counter() - start
+                retained, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            analyzers[mode] = analyzer
+            result[mode] = {'sec': elapsed, 'retained_bytes': retained, 'peak_bytes': peak}
+
+    reference = analyzers['float64'].analyzed_data
+    compact = analyzers['compact'].analyzed_data
+    fields = ('value_label', 'trend', 'stability', 'alert_level')
+    mismatches = sum(ref[field] != got[field] for ref, got in zip(reference, compact) for field in fields)
+    max_error = max(
+        abs(ref['statistics'][key] - got['statistics'][key])
+        for ref, got in zip(reference, compact) for key in ref['statistics']
+    )
+    result['label_mismatch_ratio'] = mismatches / max(len(reference) * len(fields), 1)
+    result['max_stat_error'] = max_error
+    result['passed'] = (len(reference) == len(compact) and result['label_mismatch_ratio'] <= label_tolerance
+                        and max_error <= stat_tolerance)
+    return result
+
+
+def print_compact_result(result):
+    """compact 모드 비교 결과 출력 (레코드 100만 개당 메모리)"""
+    per_million = 1_000_000 / result['rows'] / 1024 ** 2
+    print(f"📊 {result['rows']:,}개 레코드")
+    for mode in ('float64', 'compact'):
+        stats = result[mode]
+        print(f"   {mode:>8}: {stats['sec']:.3f}초, 유지 메모리 {stats['retained_bytes'] * per_million:.1f}MB/백만 레코드, "
+              f"최대 메모리 {stats['peak_bytes'] * per_million:.1f}MB/백만 레코드")
+    ratio = result['float64']['retained_bytes'] / max(result['compact']['retained_bytes'], 1)
+    print(f"   💾 유지 메모리 절감: {ratio:.1f}배")
+    print(f"   라벨 불일치 비율 {result['label_mismatch_ratio']:.4%}, 통계 최대 오차 {result['max_stat_error']:.2e}°C")
+    print("   ✅ 허용 오차 이내" if result['passed'] else "   ❌ 허용 오차 초과")
+
+
+def benchmark_quantile_sketch(n_rows, quantiles=(0.5, 0.95, 0.99), k=200):
+    """
+    KLL 스케치 분위수 정확도/속도 측정
+    - 순위 오차: 스케치가 반환한 값의 실제 순위(정렬 배열 기준)와 목표 분위수의 차이
+    - 병합: 하루(10분 간격 144개) 단위 스케치를 merge_sketches로 합친 결과도 같은 상한 이내여야 통과
+    """
+    values = generate_series(n_rows)['value'].to_numpy(dtype=np.float64)
+    quantiles = np.asarray(quantiles)
+
+    exact_sec, exact = timed(np.quantile, values, quantiles)
+    sorted_values = np.sort(values)
+
+    def rank_error(estimates):
+        low = np.searchsorted(sorted_values, estimates, side='left') / n_rows
+        high = np.searchsorted(sorted_values, estimates, side='right') / n_rows
+        # 동일 값이 여러 개면 그 값이 차지하는 순위 구간 안쪽은 오차 0
+        return float(np.max(np.maximum(0, np.maximum(low - quantiles, quantiles - high))))
+
+    build_sec, sketch = timed(KLLSketch.from_values, values, k)
+    query_sec, estimates = timed(sketch.quantiles, quantiles)
+
+    day_size = 144
+    day_sec, day_sketches = timed(lambda: [
+        KLLSketch.from_values(values[start:start + day_size], k) for start in range(0, n_rows, day_size)
+    ])
+    merge_sec, merged = timed(merge_sketches, day_sketches)
+
+    result = {
+        'rows': n_rows,
+        'k': k,
+        'exact': exact.tolist(),
+        'exact_sec': exact_sec,
+        'sketch': estimates.tolist(),
+        'build_sec': build_sec,
+        'query_sec': query_sec,
+        'rank_error': rank_error(estimates),
+        'days': len(day_sketches),
+        'day_build_sec': day_sec,
+        'merge_sec': merge_sec,
+        'merged': merged.quantiles(quantiles).tolist(),
+        'merged_rank_error': rank_error(merged.quantiles(quantiles)),
+        'error_bound': sketch.rank_error,
+        'retained_items': sum(len(items) for items in sketch.levels)
+    }
+    result['passed'] = (merged.n == n_rows and result['rank_error'] <= result['error_bound']
+                        and result['merged_rank_error'] <= result['error_bound'])
+    return result
+
+
+def print_sketch_result(result):
+    """분위수 스케치 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 (k={result['k']}, 보관 값 {result['retained_items']}개)")
+    print(f"   np.quantile: {result['exact_sec']:.3f}초 → {', '.join(f'{v:.2f}' for v in result['exact'])}")
+    print(f"   KLL 스케치: 생성 {result['build_sec']:.3f}초, 조회 {result['query_sec'] * 1000:.2f}ms → "
+          f"{', '.join(f'{v:.2f}' for v in result['sketch'])} (순위 오차 {result['rank_error']:.4%})")
+    print(f"   일 단위 {result['days']:,}개 스케치: 생성 {result['day_build_sec']:.3f}초, 병합 {result['merge_sec']:.3f}초 → "
+          f"{', '.join(f'{v:.2f}' for v in result['merged'])} (순위 오차 {result['merged_rank_error']:.4%})")
+    print(f"   순위 오차 상한 {result['error_bound']:.4%}")
+    print("   ✅ 오차 상한 이내" if result['passed'] else "   ❌ 오차 상한 초과")
+
+
+def benchmark_rollups(n_rows, n_queries=200, max_points=2000, n_appends=200, append_rows=10, seed=0):
+    """
+    롤업 피라미드 생성/조회/추가 측정
+    - 임의 구간 n_queries개를 피라미드 집계와 원시 배열 재스캔(슬라이스 mean/std/min/max)으로 각각 계산
+    - 마지막 n_appends * append_rows개 레코드를 append_rows개씩 update()로 이어 붙인 피라미드도 같은 구간 집계
+    - 결과(count/min/max 일치, mean/std 1e-6 이내)가 모두 같아야 통과
+    """
+    series = generate_series(n_rows)
+    epoch_ns = series['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+    values = series['value'].to_numpy(dtype=np.float64)
+
+    build_sec, pyramid = timed(RollupPyramid, epoch_ns, values)
+    rng = np.random.default_rng(seed)
+    ranges = np.sort(rng.integers(0, n_rows, size=(n_queries, 2)), axis=1)
+
+    def pyramid_queries():
+        return [pyramid.query(epoch_ns[start], epoch_ns[end]) for start, end in ranges]
+
+    def rescan_queries():
+        results = []
+        for start, end in ranges:
+            mask = (epoch_ns >= epoch_ns[start]) & (epoch_ns <= epoch_ns[end])
+            selected = values[mask]
+            results.append((len(selected), selected.mean(), selected.std(), selected.min(), selected.max()))
+        return results
+
+    query_sec, answers = timed(pyramid_queries)
+    rescan_sec, expected = timed(rescan_queries)
+    zoom_sec, cells = timed(pyramid.cells_between, epoch_ns[n_rows // 3], epoch_ns[-1], max_points)
+
+    # 추가 비용은 이력 길이와 무관해야 함 (레벨마다 마지막 열린 셀과 새 셀만 다시 집계)
+    base_rows = max(0, n_rows - n_appends * append_rows)
+    incremental = RollupPyramid(epoch_ns[:base_rows], values[:base_rows])
+    started = time.perf_counter()
+    for first_row in range(base_rows, n_rows, append_rows):
+        last_row = min(n_rows, first_row + append_rows)
+        incremental.update(epoch_ns[:last_row], values[:last_row], first_row)
+    append_sec = time.perf_counter() - started
+    appended = [incremental.query(epoch_ns[start], epoch_ns[end]) for start, end in ranges]
+
+    matched = all(
+        got['count'] == count and got['min'] == minimum and got['max'] == maximum
+        and abs(got['mean'] - mean) <= 1e-6 and abs(got['std'] - std) <= 1e-6
+        for answer_set in (answers, appended)
+        for got, (count, mean, std, minimum, maximum) in zip(answer_set, expected)
+    )
+    return {
+        'rows': n_rows,
+        'build_sec': build_sec,
+        'queries': n_queries,
+        'query_sec': query_sec,
+        'rescan_sec': rescan_sec,
+        'max_cells': max(answer['cells'] for answer in answers),
+        'zoom_sec': zoom_sec,
+        'zoom_level': cells['level'],
+        'zoom_points': len(cells['count']),
+        'appends': -(-(n_rows - base_rows) // append_rows),
+        'append_sec': append_sec,
+        'cell_bytes': sum(array.nbytes for level in pyramid.cells.values() for array in level.values()),
+        'passed': matched
+    }
+
+
+def print_rollup_result(result):
+    """롤업 피라미드 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드")
+    print(f"   피라미드 생성: {result['build_sec']:.3f}초 (셀 {result['cell_bytes'] / 1024 ** 2:.1f}MB)")
+    per_query = result['query_sec'] / result['queries'] * 1000
+    per_rescan = result['rescan_sec'] / result['queries'] * 1000
+    print(f"   구간 집계 {result['queries']}회: 피라미드 {per_query:.3f}ms/회 (최대 셀 {result['max_cells']}개), "
+          f"원시 재스캔 {per_rescan:.3f}ms/회")
+    print(f"   ⚡ 속도 향상: {per_rescan / max(per_query, 1e-9):.1f}배")
+    print(f"   확대 조회: {result['zoom_sec'] * 1000:.2f}ms (레벨 {result['zoom_level']}, {result['zoom_points']}개 포인트)")
+    if result['appends']:
+        print(f"   추가 갱신 {result['appends']}회: {result['append_sec'] / result['appends'] * 1000:.3f}ms/회")
+    print("   ✅ 재스캔 결과와 일치" if result['passed'] else "   ❌ 재스캔 결과와 불일치")
+
+
+def benchmark_analysis_cache(n_rows, window_size=100):
+    """
+    같은 CSV의 첫 분석(캐시 미스)과 재업로드(캐시 적중) 시간 및 결과 일치 확인
+    모티프는 적중에서도 탐색하지 않아야 하고, 요청 시 탐색(AnalysisCache.discover_motifs)한 결과는 다음 적중에 저장된 그대로 로드
+    원시 저장소는 파일 이름과 관계없이 내용 해시로 한 번만 저장되고, 한도를 넘으면 현재 저장소만 남아야 함
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'bench.csv')
+        generate_series(n_rows).to_csv(csv_path, index=False)
+        other_path = os.path.join(tmp_dir, 'other.csv')
+        generate_series(window_size * 10).to_csv(other_path, index=False)
+        cache = AnalysisCache(os.path.join(tmp_dir, 'cache'), raw_store_dir=os.path.join(tmp_dir, 'raw_store'))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            miss_sec, (cold, cold_hit) = timed(cache.analyze_file, csv_path, window_size)
+            hit_sec, (warm, warm_hit) = timed(cache.analyze_file, csv_path, window_size)
+            entry_bytes = cache.total_bytes()
+            deferred = cold.matrix_profile_summary['status'] == warm.matrix_profile_summary['status'] == MOTIFS_NOT_COMPUTED
+            motif_sec, _ = timed(cache.discover_motifs, warm)
+            reload_sec, (restored, _) = timed(cache.analyze_file, csv_path, window_size)
+
+            store_path = cache.save_raw_store(cold, label='bench.csv')
+            same_store = (cache.save_raw_store(warm, label='renamed.csv') == store_path
+                          and [entry['key'] for entry in cache.raw_store_entries()] == [cold.load_summary['cache_key']])
+            cache.raw_store_max_bytes = 1
+            other, _ = cache.analyze_file(other_path, window_size)
+            other_store = cache.save_raw_store(other, label='bench.csv')
+            evicted = [entry['path'] for entry in cache.raw_store_entries()] == [other_store]
+        motifs_kept = restored.matrix_profile_summary == warm.matrix_profile_summary and restored.motifs == warm.motifs
+
+    matched = (not cold_hit and warm_hit
+               and cold.get_output_data(include_raw=False)['analysis_results']
+               == warm.get_output_data(include_raw=False)['analysis_results'])
+    return {
+        'rows': n_rows,
+        'miss_sec': miss_sec,
+        'hit_sec': hit_sec,
+        'entry_bytes': entry_bytes,
+        'motif_sec': motif_sec,
+        'reload_sec': reload_sec,
+        'motifs_deferred': deferred,
+        'motifs_kept': motifs_kept,
+        'raw_store_deduped': same_store,
+        'raw_store_evicted': evicted,
+        'passed': matched and deferred and motifs_kept and same_store and evicted
+    }
+
+
+def print_cache_result(result):
+    """분석 캐시 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드")
+    print(f"   첫 분석(캐시 미스): {result['miss_sec']:.3f}초")
+    print(f"   재업로드(캐시 적중): {result['hit_sec'] * 1000:.1f}ms (캐시 항목 {result['entry_bytes'] / 1024 ** 2:.1f}MB)")
+    print(f"   ⚡ 속도 향상: {result['miss_sec'] / max(result['hit_sec'], 1e-9):.1f}배")
+    print(f"   요청 시 모티프 탐색: {result['motif_sec']:.3f}초, 탐색 후 재업로드: {result['reload_sec'] * 1000:.1f}ms "
+          f"(미스/적중에서 탐색 안 함: {'예' if result['motifs_deferred'] else '아니오'}, "
+          f"적중 시 탐색 결과 유지: {'예' if result['motifs_kept'] else '아니오'})")
+    print(f"   원시 저장소: 같은 내용은 하나로 저장 {'예' if result['raw_store_deduped'] else '아니오'}, "
+          f"한도 초과 시 현재 저장소만 유지 {'예' if result['raw_store_evicted'] else '아니오'}")
+    print("   ✅ 결과 일치" if result['passed'] else "   ❌ 결과 불일치")
+
+
+def benchmark_batch_table(n_rows, window_size=100):
+    """
+    배치 딕셔너리 목록과 BatchTable의 유지 메모리(tracemalloc) 및 집계 시간 비교
+    집계: 경고 수준별 개수 + 평균 온도 + 위험/주의 배치 목록 (챗봇 analyze_data와 같은 항목)
+    """
+    analyzer = WaterPumpAnalyzer()
+    series = generate_series(n_rows)
+    analyzer.raw_timestamps = series['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+    analyzer.raw_values = series['value'].to_numpy()
+    analyzer.analyze_temperature_characteristics(window_size)
+    source = analyzer.get_output_data(include_raw=False)['analysis_results']
+    payload = json.dumps(source, ensure_ascii=False)
+    del source
+
+    def measure(build):
+        tracemalloc.start()
+        try:
+            value = build()
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return value, retained
+
+    # JSON에서 읽은 상태(로드 직후 딕셔너리 목록)와 그로부터 만든 테이블 비교
+    batches, dict_bytes = measure(lambda: json.loads(payload))
+    table, table_bytes = measure(lambda: BatchTable.from_batches(batches))
+    convert_sec, _ = timed(BatchTable.from_batches, batches)
+
+    def dict_aggregate():
+        alert_counts = {}
+        critical = []
+        for batch in batches:
+            alert_counts[batch['alert_level']] = alert_counts.get(batch['alert_level'], 0) + 1
+            if batch['alert_level'] in ('위험', '주의'):
+                critical.append(batch)
+        return alert_counts, np.mean([batch['statistics']['mean'] for batch in batches]), len(critical)
+
+    def table_aggregate():
+        return (table.label_counts('alert_level'), table['mean'].mean(),
+                len(table.where('alert_level', ['위험', '주의'])))
+
+    dict_sec, dict_result = timed(dict_aggregate)
+    table_sec, table_result = timed(table_aggregate)
+
+    # 대시보드/챗봇은 분석기가 보관한 테이블을 사용하므로 화면을 다시 그릴 때마다 변환하지 않아야 함
+    first_sec, first_table = timed(analyzer.batch_table)
+    reuse_sec, reused_table = timed(analyzer.batch_table)
+    return {
+        'rows': n_rows,
+        'batches': len(batches),
+        'dict_bytes': dict_bytes,
+        'table_bytes': table_bytes,
+        'convert_sec': convert_sec,
+        'dict_sec': dict_sec,
+        'table_sec': table_sec,
+        'first_sec': first_sec,
+        'reuse_sec': reuse_sec,
+        'reused': reused_table is first_table,
+        'passed': (dict_result[0] == table_result[0] and dict_result[2] == table_result[2]
+                   and abs(dict_result[1] - table_result[1]) < 1e-9),
+        'roundtrip': table.to_batches() == batches
+    }
+
+
+def print_batch_table_result(result):
+    """배치 테이블 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 ({result['batches']:,}개 배치)")
+    print(f"   딕셔너리 목록: {result['dict_bytes'] / 1024 ** 2:.1f}MB, 집계 {result['dict_sec'] * 1000:.1f}ms")
+    print(f"   BatchTable:    {result['table_bytes'] / 1024 ** 2:.1f}MB, 집계 {result['table_sec'] * 1000:.1f}ms "
+          f"(변환 {result['convert_sec']:.3f}초)")
+    print(f"   💾 메모리 절감: {result['dict_bytes'] / max(result['table_bytes'], 1):.1f}배, "
+          f"⚡ 집계 속도 향상: {result['dict_sec'] / max(result['table_sec'], 1e-9):.1f}배")
+    print(f"   분석기 테이블: 첫 조회 {result['first_sec'] * 1000:.1f}ms, 다시 조회 {result['reuse_sec'] * 1e6:.1f}µs")
+    print("   ✅ 집계 결과 일치" if result['passed'] else "   ❌ 집계 결과 불일치")
+    print("   ✅ 분석기 테이블 재사용" if result['reused'] else "   ❌ 조회할 때마다 테이블 재생성")
+    print("   ✅ JSON 스키마 왕복 일치" if result['roundtrip'] else "   ❌ JSON 스키마 왕복 불일치")
+
+
+def generate_wide_csv(path, n_rows, n_columns=60, seed=42):
+    """
+    온도 컬럼 하나와 시간 컬럼 하나가 다른 태그 컬럼 사이에 섞인 히스토리언 형식 CSV 생성
+    다른 태그 컬럼은 약 10%가 빈 값 (태그마다 수집 주기가 달라 생기는 공백)
+    """
+    rng = np.random.default_rng(seed)
+    series = generate_series(n_rows, seed)
+    tags = rng.normal(size=(n_rows, n_columns - 2)).round(3)
+    tags[rng.random(tags.shape) < 0.1] = np.nan
+    frame = pd.DataFrame({f'TAG_{i:03d}': tags[:, i] for i in range(n_columns - 2)})
+    frame.insert(n_columns // 3, 'Sample Time', series['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+    frame.insert(n_columns // 2, 'PUMP_01_TEMP', series['value'].round(2))
+    frame.to_csv(path, index=False)
+
+
+def benchmark_wide_csv(n_rows, n_columns=60):
+    """
+    전체 컬럼 로드와 timestamp/value 컬럼만 로드(usecols + 지정 자료형)의 시간/최대 메모리 비교
+    다른 태그 컬럼의 빈 값과 관계없이 두 경로와 data= 경로(같은 CSV를 DataFrame으로 전달)가 같은 행을 남기는지 확인
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'wide.csv')
+        generate_wide_csv(csv_path, n_rows, n_columns)
+
+        result = {'rows': n_rows, 'columns': n_columns, 'file_bytes': os.path.getsize(csv_path)}
+        loaded = {}
+        for name, keep_all_columns in (('all', True), ('usecols', False)):
+            analyzer = WaterPumpAnalyzer()
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, peak = measure_memory(analyzer.load_data, file_path=csv_path,
+                                               csv_engine='c', keep_all_columns=keep_all_columns)
+            result[name] = {'sec': elapsed, 'peak_bytes': peak}
+            loaded[name] = analyzer
+        loaded['data'] = WaterPumpAnalyzer()
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded['data'].load_data(data=pd.read_csv(csv_path).to_dict('list'))
+
+    result['mapping'] = loaded['usecols'].load_summary.get('columns')
+    result['kept_rows'] = {name: len(analyzer.data) for name, analyzer in loaded.items()}
+    result['passed'] = (result['mapping'] == {'timestamp': 'Sample Time', 'value': 'PUMP_01_TEMP'}
+                        and set(result['kept_rows'].values()) == {n_rows}
+                        and loaded['all'].data[['timestamp', 'value']].equals(loaded['usecols'].data)
+                        and loaded['data'].data[['timestamp', 'value']].equals(loaded['usecols'].data))
+    return result
+
+
+def print_wide_csv_result(result):
+    """넓은 CSV 로드 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 x {result['columns']}컬럼 (CSV {result['file_bytes'] / 1024 ** 2:.1f}MB)")
+    for name, label in (('all', '전체 컬럼'), ('usecols', '필요 컬럼만')):
+        stats = result[name]
+        print(f"   {label}: {stats['sec']:.3f}초, 최대 메모리 {stats['peak_bytes'] / 1024 ** 2:.1f}MB")
+    print(f"   ⚡ 속도 향상: {result['all']['sec'] / max(result['usecols']['sec'], 1e-9):.1f}배, "
+          f"메모리 절감: {result['all']['peak_bytes'] / max(result['usecols']['peak_bytes'], 1):.1f}배")
+    print(f"   🔎 자동 매핑: {result['mapping']}")
+    print(f"   남은 행 (전체 컬럼/필요 컬럼만/data=): "
+          f"{result['kept_rows']['all']:,}/{result['kept_rows']['usecols']:,}/{result['kept_rows']['data']:,}")
+    print("   ✅ 결과 일치" if result['passed'] else "   ❌ 결과 불일치")
+
+
+def benchmark_anomaly_detectors(n_rows, stream_rows=200_000, seed=42):
+    """벡터화 이상 감지(score_series + anomaly_events)와 스트리밍 감지기(앞 stream_rows개)의 시간 및 결과 비교"""
+    rng = np.random.default_rng(seed)
+    values = generate_series(n_rows, seed)['value'].to_numpy(dtype=np.float64, copy=True)
+    spikes = rng.choice(n_rows, size=max(n_rows // 10_000, 1), replace=False)
+    values[spikes] += rng.choice([-25.0, 25.0], size=len(spikes))
+
+    start = time.perf_counter()
+    scores = score_series(values)
+    events = anomaly_events(scores)
+    vector_sec = time.perf_counter() - start
+
+    stream_rows = min(stream_rows, n_rows)
+    detector = StreamingDetector()
+    start = time.perf_counter()
+    results = [detector.update(value) for value in values[:stream_rows].tolist()]
+    stream_sec = time.perf_counter() - start
+
+    zscore = np.array([np.nan if r['zscore'] is None else r['zscore'] for r in results])
+    reference = scores['zscore'][:stream_rows]
+    flags_match = all(
+        np.array_equal(np.array([name in r['flags'] for r in results]), scores['flags'][name][:stream_rows])
+        for name in DETECTOR_NAMES
+    )
+    return {
+        'rows': n_rows,
+        'vector_sec': vector_sec,
+        'events': len(events['start']),
+        'spikes': len(spikes),
+        'stream_rows': stream_rows,
+        'stream_us_per_record': stream_sec / stream_rows * 1e6,
+        'max_zscore_diff': float(np.nanmax(np.abs(zscore - reference))) if stream_rows else 0.0,
+        'passed': flags_match and np.array_equal(np.isnan(zscore), np.isnan(reference))
+    }
+
+
+def print_anomaly_result(result):
+    """이상 감지 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 (주입한 급변 {result['spikes']:,}개)")
+    print(f"   벡터화 감지: {result['vector_sec']:.3f}초 "
+          f"({result['rows'] / max(result['vector_sec'], 1e-9):,.0f}레코드/초), 이벤트 {result['events']:,}개")
+    print(f"   스트리밍 감지: 레코드당 {result['stream_us_per_record']:.1f}µs (앞 {result['stream_rows']:,}개)")
+    print(f"   z-score 최대 차이: {result['max_zscore_diff']:.2e}")
+    print("   ✅ 결과 일치" if result['passed'] else "   ❌ 결과 불일치")
+
+
+def holt_interval_coverage(n_series=4000, fit_window=288, horizons=(1, 30, 120), alpha=0.3, beta=0.2,
+                           confidence=0.9, seed=42):
+    """
+    성분형 Holt 모델(수준 += 추세 + α·ε, 추세 += α·β·ε)로 생성한 시계열에 적합한 뒤
+    horizons 단계 뒤 실제 값이 Holt 예측 구간 안에 든 비율
+    (초기화 직후 오차가 σ에 섞이지 않도록 첫 구간으로 적합하고 다음 구간을 update()로 반영한 뒤 예측)
+    """
+    rng = np.random.default_rng(seed)
+    params = {'fit_window': fit_window, 'holt_alpha': alpha, 'holt_beta': beta, 'confidence': confidence}
+    n_fit = 2 * fit_window
+    n_total = n_fit + max(horizons)
+    errors = rng.normal(0, 1, size=(n_series, n_total))
+    values = np.empty((n_series, n_total))
+    level, trend = rng.normal(60, 5, n_series), rng.normal(0, 0.05, n_series)
+    for step in range(n_total):
+        values[:, step] = level + trend + errors[:, step]
+        level = level + trend + alpha * errors[:, step]
+        trend = trend + alpha * beta * errors[:, step]
+
+    epoch_ns = np.arange(n_fit, dtype=np.int64) * 300_000_000_000
+    state = ForecastState.from_series([(epoch_ns[:fit_window], row[:fit_window]) for row in values], params)
+    for step in range(fit_window, n_fit):
+        state.update(values[:, step], np.full(n_series, epoch_ns[step]))
+    sigma = np.sqrt(state.sum_err / state.n_err)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    coverage = {}
+    for h in horizons:
+        spread = z * sigma * holt_growth(alpha, beta, h)
+        error = values[:, n_fit + h - 1] - (state.level + state.trend * h)
+        coverage[h] = float((np.abs(error) <= spread).mean())
+    return coverage
+
+
+def scanned_crossings(state, forecast):
+    """
+    forecast()의 도달 시점을 (펌프, horizon) 예측값/예측 구간 전체를 훑어 다시 계산했을 때 다른 칸 수 (모델별)
+    (닫힌 형태 풀이와 이분 탐색 검증용)
+    """
+    params = state.params
+    thresholds = np.asarray(forecast['thresholds'])
+    steps = np.arange(1, params['horizon'] + 1, dtype=np.float64)
+    step_hours = forecast['step_seconds'] / 3600
+    z = NormalDist().inv_cdf(0.5 + params['confidence'] / 2)
+    linear = state._linear_fit(np.arange(state.n_pumps))
+    mismatches = {}
+    for name, model in forecast['models'].items():
+        level, slope, sigma = model['level'], model['slope_per_hour'] * step_hours, model['sigma']
+        mean = level[:, None] + slope[:, None] * steps
+        if name == 'linear':
+            x = state.count[:, None] - 1 + steps - linear['x_mean'][:, None]
+            spread = sigma[:, None] * np.sqrt(1 + 1 / linear['n'][:, None] + x * x / linear['sxx'][:, None])
+        else:
+            spread = sigma[:, None] * holt_growth(params['holt_alpha'], params['holt_beta'], steps)
+        bands = {'eta_hours': mean, 'earliest_hours': mean + z * spread, 'latest_hours': mean - z * spread}
+        mismatches[name] = 0
+        for key, band in bands.items():
+            reached = band[:, :, None] >= thresholds
+            first = np.argmax(reached, axis=1)
+            hours = np.where(reached.any(axis=1), (first + 1) * step_hours[:, None], np.nan)
+            expected = np.where(level[:, None] >= thresholds, 0.0, hours)
+            mismatches[name] += int((~np.isclose(expected, model[key], rtol=1e-12, atol=0, equal_nan=True)).sum())
+    return mismatches
+
+
+def benchmark_forecast(n_pumps, rows_per_pump, update_rounds=100, seed=42):
+    """플릿 임계 온도 도달 예측의 일괄 적합/예측 시간과 증분 갱신 시간, 증분/재적합 직선 모델 일치 여부"""
+    rng = np.random.default_rng(seed)
+    n_total = rows_per_pump + update_rounds
+    epoch_ns = generate_series(n_total, seed)['timestamp'].to_numpy().astype(np.int64)
+    drift = rng.uniform(-0.002, 0.01, size=(n_pumps, 1))
+    values = 55 + rng.normal(0, 3, size=(n_pumps, 1)) + drift * np.arange(n_total) + rng.normal(0, 0.5, size=(n_pumps, n_total))
+
+    start = time.perf_counter()
+    state = ForecastState.from_series([(epoch_ns[:rows_per_pump], row[:rows_per_pump]) for row in values])
+    fit_sec = time.perf_counter() - start
+    start = time.perf_counter()
+    forecast = state.forecast()
+    forecast_sec = time.perf_counter() - start
+    mismatches = scanned_crossings(state, forecast)
+
+    start = time.perf_counter()
+    for step in range(rows_per_pump, n_total):
+        state.update(values[:, step], np.full(n_pumps, epoch_ns[step]))
+    update_sec = (time.perf_counter() - start) / update_rounds
+
+    refit = ForecastState.from_series([(epoch_ns, row) for row in values])
+    rows = np.arange(n_pumps)
+    incremental, reference = state._linear_fit(rows), refit._linear_fit(rows)
+    max_diff = float(np.nanmax(np.abs(incremental['level'] - reference['level'])))
+    holt_eta = forecast['models']['holt']['eta_hours']
+    confidence = 0.9
+    coverage = holt_interval_coverage(confidence=confidence, seed=seed)
+    return {
+        'pumps': n_pumps,
+        'rows_per_pump': rows_per_pump,
+        'fit_sec': fit_sec,
+        'forecast_sec': forecast_sec,
+        'update_ms': update_sec * 1000,
+        'upcoming': int(np.any(holt_eta > 0, axis=1).sum()),
+        'max_level_diff': max_diff,
+        'confidence': confidence,
+        'coverage': coverage,
+        'scan_mismatches': mismatches,
+        'passed': (max_diff < 1e-6 and all(abs(rate - confidence) < 0.03 for rate in coverage.values())
+                   and not any(mismatches.values()))
+    }
+
+
+def print_forecast_result(result):
+    """임계 온도 도달 예측 벤치마크 결과 출력"""
+    print(f"📊 펌프 {result['pumps']:,}대 x {result['rows_per_pump']:,}개 레코드")
+    print(f"   일괄 적합: {result['fit_sec']:.3f}초, 도달 시점 예측: {result['forecast_sec']:.3f}초 "
+          f"(탐색 범위 안 도달 예상 펌프 {result['upcoming']:,}대)")
+    print(f"   증분 갱신: 전체 펌프 레코드 1개씩 {result['update_ms']:.2f}ms")
+    print(f"   증분/재적합 직선 수준 최대 차이: {result['max_level_diff']:.2e}")
+    mismatches = ', '.join(f"{model} {count}개" for model, count in result['scan_mismatches'].items())
+    print(f"   전체 horizon 탐색과 다른 도달 시점: {mismatches}")
+    rates = ', '.join(f"{h}단계 {rate:.1%}" for h, rate in result['coverage'].items())
+    print(f"   Holt {result['confidence']:.0%} 예측 구간 실제 포함률 (α=0.3, β=0.2 생성 시계열): {rates}")
+    print("   ✅ 결과 일치" if result['passed'] else "   ❌ 결과 불일치")
+
+
+def generate_regimes(n_rows, n_changes=50, seed=42):
+    """운전 구간(평균/표준편차가 다른 구간)을 심은 시계열과 심은 변화점 위치"""
+    rng = np.random.default_rng(seed)
+    change_points = np.sort(rng.choice(np.arange(1, n_rows // 100), n_changes, replace=False)) * 100
+    lengths = np.diff(np.concatenate(([0], change_points, [n_rows])))
+    means = np.repeat(rng.uniform(40, 90, n_changes + 1), lengths)
+    stds = np.repeat(rng.uniform(0.5, 3, n_changes + 1), lengths)
+    return means + stds * rng.standard_normal(n_rows), change_points
+
+
+def generate_autocorrelated(n_rows, rho=0.9, seed=42):
+    """변화점 없이 AR(1) 잡음(lag-1 자기상관 rho)만 있는 시계열 (천천히 흔들리는 센서 값 흉내)"""
+    noise = np.random.default_rng(seed).standard_normal(n_rows)
+    values = np.empty(n_rows)
+    level = 0.0
+    for idx, shock in enumerate(noise.tolist()):
+        level = rho * level + shock
+        values[idx] = level
+    return 60 + values
+
+
+def match_change_points(found, expected, tolerance):
+    """expected 중 tolerance 레코드 이내에 found 변화점이 있는 개수"""
+    found = np.asarray(found, dtype=np.int64)
+    if len(found) == 0:
+        return 0
+    idx = np.clip(np.searchsorted(found, expected), 1, len(found)) - 1
+    nearest = np.minimum(np.abs(found[idx] - expected), np.abs(found[np.minimum(idx + 1, len(found) - 1)] - expected))
+    return int((nearest <= tolerance).sum())
+
+
+def optimal_partition_cost(cost, n, penalty, min_size):
+    """가지치기 없는 O(n²) 동적 계획법의 최소 벌점 비용 (PELT 검증용)"""
+    best_cost = np.full(n + 1, np.inf)
+    best_cost[0] = -penalty
+    for end in range(min_size, n + 1):
+        starts = np.concatenate(([0], np.arange(min_size, end - min_size + 1)))
+        best_cost[end] = np.min(best_cost[starts] + cost(starts, end)) + penalty
+    return best_cost[n]
+
+
+def pelt_optimality_failures(n_series=200, seed=42):
+    """작은 무작위 시계열에서 PELT 분할 비용이 동적 계획법 최솟값보다 큰 경우의 수 (모델별)"""
+    rng = np.random.default_rng(seed)
+    failures = {}
+    for model in ('normal', 'mean'):
+        failures[model] = 0
+        for _ in range(n_series):
+            n = int(rng.integers(40, 160))
+            min_size = int(rng.integers(2, 15))
+            penalty = float(rng.uniform(1, 15))
+            values = np.repeat(rng.normal(0, 3, 6), n // 6 + 1)[:n] + rng.normal(0, rng.uniform(0.3, 2), n)
+            cost = _SegmentCost(values, model, 0.1)
+            bounds = [0] + _pelt(cost, n, penalty, min_size) + [n]
+            total = sum(float(cost(start, end)) for start, end in zip(bounds[:-1], bounds[1:])) + penalty * (len(bounds) - 2)
+            failures[model] += total > optimal_partition_cost(cost, n, penalty, min_size) + 1e-7
+    return failures
+
+
+def benchmark_change_points(n_rows, pelt_rows=20_000, n_changes=50, tolerance=5, seed=42):
+    """
+    binseg 변화점 탐지 시간과 심은 변화점 재현율, 작은 구간에서 PELT/binseg 결과 비교,
+    변화점 없는 AR(1) 잡음 시계열에서 자기상관 보정 벌점의 거짓 변화점 수
+    """
+    values, expected = generate_regimes(n_rows, n_changes, seed)
+    binseg_sec, found = timed(find_change_points, values)
+    recall = match_change_points(found, expected, tolerance) / len(expected)
+    false_changes = len(find_change_points(generate_autocorrelated(pelt_rows, seed=seed)))
+    
+    small_values, small_expected = generate_regimes(pelt_rows, 10, seed)
+    pelt_sec, pelt = timed(find_change_points, small_values, {'method': 'pelt'})
+    small_binseg_sec, small_binseg = timed(find_change_points, small_values)
+    failures = pelt_optimality_failures(seed=seed)
+    return {
+        'rows': n_rows,
+        'expected': len(expected),
+        'found': len(found),
+        'binseg_sec': binseg_sec,
+        'recall': recall,
+        'pelt_rows': pelt_rows,
+        'pelt_sec': pelt_sec,
+        'small_binseg_sec': small_binseg_sec,
+        'pelt_found': len(pelt),
+        'small_binseg_found': len(small_binseg),
+        'pelt_binseg_matched': match_change_points(small_binseg, pelt, tolerance),
+        'pelt_failures': failures,
+        'false_changes': false_changes,
+        'passed': (recall >= 0.9 and match_change_points(pelt, small_expected, tolerance) == len(small_expected)
+                   and not any(failures.values()) and false_changes <= 2)
+    }
+
+
+def print_change_point_result(result):
+    """변화점 탐지 벤치마크 결과 출력"""
+    print(f"📊 {result['rows']:,}개 레코드 (심은 변화점 {result['expected']}개)")
+    print(f"   binseg: {result['binseg_sec']:.3f}초 ({result['rows'] / result['binseg_sec']:,.0f}행/초), "
+          f"변화점 {result['found']}개, 재현율 {result['recall']:.0%}")
+    print(f"   {result['pelt_rows']:,}개 레코드: PELT {result['pelt_sec']:.3f}초 ({result['pelt_found']}개), "
+          f"binseg {result['small_binseg_sec']:.3f}초 ({result['small_binseg_found']}개), "
+          f"PELT 변화점 중 binseg 일치 {result['pelt_binseg_matched']}개")
+    failures = ', '.join(f"{model} {count}개" for model, count in result['pelt_failures'].items())
+    print(f"   동적 계획법 최솟값보다 비용이 큰 PELT 결과 (무작위 시계열 모델별 200개): {failures}")
+    print(f"   변화점 없는 AR(1) 잡음 {result['pelt_rows']:,}개 레코드 (ρ=0.9): 거짓 변화점 {result['false_changes']}개")
+    print("   ✅ 변화점 재현, PELT 최적" if result['passed'] else "   ❌ 변화점 누락/과다 또는 PELT 비최적")
+
+
+def generate_batch_features(n_batches, window_size=100, n_patterns=12, seed=42):
+    """패턴 n_patterns종을 섞은 배치의 특징 벡터 (통계 6개 + 모양 16개, 원시 배열 없이 직접 생성)"""
+    rng = np.random.default_rng(seed)
+    patterns = rng.normal(size=(n_patterns, 22)).astype(np.float32)
+    labels = rng.integers(0, n_patterns, n_batches)
+    features = patterns[labels] + rng.normal(0, 0.3, size=(n_batches, 22)).astype(np.float32)
+    # 모양 블록은 실제 색인처럼 원시 값 구간 평균으로 계산 (앞쪽 일부 배치만, 계산 시간 측정용)
+    values = rng.normal(55, 2, min(n_batches, 10_000) * window_size)
+    starts = np.arange(0, len(values), window_size)
+    shape_sec, _ = timed(shape_features, values, starts, starts + window_size, 16)
+    return features, shape_sec * n_batches / len(starts)
+
+
+def similarity_append_ms(index, n_appends, window_size=100, seed=42):
+    """
+    append()처럼 열린 마지막 배치 교체 + 새 배치 1개를 n_appends번 add()한 1회당 시간 중앙값 (ms)
+    (각 add 뒤 군집 비교 질의 1회 포함, 질의 시간은 빼고 계산, 버퍼 용량을 늘리는 회차는 중앙값에서 제외됨)
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.normal(55, 2, 2 * window_size)
+    table = {name: rng.normal(55, 2, 2) for name in SIMILARITY_STAT_FIELDS}
+    table['raw_start'] = np.array([0, window_size])
+    table['raw_end'] = np.array([window_size, 2 * window_size])
+    last_id = int(index.batch_ids[-1])
+    add_sec = []
+    for step in range(n_appends):
+        table['batch_id'] = np.array([last_id + step, last_id + step + 1])
+        start = time.perf_counter()
+        index.add(table, values)
+        add_sec.append(time.perf_counter() - start)
+        index.similar(last_id + step + 1, 5, n_probe=3)
+    return float(np.median(add_sec)) * 1000
+
+
+def benchmark_similarity(n_batches, n_queries=200, k=10, n_probe=3, n_appends=200, seed=42):
+    """
+    유사도 색인 생성 시간과 전체 비교/군집 비교 질의 시간, 군집 비교 재현율
+    배치 추가(add) 비용은 이력이 1%인 색인과 비교하여 이력 길이와 무관한지 확인
+    """
+    features, shape_sec = generate_batch_features(n_batches, seed=seed)
+    scaling = {'center': [0.0] * len(SIMILARITY_STAT_FIELDS), 'scale': [1.0] * len(SIMILARITY_STAT_FIELDS), 'has_shape': True}
+    build_sec, index = timed(BatchSimilarityIndex, features, np.arange(1, n_batches + 1), None, scaling)
+    small_batches = max(n_batches // 100, 100)
+    small_index = BatchSimilarityIndex(features[:small_batches], np.arange(1, small_batches + 1), None, scaling)
+    queries = np.random.default_rng(seed).integers(1, n_batches + 1, n_queries).tolist()
+    
+    start = time.perf_counter()
+    exact = [index.similar(batch_id, k) for batch_id in queries]
+    brute_ms = (time.perf_counter() - start) * 1000 / n_queries
+    start = time.perf_counter()
+    probed = [index.similar(batch_id, k, n_probe=n_probe) for batch_id in queries]
+    probe_ms = (time.perf_counter() - start) * 1000 / n_queries
+    
+    hits = sum(
+        len({match['batch_id'] for match in a} & {match['batch_id'] for match in b})
+        for a, b in zip(exact, probed)
+    )
+    small_append_ms = similarity_append_ms(small_index, n_appends, seed=seed)
+    append_ms = similarity_append_ms(index, n_appends, seed=seed)
+    return {
+        'batches': n_batches,
+        'clusters': len(index.centers),
+        'shape_sec': shape_sec,
+        'build_sec': build_sec,
+        'brute_ms': brute_ms,
+        'probe_ms': probe_ms,
+        'n_probe': n_probe,
+        'recall': hits / (k * n_queries),
+        'small_batches': small_batches,
+        'small_append_ms': small_append_ms,
+        'append_ms': append_ms,
+        'passed': brute_ms < 50 and append_ms < max(3 * small_append_ms, 0.5)
+    }
+
+
+def print_similarity_result(result):
+    """유사도 색인 벤치마크 결과 출력"""
+    print(f"📊 배치 {result['batches']:,}개 (패턴 그룹 {result['clusters']}개)")
+    print(f"   모양 특징 계산(추정): {result['shape_sec']:.3f}초, 색인 생성(미니배치 k-means): {result['build_sec']:.3f}초")
+    print(f"   유사 배치 질의: 전체 비교 {result['brute_ms']:.2f}ms, 가까운 군집 {result['n_probe']}개만 비교 "
+          f"{result['probe_ms']:.2f}ms (재현율 {result['recall']:.0%})")
+    print(f"   배치 추가: {result['append_ms']:.3f}ms/회 (배치 {result['small_batches']:,}개 색인은 "
+          f"{result['small_append_ms']:.3f}ms/회)")
+    print("   ✅ 밀리초 단위 질의, 추가 비용 일정" if result['passed'] else "   ❌ 질의 또는 추가가 느림")
+
+
+def generate_precursor_series(n_rows, window=144, seed=42):
+    """generate_series() 시계열의 가운데 window개 레코드를 천천히 오르는 모양으로 바꾼 시계열과 바꾼 위치"""
+    data = generate_series(n_rows, seed)
+    start = n_rows // 2
+    data.loc[start:start + window - 1, 'value'] = 55 + np.linspace(0, 12, window) + np.random.default_rng(seed).normal(0, 2, window)
+    return data, start
+
+
+def generate_flat_series(n_rows, seed=42):
+    """센서 멈춤처럼 값이 그대로인 구간(부분 시계열보다 짧은/긴 구간)을 섞은 랜덤 워크"""
+    rng = np.random.default_rng(seed)
+    values = 60 + np.cumsum(rng.normal(0, 1, n_rows))
+    for length in (5, 40, 300, 600):
+        start = int(rng.integers(0, n_rows - length))
+        values[start:start + length] = values[start]
+    return values
+
+
+def brute_force_profile(values, window, exclusion):
+    """
+    전체 z 정규화 거리 행렬로 계산한 매트릭스 프로파일 (작은 시계열 검증용)
+    평평한 부분 시계열은 0 벡터로 정규화 (평평한 구간끼리 거리 0, 나머지와는 √m)
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(values, dtype=np.float64), window)
+    flat = windows.max(axis=1) == windows.min(axis=1)
+    std = np.where(flat, 1.0, windows.std(axis=1))
+    normalized = np.where(flat[:, None], 0.0, (windows - windows.mean(axis=1, keepdims=True)) / std[:, None])
+    norms = (normalized * normalized).sum(axis=1)
+    distances = np.sqrt(np.maximum(norms[:, None] + norms[None, :] - 2 * normalized @ normalized.T, 0.0))
+    for row in range(len(distances)):
+        distances[row, max(0, row - exclusion):row + exclusion + 1] = np.inf
+    return distances.min(axis=1), distances.argmin(axis=1)
+
+
+def benchmark_matrix_profile(n_rows, workers=(1,), window=144, check_rows=2000, seed=42):
+    """모티프/디스코드 탐색 시간(프로세스 수별)과 심은 디스코드 검출, 작은 시계열의 전체 거리 행렬 대비 오차"""
+    data, planted = generate_precursor_series(n_rows, window, seed)
+    analyzer = WaterPumpAnalyzer()
+    analyzer.data = data
+    timings = []
+    for max_workers in workers:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sec, (motifs, discords) = timed(analyzer.discover_motifs, {'window': window}, max_workers=max_workers)
+        timings.append({'workers': max_workers, 'sec': sec})
+    start, end = discords[0]['raw_offsets']
+    
+    small = generate_series(check_rows, seed)['value'].to_numpy()
+    exclusion = -(-window // 4)
+    expected_profile, expected_index = brute_force_profile(small, window, exclusion)
+    profile, index = _matrix_profile(small, window, exclusion, chunk_rows=check_rows)
+    chunked_profile, chunked_index = _matrix_profile(small, window, exclusion, chunk_rows=check_rows // 7)
+    max_error = float(np.abs(profile - expected_profile).max())
+    
+    # 멈춘 구간이 있는 시계열 (거리가 0에 가까운 쌍은 제곱근 때문에 정밀도가 낮아 허용 오차를 크게 둠)
+    flat_values = generate_flat_series(check_rows, seed)
+    flat_expected, _ = brute_force_profile(flat_values, window, exclusion)
+    flat_profile, _ = _matrix_profile(flat_values, window, exclusion, chunk_rows=check_rows // 7)
+    flat_error = float(np.abs(flat_profile - flat_expected).max())
+    return {
+        'rows': n_rows,
+        'window': window,
+        'step': analyzer.matrix_profile['step'],
+        'timings': timings,
+        'motifs': len(motifs),
+        'discord_hit': start < planted + window and planted < end,
+        'check_rows': check_rows,
+        'max_error': max_error,
+        'index_match': float((index == expected_index).mean()),
+        'chunk_diff': float(np.abs(profile - chunked_profile).max()),
+        'flat_error': flat_error,
+        'passed': (max_error < 1e-6 and flat_error < 1e-3 and bool((index == chunked_index).all())
+                   and start < planted + window and planted < end)
+    }
+
+
+def print_matrix_profile_result(result):
+    """매트릭스 프로파일 벤치마크 결과 출력"""
+    step = f", {result['step']}개씩 평균" if result['step'] > 1 else ""
+    print(f"📊 {result['rows']:,}개 레코드 (부분 시계열 {result['window']}개{step})")
+    for timing in result['timings']:
+        print(f"   프로세스 {timing['workers']}개: {timing['sec']:.3f}초")
+    print(f"   모티프 {result['motifs']}개, 첫 디스코드가 심은 구간과 겹침: {'예' if result['discord_hit'] else '아니오'}")
+    print(f"   {result['check_rows']:,}개 레코드 전체 거리 행렬 대비: 최대 오차 {result['max_error']:.2e}, "
+          f"최근접 위치 일치 {result['index_match']:.1%}, 행 구간 분할 차이 {result['chunk_diff']:.2e}")
+    print(f"   멈춘 구간이 있는 {result['check_rows']:,}개 레코드 전체 거리 행렬 대비 최대 오차: {result['flat_error']:.2e}")
+    print("   ✅ 결과 일치" if result['passed'] else "   ❌ 결과 불일치")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워터펌프 분석 엔진 벤치마크")
+    parser.add_argument('--bench', choices=['window', 'raw-data', 'stream', 'fleet', 'labels', 'formats', 'export', 'raw-store', 'compact',
+                                            'sketch', 'rollups', 'cache', 'batch-table', 'wide-csv', 'anomalies',
+                                            'forecast', 'change-points', 'similarity', 'matrix-profile'], default='window',
+                       help='실행할 벤치마크')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000],
+                       help='벤치마크할 레코드 수 목록')
+    parser.add_argument('--window-size', type=int, default=100,
+                       help='윈도우 크기')
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                       help='스트리밍 벤치마크 청크 크기')
+    parser.add_argument('--pumps', type=int, default=800,
+                       help='플릿 벤치마크 펌프 수 (--sizes는 펌프당 레코드 수)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                       help='플릿 벤치마크 워커 수 목록')
+    parser.add_argument('--skip-legacy', action='store_true',
+                       help='기존 반복문 측정 생략 (대용량 데이터용)')
+
+    args = parser.parse_args()
+
+    if args.bench == 'raw-data':
+        print("🔧 원시 데이터 저장 방식 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_raw_data_result(benchmark_raw_data_modes(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'stream':
+        print("🔧 CSV 스트리밍 수집 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_stream_result(benchmark_stream_ingestion(n_rows, args.window_size, args.chunksize))
+            print()
+        return
+
+    if args.bench == 'labels':
+        print("🔧 라벨 분류 벤치마크 실행 중...\n")
+        for n_windows in args.sizes:
+            print_labeling_result(benchmark_labeling(n_windows))
+            print()
+        return
+
+    if args.bench == 'formats':
+        print("🔧 결과 파일 형식 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_format_result(benchmark_result_formats(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'export':
+        print("🔧 JSON 내보내기 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_export_result(benchmark_json_export(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'raw-store':
+        print("🔧 원시 저장소 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_raw_store_result(benchmark_raw_store(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'compact':
+        print("🔧 compact 모드 메모리 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_compact_result(benchmark_compact_mode(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'sketch':
+        print("🔧 분위수 스케치 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_sketch_result(benchmark_quantile_sketch(n_rows))
+            print()
+        return
+
+    if args.bench == 'rollups':
+        print("🔧 롤업 피라미드 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_rollup_result(benchmark_rollups(n_rows))
+            print()
+        return
+
+    if args.bench == 'cache':
+        print("🔧 분석 캐시 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_cache_result(benchmark_analysis_cache(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'batch-table':
+        print("🔧 배치 테이블 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_batch_table_result(benchmark_batch_table(n_rows, args.window_size))
+            print()
+        return
+
+    if args.bench == 'wide-csv':
+        print("🔧 넓은 CSV 컬럼 자동 매핑 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_wide_csv_result(benchmark_wide_csv(n_rows))
+            print()
+        return
+
+    if args.bench == 'anomalies':
+        print("🔧 이상 감지 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_anomaly_result(benchmark_anomaly_detectors(n_rows))
+            print()
+        return
+
+    if args.bench == 'forecast':
+        print("🔧 임계 온도 도달 예측 벤치마크 실행 중...\n")
+        for rows_per_pump in args.sizes:
+            print_forecast_result(benchmark_forecast(args.pumps, rows_per_pump))
+            print()
+        return
+
+    if args.bench == 'change-points':
+        print("🔧 변화점 탐지 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_change_point_result(benchmark_change_points(n_rows))
+            print()
+        return
+
+    if args.bench == 'similarity':
+        print("🔧 배치 유사도 색인 벤치마크 실행 중...\n")
+        for n_batches in args.sizes:
+            print_similarity_result(benchmark_similarity(n_batches))
+            print()
+        return
+
+    if args.bench == 'matrix-profile':
+        print("🔧 매트릭스 프로파일 모티프/디스코드 벤치마크 실행 중...\n")
+        for n_rows in args.sizes:
+            print_matrix_profile_result(benchmark_matrix_profile(n_rows, args.workers))
+            print()
+        return
+
+    if args.bench == 'fleet':
+        print("🔧 플릿 분석 확장성 벤치마크 실행 중...\n")
+        for rows_per_pump in args.sizes:
+            results = benchmark_fleet_scaling(args.pumps, rows_per_pump, args.workers, args.window_size)
+            print_fleet_results(args.pumps, rows_per_pump, results)
+            print()
+        return
+
+    print("🔧 윈도우 통계 엔진 벤치마크 실행 중...\n")
+    for n_rows in args.sizes:
+        result = benchmark_window_engine(n_rows, args.window_size, run_legacy=not args.skip_legacy)
+        print_result(result)
+        print()
+
+
+if __name__ == "__main__":
+    main()
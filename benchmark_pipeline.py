@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+분석 파이프라인 단계별 벤치마크 (회귀 감지용)
+
+- 재현 가능한 합성 CSV(시드 고정, 10k ~ 100M 레코드)를 청크 단위로 생성하여 재사용
+- 단계별 시간, 처리량(레코드/초), 최대 RSS를 측정
+  load(CSV 읽기) → parse(타임스탬프 변환) → clean(값 변환/결측 제거) → sort(시간 정렬)
+  → window(윈도우 통계) → labeling(라벨 분류/배치 구성) → serialize(JSON 저장)
+- 실행 결과는 이력 파일(JSON)에 누적하고, 기준(baseline) 파일과 비교하여
+  처리량이나 메모리가 허용 오차를 넘게 나빠진 단계가 있으면 종료 코드 1로 실패
+
+사용법:
+  python benchmark_pipeline.py                                   # 10k, 100k, 1M 레코드
+  python benchmark_pipeline.py --sizes 10000 100000 1000000 10000000 100000000 --repeat 1
+  python benchmark_pipeline.py --update-baseline                 # 현재 결과를 기준으로 저장
+  python benchmark_pipeline.py --tolerance 0.2 --memory-tolerance 0.3
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from stage_profiler import current_rss
+from water_pump_analyzer import (
+    WaterPumpAnalyzer,
+    _parse_timestamps,
+    _probe_csv_schema,
+    _read_csv_columns,
+    _window_statistics,
+)
+
+BENCHMARK_DIR = os.path.join('water_pump_data', 'benchmarks')
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+PIPELINE_STAGES = ('load', 'parse', 'clean', 'sort', 'window', 'labeling', 'serialize')
+
+# 합성 CSV 생성 청크 크기와 결측 값 비율 (clean 단계가 실제로 행을 제거하도록)
+_GENERATE_CHUNK_ROWS = 1_000_000
+_MISSING_RATIO = 0.001
+# 회귀 판정 시 작은 데이터의 측정 잡음을 흡수하는 최소 여유 (초, 바이트)
+_TIME_SLACK_SEC = 0.01
+_MEMORY_SLACK_BYTES = 32 * 1024 ** 2
+
+
+def generate_pipeline_csv(path, n_rows, seed=42):
+    """
+    재현 가능한 합성 온도 CSV 생성 (10분 간격, 하루 주기 변동 + 노이즈, 일부 결측)
+    청크마다 (seed, 청크 번호)로 난수를 만들므로 전체를 메모리에 올리지 않고도 항상 같은 파일
+    """
+    start = pd.Timestamp('2024-01-01')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('timestamp,value\n')
+        for chunk_index, offset in enumerate(range(0, n_rows, _GENERATE_CHUNK_ROWS)):
+            rng = np.random.default_rng([seed, chunk_index])
+            positions = np.arange(offset, min(offset + _GENERATE_CHUNK_ROWS, n_rows))
+            values = 55 + 5 * np.sin(positions * 2 * np.pi / 144) + rng.normal(0, 2, len(positions))
+            values[rng.random(len(positions)) < _MISSING_RATIO] = np.nan
+            # 일부 구간은 기록 순서가 뒤섞인 상태로 저장 (sort 단계 측정용)
+            order = np.arange(len(positions))
+            swap = 2 * rng.choice(len(order) // 2, size=len(order) // 100, replace=False)
+            order[swap], order[swap + 1] = order[swap + 1], order[swap]
+            frame = pd.DataFrame({
+                'timestamp': start + pd.to_timedelta(positions[order] * 10, unit='min'),
+                'value': values[order]
+            })
+            frame.to_csv(f, header=False, index=False, date_format='%Y-%m-%d %H:%M:%S', float_format='%.3f')
+    return path
+
+
+def dataset_path(data_dir, n_rows, seed=42):
+    """크기/시드별 합성 CSV 경로 (없으면 생성)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'pipeline_{n_rows}_{seed}.csv')
+    if not os.path.exists(path):
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        generate_pipeline_csv(temp_path, n_rows, seed)
+        os.replace(temp_path, path)
+    return path
+
+
+class PeakRSSMonitor:
+    """
+    구간 실행 중 최대 RSS 측정 (백그라운드 스레드가 interval초 간격으로 RSS를 읽음)
+    ru_maxrss는 프로세스 전체의 최댓값만 제공하므로 단계별 최댓값은 샘플링으로 구함
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self.end_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss())
+
+    def __enter__(self):
+        self.start_bytes = self.peak_bytes = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.end_bytes = current_rss()
+        self.peak_bytes = max(self.peak_bytes, self.end_bytes)
+        return False
+
+
+def _measure(stages, name, rows, func, *args, **kwargs):
+    """func 실행 시간과 최대 RSS를 stages[name]에 기록하고 결과 반환 (rows가 None이면 결과 길이)"""
+    with PeakRSSMonitor() as monitor:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    if rows is None:
+        rows = len(result)
+    stages[name] = {
+        'sec': elapsed,
+        'rows': rows,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+        'peak_rss_bytes': monitor.peak_bytes,
+        'rss_delta_bytes': monitor.peak_bytes - monitor.start_bytes
+    }
+    return result
+
+
+def run_pipeline(csv_path, window_size=100, output_dir=None, serialize_raw=False):
+    """CSV 한 개에 대해 파이프라인 단계를 순서대로 실행하며 단계별 측정값 반환"""
+    stages = {}
+    analyzer = WaterPumpAnalyzer()
+
+    schema = _probe_csv_schema(csv_path)
+    frame = _measure(stages, 'load', None, _read_csv_columns, csv_path, schema)
+    total_rows = len(frame)
+
+    def parse():
+        frame['timestamp'] = _parse_timestamps(frame['timestamp'], schema['timestamp_format'])
+
+    def clean():
+        frame['value'] = pd.to_numeric(frame['value'], errors='coerce')
+        return frame.dropna()
+
+    _measure(stages, 'parse', total_rows, parse)
+    frame = _measure(stages, 'clean', total_rows, clean)
+    frame = _measure(stages, 'sort', len(frame),
+                     lambda: frame.sort_values('timestamp', kind='stable').reset_index(drop=True))
+
+    analyzer.data = frame
+    del frame
+    epoch_ns, values = analyzer._analysis_series()
+    analyzer.window_size = window_size
+    stats = _measure(stages, 'window', len(values), _window_statistics, values, window_size)
+    analyzer.analyzed_data = _measure(
+        stages, 'labeling', len(values), analyzer._build_batches,
+        epoch_ns, values, window_size, tz=analyzer.raw_timezone, stats=stats, raw_offset=0
+    )
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _measure(stages, 'serialize', len(values), analyzer.save_to_json,
+                     os.path.join(tmp_dir, 'analysis.json'), indent=None, include_raw=serialize_raw)
+    return stages
+
+
+def benchmark_size(n_rows, data_dir, window_size=100, repeat=3, serialize_raw=False, seed=42):
+    """
+    같은 CSV로 파이프라인을 repeat번 실행하여 단계별 최소 시간(잡음이 가장 적은 값) 기록
+    최대 RSS는 반복 중 가장 큰 값
+    """
+    csv_path = dataset_path(data_dir, n_rows, seed)
+    best = {}
+    for _ in range(repeat):
+        gc.collect()
+        for name, stats in run_pipeline(csv_path, window_size, serialize_raw=serialize_raw).items():
+            if name not in best:
+                best[name] = stats
+                continue
+            peak_rss = max(best[name]['peak_rss_bytes'], stats['peak_rss_bytes'])
+            rss_delta = max(best[name]['rss_delta_bytes'], stats['rss_delta_bytes'])
+            if stats['sec'] < best[name]['sec']:
+                best[name] = stats
+            best[name]['peak_rss_bytes'] = peak_rss
+            best[name]['rss_delta_bytes'] = rss_delta
+    return {
+        'rows': n_rows,
+        'file_bytes': os.path.getsize(csv_path),
+        'stages': {name: best[name] for name in PIPELINE_STAGES}
+    }
+
+
+def environment_info():
+    """측정 환경 (결과 비교 시 참고용)"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def save_json(path, data):
+    """임시 파일에 쓴 뒤 교체 (중간에 중단되어도 기존 파일 유지)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def find_regressions(run, baseline, tolerance=0.25, memory_tolerance=0.25):
+    """
+    기준 실행과 비교하여 회귀 목록 반환 (같은 크기/단계만 비교)
+    - 처리량: 기준의 (1 - tolerance)배 미만이면서 소요 시간이 10ms 넘게 증가
+    - 메모리: 단계 중 RSS 증가량이 기준의 (1 + memory_tolerance)배 + 여유(32MB) 초과
+    """
+    regressions = []
+    for size, result in run['results'].items():
+        baseline_result = baseline.get('results', {}).get(size)
+        if baseline_result is None:
+            continue
+        for stage, stats in result['stages'].items():
+            reference = baseline_result['stages'].get(stage)
+            if reference is None:
+                continue
+            if (stats['rows_per_sec'] < reference['rows_per_sec'] * (1 - tolerance)
+                    and stats['sec'] - reference['sec'] > _TIME_SLACK_SEC):
+                regressions.append({
+                    'rows': int(size), 'stage': stage, 'metric': 'rows_per_sec',
+                    'baseline': reference['rows_per_sec'], 'current': stats['rows_per_sec']
+                })
+            memory_limit = reference['rss_delta_bytes'] * (1 + memory_tolerance) + _MEMORY_SLACK_BYTES
+            if stats['rss_delta_bytes'] > memory_limit:
+                regressions.append({
+                    'rows': int(size), 'stage': stage, 'metric': 'rss_delta_bytes',
+                    'baseline': reference['rss_delta_bytes'], 'current': stats['rss_delta_bytes']
+                })
+    return regressions
+
+
+def print_size_result(result, baseline_result=None):
+    """크기별 단계 측정 결과 출력 (기준이 있으면 처리량 변화율 포함)"""
+    print(f"📊 {result['rows']:,}개 레코드 (CSV {result['file_bytes'] / 1024 ** 2:.1f}MB)")
+    for stage in PIPELINE_STAGES:
+        stats = result['stages'][stage]
+        line = (f"   {stage:>9}: {stats['sec']:8.3f}초, {stats['rows_per_sec']:>14,.0f} 레코드/초, "
+                f"최대 RSS {stats['peak_rss_bytes'] / 1024 ** 2:8.1f}MB (+{stats['rss_delta_bytes'] / 1024 ** 2:.1f}MB)")
+        reference = (baseline_result or {}).get('stages', {}).get(stage)
+        if reference:
+            line += f"  기준 대비 {stats['rows_per_sec'] / reference['rows_per_sec'] - 1:+.1%}"
+        print(line)
+    total = sum(stats['sec'] for stats in result['stages'].values())
+    print(f"   {'total':>9}: {total:8.3f}초, {result['rows'] / total:>14,.0f} 레코드/초")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워터펌프 분석 파이프라인 단계별 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                       help='벤치마크할 레코드 수 목록')
+    parser.add_argument('--window-size', type=int, default=100,
+                       help='윈도우 크기')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='크기별 반복 횟수 (단계별 최소 시간 사용)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='합성 데이터 시드')
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARK_DIR, 'data'),
+                       help='합성 CSV 저장 디렉터리 (같은 크기/시드는 재사용)')
+    parser.add_argument('--history', default=os.path.join(BENCHMARK_DIR, 'history.json'),
+                       help='실행 결과를 누적할 이력 파일')
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'),
+                       help='회귀 비교 기준 파일')
+    parser.add_argument('--update-baseline', action='store_true',
+                       help='현재 결과로 기준 파일 갱신 (측정한 크기만 덮어씀)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                       help='허용 처리량 감소 비율 (0.25 = 25%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                       help='허용 RSS 증가 비율')
+    parser.add_argument('--serialize-raw', action='store_true',
+                       help='serialize 단계에서 원시 데이터까지 JSON으로 저장')
+
+    args = parser.parse_args()
+
+    baseline = load_json(args.baseline, None)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment_info(),
+        'window_size': args.window_size,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'serialize_raw': args.serialize_raw,
+        'results': {}
+    }
+
+    print("🔧 분석 파이프라인 벤치마크 실행 중...\n")
+    for n_rows in args.sizes:
+        result = benchmark_size(n_rows, args.data_dir, args.window_size, args.repeat, args.serialize_raw, args.seed)
+        run['results'][str(n_rows)] = result
+        print_size_result(result, (baseline or {}).get('results', {}).get(str(n_rows)))
+        print()
+
+    history = load_json(args.history, [])
+    history.append(run)
+    save_json(args.history, history)
+    print(f"📝 이력 저장: {args.history} (총 {len(history)}회)")
+
+    regressions = []
+    if baseline is None:
+        print(f"ℹ️ 기준 파일이 없습니다: {args.baseline} (--update-baseline으로 생성)")
+    else:
+        regressions = find_regressions(run, baseline, args.tolerance, args.memory_tolerance)
+
+    if args.update_baseline:
+        updated = dict(run)
+        updated['results'] = {**(baseline or {}).get('results', {}), **run['results']}
+        save_json(args.baseline, updated)
+        print(f"📌 기준 갱신: {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ 성능 회귀 {len(regressions)}건 (처리량 허용 {args.tolerance:.0%}, 메모리 허용 {args.memory_tolerance:.0%})")
+        for item in regressions:
+            if item['metric'] == 'rows_per_sec':
+                print(f"   {item['rows']:,}행 {item['stage']}: {item['baseline']:,.0f} → {item['current']:,.0f} 레코드/초")
+            else:
+                print(f"   {item['rows']:,}행 {item['stage']}: RSS +{item['baseline'] / 1024 ** 2:.1f}MB → "
+                      f"+{item['current'] / 1024 ** 2:.1f}MB")
+        return 1
+    if baseline is not None:
+        print("✅ 기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
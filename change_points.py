@@ -0,0 +1,222 @@
+"""
+운전 구간 변화점 탐지 (평균/분산 변화)
+
+- 구간 비용은 누적합 Σx, Σx² 두 배열만으로 O(1)에 계산
+  - normal: 구간 길이 × log(분산) (평균과 분산 변화, 가우시안 음의 로그우도)
+  - mean: 구간 제곱 편차 합 (평균 변화만)
+- binseg(기본): 분할 이득(전체 비용 - 좌 비용 - 우 비용)이 가장 큰 구간부터 나누는 이진 분할
+  구간 하나의 모든 분할 위치 이득을 벡터 연산으로 한 번에 계산하므로 전체 O(n log k)
+- pelt: 벌점이 붙은 전체 비용을 정확히 최소화하는 동적 계획법 (min_size 제약 포함),
+  이후 최적이 될 수 없는 후보 시작점을 가지치기하여 변화점이 고르게 촘촘하면 선형 시간
+  - 후보는 변화점 간격만큼 쌓이므로 비용은 O(n × 평균 구간 길이): 변화점이 드문 긴 시계열은 사실상 O(n²)
+  - PELT_MAX_ROWS(5만 레코드)보다 긴 시계열은 ValueError (binseg 사용)
+- 벌점 기본값은 penalty_scale × log(n) × 자기상관 보정 (BIC 계열)
+  - 가우시안 비용은 레코드가 독립이라고 보므로 천천히 흔들리는 센서 시계열에서는 이득이 부풀려짐
+  - 보정 없는 벌점으로 한 번 나눈 구간 평균 잔차의 lag-1 자기상관 ρ로 분산 팽창 계수 (1+ρ)/(1-ρ)를 곱함
+    (독립 잡음이면 약 1, 5분 간격 설비 온도처럼 자기상관이 큰 시계열은 수십)
+"""
+
+import heapq
+
+import numpy as np
+
+DEFAULT_CHANGE_POINT_PARAMS = {
+    'method': 'binseg',
+    'model': 'normal',
+    'penalty': None,
+    'penalty_scale': 2.0,
+    'autocorrelation': True,
+    'min_size': 12,
+    'max_changes': 100,
+    'min_std': 0.1
+}
+
+CHANGE_POINT_METHODS = ('binseg', 'pelt')
+CHANGE_POINT_MODELS = ('normal', 'mean')
+
+# PELT를 허용하는 최대 레코드 수 (변화점이 드물면 O(n²)이라 이보다 길면 수 초~수 분)
+PELT_MAX_ROWS = 50_000
+
+# 자기상관 보정에 쓰는 ρ 상한 (분산 팽창 계수 최대 199)
+_MAX_AUTOCORRELATION = 0.99
+
+
+def change_point_params(overrides=None):
+    """기본 변화점 파라미터에 overrides를 덮어쓴 사본 (값 검증 포함)"""
+    params = dict(DEFAULT_CHANGE_POINT_PARAMS)
+    if overrides:
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"알 수 없는 변화점 파라미터입니다: {sorted(unknown)}")
+        params.update(overrides)
+    if params['method'] not in CHANGE_POINT_METHODS:
+        raise ValueError(f"지원하지 않는 변화점 탐지 방식입니다: {params['method']}")
+    if params['model'] not in CHANGE_POINT_MODELS:
+        raise ValueError(f"지원하지 않는 구간 비용 모델입니다: {params['model']}")
+    params['min_size'] = max(int(params['min_size']), 2)
+    params['max_changes'] = int(params['max_changes'])
+    params['autocorrelation'] = bool(params['autocorrelation'])
+    return params
+
+
+class _SegmentCost:
+    """누적합 기반 구간 비용 cost(start, end) (end 미포함, 인자는 스칼라 또는 배열)"""
+
+    def __init__(self, values, model, min_std):
+        values = np.asarray(values, dtype=np.float64)
+        centered = values - (values.mean() if len(values) else 0.0)
+        self.sum1 = np.concatenate(([0.0], np.cumsum(centered)))
+        self.sum2 = np.concatenate(([0.0], np.cumsum(centered * centered)))
+        self.model = model
+        self.min_var = min_std * min_std
+
+    def __call__(self, start, end):
+        length = end - start
+        total = self.sum1[end] - self.sum1[start]
+        squared = self.sum2[end] - self.sum2[start] - total * total / length
+        if self.model == 'mean':
+            return np.maximum(squared, 0.0)
+        return length * np.log(np.maximum(squared / length, self.min_var))
+
+
+def _penalty(params, n):
+    if params['penalty'] is not None:
+        return float(params['penalty'])
+    return params['penalty_scale'] * np.log(max(n, 2))
+
+
+def _autocorrelation_factor(values, change_points):
+    """
+    변화점으로 나눈 구간 평균을 뺀 잔차의 lag-1 자기상관 ρ로 계산한 분산 팽창 계수 (1+ρ)/(1-ρ)
+    (ρ는 [0, 0.99]로 제한, 독립 잡음이면 약 1)
+    """
+    starts = np.concatenate(([0], np.asarray(change_points, dtype=np.int64))).astype(np.int64)
+    counts = np.diff(np.append(starts, len(values)))
+    residuals = values - np.repeat(np.add.reduceat(values, starts) / counts, counts)
+    energy = residuals @ residuals
+    if energy <= 0:
+        return 1.0
+    rho = min(max(float(residuals[1:] @ residuals[:-1]) / energy, 0.0), _MAX_AUTOCORRELATION)
+    return (1.0 + rho) / (1.0 - rho)
+
+
+def _binseg(cost, n, penalty, min_size, max_changes):
+    """이진 분할: 이득이 벌점보다 큰 분할을 이득 순으로 최대 max_changes개 선택"""
+    def best_split(start, end):
+        if end - start < 2 * min_size:
+            return None
+        splits = np.arange(start + min_size, end - min_size + 1)
+        gains = cost(start, end) - cost(start, splits) - cost(splits, end)
+        best = int(np.argmax(gains))
+        return float(gains[best]), int(splits[best])
+
+    change_points = []
+    heap = []
+    candidate = best_split(0, n)
+    if candidate is not None:
+        heapq.heappush(heap, (-candidate[0], candidate[1], 0, n))
+    while heap and len(change_points) < max_changes:
+        negative_gain, split, start, end = heapq.heappop(heap)
+        if -negative_gain <= penalty:
+            break
+        change_points.append(split)
+        for segment in ((start, split), (split, end)):
+            candidate = best_split(*segment)
+            if candidate is not None:
+                heapq.heappush(heap, (-candidate[0], candidate[1], *segment))
+    return sorted(change_points)
+
+
+def _pelt(cost, n, penalty, min_size):
+    """
+    PELT: F(t) = min_s F(s) + cost(s, t) + β
+    F(s) + cost(s, t) > F(t)인 후보 s는 t 이후 새 구간(t, t')이 min_size 이상인 t' ≥ t + min_size부터 제외
+    (그 전의 t'에서는 t가 변화점이 될 수 없으므로 s가 여전히 최적일 수 있음)
+    """
+    best_cost = np.full(n + 1, np.inf)
+    best_cost[0] = -penalty
+    previous = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    # 후보별 제외 시점 (가지치기 조건을 처음 만족한 t + min_size)
+    drop_at = np.array([n + 1], dtype=np.int64)
+    for end in range(min_size, n + 1):
+        keep = drop_at > end
+        candidates, drop_at = candidates[keep], drop_at[keep]
+        # 길이가 아직 min_size 미만인 후보는 비교하지 않음
+        usable = np.flatnonzero(end - candidates >= min_size)
+        valid = candidates[usable]
+        totals = best_cost[valid] + cost(valid, end)
+        best = int(np.argmin(totals))
+        best_cost[end] = totals[best] + penalty
+        previous[end] = valid[best]
+        pruned = usable[totals > best_cost[end]]
+        drop_at[pruned] = np.minimum(drop_at[pruned], end + min_size)
+        candidates = np.append(candidates, end)
+        drop_at = np.append(drop_at, n + 1)
+
+    change_points = []
+    end = int(previous[n])
+    while end > 0:
+        change_points.append(end)
+        end = int(previous[end])
+    return change_points[::-1]
+
+
+def find_change_points(values, params=None):
+    """
+    변화점 위치(새 구간이 시작하는 레코드 위치, 오름차순) 목록
+    NaN은 직전 값으로 채워 계산 (앞쪽 NaN은 첫 유효 값), method='pelt'는 PELT_MAX_ROWS 이하만 허용
+    """
+    params = change_point_params(params)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < 2 * params['min_size']:
+        return []
+    missing = np.isnan(values)
+    if missing.all():
+        return []
+    if missing.any():
+        index = np.where(missing, 0, np.arange(n))
+        np.maximum.accumulate(index, out=index)
+        values = values[index]
+        values[np.isnan(values)] = values[np.argmax(~missing)]
+
+    if params['method'] == 'pelt' and n > PELT_MAX_ROWS:
+        raise ValueError(f"PELT는 {PELT_MAX_ROWS:,}개 레코드 이하에서만 사용할 수 있습니다 ({n:,}개). binseg를 사용하세요.")
+
+    cost = _SegmentCost(values, params['model'], params['min_std'])
+    penalty = _penalty(params, n)
+    if params['penalty'] is None and params['autocorrelation']:
+        # 보정 없는 벌점의 예비 binseg 구간으로 잔차 자기상관을 추정하여 벌점 보정
+        preliminary = _binseg(cost, n, penalty, params['min_size'], params['max_changes'])
+        penalty *= _autocorrelation_factor(values, preliminary)
+    if params['method'] == 'pelt':
+        return _pelt(cost, n, penalty, params['min_size'])
+    return _binseg(cost, n, penalty, params['min_size'], params['max_changes'])
+
+
+def segment_statistics(values, change_points):
+    """
+    변화점으로 나눈 구간별 시작/끝 위치, 레코드 수, 평균/분산/최솟값/최댓값 배열
+    (reduceat으로 모든 구간을 한 번에 계산)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.concatenate(([0], np.asarray(change_points, dtype=np.int64))).astype(np.int64)
+    ends = np.append(starts[1:], len(values))
+    counts = ends - starts
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    n_valid = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.add.reduceat(filled, starts) / n_valid
+        centered = np.where(valid, values - np.repeat(mean, counts), 0.0)
+        variance = np.add.reduceat(centered * centered, starts) / n_valid
+    return {
+        'start': starts,
+        'end': ends,
+        'count': counts,
+        'mean': mean,
+        'variance': variance,
+        'min': np.minimum.reduceat(np.where(valid, values, np.inf), starts),
+        'max': np.maximum.reduceat(np.where(valid, values, -np.inf), starts)
+    }
@@ -1,12 +1,24 @@
 import streamlit as st
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 import re
-from water_pump_analyzer import WaterPumpAnalyzer
+from analysis_cache import AnalysisCache
+from batch_similarity import BatchSimilarityIndex
+from forecasting import describe_crossings
+from water_pump_analyzer import (
+    MOTIFS_COMPUTED,
+    MOTIFS_INSUFFICIENT,
+    MOTIFS_NOT_COMPUTED,
+    BatchTable,
+    WaterPumpAnalyzer,
+    describe_motif_resolution,
+    list_raw_stores,
+    load_analysis_results,
+    matrix_profile_summary,
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -18,12 +30,17 @@ st.set_page_config(
 class WaterPumpChatbot:
     def __init__(self):
         self.data = None
+        # CSV/원시 저장소/샘플을 직접 분석한 분석기 (요청 시 모티프 탐색용, 분석 결과 파일만 올리면 None)
+        self.analyzer = None
+        self.batch_table = None
+        self.similarity_index = None
         self.analysis_cache = {}
         
     def load_json_data(self, uploaded_file):
-        """JSON 데이터 로드"""
+        """JSON/JSON Lines 또는 컬럼형(npz/parquet/feather) 분석 결과 로드"""
         try:
-            self.data = json.load(uploaded_file)
+            self.data = load_analysis_results(uploaded_file, include_raw=False)
+            self.analyzer = None
             self.analyze_data()
             return True
         except Exception as e:
@@ -35,47 +52,73 @@ class WaterPumpChatbot:
         if not self.data:
             return
             
-        results = self.data['analysis_results']
-        
-        # 전체 통계 계산
-        all_temps = []
-        alert_counts = {'정상': 0, '관찰': 0, '주의': 0, '위험': 0}
-        trend_counts = {'상승': 0, '하강': 0, '평형': 0}
-        stability_counts = {'매우안정': 0, '안정': 0, '보통': 0, '불안정': 0}
-        
-        critical_batches = []
-        
-        for result in results:
-            all_temps.append(result['statistics']['mean'])
-            alert_counts[result['alert_level']] += 1
-            trend_counts[result['trend']] += 1
-            stability_counts[result['stability']] += 1
-            
-            # 위험/주의 배치 식별
-            if result['alert_level'] in ['위험', '주의']:
-                critical_batches.append(result)
+        # 집계는 배치 컬럼 테이블의 배열 연산으로 계산
+        # (분석기가 있으면 분석기가 보관한 테이블을 그대로 사용, 결과 파일만 있으면 배치 목록으로 한 번 생성)
+        if self.analyzer is not None:
+            table = self.analyzer.batch_table()
+        else:
+            table = BatchTable.from_batches(self.data['analysis_results'])
+        self.batch_table = table
+        self.similarity_index = None
         
         self.analysis_cache = {
-            'total_batches': len(results),
-            'avg_temperature': np.mean(all_temps),
-            'max_temperature': max([r['statistics']['max'] for r in results]),
-            'min_temperature': min([r['statistics']['min'] for r in results]),
-            'alert_counts': alert_counts,
-            'trend_counts': trend_counts,
-            'stability_counts': stability_counts,
-            'critical_batches': critical_batches,
+            'total_batches': len(table),
+            'avg_temperature': float(table['mean'].mean()),
+            'max_temperature': float(table['max'].max()),
+            'min_temperature': float(table['min'].min()),
+            'alert_counts': table.label_counts('alert_level', ['정상', '관찰', '주의', '위험']),
+            'trend_counts': table.label_counts('trend', ['상승', '하강', '평형']),
+            'stability_counts': table.label_counts('stability', ['매우안정', '안정', '보통', '불안정']),
+            # 위험/주의 배치 (BatchTable, 순회 시 BatchResult)
+            'critical_batches': table.where('alert_level', ['위험', '주의']),
             'analysis_period': {
-                'start': results[0]['start_timestamp'],
-                'end': results[-1]['end_timestamp']
-            }
+                'start': str(table['start_timestamp'][0]),
+                'end': str(table['end_timestamp'][-1])
+            },
+            # 원시 시계열 이상 감지 이벤트 (점수 큰 순, 이상 감지를 실행하지 않은 결과는 None)
+            'anomalies': (sorted(self.data['metadata']['anomalies'], key=lambda event: event['score'], reverse=True)
+                          if self.data['metadata'].get('anomalies') is not None else None),
+            # 임계 온도 도달 예측 (forecast_thresholds()를 실행하지 않은 결과는 None)
+            'forecast': self.data['metadata'].get('forecast'),
+            # 변화점으로 나눈 운전 구간 (시간 순, detect_change_points()를 실행하지 않은 결과는 None)
+            'segments': self.data['metadata'].get('segments'),
+            # 비슷한 패턴의 배치 그룹 (build_similarity_index()를 실행하지 않은 결과는 None)
+            'batch_clusters': self.data['metadata'].get('batch_clusters'),
+            # 매트릭스 프로파일 모티프/디스코드 (모티프 질문을 받으면 탐색, 탐색 전 결과는 status가 not_computed이고 목록은 None)
+            'matrix_profile': matrix_profile_summary(self.data['metadata']),
+            'motifs': self.data['metadata'].get('motifs'),
+            'discords': self.data['metadata'].get('discords')
         }
     
+    def discover_motifs(self):
+        """아직 탐색하지 않았으면 분석기로 모티프를 탐색하여 분석 결과와 캐시 항목에 반영 (모티프 질문을 받았을 때만 실행)"""
+        if self.analyzer is None or self.analysis_cache['matrix_profile']['status'] != MOTIFS_NOT_COMPUTED:
+            return
+        metadata = AnalysisCache().discover_motifs(self.analyzer, self.data['metadata']['data_source'])
+        self.data['metadata'].update(metadata)
+        self.analysis_cache.update({
+            'matrix_profile': metadata['matrix_profile'],
+            'motifs': metadata.get('motifs'),
+            'discords': metadata.get('discords')
+        })
+    
+    def get_similarity_index(self):
+        """배치 통계 특징으로 만든 유사도 색인 (원시 데이터가 없는 JSON 결과용, 처음 질문할 때 생성)"""
+        if self.similarity_index is None:
+            self.similarity_index = BatchSimilarityIndex.from_table(self.batch_table)
+        return self.similarity_index
+    
+    def pattern_groups(self):
+        """분석 결과의 패턴 그룹 (없으면 배치 통계 색인으로 그룹화)"""
+        if self.analysis_cache['batch_clusters']:
+            return self.analysis_cache['batch_clusters']
+        return self.get_similarity_index().cluster_summaries(self.batch_table)
+    
     def get_emergency_alert(self):
         """긴급 상황 체크"""
-        critical_batches = self.analysis_cache['critical_batches']
-        emergency_batches = [b for b in critical_batches if b['alert_level'] == '위험']
+        emergency_batches = self.analysis_cache['critical_batches'].where('alert_level', ['위험'])
         
-        if emergency_batches:
+        if len(emergency_batches):
             return self.format_emergency_response(emergency_batches)
         return None
     
@@ -84,11 +127,11 @@ class WaterPumpChatbot:
         response = "🚨 **긴급 알림: 워터펌프 과열 감지**\n\n"
         
         for batch in emergency_batches:
-            response += f"⛔ **위험 상황 - 배치 {batch['batch_id']}**\n"
-            response += f"- 최고 온도: {batch['statistics']['max']:.1f}°C\n"
-            response += f"- 평균 온도: {batch['statistics']['mean']:.1f}°C\n"
-            response += f"- 발생 시간: {batch['start_timestamp']}\n"
-            response += f"- 온도 특성: {batch['value_label']}\n\n"
+            response += f"⛔ **위험 상황 - 배치 {batch.batch_id}**\n"
+            response += f"- 최고 온도: {batch.max:.1f}°C\n"
+            response += f"- 평균 온도: {batch.mean:.1f}°C\n"
+            response += f"- 발생 시간: {batch.start_timestamp}\n"
+            response += f"- 온도 특성: {batch.value_label}\n\n"
         
         response += "🔧 **즉시 조치사항**\n"
         response += "1. 워터펌프 즉시 정지 및 안전 점검\n"
@@ -117,8 +160,16 @@ class WaterPumpChatbot:
             return self.get_overall_analysis()
         elif any(word in query for word in ['온도', '평균', '최고', '최저']):
             return self.get_temperature_analysis()
+        elif any(word in query for word in ['비슷', '유사', '그룹', '군집', '클러스터']):
+            return self.get_similarity_analysis(query)
+        elif any(word in query for word in ['모티프', '반복 패턴', '반복되는', '디스코드', '특이 구간', '전조']):
+            return self.get_motif_analysis()
+        elif any(word in query for word in ['변화점', '구간', '운전 모드', '레짐']):
+            return self.get_segment_analysis()
         elif any(word in query for word in ['트렌드', '변화', '패턴', '경향']):
             return self.get_trend_analysis()
+        elif any(word in query for word in ['이상 감지', '이상치', '급변', '급등', '이벤트']):
+            return self.get_anomaly_analysis()
         elif any(word in query for word in ['위험', '주의', '경고', '문제']):
             return self.get_risk_analysis()
         elif any(word in query for word in ['예측', '정비', '점검', '유지보수']):
@@ -162,23 +213,14 @@ class WaterPumpChatbot:
     def get_temperature_analysis(self):
         """온도 분석 응답"""
         cache = self.analysis_cache
-        results = self.data['analysis_results']
+        table = self.batch_table
         
         response = "🌡️ **온도 상세 분석**\n\n"
         
-        # 온도 범위별 분포
-        temp_ranges = {'저온 (<40°C)': 0, '정상 (40-70°C)': 0, '고온 (70-85°C)': 0, '과열 (>85°C)': 0}
-        
-        for result in results:
-            mean_temp = result['statistics']['mean']
-            if mean_temp < 40:
-                temp_ranges['저온 (<40°C)'] += 1
-            elif mean_temp < 70:
-                temp_ranges['정상 (40-70°C)'] += 1
-            elif mean_temp < 85:
-                temp_ranges['고온 (70-85°C)'] += 1
-            else:
-                temp_ranges['과열 (>85°C)'] += 1
+        # 온도 범위별 분포 (평균 온도 구간별 배치 수)
+        range_names = ['저온 (<40°C)', '정상 (40-70°C)', '고온 (70-85°C)', '과열 (>85°C)']
+        range_counts = np.bincount(np.searchsorted([40, 70, 85], table['mean'], side='right'), minlength=4)
+        temp_ranges = dict(zip(range_names, range_counts.tolist()))
         
         response += "📊 **온도 범위별 분포**\n"
         for range_name, count in temp_ranges.items():
@@ -191,11 +233,11 @@ class WaterPumpChatbot:
         response += f"- 최저 기록: {cache['min_temperature']:.1f}°C\n"
         
         # 고온 배치 식별
-        high_temp_batches = [r for r in results if r['statistics']['mean'] > 80]
-        if high_temp_batches:
+        high_temp_batches = table[table['mean'] > 80]
+        if len(high_temp_batches):
             response += f"\n⚠️ **고온 배치 ({len(high_temp_batches)}개)**\n"
             for batch in high_temp_batches[:3]:  # 상위 3개만 표시
-                response += f"- 배치 {batch['batch_id']}: {batch['statistics']['mean']:.1f}°C ({batch['value_label']})\n"
+                response += f"- 배치 {batch.batch_id}: {batch.mean:.1f}°C ({batch.value_label})\n"
         
         return response
     
@@ -233,7 +275,7 @@ class WaterPumpChatbot:
         
         response = "⚠️ **위험 요소 분석**\n\n"
         
-        if not critical_batches:
+        if not len(critical_batches):
             response += "✅ **양호한 상태**\n"
             response += "- 현재 위험 또는 주의 배치 없음\n"
             response += "- 정상적인 운영 범위 내에서 동작\n"
@@ -242,11 +284,16 @@ class WaterPumpChatbot:
         response += f"🚨 **위험/주의 배치: {len(critical_batches)}개**\n\n"
         
         for batch in critical_batches:
-            response += f"**배치 {batch['batch_id']} ({batch['alert_level']})**\n"
-            response += f"- 평균 온도: {batch['statistics']['mean']:.1f}°C\n"
-            response += f"- 최고 온도: {batch['statistics']['max']:.1f}°C\n"
-            response += f"- 특성: {batch['value_label']}\n"
-            response += f"- 발생 시간: {batch['start_timestamp'][:16]}\n\n"
+            response += f"**배치 {batch.batch_id} ({batch.alert_level})**\n"
+            response += f"- 평균 온도: {batch.mean:.1f}°C\n"
+            response += f"- 최고 온도: {batch.max:.1f}°C\n"
+            response += f"- 특성: {batch.value_label}\n"
+            response += f"- 발생 시간: {batch.start_timestamp[:16]}\n"
+            batch_events = [event for event in cache['anomalies'] or [] if event['batch_id'] == batch.batch_id]
+            if batch_events:
+                times = ', '.join(sorted(event['peak_timestamp'][:16] for event in batch_events)[:3])
+                response += f"- 이상 감지: {len(batch_events)}건 ({times})\n"
+            response += "\n"
         
         response += "🔧 **권장 조치사항**\n"
         response += "1. 고온 배치 원인 분석 (부하, 냉각수, 환경온도)\n"
@@ -256,6 +303,119 @@ class WaterPumpChatbot:
         
         return response
     
+    def get_anomaly_analysis(self):
+        """원시 시계열 이상 감지 이벤트 응답 (배치 라벨과 함께)"""
+        events = self.analysis_cache['anomalies']
+        if events is None:
+            return "ℹ️ 이 분석 결과에는 이상 감지 정보가 없습니다. CSV를 다시 분석하면 이상 감지가 함께 실행됩니다."
+        if not events:
+            return "✅ **이상 감지 결과**\n\n- 급격한 온도 변화나 지속적인 이탈이 감지되지 않았습니다.\n"
+        
+        labels = {batch.batch_id: batch for batch in self.batch_table}
+        response = f"🚨 **이상 감지 이벤트: {len(events)}건** (점수 상위 10건)\n\n"
+        for event in events[:10]:
+            batch = labels.get(event['batch_id'])
+            label = f"{batch.value_label}, {batch.alert_level}" if batch is not None else "배치 정보 없음"
+            response += f"**{event['peak_timestamp'][:16]}** - 배치 {event['batch_id']} ({label})\n"
+            response += f"- 온도: {event['peak_value']:.1f}°C, 점수 {event['score']:.1f}σ\n"
+            response += f"- 구간: {event['start_timestamp'][:16]} ~ {event['end_timestamp'][:16]}\n"
+            response += f"- 감지기: {', '.join(event['detectors'])}\n\n"
+        
+        response += "💡 **참고**\n"
+        response += "- zscore: 직전 기준선 대비 급격한 점프\n"
+        response += "- ewma: 평활 온도가 관리 한계를 벗어나기 시작한 시점\n"
+        response += "- cusum: 작은 편차가 누적된 지속적 변화\n"
+        return response
+    
+    def get_similarity_analysis(self, query):
+        """'배치 N'이 있으면 가장 비슷한 배치, 없으면 패턴 그룹별 운영 전략 응답"""
+        match = re.search(r'배치\s*(\d+)', query)
+        if match:
+            batch_id = int(match.group(1))
+            if self.get_similarity_index().cluster_of(batch_id) is None:
+                return f"ℹ️ 배치 {batch_id}를 찾을 수 없습니다. (배치 1~{self.analysis_cache['total_batches']})"
+            labels = {batch.batch_id: batch for batch in self.batch_table}
+            target = labels[batch_id]
+            response = f"🧩 **배치 {batch_id}의 유사 배치** ({target.value_label}, 평균 {target.mean:.1f}°C)\n\n"
+            for similar in self.get_similarity_index().similar(batch_id, 5):
+                batch = labels[similar['batch_id']]
+                response += (f"- **배치 {batch.batch_id}** ({batch.start_timestamp[:16]}): 평균 {batch.mean:.1f}°C, "
+                             f"최고 {batch.max:.1f}°C, {batch.value_label}, {batch.alert_level} (거리 {similar['distance']:.2f})\n")
+            response += "\n💡 거리는 표준화한 배치 통계(평균/중앙값/표준편차/최소/최대/범위) 차이입니다.\n"
+            return response
+        
+        groups = self.pattern_groups()
+        response = f"🧩 **비슷한 패턴의 배치 그룹: {len(groups)}개**\n\n"
+        for group in groups:
+            response += (f"**그룹 {group['cluster_id']}** - {group['size']}개 배치 ({group['share']:.0%}), "
+                         f"평균 {group['mean_temperature']:.1f}°C, 최고 {group['max_temperature']:.1f}°C\n")
+            response += (f"- 대표 특성: {group['value_label']}, 경고 {group['alert_level']} "
+                         f"({group['alert_level_share']:.0%}), 트렌드 {group['trend']}\n")
+            response += f"- 대표 배치: {', '.join(str(batch_id) for batch_id in group['representative_batches'])}\n"
+            if group['alert_level'] in ('위험', '주의'):
+                response += "- 전략: 냉각 용량 확보와 부하 분산, 같은 그룹 배치가 나타나면 즉시 점검\n\n"
+            elif group['mean_std'] > 5:
+                response += "- 전략: 온도 변동이 커서 유량/부하 변동 원인 점검, 제어 파라미터 조정\n\n"
+            else:
+                response += "- 전략: 현재 운전 조건 유지, 기준 패턴으로 활용\n\n"
+        response += "💡 \"배치 17과 비슷한 배치\"처럼 물어보면 특정 배치와 가장 비슷한 배치를 찾아드립니다.\n"
+        return response
+    
+    def get_segment_analysis(self):
+        """변화점으로 나눈 운전 구간 응답 (평균 변화가 큰 변화점 위주)"""
+        segments = self.analysis_cache['segments']
+        if segments is None:
+            return "ℹ️ 이 분석 결과에는 변화점 정보가 없습니다. CSV를 다시 분석하면 변화점 탐지가 함께 실행됩니다."
+        current = segments[-1]
+        response = f"🔀 **운전 구간 분석: {len(segments)}개 구간 (변화점 {len(segments) - 1}개)**\n\n"
+        response += "📍 **현재 구간**\n"
+        response += f"- 시작: {current['start_timestamp'][:16]} ({current['record_count']:,}개 레코드)\n"
+        response += f"- 평균 {current['mean']:.1f}°C, 표준편차 {current['std']:.2f}, 범위 {current['min']:.1f}~{current['max']:.1f}°C\n\n"
+        if len(segments) == 1:
+            response += "✅ 분석 기간 동안 평균/분산이 크게 바뀐 시점이 없습니다.\n"
+            return response
+        
+        shifts = sorted(segments[1:], key=lambda segment: abs(segment['mean_shift']), reverse=True)[:10]
+        response += "📈 **평균 변화가 큰 변화점** (상위 10개)\n"
+        for segment in sorted(shifts, key=lambda segment: segment['segment_id']):
+            batches = f", 배치 {segment['batch_ids'][0]}~{segment['batch_ids'][1]}" if segment['batch_ids'] else ''
+            response += (f"- **{segment['start_timestamp'][:16]}**: 평균 {segment['mean_shift']:+.1f}°C → {segment['mean']:.1f}°C "
+                         f"(표준편차 {segment['std']:.2f}, {segment['record_count']:,}개 레코드{batches})\n")
+        
+        response += "\n💡 **참고**\n"
+        response += "- 평균이 오르는 변화점은 부하 증가나 냉각 성능 저하 시작 시점일 수 있습니다\n"
+        response += "- 표준편차만 커진 구간은 운전 불안정(유량 변동, 캐비테이션 등) 여부를 점검하세요\n"
+        return response
+    
+    def get_motif_analysis(self):
+        """매트릭스 프로파일 디스코드(고장 전조 후보)와 반복 패턴(모티프) 응답"""
+        self.discover_motifs()
+        summary = self.analysis_cache['matrix_profile']
+        if summary['status'] == MOTIFS_INSUFFICIENT:
+            return "ℹ️ 레코드가 부족하여 반복 패턴/특이 구간을 탐색하지 않았습니다 (부분 시계열 길이의 2배 이상 필요)."
+        if summary['status'] != MOTIFS_COMPUTED:
+            return "ℹ️ 이 분석 결과에는 반복 패턴/특이 구간 정보가 없습니다. CSV나 원시 저장소를 분석한 뒤 질문하면 모티프 탐색을 실행합니다."
+        motifs, discords = self.analysis_cache['motifs'], self.analysis_cache['discords']
+        response = "🔎 **특이 구간 (디스코드)** - 다른 어떤 구간과도 모양이 닮지 않은 구간\n\n"
+        for discord in discords:
+            batch = f", 배치 {discord['batch_id']}" if discord['batch_id'] is not None else ''
+            response += (f"{discord['rank']}. **{discord['start_timestamp'][:16]} ~ {discord['end_timestamp'][:16]}**: "
+                         f"평균 {discord['mean']:.1f}°C, 최고 {discord['max']:.1f}°C (거리 {discord['distance']:.1f}{batch})\n")
+        
+        response += "\n🔁 **반복 패턴 (모티프)** - 모양이 거의 같은 구간이 여러 번 나타난 패턴\n\n"
+        for motif in motifs:
+            starts = ', '.join(occurrence['start_timestamp'][:16] for occurrence in motif['occurrences'])
+            response += f"{motif['rank']}. {len(motif['occurrences'])}회 (쌍 거리 {motif['distance']:.2f}): {starts}\n"
+        
+        resolution = describe_motif_resolution(summary)
+        if resolution is not None:
+            response += f"\nℹ️ {resolution}\n"
+        
+        response += "\n💡 **참고**\n"
+        response += "- 디스코드 직후에 경보나 고장이 있었다면 같은 모양이 다시 나타나는지 감시하세요\n"
+        response += "- 고장 직전 구간과 같은 모티프에 속한 구간은 전조 패턴일 수 있으니 정비 이력과 비교하세요\n"
+        return response
+    
     def get_maintenance_advice(self):
         """정비 조언 응답"""
         cache = self.analysis_cache
@@ -285,6 +445,13 @@ class WaterPumpChatbot:
         response += "- 씰 및 가스켓 점검\n"
         response += "- 전기 연결부 점검\n\n"
         
+        # 현재 추세 기준 임계 온도 도달 예측
+        if cache['forecast'] is not None:
+            response += f"⏳ **임계 온도 도달 예측** (최근 {cache['forecast']['params']['fit_window']}개 레코드 추세, Holt 모델)\n"
+            for line in describe_crossings(cache['forecast']):
+                response += f"- {line}\n"
+            response += "\n"
+        
         # 정비 주기 제안
         response += "⏰ **권장 정비 주기**\n"
         if cache['avg_temperature'] > 75:
@@ -334,6 +501,7 @@ class WaterPumpChatbot:
 - "전체 상황은 어떤가요?" - 전반적인 온도 분석
 - "온도 트렌드 분석해주세요" - 변화 패턴 분석  
 - "위험 요소가 있나요?" - 위험 상황 점검
+- "고장 전조가 될 특이 구간은?" - 반복 패턴/특이 구간 탐색
 - "정비 계획을 세워주세요" - 예측 정비 조언
 - "효율성 개선 방안은?" - 최적화 제안
 
@@ -350,56 +518,73 @@ def load_and_analyze_csv(uploaded_file):
         # 파일 포인터 리셋
         uploaded_file.seek(0)
         
-        # 분석기 생성 및 데이터 로드
-        analyzer = WaterPumpAnalyzer()
-        
-        if analyzer.load_data(uploaded_file=uploaded_file):
-            st.sidebar.write(f"📊 **데이터 정보**")
-            st.sidebar.write(f"레코드 수: {len(analyzer.data)}")
-            st.sidebar.write(f"온도 범위: {analyzer.data['value'].min():.1f}°C ~ {analyzer.data['value'].max():.1f}°C")
-            
-            # 온도 분석 실행
-            analyzer.analyze_temperature_characteristics()
-            
-            # 챗봇용 데이터 형식으로 변환
-            chatbot_data = {
-                'metadata': {
-                    'analysis_date': datetime.now().isoformat(),
-                    'total_batches': len(analyzer.analyzed_data),
-                    'window_size': 100,
-                    'data_source': 'uploaded_csv_file'
-                },
-                'analysis_results': analyzer.analyzed_data
-            }
-            
-            # 챗봇에 데이터 설정
-            st.session_state.chatbot.data = chatbot_data
-            st.session_state.chatbot.analyze_data()
-            
-            # 자동으로 water_pump_data 폴더에 저장
-            import os
-            data_folder = 'water_pump_data'
-            if not os.path.exists(data_folder):
-                os.makedirs(data_folder)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            json_filename = f"chatbot_analysis_{timestamp}.json"
-            json_path = os.path.join(data_folder, json_filename)
-            
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(chatbot_data, f, ensure_ascii=False, indent=2)
-            
-            st.sidebar.info(f"📁 분석 결과가 {json_path}에 저장되었습니다.")
-            
-            return True
-        else:
+        # 같은 내용과 분석 파라미터로 분석한 결과가 캐시에 있으면 재분석 없이 사용
+        cache = AnalysisCache()
+        analyzer, cache_hit = cache.analyze_file(uploaded_file)
+        if analyzer is None:
             st.sidebar.error("❌ CSV 파일 처리 실패")
             return False
-            
+        
+        # 챗봇용 데이터 형식으로 변환 (챗봇은 원시 데이터를 사용하지 않음)
+        st.session_state.chatbot.data = analyzer.get_output_data('uploaded_csv_file', include_raw=False)
+        st.session_state.chatbot.analyzer = analyzer
+        st.session_state.chatbot.analyze_data()
+        if cache_hit:
+            st.sidebar.info(f"⚡ 캐시된 분석 결과 사용 ({len(analyzer.analyzed_data)}개 배치)")
+            return True
+        
+        st.sidebar.write(f"📊 **데이터 정보**")
+        st.sidebar.write(f"레코드 수: {len(analyzer.data)}")
+        st.sidebar.write(f"온도 범위: {analyzer.data['value'].min():.1f}°C ~ {analyzer.data['value'].max():.1f}°C")
+        
+        # 자동으로 water_pump_data 폴더에 저장
+        import os
+        data_folder = 'water_pump_data'
+        if not os.path.exists(data_folder):
+            os.makedirs(data_folder)
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        json_filename = f"chatbot_analysis_{timestamp}.json"
+        json_path = os.path.join(data_folder, json_filename)
+        
+        # 저장 파일에는 원시 데이터 포함
+        analyzer.save_to_json(json_path, data_source='uploaded_csv_file')
+        
+        st.sidebar.info(f"📁 분석 결과가 {json_path}에 저장되었습니다.")
+        
+        # 다른 세션이 CSV를 다시 읽지 않도록 원시 저장소(메모리 맵)로도 저장 (파일 내용 해시 이름, 같은 내용은 한 번만 저장)
+        store_path = cache.save_raw_store(analyzer, label=uploaded_file.name)
+        st.sidebar.info(f"🗄️ 원시 저장소: {store_path}")
+        
+        return True
+        
     except Exception as e:
         st.sidebar.error(f"❌ CSV 처리 오류: {e}")
         return False
 
+def load_and_analyze_raw_store(store_path):
+    """원시 저장소 연결 및 분석 (메모리 맵으로 연결하므로 CSV를 다시 읽지 않음)"""
+    try:
+        analyzer = WaterPumpAnalyzer()
+        header = analyzer.attach_raw_store(store_path)
+        st.sidebar.write(f"📊 **데이터 정보**")
+        st.sidebar.write(f"레코드 수: {header['rows']}")
+        st.sidebar.write(f"기간: {header['start_timestamp']} ~ {header['end_timestamp']}")
+        
+        # 온도 분석 실행
+        analyzer.analyze_temperature_characteristics()
+        analyzer.run_extended_analyses()
+        
+        # 챗봇에 데이터 설정
+        st.session_state.chatbot.data = analyzer.get_output_data('raw_store', include_raw=False)
+        st.session_state.chatbot.analyzer = analyzer
+        st.session_state.chatbot.analyze_data()
+        return True
+        
+    except Exception as e:
+        st.sidebar.error(f"❌ 원시 저장소 처리 오류: {e}")
+        return False
+
 def create_sample_data_for_chatbot():
     """챗봇용 샘플 데이터 생성"""
     try:
@@ -428,20 +613,14 @@ def create_sample_data_for_chatbot():
         analyzer = WaterPumpAnalyzer()
         analyzer.load_data(data=sample_data)
         analyzer.analyze_temperature_characteristics()
+        analyzer.run_extended_analyses()
         
-        # 챗봇용 데이터 형식으로 변환
-        chatbot_data = {
-            'metadata': {
-                'analysis_date': datetime.now().isoformat(),
-                'total_batches': len(analyzer.analyzed_data),
-                'window_size': 100,
-                'data_source': 'sample_data'
-            },
-            'analysis_results': analyzer.analyzed_data
-        }
+        # 챗봇용 데이터 형식으로 변환 (챗봇은 원시 데이터를 사용하지 않음)
+        chatbot_data = analyzer.get_output_data('sample_data', include_raw=False)
         
         # 챗봇에 데이터 설정
         st.session_state.chatbot.data = chatbot_data
+        st.session_state.chatbot.analyzer = analyzer
         st.session_state.chatbot.analyze_data()
         
         # 자동으로 water_pump_data 폴더에 저장
@@ -454,8 +633,8 @@ def create_sample_data_for_chatbot():
         json_filename = f"sample_data_analysis_{timestamp}.json"
         json_path = os.path.join(data_folder, json_filename)
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(chatbot_data, f, ensure_ascii=False, indent=2)
+        # 저장 파일에는 원시 데이터 포함
+        analyzer.save_to_json(json_path, data_source='sample_data')
         
         st.sidebar.info(f"📁 샘플 데이터 분석 결과가 {json_path}에 저장되었습니다.")
         
@@ -548,7 +727,7 @@ def main():
         # 업로드 방식 선택
         upload_method = st.radio(
             "데이터 입력 방식:",
-            ["CSV 파일", "JSON 파일", "샘플 데이터"]
+            ["CSV 파일", "JSON 파일", "원시 저장소", "샘플 데이터"]
         )
         
         if upload_method == "CSV 파일":
@@ -558,6 +737,11 @@ def main():
                 help="timestamp, value 컬럼이 포함된 CSV 파일"
             )
             
+            # 같은 파일도 처음부터 다시 분석하려면 캐시 무효화
+            if st.button("🗑️ 분석 캐시 비우기"):
+                removed = AnalysisCache().invalidate()
+                st.info(f"캐시 항목 {removed}개를 삭제했습니다.")
+            
             if uploaded_file and not st.session_state.data_loaded:
                 if st.button("🔄 CSV 분석 실행"):
                     with st.spinner("CSV 데이터 분석 중..."):
@@ -574,8 +758,8 @@ def main():
         elif upload_method == "JSON 파일":
             uploaded_file = st.file_uploader(
                 "JSON 파일을 드래그하거나 선택하세요",
-                type=['json'],
-                help="워터펌프 온도 분석 JSON 파일"
+                type=['json', 'jsonl', 'npz', 'parquet', 'feather'],
+                help="워터펌프 온도 분석 JSON 파일 또는 컬럼형 결과 파일(npz/parquet/feather)"
             )
             
             if uploaded_file and not st.session_state.data_loaded:
@@ -588,6 +772,26 @@ def main():
                     if emergency:
                         st.error("🚨 긴급 상황 감지!")
         
+        elif upload_method == "원시 저장소":
+            stores = list_raw_stores()
+            if not stores:
+                st.info("저장된 원시 저장소가 없습니다. CSV 분석 시 자동으로 생성됩니다.")
+            else:
+                store_paths = {f"{store.get('label', store['name'])} ({store['rows']:,}개 레코드, {store['created_at'][:16]})": store['path'] for store in stores}
+                selected_store = st.selectbox("원시 저장소 선택", list(store_paths))
+                
+                if not st.session_state.data_loaded and st.button("🔄 저장소 분석 실행"):
+                    with st.spinner("원시 저장소 분석 중..."):
+                        success = load_and_analyze_raw_store(store_paths[selected_store])
+                        if success:
+                            st.session_state.data_loaded = True
+                            st.success("✅ 원시 저장소 분석 완료!")
+                            
+                            # 긴급 상황 체크
+                            emergency = st.session_state.chatbot.get_emergency_alert()
+                            if emergency:
+                                st.error("🚨 긴급 상황 감지!")
+        
         else:  # 샘플 데이터
             if st.button("🎲 샘플 데이터 생성") and not st.session_state.data_loaded:
                 with st.spinner("샘플 데이터 생성 중..."):
@@ -1,5 +1,4 @@
 import streamlit as st
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -7,7 +6,20 @@ import plotly.express as px
 import plotly.graph_objects as go
 import requests
 import os
-from water_pump_analyzer import WaterPumpAnalyzer
+import re
+from analysis_cache import AnalysisCache
+from batch_similarity import BatchSimilarityIndex
+from forecasting import describe_crossings
+from water_pump_analyzer import (
+    MOTIFS_COMPUTED,
+    MOTIFS_NOT_COMPUTED,
+    BatchTable,
+    WaterPumpAnalyzer,
+    describe_motif_resolution,
+    list_raw_stores,
+    load_analysis_results,
+    matrix_profile_summary,
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -16,9 +28,16 @@ st.set_page_config(
     layout="wide"
 )
 
+# 모티프 탐색을 실행할 질문 키워드 (반복 패턴, 고장 전조 후보 구간)
+MOTIF_KEYWORDS = ['모티프', '반복 패턴', '반복되는', '디스코드', '특이 구간', '전조']
+
 class LLMWaterPumpChatbot:
     def __init__(self):
         self.data = None
+        # CSV/원시 저장소/샘플을 직접 분석한 분석기 (요청 시 모티프 탐색용, 분석 결과 파일만 올리면 None)
+        self.analyzer = None
+        self.batch_table = None
+        self.similarity_index = None
         self.analysis_cache = {}
         self.llm_provider = None
         self.openai_api_key = None
@@ -33,9 +52,10 @@ class LLMWaterPumpChatbot:
             self.ollama_model = kwargs.get("model", "llama2")
     
     def load_json_data(self, uploaded_file):
-        """JSON 데이터 로드"""
+        """JSON/JSON Lines 또는 컬럼형(npz/parquet/feather) 분석 결과 로드"""
         try:
-            self.data = json.load(uploaded_file)
+            self.data = load_analysis_results(uploaded_file, include_raw=False)
+            self.analyzer = None
             self.analyze_data()
             return True
         except Exception as e:
@@ -47,41 +67,68 @@ class LLMWaterPumpChatbot:
         if not self.data:
             return
             
-        results = self.data['analysis_results']
-        
-        # 전체 통계 계산
-        all_temps = []
-        alert_counts = {'정상': 0, '관찰': 0, '주의': 0, '위험': 0}
-        trend_counts = {'상승': 0, '하강': 0, '평형': 0}
-        stability_counts = {'매우안정': 0, '안정': 0, '보통': 0, '불안정': 0}
-        
-        critical_batches = []
-        
-        for result in results:
-            all_temps.append(result['statistics']['mean'])
-            alert_counts[result['alert_level']] += 1
-            trend_counts[result['trend']] += 1
-            stability_counts[result['stability']] += 1
-            
-            # 위험/주의 배치 식별
-            if result['alert_level'] in ['위험', '주의']:
-                critical_batches.append(result)
+        # 집계는 배치 컬럼 테이블의 배열 연산으로 계산
+        # (분석기가 있으면 분석기가 보관한 테이블을 그대로 사용, 결과 파일만 있으면 배치 목록으로 한 번 생성)
+        if self.analyzer is not None:
+            table = self.analyzer.batch_table()
+        else:
+            table = BatchTable.from_batches(self.data['analysis_results'])
+        self.batch_table = table
+        self.similarity_index = None
         
         self.analysis_cache = {
-            'total_batches': len(results),
-            'avg_temperature': np.mean(all_temps),
-            'max_temperature': max([r['statistics']['max'] for r in results]),
-            'min_temperature': min([r['statistics']['min'] for r in results]),
-            'alert_counts': alert_counts,
-            'trend_counts': trend_counts,
-            'stability_counts': stability_counts,
-            'critical_batches': critical_batches,
+            'total_batches': len(table),
+            'avg_temperature': float(table['mean'].mean()),
+            'max_temperature': float(table['max'].max()),
+            'min_temperature': float(table['min'].min()),
+            'alert_counts': table.label_counts('alert_level', ['정상', '관찰', '주의', '위험']),
+            'trend_counts': table.label_counts('trend', ['상승', '하강', '평형']),
+            'stability_counts': table.label_counts('stability', ['매우안정', '안정', '보통', '불안정']),
+            # 위험/주의 배치 (BatchTable, 순회 시 BatchResult)
+            'critical_batches': table.where('alert_level', ['위험', '주의']),
             'analysis_period': {
-                'start': results[0]['start_timestamp'],
-                'end': results[-1]['end_timestamp']
-            }
+                'start': str(table['start_timestamp'][0]),
+                'end': str(table['end_timestamp'][-1])
+            },
+            # 원시 시계열 이상 감지 이벤트 (점수 큰 순, 이상 감지를 실행하지 않은 결과는 None)
+            'anomalies': (sorted(self.data['metadata']['anomalies'], key=lambda event: event['score'], reverse=True)
+                          if self.data['metadata'].get('anomalies') is not None else None),
+            # 임계 온도 도달 예측 (forecast_thresholds()를 실행하지 않은 결과는 None)
+            'forecast': self.data['metadata'].get('forecast'),
+            # 변화점으로 나눈 운전 구간 (시간 순, detect_change_points()를 실행하지 않은 결과는 None)
+            'segments': self.data['metadata'].get('segments'),
+            # 비슷한 패턴의 배치 그룹 (build_similarity_index()를 실행하지 않은 결과는 None)
+            'batch_clusters': self.data['metadata'].get('batch_clusters'),
+            # 매트릭스 프로파일 모티프/디스코드 (모티프 질문을 받으면 탐색, 탐색 전 결과는 status가 not_computed이고 목록은 None)
+            'matrix_profile': matrix_profile_summary(self.data['metadata']),
+            'motifs': self.data['metadata'].get('motifs'),
+            'discords': self.data['metadata'].get('discords')
         }
     
+    def discover_motifs(self):
+        """아직 탐색하지 않았으면 분석기로 모티프를 탐색하여 분석 결과와 캐시 항목에 반영 (모티프 질문을 받았을 때만 실행)"""
+        if self.analyzer is None or self.analysis_cache['matrix_profile']['status'] != MOTIFS_NOT_COMPUTED:
+            return
+        metadata = AnalysisCache().discover_motifs(self.analyzer, self.data['metadata']['data_source'])
+        self.data['metadata'].update(metadata)
+        self.analysis_cache.update({
+            'matrix_profile': metadata['matrix_profile'],
+            'motifs': metadata.get('motifs'),
+            'discords': metadata.get('discords')
+        })
+    
+    def get_similarity_index(self):
+        """배치 통계 특징으로 만든 유사도 색인 (원시 데이터가 없는 JSON 결과용, 처음 질문할 때 생성)"""
+        if self.similarity_index is None:
+            self.similarity_index = BatchSimilarityIndex.from_table(self.batch_table)
+        return self.similarity_index
+    
+    def pattern_groups(self):
+        """분석 결과의 패턴 그룹 (없으면 배치 통계 색인으로 그룹화)"""
+        if self.analysis_cache['batch_clusters']:
+            return self.analysis_cache['batch_clusters']
+        return self.get_similarity_index().cluster_summaries(self.batch_table)
+    
     def create_context_prompt(self, user_query):
         """JSON 데이터를 기반으로 컨텍스트 프롬프트 생성"""
         if not self.data or not self.analysis_cache:
@@ -97,7 +144,7 @@ class LLMWaterPumpChatbot:
 ## 데이터 개요
 - 분석 기간: {cache['analysis_period']['start'][:10]} ~ {cache['analysis_period']['end'][:10]}
 - 총 배치 수: {cache['total_batches']}개
-- 윈도우 크기: {metadata.get('window_size', 100)} 레코드
+- 윈도우 크기: {metadata.get('window_freq') or f"{metadata.get('window_size', 100)} 레코드"}
 - 데이터 소스: {metadata.get('data_source', 'N/A')}
 
 ## 온도 통계
@@ -126,27 +173,91 @@ class LLMWaterPumpChatbot:
 """
         
         # 위험 배치 정보 추가
-        if cache['critical_batches']:
+        if len(cache['critical_batches']):
             context += f"위험/주의 배치: {len(cache['critical_batches'])}개\n"
             for batch in cache['critical_batches'][:5]:  # 최대 5개만 표시
-                context += f"- 배치 {batch['batch_id']}: {batch['statistics']['mean']:.1f}°C ({batch['alert_level']}, {batch['value_label']})\n"
+                context += f"- 배치 {batch.batch_id}: {batch.mean:.1f}°C ({batch.alert_level}, {batch.value_label})\n"
         else:
             context += "현재 위험 또는 주의 배치 없음\n"
         
+        # 원시 시계열 이상 감지 이벤트 (점수 상위 5개)
+        if cache['anomalies'] is not None:
+            context += f"\n## 이상 감지 이벤트 ({len(cache['anomalies'])}건)\n"
+            labels = {batch.batch_id: batch for batch in self.batch_table}
+            for event in cache['anomalies'][:5]:
+                batch = labels.get(event['batch_id'])
+                label = f"{batch.value_label}, {batch.alert_level}" if batch is not None else "배치 정보 없음"
+                context += (f"- {event['peak_timestamp'][:16]}: {event['peak_value']:.1f}°C, 점수 {event['score']:.1f}σ, "
+                            f"감지기 {', '.join(event['detectors'])} (배치 {event['batch_id']}: {label})\n")
+        
+        # 임계 온도 도달 예측 (최근 레코드로 적합한 Holt/직선 모델)
+        if cache['forecast'] is not None:
+            context += f"\n## 임계 온도 도달 예측 (기준 시각 {cache['forecast']['last_timestamp']})\n"
+            for line in describe_crossings(cache['forecast']):
+                context += f"- {line}\n"
+        
+        # 변화점으로 나눈 운전 구간 (현재 구간과 평균 변화가 큰 변화점 5개)
+        if cache['segments'] is not None:
+            segments = cache['segments']
+            current = segments[-1]
+            context += f"\n## 운전 구간 ({len(segments)}개, 변화점 {len(segments) - 1}개)\n"
+            context += (f"- 현재 구간: {current['start_timestamp'][:16]}부터 평균 {current['mean']:.1f}°C, "
+                        f"표준편차 {current['std']:.2f} ({current['record_count']}개 레코드)\n")
+            shifts = sorted(segments[1:], key=lambda segment: abs(segment['mean_shift']), reverse=True)[:5]
+            for segment in sorted(shifts, key=lambda segment: segment['segment_id']):
+                context += (f"- {segment['start_timestamp'][:16]} 변화점: 평균 {segment['mean_shift']:+.1f}°C → "
+                            f"{segment['mean']:.1f}°C, 표준편차 {segment['std']:.2f}\n")
+        
+        # 매트릭스 프로파일 디스코드(고장 전조 후보)와 반복 패턴 (느린 탐색이라 모티프 관련 질문을 받았을 때 실행)
+        if any(word in user_query for word in MOTIF_KEYWORDS):
+            self.discover_motifs()
+        if cache['matrix_profile']['status'] == MOTIFS_COMPUTED:
+            context += "\n## 특이 구간 (디스코드, 다른 어떤 구간과도 모양이 닮지 않은 구간)\n"
+            resolution = describe_motif_resolution(cache['matrix_profile'])
+            if resolution is not None:
+                context += f"- 참고: {resolution}\n"
+            for discord in cache['discords']:
+                context += (f"- {discord['start_timestamp'][:16]} ~ {discord['end_timestamp'][:16]}: 평균 {discord['mean']:.1f}°C, "
+                            f"최고 {discord['max']:.1f}°C, 거리 {discord['distance']:.1f} (배치 {discord['batch_id']})\n")
+            context += "\n## 반복 패턴 (모티프)\n"
+            for motif in cache['motifs']:
+                starts = ', '.join(occurrence['start_timestamp'][:16] for occurrence in motif['occurrences'])
+                context += f"- 모티프 {motif['rank']}: {len(motif['occurrences'])}회, 쌍 거리 {motif['distance']:.2f}, 시작 {starts}\n"
+        
+        # 비슷한 패턴의 배치 그룹 (그룹화/전략 질문에 사용)
+        groups = self.pattern_groups()
+        context += f"\n## 패턴 그룹 ({len(groups)}개)\n"
+        for group in groups:
+            context += (f"- 그룹 {group['cluster_id']}: {group['size']}개 배치 ({group['share']:.0%}), "
+                        f"평균 {group['mean_temperature']:.1f}°C, 최고 {group['max_temperature']:.1f}°C, "
+                        f"표준편차 평균 {group['mean_std']:.2f}, {group['value_label']}/{group['alert_level']}/{group['trend']}, "
+                        f"대표 배치 {', '.join(str(batch_id) for batch_id in group['representative_batches'][:3])}\n")
+        
+        # 질문에 특정 배치가 있으면 그 배치와 가장 비슷한 배치
+        match = re.search(r'배치\s*(\d+)', user_query)
+        if match and self.get_similarity_index().cluster_of(int(match.group(1))) is not None:
+            batch_id = int(match.group(1))
+            labels = {batch.batch_id: batch for batch in self.batch_table}
+            context += f"\n## 배치 {batch_id}의 유사 배치\n"
+            for similar in self.get_similarity_index().similar(batch_id, 5):
+                batch = labels[similar['batch_id']]
+                context += (f"- 배치 {batch.batch_id} ({batch.start_timestamp[:16]}): 평균 {batch.mean:.1f}°C, "
+                            f"최고 {batch.max:.1f}°C, {batch.value_label}, {batch.alert_level}, 거리 {similar['distance']:.2f}\n")
+        
         # 상세 분석 데이터 (최근 5개 배치)
         context += "\n## 최근 배치 상세 분석\n"
-        recent_batches = self.data['analysis_results'][-5:]
+        recent_batches = self.batch_table[-5:]
         for batch in recent_batches:
             context += f"""
-배치 {batch['batch_id']}:
-- 시간: {batch['start_timestamp'][:16]}
-- 평균 온도: {batch['statistics']['mean']:.1f}°C
-- 온도 범위: {batch['statistics']['min']:.1f}°C ~ {batch['statistics']['max']:.1f}°C
-- 표준편차: {batch['statistics']['std']:.1f}°C
-- 특성 라벨: {batch['value_label']}
-- 트렌드: {batch['trend']}
-- 안정성: {batch['stability']}
-- 경고 수준: {batch['alert_level']}
+배치 {batch.batch_id}:
+- 시간: {batch.start_timestamp[:16]}
+- 평균 온도: {batch.mean:.1f}°C
+- 온도 범위: {batch.min:.1f}°C ~ {batch.max:.1f}°C
+- 표준편차: {batch.std:.1f}°C
+- 특성 라벨: {batch.value_label}
+- 트렌드: {batch.trend}
+- 안정성: {batch.stability}
+- 경고 수준: {batch.alert_level}
 """
         
         context += f"\n## 사용자 질문\n{user_query}\n"
@@ -243,56 +354,73 @@ def load_and_analyze_csv(uploaded_file):
         # 파일 포인터 리셋
         uploaded_file.seek(0)
         
-        # 분석기 생성 및 데이터 로드
-        analyzer = WaterPumpAnalyzer()
-        
-        if analyzer.load_data(uploaded_file=uploaded_file):
-            st.sidebar.write(f"📊 **데이터 정보**")
-            st.sidebar.write(f"레코드 수: {len(analyzer.data)}")
-            st.sidebar.write(f"온도 범위: {analyzer.data['value'].min():.1f}°C ~ {analyzer.data['value'].max():.1f}°C")
-            
-            # 온도 분석 실행
-            analyzer.analyze_temperature_characteristics()
-            
-            # 챗봇용 데이터 형식으로 변환
-            chatbot_data = {
-                'metadata': {
-                    'analysis_date': datetime.now().isoformat(),
-                    'total_batches': len(analyzer.analyzed_data),
-                    'window_size': 100,
-                    'data_source': 'uploaded_csv_file'
-                },
-                'analysis_results': analyzer.analyzed_data
-            }
-            
-            # 챗봇에 데이터 설정
-            st.session_state.chatbot.data = chatbot_data
-            st.session_state.chatbot.analyze_data()
-            
-            # 자동으로 water_pump_data 폴더에 저장
-            import os
-            data_folder = 'water_pump_data'
-            if not os.path.exists(data_folder):
-                os.makedirs(data_folder)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            json_filename = f"llm_chatbot_analysis_{timestamp}.json"
-            json_path = os.path.join(data_folder, json_filename)
-            
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(chatbot_data, f, ensure_ascii=False, indent=2)
-            
-            st.sidebar.info(f"📁 분석 결과가 {json_path}에 저장되었습니다.")
-            
-            return True
-        else:
+        # 같은 내용과 분석 파라미터로 분석한 결과가 캐시에 있으면 재분석 없이 사용
+        cache = AnalysisCache()
+        analyzer, cache_hit = cache.analyze_file(uploaded_file)
+        if analyzer is None:
             st.sidebar.error("❌ CSV 파일 처리 실패")
             return False
-            
+        
+        # 챗봇용 데이터 형식으로 변환 (챗봇은 원시 데이터를 사용하지 않음)
+        st.session_state.chatbot.data = analyzer.get_output_data('uploaded_csv_file', include_raw=False)
+        st.session_state.chatbot.analyzer = analyzer
+        st.session_state.chatbot.analyze_data()
+        if cache_hit:
+            st.sidebar.info(f"⚡ 캐시된 분석 결과 사용 ({len(analyzer.analyzed_data)}개 배치)")
+            return True
+        
+        st.sidebar.write(f"📊 **데이터 정보**")
+        st.sidebar.write(f"레코드 수: {len(analyzer.data)}")
+        st.sidebar.write(f"온도 범위: {analyzer.data['value'].min():.1f}°C ~ {analyzer.data['value'].max():.1f}°C")
+        
+        # 자동으로 water_pump_data 폴더에 저장
+        import os
+        data_folder = 'water_pump_data'
+        if not os.path.exists(data_folder):
+            os.makedirs(data_folder)
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        json_filename = f"llm_chatbot_analysis_{timestamp}.json"
+        json_path = os.path.join(data_folder, json_filename)
+        
+        # 저장 파일에는 원시 데이터 포함
+        analyzer.save_to_json(json_path, data_source='uploaded_csv_file')
+        
+        st.sidebar.info(f"📁 분석 결과가 {json_path}에 저장되었습니다.")
+        
+        # 다른 세션이 CSV를 다시 읽지 않도록 원시 저장소(메모리 맵)로도 저장 (파일 내용 해시 이름, 같은 내용은 한 번만 저장)
+        store_path = cache.save_raw_store(analyzer, label=uploaded_file.name)
+        st.sidebar.info(f"🗄️ 원시 저장소: {store_path}")
+        
+        return True
+        
     except Exception as e:
         st.sidebar.error(f"❌ CSV 처리 오류: {e}")
         return False
 
+def load_and_analyze_raw_store(store_path):
+    """원시 저장소 연결 및 분석 (메모리 맵으로 연결하므로 CSV를 다시 읽지 않음)"""
+    try:
+        analyzer = WaterPumpAnalyzer()
+        header = analyzer.attach_raw_store(store_path)
+        st.sidebar.write(f"📊 **데이터 정보**")
+        st.sidebar.write(f"레코드 수: {header['rows']}")
+        st.sidebar.write(f"기간: {header['start_timestamp']} ~ {header['end_timestamp']}")
+        
+        # 온도 분석 실행
+        analyzer.analyze_temperature_characteristics()
+        analyzer.run_extended_analyses()
+        
+        # 챗봇에 데이터 설정
+        st.session_state.chatbot.data = analyzer.get_output_data('raw_store', include_raw=False)
+        st.session_state.chatbot.analyzer = analyzer
+        st.session_state.chatbot.analyze_data()
+        return True
+        
+    except Exception as e:
+        st.sidebar.error(f"❌ 원시 저장소 처리 오류: {e}")
+        return False
+
 def create_sample_data_for_chatbot():
     """챗봇용 샘플 데이터 생성"""
     try:
@@ -321,20 +449,14 @@ def create_sample_data_for_chatbot():
         analyzer = WaterPumpAnalyzer()
         analyzer.load_data(data=sample_data)
         analyzer.analyze_temperature_characteristics()
+        analyzer.run_extended_analyses()
         
-        # 챗봇용 데이터 형식으로 변환
-        chatbot_data = {
-            'metadata': {
-                'analysis_date': datetime.now().isoformat(),
-                'total_batches': len(analyzer.analyzed_data),
-                'window_size': 100,
-                'data_source': 'sample_data'
-            },
-            'analysis_results': analyzer.analyzed_data
-        }
+        # 챗봇용 데이터 형식으로 변환 (챗봇은 원시 데이터를 사용하지 않음)
+        chatbot_data = analyzer.get_output_data('sample_data', include_raw=False)
         
         # 챗봇에 데이터 설정
         st.session_state.chatbot.data = chatbot_data
+        st.session_state.chatbot.analyzer = analyzer
         st.session_state.chatbot.analyze_data()
         
         # 자동으로 water_pump_data 폴더에 저장
@@ -347,8 +469,8 @@ def create_sample_data_for_chatbot():
         json_filename = f"llm_sample_data_analysis_{timestamp}.json"
         json_path = os.path.join(data_folder, json_filename)
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(chatbot_data, f, ensure_ascii=False, indent=2)
+        # 저장 파일에는 원시 데이터 포함
+        analyzer.save_to_json(json_path, data_source='sample_data')
         
         st.sidebar.info(f"📁 샘플 데이터 분석 결과가 {json_path}에 저장되었습니다.")
         
@@ -516,7 +638,7 @@ def main():
         # 업로드 방식 선택
         upload_method = st.radio(
             "데이터 입력 방식:",
-            ["CSV 파일", "JSON 파일", "샘플 데이터"],
+            ["CSV 파일", "JSON 파일", "원시 저장소", "샘플 데이터"],
             disabled=not llm_configured
         )
         
@@ -527,6 +649,11 @@ def main():
                 help="timestamp, value 컬럼이 포함된 CSV 파일"
             )
             
+            # 같은 파일도 처음부터 다시 분석하려면 캐시 무효화
+            if st.button("🗑️ 분석 캐시 비우기"):
+                removed = AnalysisCache().invalidate()
+                st.info(f"캐시 항목 {removed}개를 삭제했습니다.")
+            
             if uploaded_file and not st.session_state.data_loaded:
                 if st.button("🔄 CSV 분석 실행"):
                     with st.spinner("CSV 데이터 분석 중..."):
@@ -538,8 +665,8 @@ def main():
         elif upload_method == "JSON 파일" and llm_configured:
             uploaded_file = st.file_uploader(
                 "JSON 파일을 드래그하거나 선택하세요",
-                type=['json'],
-                help="워터펌프 온도 분석 JSON 파일"
+                type=['json', 'jsonl', 'npz', 'parquet', 'feather'],
+                help="워터펌프 온도 분석 JSON 파일 또는 컬럼형 결과 파일(npz/parquet/feather)"
             )
             
             if uploaded_file and not st.session_state.data_loaded:
@@ -547,6 +674,21 @@ def main():
                     st.session_state.data_loaded = True
                     st.success("✅ JSON 데이터 로드 완료!")
         
+        elif upload_method == "원시 저장소" and llm_configured:
+            stores = list_raw_stores()
+            if not stores:
+                st.info("저장된 원시 저장소가 없습니다. CSV 분석 시 자동으로 생성됩니다.")
+            else:
+                store_paths = {f"{store.get('label', store['name'])} ({store['rows']:,}개 레코드, {store['created_at'][:16]})": store['path'] for store in stores}
+                selected_store = st.selectbox("원시 저장소 선택", list(store_paths))
+                
+                if not st.session_state.data_loaded and st.button("🔄 저장소 분석 실행"):
+                    with st.spinner("원시 저장소 분석 중..."):
+                        success = load_and_analyze_raw_store(store_paths[selected_store])
+                        if success:
+                            st.session_state.data_loaded = True
+                            st.success("✅ 원시 저장소 분석 완료!")
+        
         elif upload_method == "샘플 데이터" and llm_configured:
             if st.button("🎲 샘플 데이터 생성") and not st.session_state.data_loaded:
                 with st.spinner("샘플 데이터 생성 중..."):
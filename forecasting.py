@@ -0,0 +1,409 @@
+"""
+임계 온도 도달 시점 예측 (선형 / Holt 이중 지수 평활)
+
+- 펌프마다 최근 fit_window개 레코드(롤링 구간)로 두 모델을 적합
+  - linear: 최소제곱 직선, 예측 구간 σ·sqrt(1 + 1/n + (x - x̄)² / Sxx)
+  - holt: 수준/추세 이중 지수 평활 (α, β), 예측 구간 σ·sqrt(1 + (h-1)(α² + αγh + γ²h(2h-1)/6)), γ = α·β
+- 70/80/85/90°C 각각에 대해 예측값이 처음 임계값에 닿는 시점(eta)과
+  상한/하한 예측 구간이 닿는 시점(earliest/latest)을 horizon 레코드 안에서 탐색
+  - eta: level + slope·h = T를 바로 풀어 계산 (펌프 x 임계값)
+  - 예측 구간: 단조 증가하는 구간(추세가 오르는 상한)은 임계값별 이분 탐색,
+    단조가 아닌 구간(추세가 내리는 상한, 오르는 하한)은 구간 폭의 상한으로 닿을 수 있는 펌프만 골라
+    horizon 전체를 계산한 뒤 누적 최댓값으로 이분 탐색
+- 모든 계산은 (펌프 수, ...) 배열 연산이므로 플릿 전체를 한 번에 예측
+- ForecastState는 펌프별 링 버퍼와 합계(Σy, Σy², Σxy, Holt 수준/추세, 잔차 제곱합)를 보관하여
+  새 레코드마다 전체 이력을 다시 적합하지 않고 O(1)로 갱신
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+# 기본값은 5분 간격 센서 기준 (적합 구간 1일, 탐색 범위 7일)
+DEFAULT_FORECAST_PARAMS = {
+    'fit_window': 288,
+    'horizon': 2016,
+    'holt_alpha': 0.1,
+    'holt_beta': 0.002,
+    'confidence': 0.9
+}
+
+FORECAST_THRESHOLDS = (70.0, 80.0, 85.0, 90.0)
+FORECAST_MODELS = ('linear', 'holt')
+
+# 단조가 아닌 예측 구간을 탐색할 때 (펌프, horizon) 배열을 만드는 펌프 묶음 크기
+_PUMP_CHUNK = 256
+
+
+def forecast_params(overrides=None):
+    """기본 예측 파라미터에 overrides를 덮어쓴 사본 (값 검증 포함)"""
+    params = dict(DEFAULT_FORECAST_PARAMS)
+    if overrides:
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"알 수 없는 예측 파라미터입니다: {sorted(unknown)}")
+        params.update(overrides)
+    params['fit_window'] = int(params['fit_window'])
+    params['horizon'] = int(params['horizon'])
+    if params['fit_window'] < 3 or params['horizon'] < 1:
+        raise ValueError("fit_window는 3 이상, horizon은 1 이상이어야 합니다.")
+    if not 0 < params['holt_alpha'] <= 1 or not 0 <= params['holt_beta'] <= 1:
+        raise ValueError("holt_alpha는 (0, 1], holt_beta는 [0, 1] 범위여야 합니다.")
+    if not 0 < params['confidence'] < 1:
+        raise ValueError("confidence는 0과 1 사이여야 합니다.")
+    return params
+
+
+def holt_growth(alpha, beta, steps):
+    """
+    Holt h단계 예측 오차 표준편차 / 한 단계 오차 표준편차 (steps: h 배열)
+    성분형 갱신에서 추세는 오차의 α·β배만큼 움직이므로 분산 공식의 추세 계수는 α·β
+    """
+    steps = np.asarray(steps, dtype=np.float64)
+    trend_gain = alpha * beta
+    return np.sqrt(1 + (steps - 1) * (alpha ** 2 + alpha * trend_gain * steps
+                                      + trend_gain ** 2 * steps * (2 * steps - 1) / 6))
+
+
+def _mean_crossing(level, slope, thresholds, horizon):
+    """
+    예측값 level + slope·h가 처음 임계값 이상이 되는 단계 h (1..horizon, 없으면 NaN)의 (펌프, 임계값) 배열
+    h = ⌈(T - level) / slope⌉를 바로 계산한 뒤 반올림 오차만 한 단계 보정
+    """
+    level, slope = level[:, None], slope[:, None]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        steps = np.where(slope > 0, np.maximum(np.ceil((thresholds - level) / slope), 1.0), 1.0)
+        steps = np.where((steps > 1) & (level + slope * (steps - 1) >= thresholds), steps - 1, steps)
+        steps = np.where(level + slope * steps >= thresholds, steps, steps + 1)
+        reached = (level + slope * steps >= thresholds) & (steps <= horizon)
+    return np.where(reached, steps, np.nan)
+
+
+def _first_reach(value_at, n_rows, thresholds, horizon):
+    """
+    h에 대해 단조 증가하는 value_at(h) (h: (행, 임계값) 정수 배열)가 처음 임계값 이상이 되는 h
+    (1..horizon, 없으면 NaN), 행과 임계값마다 이분 탐색하므로 value_at 호출은 log2(horizon)번
+    """
+    low = np.ones((n_rows, len(thresholds)), dtype=np.int64)
+    high = np.full_like(low, horizon + 1)
+    searching = low < high
+    while searching.any():
+        middle = np.minimum((low + high) // 2, horizon)
+        reached = value_at(middle) >= thresholds
+        high = np.where(searching & reached, middle, high)
+        low = np.where(searching & ~reached, middle + 1, low)
+        searching = low < high
+    return np.where(low <= horizon, low, np.nan)
+
+
+class ForecastState:
+    """
+    펌프 P대의 예측 상태 (모든 필드는 펌프 축 배열)
+    - 링 버퍼: 최근 fit_window개 값/시각/Holt 한 단계 예측 오차 제곱
+    - 선형 모델 합계는 버퍼 안 위치 x = 0..n-1 (오래된 순) 기준, 값은 펌프별 shift를 뺀 값으로 누적
+    """
+
+    def __init__(self, n_pumps, params=None):
+        self.params = forecast_params(params)
+        window = self.params['fit_window']
+        self.n_pumps = n_pumps
+        self.window = window
+        self.values = np.full((n_pumps, window), np.nan)
+        self.times = np.zeros((n_pumps, window), dtype=np.int64)
+        self.errors = np.full((n_pumps, window), np.nan)
+        self.pos = np.zeros(n_pumps, dtype=np.int64)
+        self.count = np.zeros(n_pumps, dtype=np.int64)
+        self.total = np.zeros(n_pumps, dtype=np.int64)
+        self.shift = np.zeros(n_pumps)
+        self.sum_y = np.zeros(n_pumps)
+        self.sum_yy = np.zeros(n_pumps)
+        self.sum_xy = np.zeros(n_pumps)
+        self.sum_err = np.zeros(n_pumps)
+        self.n_err = np.zeros(n_pumps, dtype=np.int64)
+        self.level = np.full(n_pumps, np.nan)
+        self.trend = np.zeros(n_pumps)
+
+    def _ordered(self, rows):
+        """rows 펌프의 버퍼 위치를 오래된 순으로 정렬한 인덱스와 유효 여부 (rows, window)"""
+        start = np.where(self.count[rows] == self.window, self.pos[rows], 0)
+        order = (start[:, None] + np.arange(self.window)) % self.window
+        valid = np.arange(self.window) < self.count[rows][:, None]
+        return order, valid
+
+    def _recompute_sums(self, rows):
+        """합계 누적 오차 제거 (window번 갱신마다 버퍼로 다시 계산, 분할상환 O(1))"""
+        if len(rows) == 0:
+            return
+        order, valid = self._ordered(rows)
+        shifted = np.where(valid, self.values[rows[:, None], order] - self.shift[rows][:, None], 0.0)
+        self.sum_y[rows] = shifted.sum(axis=1)
+        self.sum_yy[rows] = (shifted * shifted).sum(axis=1)
+        self.sum_xy[rows] = (shifted * np.arange(self.window)).sum(axis=1)
+        errors = self.errors[rows]
+        self.sum_err[rows] = np.nansum(errors, axis=1)
+        self.n_err[rows] = np.count_nonzero(~np.isnan(errors), axis=1)
+
+    @classmethod
+    def from_series(cls, series, params=None):
+        """
+        펌프별 (int64 epoch ns, 값) 시계열 목록의 최근 fit_window개 레코드로 상태 생성
+        Holt 수준/추세는 같은 구간의 직선 적합값으로 초기화한 뒤 구간 전체를 펌프 축 벡터 연산으로 평활
+        """
+        state = cls(len(series), params)
+        window = state.window
+        for row, (epoch_ns, values) in enumerate(series):
+            values = np.asarray(values, dtype=np.float64)
+            epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+            keep = ~np.isnan(values)
+            tail_values, tail_times = values[keep][-window:], epoch_ns[keep][-window:]
+            n = len(tail_values)
+            state.values[row, :n] = tail_values
+            state.times[row, :n] = tail_times
+            state.count[row] = n
+            state.total[row] = int(keep.sum())
+            state.pos[row] = n % window
+            state.shift[row] = tail_values[0] if n else 0.0
+        rows = np.arange(state.n_pumps)
+        state._recompute_sums(rows)
+
+        # Holt 초기값: 첫 예측(수준 + 추세)이 직선 적합의 x = 0 값과 같도록
+        linear = state._linear_fit(rows)
+        alpha, beta = state.params['holt_alpha'], state.params['holt_beta']
+        state.trend = np.nan_to_num(linear['slope'])
+        level = linear['intercept'] - state.trend
+        for column in range(window):
+            active = column < state.count
+            observed = state.values[:, column]
+            predicted = level + state.trend
+            new_level = np.where(active, alpha * observed + (1 - alpha) * predicted, level)
+            state.trend = np.where(active, beta * (new_level - level) + (1 - beta) * state.trend, state.trend)
+            state.errors[:, column] = np.where(active, (observed - predicted) ** 2, np.nan)
+            level = new_level
+        state.level = np.where(state.count > 0, level, np.nan)
+        state._recompute_sums(rows)
+        return state
+
+    def update(self, values, epoch_ns, pumps=None):
+        """
+        펌프별 새 레코드 하나씩 반영 (values/epoch_ns는 pumps 순서의 배열, pumps=None이면 전체 펌프)
+        NaN 값의 펌프는 건너뜀, 펌프당 O(1)
+        """
+        rows = np.arange(self.n_pumps) if pumps is None else np.asarray(pumps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        epoch_ns = np.asarray(epoch_ns, dtype=np.int64).reshape(-1)
+        keep = ~np.isnan(values)
+        rows, values, epoch_ns = rows[keep], values[keep], epoch_ns[keep]
+        if len(rows) == 0:
+            return
+
+        alpha, beta = self.params['holt_alpha'], self.params['holt_beta']
+        first = self.total[rows] == 0
+        self.shift[rows] = np.where(first, values, self.shift[rows])
+
+        # Holt: 한 단계 예측 오차 후 수준/추세 갱신 (첫 레코드는 수준만 설정)
+        level, trend = self.level[rows], self.trend[rows]
+        predicted = level + trend
+        error = np.where(first, np.nan, (values - predicted) ** 2)
+        new_level = np.where(first, values, alpha * values + (1 - alpha) * predicted)
+        self.trend[rows] = np.where(first, 0.0, beta * (new_level - level) + (1 - beta) * trend)
+        self.level[rows] = new_level
+
+        # 링 버퍼: 가득 찬 펌프는 가장 오래된 값을 빼고 위치를 한 칸씩 당김 (Σxy -= Σy - y0)
+        pos = self.pos[rows]
+        full = self.count[rows] == self.window
+        shifted = values - self.shift[rows]
+        oldest = np.where(full, self.values[rows, pos] - self.shift[rows], 0.0)
+        oldest_error = np.where(full, self.errors[rows, pos], np.nan)
+        self.sum_xy[rows] = np.where(
+            full,
+            self.sum_xy[rows] - (self.sum_y[rows] - oldest) + (self.window - 1) * shifted,
+            self.sum_xy[rows] + self.count[rows] * shifted
+        )
+        self.sum_y[rows] += shifted - oldest
+        self.sum_yy[rows] += shifted * shifted - oldest * oldest
+        self.sum_err[rows] += np.nan_to_num(error) - np.nan_to_num(oldest_error)
+        self.n_err[rows] += (~np.isnan(error)).astype(np.int64) - (~np.isnan(oldest_error)).astype(np.int64)
+
+        self.values[rows, pos] = values
+        self.times[rows, pos] = epoch_ns
+        self.errors[rows, pos] = error
+        self.pos[rows] = (pos + 1) % self.window
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+        self.total[rows] += 1
+        self._recompute_sums(rows[self.total[rows] % self.window == 0])
+
+    def update_many(self, pump_index, values, epoch_ns):
+        """
+        여러 펌프의 레코드 묶음 반영 (pump_index: 레코드별 펌프 위치, 펌프 안에서는 시간 순)
+        펌프별 n번째 레코드끼리 모아 update()를 호출하므로 반복 횟수는 펌프당 최대 레코드 수
+        """
+        pump_index = np.asarray(pump_index, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+        order = np.argsort(pump_index, kind='stable')
+        sorted_pumps = pump_index[order]
+        starts = np.flatnonzero(np.r_[True, sorted_pumps[1:] != sorted_pumps[:-1]]) if len(order) else order
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        for step in range(int(rank.max()) + 1 if len(rank) else 0):
+            selected = order[rank == step]
+            self.update(values[selected], epoch_ns[selected], pump_index[selected])
+
+    def _linear_fit(self, rows):
+        """rows 펌프의 최소제곱 직선 (x는 버퍼 위치, 절편/마지막 적합값은 원래 온도 단위)"""
+        n = self.count[rows].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = (n - 1) / 2
+            sxx = n * (n * n - 1) / 12
+            y_mean = self.sum_y[rows] / n
+            slope = (self.sum_xy[rows] - x_mean * self.sum_y[rows]) / sxx
+            residual = self.sum_yy[rows] - n * y_mean * y_mean - slope * slope * sxx
+            sigma = np.sqrt(np.maximum(residual, 0.0) / (n - 2))
+        enough = n >= 3
+        intercept = y_mean - slope * x_mean + self.shift[rows]
+        return {
+            'n': n,
+            'x_mean': x_mean,
+            'sxx': sxx,
+            'slope': np.where(enough, slope, np.nan),
+            'intercept': np.where(enough, intercept, np.nan),
+            'level': np.where(enough, intercept + slope * (n - 1), np.nan),
+            'sigma': np.where(enough, sigma, np.nan)
+        }
+
+    def step_seconds(self):
+        """펌프별 평균 레코드 간격 (초, 버퍼의 가장 오래된/최신 시각 차이로 계산)"""
+        rows = np.arange(self.n_pumps)
+        order, _ = self._ordered(rows)
+        newest = self.times[rows, (self.pos - 1) % self.window]
+        oldest = self.times[rows, order[:, 0]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (newest - oldest) / 1e9 / (self.count - 1)
+        return np.where(self.count >= 2, step, np.nan)
+
+    @staticmethod
+    def _peak_reach(band, rows, offset, thresholds, steps):
+        """
+        단조가 아닌 예측 구간 band(rows, h, offset)가 처음 임계값 이상이 되는 단계 (없으면 NaN)
+        _PUMP_CHUNK개 펌프씩 horizon 전체를 계산한 뒤 누적 최댓값(단조 증가)에서 이분 탐색
+        """
+        found = np.full((len(rows), len(thresholds)), np.nan)
+        for start in range(0, len(rows), _PUMP_CHUNK):
+            chunk = rows[start:start + _PUMP_CHUNK]
+            peak = np.maximum.accumulate(band(chunk, steps, offset), axis=1)
+            found[start:start + len(chunk)] = _first_reach(
+                lambda h: np.take_along_axis(peak, h - 1, axis=1), len(chunk), thresholds, len(steps)
+            )
+        return found
+
+    def forecast(self, thresholds=FORECAST_THRESHOLDS):
+        """
+        임계값별 도달 시점 예측 (단위: 시간, 탐색 범위 안에서 닿지 않으면 NaN, 이미 넘었으면 0)
+        반환: {'params', 'thresholds', 'records', 'step_seconds', 'last_epoch_ns', 'current',
+               'models': {모델: {'level', 'slope_per_hour', 'sigma', 'eta_hours', 'earliest_hours', 'latest_hours'}}}
+        """
+        params = self.params
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        rows = np.arange(self.n_pumps)
+        z = NormalDist().inv_cdf(0.5 + params['confidence'] / 2)
+        horizon = params['horizon']
+        steps = np.arange(1, horizon + 1, dtype=np.float64)
+        step_hours = self.step_seconds() / 3600
+        linear = self._linear_fit(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            holt_sigma = np.sqrt(self.sum_err / self.n_err)
+        models = {
+            'linear': (linear['level'], linear['slope'], linear['sigma']),
+            'holt': (self.level, self.trend, holt_sigma)
+        }
+
+        result = {
+            'params': dict(params),
+            'thresholds': thresholds.tolist(),
+            'records': self.count.copy(),
+            'step_seconds': step_hours * 3600,
+            'last_epoch_ns': self.times[rows, (self.pos - 1) % self.window],
+            'current': self.values[rows, (self.pos - 1) % self.window],
+            'models': {}
+        }
+        for name, (level, slope, sigma) in models.items():
+            if name == 'linear':
+                def spread(rows, h):
+                    x = self.count[rows, None] - 1 + h - linear['x_mean'][rows, None]
+                    return sigma[rows, None] * np.sqrt(1 + 1 / linear['n'][rows, None] + x * x / linear['sxx'][rows, None])
+            else:
+                def spread(rows, h):
+                    return sigma[rows, None] * holt_growth(params['holt_alpha'], params['holt_beta'], h)
+
+            def band(rows, h, offset):
+                return level[rows, None] + slope[rows, None] * h + offset * spread(rows, h)
+
+            eta = _mean_crossing(level, slope, thresholds, horizon)
+            earliest = np.full_like(eta, np.nan)
+            latest = np.full_like(eta, np.nan)
+            # 상한: 추세가 오르거나 평평하면 예측값과 구간 폭이 모두 늘어나므로 단조 증가
+            rising = np.flatnonzero(slope >= 0)
+            earliest[rising] = _first_reach(lambda h: band(rising, h, z), len(rising), thresholds, horizon)
+            # 추세가 내리는 상한과 오르는 하한은 단조가 아님: 구간 폭이 h에 대해 늘어나므로
+            # 상한 ≤ level + slope + z·spread(horizon), 하한 ≤ level + slope·horizon - z·spread(1)로
+            # 어떤 임계값에도 닿을 수 없는 펌프는 계산하지 않음
+            above_now = level[:, None] >= thresholds
+            all_rows = np.arange(self.n_pumps)
+            edges = spread(all_rows, np.array([1.0, horizon]))
+            upper_bound = level + slope + z * edges[:, 1]
+            lower_bound = level + slope * horizon - z * edges[:, 0]
+            falling = np.flatnonzero((slope < 0) & ((upper_bound[:, None] >= thresholds) & ~above_now).any(axis=1))
+            earliest[falling] = self._peak_reach(band, falling, z, thresholds, steps)
+            reaching = np.flatnonzero((slope > 0) & ((lower_bound[:, None] >= thresholds) & ~above_now).any(axis=1))
+            latest[reaching] = self._peak_reach(band, reaching, -z, thresholds, steps)
+
+            crossing = {
+                key: np.where(above_now, 0.0, found * step_hours[:, None])
+                for key, found in (('eta_hours', eta), ('earliest_hours', earliest), ('latest_hours', latest))
+            }
+            result['models'][name] = {
+                'level': level,
+                'slope_per_hour': slope / step_hours,
+                'sigma': sigma,
+                **crossing
+            }
+        return result
+
+
+def forecast_fleet(series, params=None, thresholds=FORECAST_THRESHOLDS):
+    """펌프별 (epoch ns, 값) 시계열 목록을 한 번에 예측 (ForecastState.from_series(...).forecast())"""
+    return ForecastState.from_series(series, params).forecast(thresholds)
+
+
+def format_hours(hours):
+    """도달 시간(시간 단위)을 '약 5.2시간' / '약 2.3일' 형태로 표시"""
+    if hours < 48:
+        return f"약 {hours:.1f}시간"
+    return f"약 {hours / 24:.1f}일"
+
+
+def describe_crossings(forecast, model='holt'):
+    """
+    예측 딕셔너리(WaterPumpAnalyzer.forecast 형식)의 임계값별 도달 예측 설명 목록 (챗봇/대시보드 표시용)
+    예: '85°C: 약 2.3일 후 (90% 구간 약 1.8일 ~ 약 3.1일, 직선 추세 약 2.5일)'
+    """
+    params = forecast['params']
+    horizon_hours = params['horizon'] * (forecast['step_seconds'] or 0) / 3600
+    horizon = f"{horizon_hours / 24:.0f}일" if horizon_hours >= 48 else f"{horizon_hours:.0f}시간"
+    linear = {crossing['threshold']: crossing for crossing in forecast['models']['linear']['crossings']}
+    lines = []
+    for crossing in forecast['models'][model]['crossings']:
+        threshold = crossing['threshold']
+        if crossing['eta_hours'] == 0:
+            lines.append(f"{threshold:.0f}°C: 이미 도달 (현재 수준 {forecast['models'][model]['level']:.1f}°C)")
+            continue
+        if crossing['eta_hours'] is None:
+            lines.append(f"{threshold:.0f}°C: {horizon} 안에 도달 예상 없음")
+            continue
+        earliest = format_hours(crossing['earliest_hours'])
+        latest = format_hours(crossing['latest_hours']) if crossing['latest_hours'] is not None else f"{horizon} 이후"
+        line = (f"{threshold:.0f}°C: {format_hours(crossing['eta_hours'])} 후 "
+                f"({params['confidence']:.0%} 구간 {earliest} ~ {latest}")
+        if linear[threshold]['eta_hours'] is not None:
+            line += f", 직선 추세 {format_hours(linear[threshold]['eta_hours'])}"
+        lines.append(line + ")")
+    return lines
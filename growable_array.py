@@ -0,0 +1,43 @@
+"""
+용량을 두 배씩 늘리는 배열 버퍼
+
+- 첫 번째 축 방향으로만 늘어남 (1차원 값 배열, 행 x 특징 2차원 배열 모두 사용)
+- extend 비용 분할상환 O(1), truncate는 크기만 줄이고 버퍼는 유지
+"""
+
+import numpy as np
+
+
+class GrowableArray:
+    """
+    용량을 두 배씩 늘리는 배열 (extend 비용 분할상환 O(1))
+    메모리 맵 배열은 복사하지 않고 그대로 감싸며, 처음 extend할 때 dtype 메모리 버퍼로 옮김
+    """
+
+    def __init__(self, values, dtype):
+        self._dtype = np.dtype(dtype)
+        if isinstance(values, np.memmap):
+            self._buffer = values
+        else:
+            self._buffer = np.asarray(values, dtype=dtype)
+        self._size = len(self._buffer)
+
+    def __len__(self):
+        return self._size
+
+    def view(self):
+        return self._buffer[:self._size]
+
+    def extend(self, values):
+        required = self._size + len(values)
+        if required > len(self._buffer) or not self._buffer.flags.writeable:
+            capacity = max(required, 2 * len(self._buffer), 1024)
+            buffer = np.empty((capacity,) + self._buffer.shape[1:], dtype=self._dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        self._buffer[self._size:required] = values
+        self._size = required
+
+    def truncate(self, size):
+        """앞쪽 size개만 남김 (버퍼 용량은 그대로)"""
+        self._size = min(self._size, max(0, size))
@@ -0,0 +1,190 @@
+"""
+병합 가능한 분위수 스케치 (KLL, NumPy 구현)
+
+- 값을 모두 보관하지 않고 중앙값/p95/p99 등 분위수를 근사
+- 윈도우, 펌프, 날짜별 스케치를 merge()로 합쳐 전체 분위수를 재스캔 없이 계산
+- 정확도는 k로 조절: 순위 오차는 약 2.296 / k^0.9723 (99% 신뢰, k=200이면 약 1.3%)
+  압축이 한 번도 일어나지 않은 경우(값 개수 <= k)는 정확한 값
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_SKETCH_K = 200
+
+# 레벨 h의 용량은 k * (2/3)^(최상위 레벨까지의 깊이), 최소 2
+_CAPACITY_DECAY = 2 / 3
+_MIN_CAPACITY = 2
+
+
+class KLLSketch:
+    """
+    KLL 분위수 스케치
+    레벨 h의 값은 가중치 2^h를 가지며, 레벨이 용량을 넘으면 정렬 후 한 칸씩 건너 절반만 윗 레벨로 올림
+    대량 update는 한 번의 정렬/압축으로 처리 (값 하나씩 넣는 반복 없음)
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        if k < _MIN_CAPACITY:
+            raise ValueError(f"k는 {_MIN_CAPACITY} 이상이어야 합니다.")
+        self.k = int(k)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_rank_error(cls, rank_error, seed=None):
+        """목표 순위 오차(예: 0.01 = 1%)를 만족하는 k로 생성"""
+        if not 0 < rank_error < 1:
+            raise ValueError("rank_error는 0과 1 사이여야 합니다.")
+        return cls(max(_MIN_CAPACITY, math.ceil((2.296 / rank_error) ** (1 / 0.9723))), seed=seed)
+
+    @classmethod
+    def from_values(cls, values, k=DEFAULT_SKETCH_K, seed=None):
+        """값 배열로 스케치 생성"""
+        return cls(k, seed=seed).update(values)
+
+    @property
+    def rank_error(self):
+        """순위 오차 상한 (정규화, 99% 신뢰). 압축 전이면 0"""
+        if len(self.levels) == 1:
+            return 0.0
+        return 2.296 / self.k ** 0.9723
+
+    def __len__(self):
+        return self.n
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(_MIN_CAPACITY, math.ceil(self.k * _CAPACITY_DECAY ** depth))
+
+    def update(self, values):
+        """값 배열 추가 (NaN 제외)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """다른 스케치를 병합 (레벨별로 이어 붙인 뒤 압축). k가 다르면 작은 쪽(더 거친 정확도)을 따름"""
+        if other.n == 0:
+            return self
+
+        self.k = min(self.k, other.k)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def _compress(self):
+        """용량을 넘은 레벨을 아래에서부터 압축"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # 홀수 개면 하나는 현재 레벨에 남김 (남긴 값은 오차를 만들지 않음)
+                odd = len(items) % 2
+                promoted = items[odd + self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _sorted_view(self):
+        """(정렬된 값, 누적 가중치) 반환"""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.int64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """
+        분위수 배열 (q는 0~1)
+        압축 전에는 np.quantile(values, q, method='inverted_cdf')와 같은 값
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+
+        items, cumulative = self._sorted_view()
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.minimum(positions, len(items) - 1)]
+        # 양 끝은 실제 최솟값/최댓값
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        """단일 분위수"""
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value):
+        """value 이하 값의 비율 추정"""
+        if self.n == 0:
+            return math.nan
+        items, cumulative = self._sorted_view()
+        position = np.searchsorted(items, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+    def to_dict(self):
+        """JSON 저장용 딕셔너리"""
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+            'levels': [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        """to_dict() 결과로 스케치 복원"""
+        sketch = cls(data['k'], seed=seed)
+        sketch.n = data['n']
+        if sketch.n:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data['levels']]
+        return sketch
+
+
+def merge_sketches(sketches, k=None):
+    """여러 스케치를 병합한 새 스케치 반환 (원본은 변경하지 않음)"""
+    sketches = list(sketches)
+    if k is None:
+        k = min((sketch.k for sketch in sketches), default=DEFAULT_SKETCH_K)
+    merged = KLLSketch(k)
+    sketches = [sketch for sketch in sketches if sketch.n]
+    if not sketches:
+        return merged
+
+    # 같은 레벨끼리 한 번에 이어 붙인 뒤 한 번만 압축 (스케치 수만큼 압축을 반복하지 않음)
+    depth = max(len(sketch.levels) for sketch in sketches)
+    merged.levels = [
+        np.concatenate([sketch.levels[level] for sketch in sketches if level < len(sketch.levels)])
+        for level in range(depth)
+    ]
+    merged.n = sum(sketch.n for sketch in sketches)
+    merged.min = min(sketch.min for sketch in sketches)
+    merged.max = max(sketch.max for sketch in sketches)
+    merged._compress()
+    return merged
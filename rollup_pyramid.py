@@ -0,0 +1,331 @@
+"""
+다중 해상도 롤업 피라미드
+
+- 레벨 L의 셀 i는 원시 레코드 [i*L, (i+1)*L)의 count/sum/sumsq/min/max (마지막 셀은 남은 레코드)
+- 레벨 1은 원시 값 배열 자체를 사용하고, 그 위 레벨은 바로 아래 레벨 셀을 묶어 O(n)에 생성
+- 레벨별 셀은 늘어나는 버퍼에 두고, append 시 레벨마다 마지막 열린 셀과 새 셀만 다시 집계
+- 가장 거친 레벨은 count/sum/sumsq 누적합과 닫힌 셀의 min/max 희소 테이블을 함께 유지하여
+  온전히 포함되는 셀 구간을 O(1)에 집계
+- 임의 구간 집계는 가장 거친 레벨의 셀 구간 + 양 끝의 더 세밀한 셀(레벨당 최대 배율-1개씩)로 계산
+- 확대/축소 조회는 구간 안 셀 수가 max_points 이하인 가장 세밀한 레벨을 선택
+"""
+
+import numpy as np
+
+from growable_array import GrowableArray
+
+DEFAULT_ROLLUP_LEVELS = (1, 10, 100, 1_000, 10_000)
+ROLLUP_FORMAT_VERSION = 1
+
+_ROLLUP_FIELDS = ('count', 'sum', 'sumsq', 'min', 'max')
+_PREFIX_FIELDS = ('count', 'sum', 'sumsq')
+
+
+def _field_dtype(field):
+    return np.int64 if field == 'count' else np.float64
+
+
+class RollupPyramid:
+    """
+    원시 시계열(int64 epoch ns, 온도 값)에 대한 롤업 피라미드
+    원시 배열은 복사하지 않고 참조 (메모리 맵 배열도 그대로 사용)
+    """
+
+    def __init__(self, epoch_ns, values, levels=DEFAULT_ROLLUP_LEVELS, cells=None):
+        levels = tuple(int(level) for level in levels)
+        if not levels or levels[0] != 1:
+            raise ValueError("롤업 레벨은 1부터 시작해야 합니다.")
+        for finer, coarser in zip(levels, levels[1:]):
+            if coarser <= finer or coarser % finer:
+                raise ValueError(f"롤업 레벨 {coarser}는 {finer}의 배수여야 합니다.")
+        if len(epoch_ns) != len(values):
+            raise ValueError("타임스탬프와 값 배열 길이가 다릅니다.")
+
+        self.levels = levels
+        self.epoch_ns = epoch_ns
+        self.values = values
+        self._cells = {
+            level: {
+                field: GrowableArray(np.empty(0) if cells is None else cells[level][field], _field_dtype(field))
+                for field in _ROLLUP_FIELDS
+            }
+            for level in levels[1:]
+        }
+        # 가장 거친 레벨의 누적합 (prefix[i] = 셀 [0, i) 합)과 닫힌 셀 min/max 희소 테이블
+        self._prefix = {field: GrowableArray(np.zeros(1), _field_dtype(field)) for field in _PREFIX_FIELDS}
+        self._sparse = {'min': [], 'max': []}
+        self._closed_cells = 0
+        if cells is None:
+            self._rebuild_from(0)
+        else:
+            self._index_top(0)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def cells(self):
+        """레벨별 셀 배열 딕셔너리 (레벨 1 제외, 버퍼 뷰)"""
+        return {
+            level: {field: buffer.view() for field, buffer in fields.items()}
+            for level, fields in self._cells.items()
+        }
+
+    def _rebuild_from(self, first_row):
+        """first_row 레코드가 속한 셀부터 각 레벨을 다시 집계 (그 앞 셀은 버퍼에 그대로 유지)"""
+        finer_level, finer = 1, None
+        for level in self.levels[1:]:
+            first_cell = first_row // level
+
+            if finer is None:
+                # 레벨 1 위 첫 레벨은 원시 값에서 직접 집계
+                values = np.asarray(self.values[first_cell * level:], dtype=np.float64)
+                starts = np.arange(0, len(values), level)
+                tail = {
+                    'count': np.diff(np.append(starts, len(values))).astype(np.int64),
+                    'sum': np.add.reduceat(values, starts) if len(values) else values,
+                    'sumsq': np.add.reduceat(values * values, starts) if len(values) else values,
+                    'min': np.minimum.reduceat(values, starts) if len(values) else values,
+                    'max': np.maximum.reduceat(values, starts) if len(values) else values
+                }
+            else:
+                ratio = level // finer_level
+                offset = first_cell * ratio
+                starts = np.arange(0, len(finer['count']) - offset, ratio)
+                tail = {}
+                for field, reducer in (('count', np.add), ('sum', np.add), ('sumsq', np.add),
+                                       ('min', np.minimum), ('max', np.maximum)):
+                    source = finer[field].view()[offset:]
+                    tail[field] = reducer.reduceat(source, starts) if len(source) else source
+
+            cells = self._cells[level]
+            for field in _ROLLUP_FIELDS:
+                cells[field].truncate(first_cell)
+                cells[field].extend(tail[field])
+            finer_level, finer = level, cells
+        self._index_top(first_row // self.levels[-1])
+
+    def _index_top(self, first_cell):
+        """가장 거친 레벨의 first_cell 이후 누적합과 새로 닫힌 셀의 희소 테이블 항목 갱신"""
+        top = self.levels[-1]
+        if top == 1:
+            return
+        cells = self._cells[top]
+        for field in _PREFIX_FIELDS:
+            prefix = self._prefix[field]
+            prefix.truncate(first_cell + 1)
+            added = cells[field].view()[first_cell:]
+            prefix.extend(prefix.view()[-1] + np.cumsum(added))
+
+        # 닫힌(레코드가 top개 찬) 셀만 희소 테이블에 넣음: 값이 바뀌지 않으므로 새 셀 항목만 추가
+        closed = len(self.values) // top
+        first_closed = min(first_cell, self._closed_cells)
+        if closed == self._closed_cells and first_closed >= closed:
+            return
+        for field, reducer in (('min', np.minimum), ('max', np.maximum)):
+            table = self._sparse[field]
+            source = cells[field].view()[:closed]
+            span = 1
+            depth = 0
+            while span <= closed:
+                if depth == len(table):
+                    table.append(GrowableArray(np.empty(0), np.float64))
+                row = table[depth]
+                start = max(0, first_closed - span + 1)
+                row.truncate(start)
+                end = closed - span + 1
+                if depth == 0:
+                    row.extend(source[start:end])
+                else:
+                    half = span // 2
+                    previous = table[depth - 1].view()
+                    row.extend(reducer(previous[start:end], previous[start + half:end + half]))
+                span *= 2
+                depth += 1
+        self._closed_cells = closed
+
+    def update(self, epoch_ns, values, first_row):
+        """
+        원시 배열이 늘어난 뒤(append) first_row 이후 레코드가 속한 셀만 다시 집계
+        (레벨마다 마지막 열린 셀 + 새 셀만 계산하므로 전체 재구축 없음)
+        """
+        self.epoch_ns = epoch_ns
+        self.values = values
+        self._rebuild_from(first_row)
+        return self
+
+    def _aggregate_top(self, first_cell, last_cell):
+        """가장 거친 레벨 셀 [first_cell, last_cell) 합산: 누적합 차이 + 희소 테이블 두 칸 (O(1))"""
+        count, total, total_sq = (
+            self._prefix[field].view()[last_cell] - self._prefix[field].view()[first_cell]
+            for field in _PREFIX_FIELDS
+        )
+        minimum, maximum = np.inf, -np.inf
+        first_cell, last_cell = int(first_cell), int(last_cell)
+        closed_end = min(last_cell, self._closed_cells)
+        if first_cell < closed_end:
+            depth = (closed_end - first_cell).bit_length() - 1
+            span = 1 << depth
+            minimum = min(self._sparse['min'][depth].view()[first_cell], self._sparse['min'][depth].view()[closed_end - span])
+            maximum = max(self._sparse['max'][depth].view()[first_cell], self._sparse['max'][depth].view()[closed_end - span])
+        if closed_end < last_cell:
+            # 열린 마지막 셀
+            cells = self._cells[self.levels[-1]]
+            minimum = min(minimum, cells['min'].view()[closed_end])
+            maximum = max(maximum, cells['max'].view()[closed_end])
+        return int(count), total, total_sq, minimum, maximum
+
+    def _aggregate(self, level, spans):
+        """level의 셀 구간 목록 [(first_cell, last_cell), ...] 합산 (count, sum, sumsq, min, max)"""
+        if level == self.levels[-1] and level != 1:
+            return self._aggregate_top(*spans[0])
+        if len(spans) == 1:
+            selection = slice(*spans[0])
+        else:
+            selection = np.r_[tuple(slice(first_cell, last_cell) for first_cell, last_cell in spans)]
+        if level == 1:
+            values = np.asarray(self.values[selection], dtype=np.float64)
+            return len(values), values.sum(), (values * values).sum(), values.min(), values.max()
+        cells = self._cells[level]
+        return (
+            int(cells['count'].view()[selection].sum()),
+            cells['sum'].view()[selection].sum(),
+            cells['sumsq'].view()[selection].sum(),
+            cells['min'].view()[selection].min(),
+            cells['max'].view()[selection].max()
+        )
+
+    def query_rows(self, start_row, end_row):
+        """
+        레코드 구간 [start_row, end_row) 집계 (레벨마다 셀 구간 최대 2개, 가장 거친 레벨은 O(1))
+        반환: count/mean/std/min/max와 사용한 셀 수(cells)
+        """
+        n = len(self.values)
+        start_row, end_row = max(0, start_row), min(n, end_row)
+        count, total, total_sq = 0, 0.0, 0.0
+        minimum, maximum = np.inf, -np.inf
+        used_cells = 0
+
+        # 거친 레벨부터 온전히 포함되는 셀을 사용하고 남은 양 끝은 다음 레벨로 넘김
+        segments = [(start_row, end_row)] if start_row < end_row else []
+        for level in reversed(self.levels):
+            remaining = []
+            spans = []
+            n_cells = -(-n // level)
+            for low, high in segments:
+                first_cell = -(-low // level)
+                last_cell = n_cells if high >= n else high // level
+                if first_cell >= last_cell:
+                    remaining.append((low, high))
+                    continue
+                spans.append((first_cell, last_cell))
+                used_cells += last_cell - first_cell
+                if low < first_cell * level:
+                    remaining.append((low, first_cell * level))
+                if min(last_cell * level, n) < high:
+                    remaining.append((last_cell * level, high))
+            if spans:
+                part = self._aggregate(level, spans)
+                count += part[0]
+                total += part[1]
+                total_sq += part[2]
+                minimum = min(minimum, part[3])
+                maximum = max(maximum, part[4])
+            segments = remaining
+
+        if count == 0:
+            return {'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None, 'cells': 0}
+        mean = total / count
+        variance = max(total_sq / count - mean * mean, 0.0)
+        return {
+            'count': count,
+            'mean': float(mean),
+            'std': float(np.sqrt(variance)),
+            'min': float(minimum),
+            'max': float(maximum),
+            'cells': used_cells
+        }
+
+    def rows_between(self, start_ns=None, end_ns=None):
+        """epoch ns 시각 구간 [start_ns, end_ns] (양 끝 포함)에 해당하는 레코드 구간 [start, end)"""
+        start_row = 0 if start_ns is None else int(np.searchsorted(self.epoch_ns, start_ns, side='left'))
+        end_row = len(self.values) if end_ns is None else int(np.searchsorted(self.epoch_ns, end_ns, side='right'))
+        return start_row, max(start_row, end_row)
+
+    def query(self, start_ns=None, end_ns=None):
+        """시각 구간 [start_ns, end_ns] 집계 (None이면 처음/끝까지)"""
+        return self.query_rows(*self.rows_between(start_ns, end_ns))
+
+    def select_level(self, start_row, end_row, max_points):
+        """구간 안 셀 수가 max_points 이하인 가장 세밀한 레벨 (없으면 가장 거친 레벨)"""
+        for level in self.levels:
+            if end_row // level - start_row // level + 1 <= max_points:
+                return level
+        return self.levels[-1]
+
+    def cells_between(self, start_ns=None, end_ns=None, max_points=2000, level=None):
+        """
+        확대/축소용 셀 배열 (구간과 겹치는 셀 전체)
+        반환: start_ns/end_ns/count/mean/std/min/max 배열 딕셔너리와 사용한 level
+        """
+        start_row, end_row = self.rows_between(start_ns, end_ns)
+        if level is None:
+            level = self.select_level(start_row, end_row, max_points)
+        elif level not in self.levels:
+            raise ValueError(f"지원하지 않는 롤업 레벨입니다: {level}")
+
+        first_cell = start_row // level
+        last_cell = -(-end_row // level) if end_row > start_row else first_cell
+        rows = np.arange(first_cell, last_cell) * level
+        row_ends = np.minimum(rows + level, len(self.values)) - 1
+        if level == 1:
+            values = np.asarray(self.values[first_cell:last_cell], dtype=np.float64)
+            count = np.ones(len(values), dtype=np.int64)
+            total, total_sq, minimum, maximum = values, values * values, values, values
+        else:
+            cells = {field: buffer.view() for field, buffer in self._cells[level].items()}
+            count = cells['count'][first_cell:last_cell]
+            total = cells['sum'][first_cell:last_cell]
+            total_sq = cells['sumsq'][first_cell:last_cell]
+            minimum = cells['min'][first_cell:last_cell]
+            maximum = cells['max'][first_cell:last_cell]
+
+        mean = total / count
+        return {
+            'level': level,
+            'start_ns': np.asarray(self.epoch_ns[rows]),
+            'end_ns': np.asarray(self.epoch_ns[row_ends]),
+            'count': count,
+            'mean': mean,
+            'std': np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0)),
+            'min': minimum,
+            'max': maximum
+        }
+
+    def save(self, path):
+        """레벨 1을 제외한 셀 배열을 npz로 저장 (원시 배열은 저장하지 않음)"""
+        arrays = {
+            'format_version': np.array(ROLLUP_FORMAT_VERSION),
+            'levels': np.array(self.levels, dtype=np.int64),
+            'rows': np.array(len(self.values), dtype=np.int64)
+        }
+        for level, cells in self.cells.items():
+            for field in _ROLLUP_FIELDS:
+                arrays[f"level{level}.{field}"] = cells[field]
+        np.savez(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path, epoch_ns, values):
+        """save()로 저장한 셀 배열을 원시 배열과 연결하여 복원"""
+        with np.load(path) as archive:
+            if int(archive['format_version']) != ROLLUP_FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 롤업 파일 버전입니다: {int(archive['format_version'])}")
+            if int(archive['rows']) != len(values):
+                raise ValueError("롤업 파일과 원시 데이터의 레코드 수가 다릅니다.")
+            levels = tuple(archive['levels'].tolist())
+            cells = {
+                level: {field: archive[f"level{level}.{field}"] for field in _ROLLUP_FIELDS}
+                for level in levels[1:]
+            }
+        return cls(epoch_ns, values, levels, cells=cells)
@@ -0,0 +1,157 @@
+"""
+분석 단계별 프로파일링
+
+- profiler.stage('parse', rows=n) 컨텍스트 안의 벽시계 시간, 처리 레코드 수, RSS 변화량 기록
+- 단계별 누적값은 profile 딕셔너리(calls/total_sec/last_sec/rows/rows_per_sec/memory_delta_bytes)로 제공
+- sink(콜백)를 등록하면 단계가 끝날 때마다 이벤트 딕셔너리 전달 (로그, 메트릭 수집기 등)
+- 비활성 상태의 stage()는 공유 no-op 컨텍스트만 반환하므로 측정 비용이 거의 없음
+"""
+
+import logging
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_LOGGER_NAME = 'water_pump_analyzer.profile'
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+# /proc/self/statm은 (pid, 파일 디스크립터)로 열어 두고 재사용 (fork된 자식 프로세스는 다시 엶)
+_statm = {'pid': None, 'fd': None}
+
+
+def current_rss():
+    """현재 프로세스 RSS (바이트), /proc을 읽을 수 없으면 지금까지의 최대 RSS"""
+    try:
+        if _statm['pid'] != os.getpid():
+            _statm['fd'] = os.open('/proc/self/statm', os.O_RDONLY)
+            _statm['pid'] = os.getpid()
+        return int(os.pread(_statm['fd'], 128, 0).split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _NullStage:
+    """비활성 프로파일러의 stage() 반환값 (rows 대입은 무시)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """측정 중인 단계 (컨텍스트 안에서 rows를 나중에 지정할 수 있음)"""
+
+    __slots__ = ('profiler', 'name', 'rows', '_start', '_rss')
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._rss = current_rss() if self.profiler.track_memory else 0
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter() - self._start
+        memory_delta = current_rss() - self._rss if self.profiler.track_memory else None
+        self.profiler.record(self.name, elapsed, self.rows, memory_delta, failed=exc_type is not None)
+        return False
+
+
+class StageProfiler:
+    """
+    단계별 시간/레코드 수/메모리 변화량 수집기
+    enabled=False면 stage()가 no-op이며 sink도 호출하지 않음
+    """
+
+    def __init__(self, enabled=False, sinks=None, track_memory=True):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.sinks = list(sinks or [])
+        self.profile = {}
+
+    def stage(self, name, rows=None):
+        """단계 측정 컨텍스트 (with profiler.stage('sort', rows=n) as stage: ...)"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def record(self, name, sec, rows=None, memory_delta=None, failed=False):
+        """단계 측정값 누적 후 sink에 이벤트 전달"""
+        entry = self.profile.get(name)
+        if entry is None:
+            entry = self.profile[name] = {
+                'calls': 0, 'total_sec': 0.0, 'last_sec': 0.0, 'rows': 0,
+                'rows_per_sec': None, 'memory_delta_bytes': 0, 'failures': 0
+            }
+        entry['calls'] += 1
+        entry['total_sec'] += sec
+        entry['last_sec'] = sec
+        if rows is not None:
+            entry['rows'] += rows
+            entry['rows_per_sec'] = entry['rows'] / entry['total_sec'] if entry['total_sec'] > 0 else None
+        if memory_delta is not None:
+            entry['memory_delta_bytes'] += memory_delta
+        if failed:
+            entry['failures'] += 1
+
+        if self.sinks:
+            event = {
+                'stage': name,
+                'sec': sec,
+                'rows': rows,
+                'memory_delta_bytes': memory_delta,
+                'failed': failed,
+                'timestamp': time.time()
+            }
+            for sink in self.sinks:
+                sink(event)
+
+    def add_sink(self, sink):
+        """단계가 끝날 때마다 sink(event) 호출"""
+        self.sinks.append(sink)
+
+    def reset(self):
+        self.profile = {}
+
+    def summary(self):
+        """전체 소요 시간 대비 단계별 비율 포함 요약 (소요 시간 큰 순)"""
+        total = sum(entry['total_sec'] for entry in self.profile.values())
+        return [
+            {'stage': name, **entry, 'share': entry['total_sec'] / total if total > 0 else 0.0}
+            for name, entry in sorted(self.profile.items(), key=lambda item: item[1]['total_sec'], reverse=True)
+        ]
+
+
+def logging_sink(logger=None, level=logging.INFO):
+    """단계 이벤트를 logging으로 남기는 sink 생성"""
+    logger = logger or logging.getLogger(PROFILE_LOGGER_NAME)
+
+    def sink(event):
+        rows = f", {event['rows']:,}행" if event['rows'] is not None else ''
+        memory = (f", 메모리 {event['memory_delta_bytes'] / 1024 ** 2:+.1f}MB"
+                  if event['memory_delta_bytes'] is not None else '')
+        logger.log(level, f"[{event['stage']}] {event['sec'] * 1000:.1f}ms{rows}{memory}")
+
+    return sink
@@ -5,7 +5,19 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
-from water_pump_analyzer import WaterPumpAnalyzer
+from analysis_cache import AnalysisCache
+from batch_similarity import BatchSimilarityIndex
+from forecasting import describe_crossings
+from water_pump_analyzer import (
+    MOTIFS_INSUFFICIENT,
+    MOTIFS_NOT_COMPUTED,
+    BatchTable,
+    WaterPumpAnalyzer,
+    describe_motif_resolution,
+    list_raw_stores,
+    load_analysis_results,
+    matrix_profile_summary,
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -14,10 +26,21 @@ st.set_page_config(
     layout="wide"
 )
 
+# JSON 내보내기 형식: 표시 이름 → (save_to_json 옵션, 확장자)
+JSON_EXPORT_MODES = {
+    '들여쓰기 JSON': ({}, 'json'),
+    '압축 JSON': ({'indent': None}, 'json'),
+    '통계만 (raw_data 제외)': ({'indent': None, 'include_raw': False}, 'json'),
+    'JSON Lines': ({'lines': True}, 'jsonl')
+}
+
 class StreamlitDashboard:
     def __init__(self):
         self.data = None
         self.analyzer = None
+        self.cache = AnalysisCache()
+        self.similarity_index = None  # 분석기 없이 JSON 결과만 있을 때 통계 특징으로 만든 색인
+        self._batch_table = None  # 분석기 없이 JSON 결과만 있을 때 배치 목록으로 만든 컬럼 테이블
         self.load_data()
     
     def load_data(self):
@@ -27,13 +50,15 @@ class StreamlitDashboard:
         # 파일 업로드 옵션 선택
         upload_option = st.sidebar.radio(
             "데이터 입력 방식 선택:",
-            ["CSV 파일 업로드", "JSON 파일 업로드", "샘플 데이터 사용"]
+            ["CSV 파일 업로드", "JSON 파일 업로드", "원시 저장소 연결", "샘플 데이터 사용"]
         )
         
         if upload_option == "CSV 파일 업로드":
             return self.load_csv_data()
         elif upload_option == "JSON 파일 업로드":
             return self.load_json_data()
+        elif upload_option == "원시 저장소 연결":
+            return self.load_raw_store_data()
         else:
             return self.load_sample_data()
     
@@ -58,52 +83,52 @@ class StreamlitDashboard:
                 # 파일 다시 읽기 (seek to beginning)
                 uploaded_file.seek(0)
                 
-                # WaterPumpAnalyzer로 데이터 처리
-                self.analyzer = WaterPumpAnalyzer()
-                
-                if self.analyzer.load_data(uploaded_file=uploaded_file):
-                    st.sidebar.success(f"✅ CSV 데이터 로드 완료! ({len(self.analyzer.data)}개 레코드)")
-                    
-                    # 컬럼 정보 표시
-                    st.sidebar.write("📊 **데이터 정보**")
-                    st.sidebar.write(f"- 시작 시간: {self.analyzer.data['timestamp'].min()}")
-                    st.sidebar.write(f"- 종료 시간: {self.analyzer.data['timestamp'].max()}")
-                    st.sidebar.write(f"- 온도 범위: {self.analyzer.data['value'].min():.1f}°C ~ {self.analyzer.data['value'].max():.1f}°C")
-                    
-                    # 분석 실행 버튼
-                    if st.sidebar.button("🔄 온도 분석 실행"):
-                        with st.sidebar.spinner("분석 중..."):
-                            self.analyzer.analyze_temperature_characteristics()
-                            
-                            # JSON 형태로 변환
-                            self.data = {
-                                'metadata': {
-                                    'analysis_date': datetime.now().isoformat(),
-                                    'total_batches': len(self.analyzer.analyzed_data),
-                                    'window_size': 100,
-                                    'data_source': 'uploaded_csv_file'
-                                },
-                                'analysis_results': self.analyzer.analyzed_data
-                            }
-                            
-                            # 자동으로 water_pump_data 폴더에 저장
-                            import os
-                            data_folder = 'water_pump_data'
-                            if not os.path.exists(data_folder):
-                                os.makedirs(data_folder)
-                            
-                            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                            json_filename = f"csv_analysis_{timestamp}.json"
-                            json_path = os.path.join(data_folder, json_filename)
-                            
-                            with open(json_path, 'w', encoding='utf-8') as f:
-                                json.dump(self.data, f, ensure_ascii=False, indent=2)
-                            
-                            st.sidebar.success("✅ 분석 완료!")
-                            st.sidebar.info(f"📁 결과가 {json_path}에 저장되었습니다.")
-                            return True
-                else:
+                # 같은 내용과 분석 파라미터로 분석한 결과가 캐시에 있으면 재분석 없이 사용 (새로 분석하면 단계별 처리 시간 기록)
+                with st.sidebar.spinner("분석 중..."):
+                    self.analyzer, cache_hit = self.cache.analyze_file(uploaded_file, profile=True)
+                if self.analyzer is None:
                     st.sidebar.error("❌ CSV 파일 처리 중 오류가 발생했습니다.")
+                    return False
+                
+                # 원시 데이터는 상세 분석/내보내기 시점에 생성
+                self.data = self.analyzer.get_output_data('uploaded_csv_file', include_raw=False)
+                cache_key = self.analyzer.load_summary['cache_key']
+                if cache_hit:
+                    st.sidebar.success(f"⚡ 캐시된 분석 결과 사용 ({len(self.analyzer.analyzed_data)}개 배치)")
+                    self.display_cache_controls(cache_key)
+                    return True
+                
+                st.sidebar.success(f"✅ CSV 데이터 로드 완료! ({len(self.analyzer.data)}개 레코드)")
+                
+                # 컬럼 정보 표시
+                st.sidebar.write("📊 **데이터 정보**")
+                st.sidebar.write(f"- 시작 시간: {self.analyzer.data['timestamp'].min()}")
+                st.sidebar.write(f"- 종료 시간: {self.analyzer.data['timestamp'].max()}")
+                st.sidebar.write(f"- 온도 범위: {self.analyzer.data['value'].min():.1f}°C ~ {self.analyzer.data['value'].max():.1f}°C")
+                load_summary = self.analyzer.load_summary
+                st.sidebar.write(f"- 시간 형식: {load_summary['timestamp_format']} (파싱 {load_summary['parse_rows_per_sec']:,.0f}행/초)")
+                
+                # 자동으로 water_pump_data 폴더에 저장
+                import os
+                data_folder = 'water_pump_data'
+                if not os.path.exists(data_folder):
+                    os.makedirs(data_folder)
+                
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                json_filename = f"csv_analysis_{timestamp}.json"
+                json_path = os.path.join(data_folder, json_filename)
+                
+                # 배치 단위 스트리밍 저장 (raw_data는 블록별로 생성)
+                self.analyzer.save_to_json(json_path, data_source='uploaded_csv_file')
+                
+                # 다른 세션이 CSV를 다시 읽지 않도록 원시 저장소(메모리 맵)로도 저장 (파일 내용 해시 이름, 같은 내용은 한 번만 저장)
+                store_path = self.cache.save_raw_store(self.analyzer, label=uploaded_file.name)
+                
+                st.sidebar.success("✅ 분석 완료!")
+                st.sidebar.info(f"📁 결과가 {json_path}에 저장되었습니다.")
+                st.sidebar.info(f"🗄️ 원시 저장소: {store_path}")
+                self.display_profile()
+                return True
                     
             except Exception as e:
                 st.sidebar.error(f"❌ 파일 로드 중 오류: {e}")
@@ -111,27 +136,59 @@ class StreamlitDashboard:
         
         return False
     
+    def display_cache_controls(self, cache_key):
+        """분석 캐시 상태 표시 및 무효화 버튼"""
+        entries = self.cache.entries()
+        total_mb = sum(entry['bytes'] for entry in entries) / 1024 ** 2
+        st.sidebar.caption(f"🗃️ 분석 캐시: {len(entries)}개 항목, {total_mb:.1f}MB")
+        col1, col2 = st.sidebar.columns(2)
+        if col1.button("이 파일 다시 분석"):
+            self.cache.invalidate(cache_key)
+            st.rerun()
+        if col2.button("캐시 비우기"):
+            self.cache.invalidate()
+            st.rerun()
+    
+    def display_profile(self):
+        """분석기 단계별 처리 시간/레코드 수/메모리 변화량 표시 (업로드가 느린 원인 확인용)"""
+        summary = self.analyzer.profiler.summary()
+        if not summary:
+            return
+        with st.sidebar.expander("⏱️ 단계별 처리 시간"):
+            st.dataframe(pd.DataFrame([{
+                '단계': entry['stage'],
+                '시간(ms)': round(entry['total_sec'] * 1000, 1),
+                '비율': f"{entry['share']:.0%}",
+                '레코드 수': entry['rows'],
+                '메모리 변화(MB)': round(entry['memory_delta_bytes'] / 1024 ** 2, 1)
+            } for entry in summary]), hide_index=True)
+    
     def load_json_data(self):
-        """기존 JSON 파일 로드"""
+        """기존 JSON/JSON Lines 또는 컬럼형(npz/parquet/feather) 분석 결과 파일 로드"""
         st.sidebar.subheader("JSON 파일 업로드")
         
         uploaded_file = st.sidebar.file_uploader(
-            "분석된 JSON 파일을 업로드하세요", 
-            type=['json'],
+            "분석된 JSON 또는 컬럼형 결과 파일을 업로드하세요", 
+            type=['json', 'jsonl', 'npz', 'parquet', 'feather'],
             key="json_uploader",
-            help="이미 분석된 워터펌프 온도 데이터 JSON 파일"
+            help="이미 분석된 워터펌프 온도 데이터 JSON 파일 또는 save_columnar()로 저장한 파일"
         )
         
         if uploaded_file is not None:
             try:
-                self.data = json.load(uploaded_file)
-                st.sidebar.success("✅ JSON 데이터 로드 완료!")
+                if uploaded_file.name.lower().endswith(('.json', '.jsonl')):
+                    self.data = load_analysis_results(uploaded_file)
+                else:
+                    # 컬럼형 결과는 분석기에 복원하고 raw_data는 상세 분석/내보내기 시점에 생성
+                    self.analyzer = WaterPumpAnalyzer()
+                    self.data = self.analyzer.load_columnar(uploaded_file)
+                st.sidebar.success("✅ 분석 결과 로드 완료!")
                 
                 # 데이터 정보 표시
                 metadata = self.data.get('metadata', {})
                 st.sidebar.write("📊 **분석 정보**")
                 st.sidebar.write(f"- 총 배치: {metadata.get('total_batches', 'N/A')}개")
-                st.sidebar.write(f"- 윈도우 크기: {metadata.get('window_size', 'N/A')}")
+                st.sidebar.write(f"- 윈도우 크기: {metadata.get('window_freq', metadata.get('window_size', 'N/A'))}")
                 st.sidebar.write(f"- 분석 일시: {metadata.get('analysis_date', 'N/A')}")
                 
                 return True
@@ -140,6 +197,40 @@ class StreamlitDashboard:
         
         return False
     
+    def load_raw_store_data(self):
+        """water_pump_data/raw_store의 원시 저장소를 메모리 맵으로 연결하여 분석"""
+        st.sidebar.subheader("원시 저장소 연결")
+        
+        stores = list_raw_stores()
+        if not stores:
+            st.sidebar.info("저장된 원시 저장소가 없습니다. CSV 분석 시 자동으로 생성됩니다.")
+            return False
+        
+        store_paths = {f"{store.get('label', store['name'])} ({store['rows']:,}개 레코드, {store['created_at'][:16]})": store['path'] for store in stores}
+        selected_store = st.sidebar.selectbox("원시 저장소 선택", list(store_paths))
+        
+        try:
+            # 메모리 맵 연결은 복사가 없어 매 실행마다 다시 연결해도 즉시 완료
+            self.analyzer = WaterPumpAnalyzer()
+            header = self.analyzer.attach_raw_store(store_paths[selected_store])
+            
+            st.sidebar.write("📊 **데이터 정보**")
+            st.sidebar.write(f"- 시작 시간: {header['start_timestamp']}")
+            st.sidebar.write(f"- 종료 시간: {header['end_timestamp']}")
+            st.sidebar.write(f"- 저장 형식: timestamp int64 / value {header['value_dtype']}")
+            
+            if st.sidebar.button("🔄 온도 분석 실행"):
+                with st.sidebar.spinner("분석 중..."):
+                    self.analyzer.analyze_temperature_characteristics()
+                    self.analyzer.run_extended_analyses()
+                    self.data = self.analyzer.get_output_data('raw_store', include_raw=False)
+                    st.sidebar.success("✅ 분석 완료!")
+                    return True
+        except Exception as e:
+            st.sidebar.error(f"❌ 원시 저장소 연결 중 오류: {e}")
+        
+        return False
+    
     def load_sample_data(self):
         """샘플 데이터 생성"""
         st.sidebar.subheader("샘플 데이터")
@@ -179,16 +270,9 @@ class StreamlitDashboard:
             analyzer = WaterPumpAnalyzer()
             analyzer.load_data(data=sample_data)
             analyzer.analyze_temperature_characteristics()
-            
-            self.data = {
-                'metadata': {
-                    'analysis_date': datetime.now().isoformat(),
-                    'total_batches': len(analyzer.analyzed_data),
-                    'window_size': 100,
-                    'data_source': 'sample_data'
-                },
-                'analysis_results': analyzer.analyzed_data
-            }
+            analyzer.run_extended_analyses()
+            self.analyzer = analyzer
+            self.data = analyzer.get_output_data('sample_data', include_raw=False)
             
             st.sidebar.success("✅ 샘플 데이터 생성 완료!")
             
@@ -240,6 +324,17 @@ timestamp,value
                   "- 지원 형식: CSV, JSON\n"
                   "- 인코딩: UTF-8 권장")
 
+    def batch_table(self):
+        """
+        배치 컬럼 테이블 (분석기가 있으면 분석기가 보관한 테이블을 그대로 사용)
+        JSON 결과만 있으면 배치 목록으로 한 번 만들어 개요/트렌드/리포트/유사 배치 표에서 재사용
+        """
+        if self.analyzer is not None:
+            return self.analyzer.batch_table()
+        if self._batch_table is None:
+            self._batch_table = BatchTable.from_batches(self.data['analysis_results'])
+        return self._batch_table
+    
     def display_overview(self):
         """개요 대시보드"""
         st.header("📊 워터펌프 온도 분석 개요")
@@ -248,7 +343,7 @@ timestamp,value
             return
         
         metadata = self.data['metadata']
-        results = self.data['analysis_results']
+        table = self.batch_table()
         
         # 메트릭 표시
         col1, col2, col3, col4 = st.columns(4)
@@ -257,21 +352,223 @@ timestamp,value
             st.metric("총 배치 수", metadata['total_batches'])
         
         with col2:
-            st.metric("윈도우 크기", f"{metadata['window_size']} 레코드")
+            st.metric("윈도우 크기", metadata['window_freq'] if 'window_freq' in metadata else f"{metadata['window_size']} 레코드")
         
         with col3:
-            alert_counts = {}
-            for result in results:
-                alert = result['alert_level']
-                alert_counts[alert] = alert_counts.get(alert, 0) + 1
-            
-            critical_count = alert_counts.get('위험', 0) + alert_counts.get('주의', 0)
+            critical_count = len(table.where('alert_level', ['위험', '주의']))
             st.metric("위험/주의 배치", critical_count)
         
         with col4:
-            avg_temp = np.mean([r['statistics']['mean'] for r in results])
+            avg_temp = table['mean'].mean()
             st.metric("평균 온도", f"{avg_temp:.1f}°C")
+
+        # 원시 데이터가 있으면 전체 온도 분위수 (KLL 스케치)
+        if self.analyzer is not None and self.analyzer.value_sketch is not None:
+            percentiles = self.analyzer.get_percentiles()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("전체 중앙값", f"{percentiles['p50']:.1f}°C")
+            col2.metric("전체 p95", f"{percentiles['p95']:.1f}°C")
+            col3.metric("전체 p99", f"{percentiles['p99']:.1f}°C")
+            st.caption(f"분위수 순위 오차 ±{percentiles['rank_error']:.2%} 이내 ({percentiles['count']:,}개 레코드)")
+        
+        # 임계 온도 도달 예측 (Holt 모델 기준, 직선 추세는 비교용)
+        forecast = metadata.get('forecast')
+        if forecast is not None:
+            st.subheader("⏳ 임계 온도 도달 예측")
+            st.caption(f"기준 시각 {forecast['last_timestamp']}, 최근 {forecast['params']['fit_window']}개 레코드 추세")
+            for line in describe_crossings(forecast):
+                st.write(f"- {line}")
+        
+        # 원시 시계열 이상 감지 이벤트 (배치 라벨과 함께 표시)
+        anomalies = self.anomaly_table()
+        if anomalies is not None:
+            st.subheader(f"🚨 이상 감지 이벤트 ({len(anomalies)}건)")
+            if len(anomalies):
+                st.dataframe(anomalies.sort_values('점수', ascending=False), hide_index=True)
+            else:
+                st.success("감지된 이상 이벤트가 없습니다.")
+        
+        # 변화점으로 나눈 운전 구간 (평균/분산이 일정한 구간)
+        segments = self.segment_table()
+        if segments is not None:
+            st.subheader(f"🔀 운전 구간 ({len(segments)}개, 변화점 {max(len(segments) - 1, 0)}개)")
+            st.dataframe(segments, hide_index=True)
+        
+        # 비슷한 패턴의 배치 그룹 (미니배치 k-means)
+        groups = self.data['metadata'].get('batch_clusters')
+        if groups:
+            st.subheader(f"🧩 패턴 그룹 ({len(groups)}개)")
+            st.dataframe(pd.DataFrame([
+                {
+                    '그룹': group['cluster_id'],
+                    '배치 수': group['size'],
+                    '비율': f"{group['share']:.1%}",
+                    '평균 온도 (°C)': round(group['mean_temperature'], 1),
+                    '최고 온도 (°C)': round(group['max_temperature'], 1),
+                    '평균 표준편차': round(group['mean_std'], 2),
+                    '대표 라벨': group['value_label'],
+                    '경고 수준': group['alert_level'],
+                    '트렌드': group['trend'],
+                    '대표 배치': ', '.join(str(batch_id) for batch_id in group['representative_batches'])
+                }
+                for group in groups
+            ]), hide_index=True)
+        
+        # 매트릭스 프로파일 디스코드 (고장 전조 후보)와 반복 패턴 모티프
+        self.display_motifs()
+    
+    def display_motifs(self):
+        """
+        디스코드/모티프 표
+        매트릭스 프로파일은 느려서 분석 시 실행하지 않으므로, 아직 탐색하지 않았으면 원시 데이터가 있을 때 탐색 버튼 표시
+        (CSV 분석 결과는 캐시 항목에 다시 저장되어 다음 실행부터 바로 표시)
+        """
+        summary = matrix_profile_summary(self.data['metadata'])
+        if summary['status'] == MOTIFS_NOT_COMPUTED:
+            if self.analyzer is None or self.analyzer.raw_values is None:
+                return
+            st.subheader("🔎 특이 구간 / 🔁 반복 패턴")
+            st.caption("매트릭스 프로파일 탐색은 레코드 수에 따라 수 초 이상 걸려 필요할 때만 실행합니다.")
+            if not st.button("🔍 반복 패턴/특이 구간 탐색"):
+                return
+            with st.spinner("매트릭스 프로파일 계산 중..."):
+                self.data['metadata'].update(self.cache.discover_motifs(self.analyzer, self.data['metadata']['data_source']))
+            summary = self.data['metadata']['matrix_profile']
+        if summary['status'] == MOTIFS_INSUFFICIENT:
+            st.caption("ℹ️ 레코드가 부족하여 반복 패턴/특이 구간을 탐색하지 않았습니다.")
+            return
+        
+        discords = self.discord_table()
+        if discords is None:
+            return
+        st.subheader(f"🔎 특이 구간 (디스코드 {len(discords)}개)")
+        st.caption("다른 어떤 구간과도 모양이 닮지 않은 구간입니다. 고장 전조일 수 있습니다.")
+        resolution = describe_motif_resolution(summary)
+        if resolution is not None:
+            st.caption(f"ℹ️ {resolution}")
+        st.dataframe(discords, hide_index=True)
+        st.subheader(f"🔁 반복 패턴 (모티프 {len(self.data['metadata']['motifs'])}개)")
+        st.dataframe(self.motif_table(), hide_index=True)
+    
+    def similar_batch_table(self, batch_id, k=5):
+        """
+        batch_id와 패턴이 가장 비슷한 배치 표
+        CSV/저장소 분석은 분석기 색인(통계+모양), JSON 결과는 배치 통계로 만든 색인 사용
+        """
+        if self.analyzer is not None and self.analyzer.analyzed_data:
+            matches = self.analyzer.similar_batches(batch_id, k)
+        else:
+            results = self.data['analysis_results']
+            if self.similarity_index is None or len(self.similarity_index) != len(results):
+                self.similarity_index = BatchSimilarityIndex.from_table(self.batch_table())
+            labels = {r['batch_id']: r for r in results}
+            matches = []
+            for match in self.similarity_index.similar(batch_id, k):
+                batch = labels[match['batch_id']]
+                matches.append({
+                    **match,
+                    'start_timestamp': batch['start_timestamp'],
+                    'mean': batch['statistics']['mean'],
+                    'max': batch['statistics']['max'],
+                    'value_label': batch['value_label'],
+                    'alert_level': batch['alert_level']
+                })
+        return pd.DataFrame([
+            {
+                '배치 ID': match['batch_id'],
+                '거리': round(match['distance'], 3),
+                '그룹': match['cluster_id'],
+                '시작': match['start_timestamp'],
+                '평균 (°C)': round(match['mean'], 2),
+                '최고 (°C)': round(match['max'], 2),
+                '온도 라벨': match['value_label'],
+                '경고 수준': match['alert_level']
+            }
+            for match in matches
+        ])
+    
+    def discord_table(self):
+        """메타데이터의 디스코드 표 (모티프를 탐색하지 않았거나 레코드가 부족한 결과는 None)"""
+        discords = self.data['metadata'].get('discords')
+        if discords is None:
+            return None
+        return pd.DataFrame([
+            {
+                '순위': discord['rank'],
+                '거리': round(discord['distance'], 2),
+                '시작': discord['start_timestamp'],
+                '종료': discord['end_timestamp'],
+                '배치 ID': discord['batch_id'],
+                '평균 (°C)': round(discord['mean'], 2),
+                '최고 (°C)': round(discord['max'], 2),
+                '가장 닮은 구간 시작': discord['nearest_start_timestamp']
+            }
+            for discord in discords
+        ], columns=['순위', '거리', '시작', '종료', '배치 ID', '평균 (°C)', '최고 (°C)', '가장 닮은 구간 시작'])
     
+    def motif_table(self):
+        """메타데이터의 모티프 표 (모티프마다 반복 위치 한 행, 모티프를 탐색하지 않았거나 레코드가 부족한 결과는 None)"""
+        motifs = self.data['metadata'].get('motifs')
+        if motifs is None:
+            return None
+        return pd.DataFrame([
+            {
+                '모티프': motif['rank'],
+                '쌍 거리': round(motif['distance'], 2),
+                '시작': occurrence['start_timestamp'],
+                '종료': occurrence['end_timestamp'],
+                '배치 ID': occurrence['batch_id'],
+                '거리': round(occurrence['distance'], 2),
+                '평균 (°C)': round(occurrence['mean'], 2)
+            }
+            for motif in motifs
+            for occurrence in motif['occurrences']
+        ], columns=['모티프', '쌍 거리', '시작', '종료', '배치 ID', '거리', '평균 (°C)'])
+    
+    def segment_table(self):
+        """메타데이터의 운전 구간 표 (변화점 탐지를 실행하지 않은 결과는 None)"""
+        segments = self.data['metadata'].get('segments')
+        if segments is None:
+            return None
+        return pd.DataFrame([
+            {
+                '구간': segment['segment_id'],
+                '시작': segment['start_timestamp'],
+                '종료': segment['end_timestamp'],
+                '레코드 수': segment['record_count'],
+                '평균 (°C)': round(segment['mean'], 2),
+                '표준편차': round(segment['std'], 2),
+                '최저 (°C)': round(segment['min'], 2),
+                '최고 (°C)': round(segment['max'], 2),
+                '평균 변화': round(segment['mean_shift'], 2) if segment['mean_shift'] is not None else None,
+                '배치 범위': '{}~{}'.format(*segment['batch_ids']) if segment['batch_ids'] else None
+            }
+            for segment in segments
+        ], columns=['구간', '시작', '종료', '레코드 수', '평균 (°C)', '표준편차', '최저 (°C)', '최고 (°C)', '평균 변화', '배치 범위'])
+    
+    def anomaly_table(self, batch_id=None):
+        """메타데이터의 이상 이벤트를 배치 라벨과 합친 표 (이상 감지를 실행하지 않은 결과는 None)"""
+        events = self.data['metadata'].get('anomalies')
+        if events is None:
+            return None
+        if batch_id is not None:
+            events = [event for event in events if event['batch_id'] == batch_id]
+        labels = {r['batch_id']: r for r in self.data['analysis_results']}
+        return pd.DataFrame([
+            {
+                '최고점 시각': event['peak_timestamp'],
+                '시작': event['start_timestamp'],
+                '종료': event['end_timestamp'],
+                '온도 (°C)': round(event['peak_value'], 2),
+                '점수': event['score'],
+                '감지기': ', '.join(event['detectors']),
+                '배치 ID': event['batch_id'],
+                '온도 라벨': labels.get(event['batch_id'], {}).get('value_label'),
+                '경고 수준': labels.get(event['batch_id'], {}).get('alert_level')
+            }
+            for event in events
+        ], columns=['최고점 시각', '시작', '종료', '온도 (°C)', '점수', '감지기', '배치 ID', '온도 라벨', '경고 수준'])
+
     def display_temperature_trends(self):
         """온도 트렌드 시각화"""
         st.header("📈 온도 트렌드 분석")
@@ -279,24 +576,19 @@ timestamp,value
         if not self.data:
             return
         
-        results = self.data['analysis_results']
+        table = self.batch_table()
         
-        # 시계열 데이터 준비
-        timeline_data = []
-        for result in results:
-            timeline_data.append({
-                'batch_id': result['batch_id'],
-                'start_time': result['start_timestamp'],
-                'mean_temp': result['statistics']['mean'],
-                'max_temp': result['statistics']['max'],
-                'min_temp': result['statistics']['min'],
-                'value_label': result['value_label'],
-                'alert_level': result['alert_level'],
-                'trend': result['trend']
-            })
-        
-        df = pd.DataFrame(timeline_data)
-        df['start_time'] = pd.to_datetime(df['start_time'])
+        # 시계열 데이터 준비 (배치 테이블 컬럼을 그대로 사용)
+        df = pd.DataFrame({
+            'batch_id': table['batch_id'],
+            'start_time': pd.to_datetime(table['start_timestamp']),
+            'mean_temp': table['mean'],
+            'max_temp': table['max'],
+            'min_temp': table['min'],
+            'value_label': np.asarray(table['value_label']),
+            'alert_level': np.asarray(table['alert_level']),
+            'trend': np.asarray(table['trend'])
+        })
         
         # 온도 트렌드 차트
         fig = go.Figure()
@@ -326,6 +618,21 @@ timestamp,value
             fill='tonexty'
         ))
         
+        # 운전 구간 평균 (변화점마다 끊기는 계단선)
+        segments = self.data['metadata'].get('segments')
+        if segments:
+            x, y = [], []
+            for segment in segments:
+                x += [segment['start_timestamp'], segment['end_timestamp'], None]
+                y += [segment['mean'], segment['mean'], None]
+            fig.add_trace(go.Scatter(
+                x=[pd.Timestamp(value) if value is not None else None for value in x],
+                y=y,
+                mode='lines',
+                name='구간 평균',
+                line=dict(color='orange', width=3)
+            ))
+        
         fig.update_layout(
             title="배치별 온도 변화 추이",
             xaxis_title="시간",
@@ -335,6 +642,10 @@ timestamp,value
         
         st.plotly_chart(fig, use_container_width=True)
         
+        # 원시 데이터가 있으면 롤업 피라미드로 임의 구간 확대/축소
+        if self.analyzer is not None and self.analyzer.rollups is not None:
+            self.display_zoom_view()
+        
         # 경고 수준별 분포
         alert_dist = df['alert_level'].value_counts()
         fig_pie = px.pie(
@@ -364,6 +675,50 @@ timestamp,value
             fig_bar.update_xaxes(tickangle=45)
             st.plotly_chart(fig_bar, use_container_width=True)
     
+    def display_zoom_view(self):
+        """롤업 피라미드 기반 구간 확대 차트 (구간 크기에 맞는 해상도 자동 선택)"""
+        st.subheader("🔍 구간 확대 보기")
+        
+        # 슬라이더는 시간대 없는 현지 시각으로 표시 (조회 시 분석기가 데이터 시간대를 적용)
+        zoom_all = self.analyzer.zoom(max_points=1)
+        bounds = pd.Series([zoom_all['timestamp'].iloc[0], zoom_all['end_timestamp'].iloc[-1]])
+        if bounds.dt.tz is not None:
+            bounds = bounds.dt.tz_localize(None)
+        start_time, end_time = [timestamp.to_pydatetime() for timestamp in bounds]
+        if start_time >= end_time:
+            return
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            selected_range = st.slider("조회 구간", min_value=start_time, max_value=end_time,
+                                       value=(start_time, end_time), format="YYYY-MM-DD HH:mm")
+        with col2:
+            max_points = st.selectbox("최대 포인트 수", [500, 1000, 2000, 5000], index=2)
+        
+        zoom = self.analyzer.zoom(selected_range[0], selected_range[1], max_points=max_points)
+        summary = self.analyzer.query_range(selected_range[0], selected_range[1])
+        if summary['count'] == 0:
+            st.info("선택한 구간에 데이터가 없습니다.")
+            return
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=zoom['timestamp'], y=zoom['max'], mode='lines', name='최고 온도',
+                                 line=dict(color='red', width=1)))
+        fig.add_trace(go.Scatter(x=zoom['timestamp'], y=zoom['min'], mode='lines', name='최저 온도',
+                                 line=dict(color='lightblue', width=1), fill='tonexty'))
+        fig.add_trace(go.Scatter(x=zoom['timestamp'], y=zoom['mean'], mode='lines', name='평균 온도',
+                                 line=dict(color='blue', width=2)))
+        fig.update_layout(
+            title=f"구간 온도 변화 ({zoom.attrs['level']}개 레코드 단위)",
+            xaxis_title="시간",
+            yaxis_title="온도 (°C)",
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.caption(f"구간 {summary['count']:,}개 레코드: 평균 {summary['mean']:.2f}°C, 표준편차 {summary['std']:.2f}, "
+                   f"최저 {summary['min']:.2f}°C, 최고 {summary['max']:.2f}°C (롤업 셀 {summary['cells']}개 사용)")
+    
     def display_detailed_analysis(self):
         """상세 분석"""
         st.header("🔍 상세 분석")
@@ -405,8 +760,28 @@ timestamp,value
                 st.write(f"**최댓값**: {stats['max']:.2f}°C")
                 st.write(f"**범위**: {stats['range']:.2f}°C")
             
-            # 배치 내 온도 변화
-            raw_data = batch_data['raw_data']
+            # 배치 라벨과 함께 원시 시계열 이상 감지 이벤트 표시
+            anomalies = self.anomaly_table(batch_id)
+            if anomalies is not None:
+                if len(anomalies):
+                    st.subheader(f"🚨 이상 감지 이벤트 ({len(anomalies)}건)")
+                    st.dataframe(anomalies, hide_index=True)
+                else:
+                    st.caption("이 배치에서 감지된 이상 이벤트가 없습니다.")
+            
+            # 특징 벡터(통계 + 모양)가 가장 가까운 배치
+            if len(results) > 1:
+                st.subheader("🧩 비슷한 패턴의 배치")
+                st.dataframe(self.similar_batch_table(batch_id), hide_index=True)
+            
+            # 배치 내 온도 변화 (JSON 업로드는 raw_data 포함, CSV 분석은 필요할 때 생성)
+            if 'raw_data' in batch_data:
+                raw_data = batch_data['raw_data']
+            elif 'raw_offsets' in batch_data and self.analyzer is not None:
+                raw_data = self.analyzer.get_raw_data(batch_data)
+            else:
+                st.info("통계만 저장된 결과라 배치 내 원시 데이터가 없습니다.")
+                return
             df_raw = pd.DataFrame(raw_data)
             df_raw['timestamp'] = pd.to_datetime(df_raw['timestamp'])
             
@@ -422,16 +797,27 @@ timestamp,value
             fig_detail.add_hline(y=70, line_dash="dash", line_color="orange", annotation_text="주의 임계값")
             fig_detail.add_hline(y=85, line_dash="dash", line_color="red", annotation_text="위험 임계값")
             
+            # 배치 안의 이상 감지 이벤트 최고점 표시
+            if anomalies is not None and len(anomalies):
+                fig_detail.add_scatter(
+                    x=pd.to_datetime(anomalies['최고점 시각']),
+                    y=anomalies['온도 (°C)'],
+                    mode='markers',
+                    marker=dict(color='red', size=10, symbol='x'),
+                    name='이상 감지'
+                )
+            
             st.plotly_chart(fig_detail, use_container_width=True)
     
     def display_export_options(self):
         """데이터 내보내기 옵션"""
         st.header("💾 데이터 내보내기")
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             st.subheader("📄 JSON 분석 결과")
+            export_mode = st.selectbox("JSON 형식", list(JSON_EXPORT_MODES))
             if st.button("📥 JSON 파일 다운로드"):
                 import os
                 
@@ -441,21 +827,30 @@ timestamp,value
                     os.makedirs(data_folder)
                 
                 # 파일명 생성
+                options, extension = JSON_EXPORT_MODES[export_mode]
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"water_pump_analysis_{timestamp}.json"
+                filename = f"water_pump_analysis_{timestamp}.{extension}"
+                full_path = os.path.join(data_folder, filename)
                 
-                json_str = json.dumps(self.data, ensure_ascii=False, indent=2)
-                st.download_button(
-                    label="분석 결과 다운로드",
-                    data=json_str,
-                    file_name=filename,
-                    mime="application/json"
-                )
+                if self.analyzer is not None:
+                    # 분석기에서 배치 단위로 스트리밍 저장한 파일을 그대로 다운로드
+                    self.analyzer.save_to_json(
+                        full_path,
+                        data_source=self.data['metadata'].get('data_source', 'water_pump_temperature_sensor'),
+                        **options
+                    )
+                else:
+                    # 업로드한 JSON 결과는 들여쓰기 JSON으로 그대로 저장
+                    with open(full_path, 'w', encoding='utf-8') as f:
+                        json.dump(self.data, f, ensure_ascii=False, indent=2)
                 
-                # 로컬 저장도 수행
-                full_path = os.path.join(data_folder, filename)
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+                with open(full_path, 'rb') as f:
+                    st.download_button(
+                        label="분석 결과 다운로드",
+                        data=f.read(),
+                        file_name=filename,
+                        mime="application/json"
+                    )
                 st.success(f"✅ 파일이 {full_path}에도 저장되었습니다!")
         
         with col2:
@@ -482,21 +877,44 @@ timestamp,value
                 with open(full_path, 'w', encoding='utf-8') as f:
                     f.write(report)
                 st.success(f"✅ 리포트가 {full_path}에도 저장되었습니다!")
+        
+        with col3:
+            st.subheader("🗜️ 컬럼형 분석 결과")
+            if self.analyzer is None:
+                st.info("CSV 분석 또는 샘플 데이터 결과에서 사용할 수 있습니다.")
+            elif st.button("📦 컬럼형 파일 생성"):
+                import os
+                
+                data_folder = 'water_pump_data'
+                if not os.path.exists(data_folder):
+                    os.makedirs(data_folder)
+                
+                # pyarrow가 있으면 parquet, 없으면 npz로 저장
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                full_path = self.analyzer.save_columnar(
+                    os.path.join(data_folder, f"water_pump_analysis_{timestamp}"),
+                    data_source=self.data['metadata'].get('data_source', 'water_pump_temperature_sensor')
+                )
+                with open(full_path, 'rb') as f:
+                    st.download_button(
+                        label="컬럼형 결과 다운로드",
+                        data=f.read(),
+                        file_name=os.path.basename(full_path),
+                        mime="application/octet-stream"
+                    )
+                st.success(f"✅ 파일이 {full_path}에도 저장되었습니다!")
     
     def generate_summary_report(self):
         """요약 리포트 생성"""
         if not self.data:
             return "데이터가 없습니다."
         
-        results = self.data['analysis_results']
+        table = self.batch_table()
         metadata = self.data['metadata']
         
-        # 통계 계산
-        all_temps = [r['statistics']['mean'] for r in results]
-        alert_counts = {}
-        for result in results:
-            alert = result['alert_level']
-            alert_counts[alert] = alert_counts.get(alert, 0) + 1
+        # 통계 계산 (경고 수준은 처음 나타난 순서로 표시)
+        appearance_order = pd.unique(table['alert_level']).tolist()
+        alert_counts = table.label_counts('alert_level', appearance_order)
         
         report = f"""
 워터펌프 온도 분석 리포트
@@ -506,28 +924,28 @@ timestamp,value
 ---------
 - 분석 일시: {metadata.get('analysis_date', 'N/A')}
 - 총 배치 수: {metadata.get('total_batches', 'N/A')}개
-- 윈도우 크기: {metadata.get('window_size', 'N/A')} 레코드
+- 윈도우 크기: {metadata.get('window_freq') or f"{metadata.get('window_size', 'N/A')} 레코드"}
 
 온도 통계
 ---------
-- 평균 온도: {np.mean(all_temps):.1f}°C
-- 최고 온도: {max([r['statistics']['max'] for r in results]):.1f}°C
-- 최저 온도: {min([r['statistics']['min'] for r in results]):.1f}°C
+- 평균 온도: {table['mean'].mean():.1f}°C
+- 최고 온도: {table['max'].max():.1f}°C
+- 최저 온도: {table['min'].min():.1f}°C
 
 경고 수준 분포
 -----------
 """
         for level, count in alert_counts.items():
-            percentage = (count / len(results)) * 100
+            percentage = (count / len(table)) * 100
             report += f"- {level}: {count}개 ({percentage:.1f}%)\n"
         
         # 위험 배치 상세
-        critical_batches = [r for r in results if r['alert_level'] in ['위험', '주의']]
-        if critical_batches:
+        critical_batches = table.where('alert_level', ['위험', '주의'])
+        if len(critical_batches):
             report += f"\n위험/주의 배치 상세\n"
             report += f"------------------\n"
             for batch in critical_batches:
-                report += f"배치 {batch['batch_id']}: {batch['statistics']['mean']:.1f}°C ({batch['alert_level']})\n"
+                report += f"배치 {batch.batch_id}: {batch.mean:.1f}°C ({batch.alert_level})\n"
         
         return report
 
@@ -1,205 +1,3241 @@
 import pandas as pd
 import numpy as np
 import json
+import os
+import heapq
+import importlib.util
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import statistics
 
+from anomaly_detectors import DEFAULT_EVENT_GAP, DETECTOR_NAMES, StreamingDetector, anomaly_events, detector_params, score_series
+from batch_similarity import BatchSimilarityIndex, similarity_params
+from change_points import change_point_params, find_change_points, segment_statistics
+from forecasting import DEFAULT_FORECAST_PARAMS, FORECAST_MODELS, FORECAST_THRESHOLDS, ForecastState, forecast_params
+from growable_array import GrowableArray
+from quantile_sketch import DEFAULT_SKETCH_K, KLLSketch, merge_sketches
+from rollup_pyramid import DEFAULT_ROLLUP_LEVELS, RollupPyramid
+from stage_profiler import StageProfiler
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# 배치 라벨 분류 임계값 테이블
+# - bins/labels: 오름차순 구간 (bins[i-1] <= x < bins[i] 이면 labels[i], np.digitize와 동일)
+# - rules: 위에서부터 처음 만족하는 규칙의 라벨, 모두 불만족이면 default
+DEFAULT_THRESHOLDS = {
+    'temperature': {'bins': [40, 70, 85], 'labels': ['저온', '정상', '고온', '과열']},
+    'variability': {'bins': [2, 5], 'labels': ['안정', '보통', '불안정']},
+    'range': {'bins': [5, 15], 'labels': ['일정', '변동', '급변']},
+    'stability': {'bins': [0.05, 0.1, 0.2], 'labels': ['매우안정', '안정', '보통', '불안정']},
+    'trend': {
+        # labels 순서: 상승(> rising_slope), 하강(< falling_slope), 평형
+        'rising_slope': 0.1,
+        'falling_slope': -0.1,
+        'labels': ['상승', '하강', '평형'],
+        'insufficient': '불충분'
+    },
+    'alert_level': {
+        'rules': [
+            {'label': '위험', 'max_above': 90, 'mean_above': 85},
+            {'label': '주의', 'max_above': 80, 'mean_above': 75},
+            {'label': '관찰', 'max_above': 70, 'mean_above': 65}
+        ],
+        'default': '정상'
+    }
+}
+
+# 컬럼형 결과 파일 (save_columnar/load_columnar)
+COLUMNAR_FORMAT_VERSION = 1
+_COLUMNAR_EXTENSIONS = {'.npz': 'npz', '.parquet': 'parquet', '.feather': 'feather'}
+_STATISTICS_FIELDS = ('mean', 'median', 'std', 'min', 'max', 'range')
+_LABEL_FIELDS = ('value_label', 'trend', 'stability', 'alert_level')
+
+# 메모리 맵 원시 저장소 (save_raw_store/attach_raw_store)
+RAW_STORE_DIR = os.path.join('water_pump_data', 'raw_store')
+RAW_STORE_VERSION = 1
+
+# compact 모드 배치 레코드 배열 (배치당 77바이트, 라벨은 label_lookups 조회표 코드)
+BATCH_RECORD_DTYPE = np.dtype([
+    ('batch_id', np.int64), ('start_ns', np.int64), ('end_ns', np.int64), ('record_count', np.int32),
+    ('raw_start', np.int64), ('raw_end', np.int64),
+    ('mean', np.float32), ('median', np.float32), ('std', np.float32), ('min', np.float32),
+    ('max', np.float32), ('range', np.float32), ('slope', np.float32),
+    ('value_label', np.int16), ('trend', np.int8), ('stability', np.int8), ('alert_level', np.int8)
+])
+
+# CSV 컬럼 자동 매핑 시 헤더와 함께 읽어 자료형을 판별할 샘플 행 수
+SCHEMA_SAMPLE_ROWS = 5000
+# 이름으로 찾지 못한 숫자 컬럼을 epoch 타임스탬프로 볼 최솟값 (1e8초 = 1973년)
+_EPOCH_MIN_SECONDS = 1e8
+
+# 스트리밍 JSON 내보내기 시 한 번에 raw_data를 생성하는 최대 레코드 수 (배치 블록 단위)
+JSON_EXPORT_BLOCK_ROWS = 10_000
+
+# 매트릭스 프로파일 모티프/디스코드 탐색 (discover_motifs)
+# - window: 부분 시계열 길이 (레코드 수, 5분 간격 기준 1일)
+# - max_points: 초과하면 구간 평균으로 줄여 계산 (줄인 뒤에도 부분 시계열은 min_window_points개 이상)
+# - chunk_rows: 작업 하나가 계산하는 프로파일 행 수 (FFT로 다시 시작하므로 누적 오차도 제한)
+# - motif_radius: 모티프 쌍 거리의 배수 이내인 구간을 같은 모티프의 반복으로 묶음
+DEFAULT_MATRIX_PROFILE_PARAMS = {
+    'window': 288,
+    'top_k': 3,
+    'max_points': 50_000,
+    'min_window_points': 16,
+    'chunk_rows': 8192,
+    'motif_radius': 2.0,
+    'max_occurrences': 10
+}
+
+# 모티프 탐색 상태 (metadata['matrix_profile']['status'])
+# 매트릭스 프로파일은 확장 분석 중 가장 느려서(레코드 10만 개 약 8초) 업로드 시 실행하지 않고 요청할 때 실행
+# - not_computed: 아직 탐색하지 않음 (모티프/디스코드 목록이 없다는 뜻이 아님)
+# - computed: 탐색 완료 (step > 1이면 step개씩 평균하여 계산한 근사 위치)
+# - insufficient: 부분 시계열 길이에 비해 레코드가 부족하여 계산하지 않음
+MOTIFS_NOT_COMPUTED = 'not_computed'
+MOTIFS_COMPUTED = 'computed'
+MOTIFS_INSUFFICIENT = 'insufficient'
+
+
 class WaterPumpAnalyzer:
-    def __init__(self):
+    def __init__(self, thresholds=None, compact=False, sketch_k=DEFAULT_SKETCH_K, profile=False):
+        """
+        sketch_k: 전체 분위수(get_percentiles) KLL 스케치 정확도, 순위 오차 약 2.296 / k^0.9723
+        profile: 단계별(read/parse/clean/sort/window_statistics/labeling/serialize 등) 시간, 레코드 수,
+            메모리 변화량을 self.profile에 기록 (enable_profiling()으로 나중에 켤 수도 있음)
+        
+        compact=True: 대용량(플릿) 데이터용 저메모리 모드
+        - 온도 값은 float32, 타임스탬프는 int64 epoch ns 원시 배열로만 보관 (분석 후 DataFrame 해제)
+        - 추가 문자열 컬럼은 category dtype
+        - 레코드 수 기준 배치는 batch_records(BATCH_RECORD_DTYPE 레코드 배열)로 보관하고
+          analyzed_data 딕셔너리 목록은 처음 조회할 때 생성
+        """
+        self.compact = compact
+        self.sketch_k = sketch_k
+        self.stream_sketch = None   # iter_csv_stream()에서 청크마다 갱신한 스케치
         self.data = None
+        self.batch_records = None
         self.analyzed_data = []
+        self.window_size = 100
+        self.window_freq = None  # 시간 기준 윈도우 분석 시 '16h' 등
+        self.load_summary = {}
+        
+        # 라벨 분류 임계값 테이블과 라벨 코드 조회표
+        self.set_thresholds(thresholds)
+        
+        # 컬럼형 원시 데이터: 배치는 raw_offsets [start, end)만 보관
+        self.raw_timestamps = None  # int64 epoch 나노초
+        self.raw_values = None      # float64 온도 값 (compact 모드는 float32)
+        self.raw_timezone = None
+        self.raw_store = None       # attach_raw_store()로 연결한 저장소 경로
+        
+        # append()로 새로 닫힌 배치를 전달받는 콜백 목록
+        self.batch_listeners = []
+        
+        # 단계별 프로파일링 (비활성 시 측정 비용 없음)
+        self.profiler = StageProfiler(enabled=profile)
+        
+        # detect_anomalies() 결과 (이벤트 목록)와 append()용 스트리밍 감지기
+        self.anomalies = None
+        self.anomaly_params = None
+        self._anomaly_detector = None
+        self._anomaly_gap = DEFAULT_EVENT_GAP
+        self._anomaly_pending = None
+        
+        # forecast_thresholds() 결과 (임계 온도 도달 예측)와 append()용 증분 예측 상태
+        self.forecast = None
+        self._forecast_state = None
+        
+        # detect_change_points() 결과 (평균/분산이 일정한 운전 구간 목록)
+        self.segments = None
+        self.change_point_params = None
+        
+        # build_similarity_index() 결과 (배치 특징 색인과 패턴 그룹 요약)
+        self.similarity_index = None
+        self.similarity_params = None
+        self.batch_clusters = None
+        self._clusters_stale = False
+        
+        # discover_motifs() 결과 (매트릭스 프로파일 모티프/디스코드와 프로파일 배열)
+        self.motifs = None
+        self.discords = None
+        self.matrix_profile_params = None
+        self.matrix_profile = None
+        self.matrix_profile_summary = {'status': MOTIFS_NOT_COMPUTED}
+    
+    @property
+    def data(self):
+        """원본 DataFrame (append로 추가된 레코드는 조회 시점에 합침)"""
+        if self._pending_frames:
+            self._data = pd.concat([self._data] + self._pending_frames, ignore_index=True)
+            self._pending_frames = []
+        return self._data
+    
+    @data.setter
+    def data(self, frame):
+        self._data = frame
+        self._pending_frames = []
+    
+    @property
+    def analyzed_data(self):
+        """배치 딕셔너리 목록 (compact 모드에서는 batch_records로부터 처음 조회할 때 생성)"""
+        if self._analyzed_data is None:
+            self._analyzed_data = self._batches_from_records(self.batch_records)
+        return self._analyzed_data
+    
+    @analyzed_data.setter
+    def analyzed_data(self, batches):
+        self._analyzed_data = batches
+        self.batch_records = None
+        self._batch_table = None
+    
+    @property
+    def raw_timestamps(self):
+        return None if self._raw_timestamps is None else self._raw_timestamps.view()
+    
+    @raw_timestamps.setter
+    def raw_timestamps(self, values):
+        self._raw_timestamps = None if values is None else GrowableArray(values, np.int64)
+    
+    @property
+    def raw_values(self):
+        return None if self._raw_values is None else self._raw_values.view()
+    
+    @raw_values.setter
+    def raw_values(self, values):
+        value_dtype = np.float32 if self.compact else np.float64
+        self._raw_values = None if values is None else GrowableArray(values, value_dtype)
+        self._sketch = None
+        self._rollups = None
+        self._anomaly_detector = None
+        self._forecast_state = None
+    
+    @property
+    def value_sketch(self):
+        """
+        전체 원시 값의 KLL 분위수 스케치 (처음 조회할 때 생성, append()에서는 새 레코드만 반영)
+        원시 데이터가 없는 스트리밍 분석 결과는 stream_sketch 사용
+        """
+        if self._sketch is None and self._raw_values is not None and len(self._raw_values):
+            self._sketch = KLLSketch.from_values(self.raw_values, self.sketch_k)
+        return self._sketch
+    
+    @property
+    def rollups(self):
+        """
+        원시 시계열의 롤업 피라미드 (레벨 1/10/100/1k/10k, 처음 조회할 때 O(n)으로 생성)
+        append()에서는 새 레코드가 속한 셀만 다시 집계
+        """
+        if self._rollups is None and self._raw_values is not None and len(self._raw_values):
+            self._rollups = RollupPyramid(self.raw_timestamps, self.raw_values, DEFAULT_ROLLUP_LEVELS)
+        return self._rollups
+    
+    @property
+    def profile(self):
+        """단계별 프로파일 {단계: {calls, total_sec, last_sec, rows, rows_per_sec, memory_delta_bytes, failures}}"""
+        return self.profiler.profile
+    
+    def enable_profiling(self, sink=None, track_memory=True):
+        """
+        단계별 프로파일링 시작
+        sink: 단계가 끝날 때마다 호출할 callback(event) (예: stage_profiler.logging_sink())
+        """
+        self.profiler.enabled = True
+        self.profiler.track_memory = track_memory
+        if sink is not None:
+            self.profiler.add_sink(sink)
+        return self.profiler
+    
+    def disable_profiling(self):
+        """단계별 프로파일링 중지 (수집한 profile은 유지)"""
+        self.profiler.enabled = False
     
-    def load_data(self, file_path=None, data=None, uploaded_file=None):
+    def load_data(self, file_path=None, data=None, uploaded_file=None, csv_engine='auto', timestamp_format=None,
+                  keep_all_columns=False):
         """
         데이터 로드 (CSV 파일, 직접 데이터, 또는 업로드된 파일)
         예상 컬럼: timestamp, value
+        
+        csv_engine: 'auto'(pyarrow 설치 시 pyarrow, 아니면 'c'), 'pyarrow', 'c', 'python'
+        timestamp_format: strptime 형식 또는 'epoch_s'/'epoch_ms' 등, None이면 샘플로 자동 판별
+        keep_all_columns: CSV의 나머지 컬럼도 함께 읽을지 여부
+            (기본값은 헤더와 샘플 행으로 timestamp/value 컬럼을 먼저 찾고 그 두 컬럼만 읽음)
         """
         try:
-            if uploaded_file is not None:
-                # Streamlit 업로드된 파일 처리
-                self.data = pd.read_csv(uploaded_file)
-            elif file_path:
-                self.data = pd.read_csv(file_path)
-            elif data:
-                self.data = pd.DataFrame(data)
-            else:
-                raise ValueError("데이터 소스가 제공되지 않았습니다.")
+            if csv_engine == 'auto':
+                csv_engine = 'pyarrow' if _pyarrow_available() else 'c'
             
-            # 컬럼명 확인 및 정규화
-            if 'timestamp' not in self.data.columns or 'value' not in self.data.columns:
-                # 컬럼명 자동 매핑 시도
-                timestamp_cols = [col for col in self.data.columns if any(keyword in col.lower() for keyword in ['time', 'date', 'timestamp', '시간', '날짜'])]
-                value_cols = [col for col in self.data.columns if any(keyword in col.lower() for keyword in ['temp', 'value', 'temperature', '온도', '값'])]
-                
-                if timestamp_cols and value_cols:
-                    self.data = self.data.rename(columns={
-                        timestamp_cols[0]: 'timestamp',
-                        value_cols[0]: 'value'
-                    })
+            read_start = time.perf_counter()
+            schema = None
+            with self.profiler.stage('read') as stage:
+                if uploaded_file is not None or file_path:
+                    # Streamlit 업로드된 파일 또는 파일 경로
+                    source = uploaded_file if uploaded_file is not None else file_path
+                    schema = _probe_csv_schema(source)
+                    self.data = _read_csv_columns(source, schema, csv_engine, all_columns=keep_all_columns)
+                elif data:
+                    self.data = pd.DataFrame(data)
+                    csv_engine = None
+                    # 컬럼명 확인 및 정규화
+                    self.data.columns = _resolve_column_names(self.data.columns)
                 else:
-                    # 첫 번째와 두 번째 컬럼을 timestamp, value로 가정
-                    if len(self.data.columns) >= 2:
-                        self.data.columns = ['timestamp', 'value'] + list(self.data.columns[2:])
-                    else:
-                        raise ValueError("timestamp와 value 컬럼을 찾을 수 없습니다.")
+                    raise ValueError("데이터 소스가 제공되지 않았습니다.")
+                stage.rows = len(self.data)
+            read_sec = time.perf_counter() - read_start
             
-            # 데이터 타입 변환
-            self.data['timestamp'] = pd.to_datetime(self.data['timestamp'])
-            self.data['value'] = pd.to_numeric(self.data['value'], errors='coerce')
+            # 타임스탬프 형식은 샘플로 한 번만 판별한 뒤 전체 컬럼에 고정 형식으로 적용
+            parse_start = time.perf_counter()
+            if timestamp_format is None:
+                if schema is not None and schema['timestamp_format'] not in (None, 'mixed'):
+                    timestamp_format = schema['timestamp_format']
+                else:
+                    timestamp_format = _detect_timestamp_format(self.data['timestamp'])
+            total_rows = len(self.data)
             
-            # 결측치 제거
-            self.data = self.data.dropna()
+            # 데이터 타입 변환 및 결측치 제거
+            self.data = _clean_frame(self.data, timestamp_format, self.profiler)
+            parse_sec = time.perf_counter() - parse_start
             
             # 시간 순 정렬
-            self.data = self.data.sort_values('timestamp').reset_index(drop=True)
+            with self.profiler.stage('sort', rows=len(self.data)):
+                self.data = self.data.sort_values('timestamp').reset_index(drop=True)
+            self.raw_store = None
+            self.anomalies = None
+            self.forecast = None
+            self.segments = None
+            self._clear_similarity()
+            self._clear_motifs()
+            if self.compact:
+                with self.profiler.stage('compact', rows=len(self.data)):
+                    self.data = _compact_frame(self.data)
+            
+            self.load_summary = {
+                'records': len(self.data),
+                'dropped_records': total_rows - len(self.data),
+                'csv_engine': csv_engine,
+                'timestamp_format': timestamp_format,
+                'read_sec': read_sec,
+                'parse_sec': parse_sec,
+                'parse_rows_per_sec': total_rows / parse_sec if parse_sec > 0 else float('inf')
+            }
+            if schema is not None:
+                self.load_summary['columns'] = {'timestamp': schema['timestamp'], 'value': schema['value']}
+                self.load_summary['total_columns'] = schema['total_columns']
             
-            print(f"데이터 로드 완료: {len(self.data)}개 레코드")
+            print(f"데이터 로드 완료: {len(self.data)}개 레코드 "
+                  f"(타임스탬프 형식 {timestamp_format}, 파싱 {self.load_summary['parse_rows_per_sec']:,.0f}행/초)")
             return True
             
         except Exception as e:
             print(f"데이터 로드 실패: {e}")
             return False
     
-    def analyze_temperature_characteristics(self, window_size=100):
+    def analyze_temperature_characteristics(self, window_size=100, raw_data_mode='columnar'):
         """
         100개 레코드마다 온도 특성 분석하여 라벨 생성
+        모든 윈도우의 통계는 _window_statistics에서 한 번에 벡터 연산으로 계산
+        
+        raw_data_mode:
+        - 'columnar': 배치에는 raw_offsets만 저장, 원시 데이터는 get_raw_data()로 필요할 때 생성
+        - 'dict': 기존처럼 배치마다 raw_data 딕셔너리 목록을 즉시 생성
         """
+        if raw_data_mode not in ('columnar', 'dict'):
+            raise ValueError(f"지원하지 않는 raw_data_mode입니다: {raw_data_mode}")
+        
         self.analyzed_data = []
+        self.window_size = window_size
+        self.window_freq = None
+        self._clear_similarity()
         
-        for i in range(0, len(self.data), window_size):
-            window_data = self.data.iloc[i:i+window_size]
-            
-            if len(window_data) == 0:
-                continue
-            
-            # 기본 통계 분석
-            temp_values = window_data['value'].values
+        with self.profiler.stage('prepare_series') as stage:
+            series = self._analysis_series()
+            stage.rows = 0 if series is None else len(series[1])
+        if series is None:
+            return
+        
+        epoch_ns, values = series
+        with self.profiler.stage('window_statistics', rows=len(values)):
+            stats = _window_statistics(values, window_size)
+        with self.profiler.stage('labeling', rows=len(values)):
+            if self.compact and raw_data_mode == 'columnar':
+                self._set_batch_records(self._build_batch_records(epoch_ns, stats, window_size))
+                return
             
+            self.analyzed_data = self._build_batches(
+                epoch_ns, values, window_size, tz=self.raw_timezone, stats=stats, raw_offset=0
+            )
+        
+        if raw_data_mode == 'dict':
+            with self.profiler.stage('materialize_raw', rows=len(values)):
+                self.analyzed_data = self.materialize_raw_data()
+    
+    def _analysis_series(self):
+        """
+        분석 대상 시계열을 (int64 epoch ns, float64 값) 배열로 반환 (데이터가 없으면 None)
+        - 로드한 DataFrame이 있으면 이를 모든 배치가 공유하는 원시 배열로 변환
+        - 원시 저장소만 연결된 경우에는 메모리 맵 배열을 그대로 사용 (DataFrame을 만들지 않음)
+        - 통계 계산용 값 배열은 항상 float64 (compact 모드의 float32 원시 값도 변환하여 계산)
+        """
+        if self.data is not None and len(self.data):
+            self.raw_timestamps = _to_epoch_ns(self.data['timestamp'])
+            self.raw_values = self.data['value'].to_numpy()
+            self.raw_timezone = getattr(self.data['timestamp'].dtype, 'tz', None)
+            if self.compact:
+                # compact 모드는 원시 배열만 유지
+                self.data = None
+        elif self._raw_values is None or len(self._raw_values) == 0:
+            return None
+        
+        return np.asarray(self.raw_timestamps), np.asarray(self.raw_values, dtype=np.float64)
+    
+    def _build_batches(self, epoch_ns, values, window_size, tz=None, stats=None, first_batch_id=1, raw_offset=None, bounds=None):
+        """
+        연속된 시계열 구간(int64 epoch ns 타임스탬프, tz는 표시용 시간대)을 window_size 단위 배치 딕셔너리 목록으로 변환
+        raw_offset이 주어지면 공유 원시 배열 기준 raw_offsets [start, end)를 기록
+        bounds=(starts, ends)가 주어지면 고정 크기 대신 해당 구간을 배치로 사용 (stats 필수)
+        """
+        if bounds is not None:
+            starts, ends = bounds
+        else:
+            if stats is None:
+                stats = _window_statistics(values, window_size)
+            starts = np.arange(0, len(values), window_size)
+            ends = np.minimum(starts + window_size, len(values))
+        
+        # 배치 경계 시각 문자열은 윈도우당 한 번, 벡터 변환으로 생성
+        start_times = _isoformat_epoch_ns(epoch_ns[starts], tz)
+        end_times = _isoformat_epoch_ns(epoch_ns[ends - 1], tz)
+        
+        # 모든 윈도우의 라벨을 한 번에 분류한 뒤 조회표로 문자열 변환
+        label_codes = _classify_statistics(stats, ends - starts, self.thresholds)
+        labels = {
+            field: [lookup[code] for code in label_codes[field].tolist()]
+            for field, lookup in self.label_lookups.items()
+        }
+        
+        batches = []
+        for idx, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
             analysis = {
-                'batch_id': i // window_size + 1,
-                'start_timestamp': window_data['timestamp'].iloc[0].isoformat(),
-                'end_timestamp': window_data['timestamp'].iloc[-1].isoformat(),
-                'record_count': len(window_data),
+                'batch_id': first_batch_id + idx,
+                'start_timestamp': start_times[idx],
+                'end_timestamp': end_times[idx],
+                'record_count': end - start,
                 'statistics': {
-                    'mean': float(np.mean(temp_values)),
-                    'median': float(np.median(temp_values)),
-                    'std': float(np.std(temp_values)),
-                    'min': float(np.min(temp_values)),
-                    'max': float(np.max(temp_values)),
-                    'range': float(np.max(temp_values) - np.min(temp_values))
-                },
-                'raw_data': [
-                    {
-                        'timestamp': row['timestamp'].isoformat(),
-                        'value': float(row['value'])
-                    } for _, row in window_data.iterrows()
-                ]
+                    'mean': float(stats['mean'][idx]),
+                    'median': float(stats['median'][idx]),
+                    'std': float(stats['std'][idx]),
+                    'min': float(stats['min'][idx]),
+                    'max': float(stats['max'][idx]),
+                    'range': float(stats['range'][idx])
+                }
             }
             
-            # 온도 특성 라벨 생성
-            analysis['value_label'] = self._generate_temperature_label(analysis['statistics'])
+            if raw_offset is not None:
+                analysis['raw_offsets'] = [raw_offset + start, raw_offset + end]
             
-            # 추가 특성 분석
-            analysis['trend'] = self._analyze_trend(temp_values)
-            analysis['stability'] = self._analyze_stability(analysis['statistics'])
-            analysis['alert_level'] = self._determine_alert_level(analysis['statistics'])
+            # 온도 특성 라벨 및 추가 특성
+            analysis['value_label'] = labels['value_label'][idx]
+            analysis['trend'] = labels['trend'][idx]
+            analysis['stability'] = labels['stability'][idx]
+            analysis['alert_level'] = labels['alert_level'][idx]
             
-            self.analyzed_data.append(analysis)
+            batches.append(analysis)
+        
+        return batches
     
-    def _generate_temperature_label(self, stats):
-        """온도 통계를 바탕으로 라벨 생성"""
-        mean_temp = stats['mean']
-        std_temp = stats['std']
-        temp_range = stats['range']
+    def _build_batch_records(self, epoch_ns, stats, window_size):
+        """window_size 단위 배치를 BATCH_RECORD_DTYPE 레코드 배열로 생성 (compact 모드)"""
+        starts = np.arange(0, len(epoch_ns), window_size)
+        ends = np.minimum(starts + window_size, len(epoch_ns))
         
-        # 온도 범위별 분류
-        if mean_temp < 40:
-            temp_category = "저온"
-        elif mean_temp < 70:
-            temp_category = "정상"
-        elif mean_temp < 85:
-            temp_category = "고온"
-        else:
-            temp_category = "과열"
+        records = np.empty(len(starts), dtype=BATCH_RECORD_DTYPE)
+        records['batch_id'] = np.arange(1, len(starts) + 1)
+        records['start_ns'] = epoch_ns[starts]
+        records['end_ns'] = epoch_ns[ends - 1]
+        records['record_count'] = ends - starts
+        records['raw_start'] = starts
+        records['raw_end'] = ends
+        for key in _STATISTICS_FIELDS + ('slope',):
+            records[key] = stats[key]
+        
+        # 라벨은 float64 통계로 분류한 뒤 코드로 저장
+        label_codes = _classify_statistics(stats, ends - starts, self.thresholds)
+        for field in _LABEL_FIELDS:
+            records[field] = label_codes[field]
+        return records
+    
+    def _set_batch_records(self, records):
+        """레코드 배열을 분석 결과로 설정 (딕셔너리 목록은 조회 시점에 생성)"""
+        self._analyzed_data = None
+        self.batch_records = records
+        self._batch_table = None
+    
+    def batch_table(self):
+        """
+        분석 결과를 BatchTable로 반환 (처음 조회할 때 만들고 배치가 바뀔 때까지 같은 테이블을 재사용)
+        compact 모드 레코드 배열은 배치 딕셔너리를 만들지 않고 컬럼을 바로 구성
+        """
+        if self._batch_table is None:
+            if self.batch_records is None or self._analyzed_data is not None:
+                self._batch_table = BatchTable.from_batches(self.analyzed_data)
+            else:
+                self._batch_table = self._table_from_records()
+        return self._batch_table
+    
+    def _table_from_records(self):
+        """compact 모드 레코드 배열로 BatchTable 컬럼 구성"""
+        records = self.batch_records
+        columns = {
+            'batch_id': records['batch_id'].astype(np.int64),
+            'start_timestamp': np.array(_isoformat_epoch_ns(records['start_ns'], self.raw_timezone), dtype=str),
+            'end_timestamp': np.array(_isoformat_epoch_ns(records['end_ns'], self.raw_timezone), dtype=str),
+            'record_count': records['record_count'].astype(np.int64)
+        }
+        for key in _STATISTICS_FIELDS:
+            columns[key] = np.array(_value_list(records[key]), dtype=np.float64)
+        for field in _LABEL_FIELDS:
+            columns[field] = pd.Categorical.from_codes(records[field].astype(np.int64), categories=self.label_lookups[field])
+        columns['raw_start'] = records['raw_start'].astype(np.int64)
+        columns['raw_end'] = records['raw_end'].astype(np.int64)
+        return BatchTable(columns)
+    
+    def _batches_from_records(self, records):
+        """레코드 배열을 _build_batches와 같은 형태의 배치 딕셔너리 목록으로 변환"""
+        if records is None:
+            return []
+        
+        columns = {
+            'batch_id': records['batch_id'].tolist(),
+            'start_timestamp': _isoformat_epoch_ns(records['start_ns'], self.raw_timezone),
+            'end_timestamp': _isoformat_epoch_ns(records['end_ns'], self.raw_timezone),
+            'record_count': records['record_count'].tolist(),
+            'raw_start': records['raw_start'].tolist(),
+            'raw_end': records['raw_end'].tolist()
+        }
+        for key in _STATISTICS_FIELDS:
+            columns[key] = _value_list(records[key])
+        for field in _LABEL_FIELDS:
+            lookup = self.label_lookups[field]
+            columns[field] = [lookup[code] for code in records[field].tolist()]
+        
+        return [
+            {
+                'batch_id': columns['batch_id'][idx],
+                'start_timestamp': columns['start_timestamp'][idx],
+                'end_timestamp': columns['end_timestamp'][idx],
+                'record_count': columns['record_count'][idx],
+                'statistics': {key: columns[key][idx] for key in _STATISTICS_FIELDS},
+                'raw_offsets': [columns['raw_start'][idx], columns['raw_end'][idx]],
+                'value_label': columns['value_label'][idx],
+                'trend': columns['trend'][idx],
+                'stability': columns['stability'][idx],
+                'alert_level': columns['alert_level'][idx]
+            } for idx in range(len(records))
+        ]
+    
+    def analyze_time_windows(self, freq='16h', gap_threshold='30min'):
+        """
+        시간 길이 기준 윈도우 분석 (레코드 수 대신 '16h', '1D' 같은 기간 단위)
+        - 윈도우 경계는 벽시계 기준으로 정렬 (epoch부터 freq 간격, tz-aware는 현지 시각 기준)
+        - 경계 위치는 경계를 UTC 시각으로 바꾼 뒤 정렬된 int64 epoch 타임스탬프에 np.searchsorted로 계산
+          (DST 종료로 반복되는 벽시계 시각은 처음 시각의 윈도우, DST 시작으로 없는 경계 시각은 뒤로 밀어 사용)
+        - 윈도우 안 레코드 간격과 이웃 윈도우의 레코드에서 이어지는 공백 중 윈도우 안에 걸친 부분이
+          gap_threshold보다 길면 has_gap 표시 (시계열 시작 전/끝 후는 공백으로 보지 않음)
+        - 레코드가 없는 윈도우는 결과에서 제외
+        결과는 analyzed_data에 저장되며 배치마다 window_start/window_end/max_gap_seconds/has_gap 추가
+        """
+        freq_ns = pd.Timedelta(freq).value
+        gap_ns = pd.Timedelta(gap_threshold).value
+        if freq_ns <= 0:
+            raise ValueError("freq는 0보다 커야 합니다.")
+        
+        self.analyzed_data = []
+        self.window_freq = freq
+        self._clear_similarity()
+        series = self._analysis_series()
+        if series is None:
+            return self.analyzed_data
+        
+        epoch_ns, values = series
+        
+        # 벽시계 시각 기준 경계 (DST 종료 구간은 벽시계 시각이 되돌아가므로 최솟값/최댓값으로 범위 결정)
+        wall_ns = epoch_ns
+        if self.raw_timezone is not None:
+            wall_ns = _to_epoch_ns(_from_epoch_ns(epoch_ns, self.raw_timezone).tz_localize(None))
+        
+        first_edge = wall_ns.min() // freq_ns * freq_ns
+        edges = np.arange(first_edge, wall_ns.max() + freq_ns, freq_ns, dtype=np.int64)
+        if self.raw_timezone is not None:
+            edges = _to_epoch_ns(_from_epoch_ns(edges).tz_localize(
+                self.raw_timezone, ambiguous=np.ones(len(edges), dtype=bool), nonexistent='shift_forward'))
+        bounds = np.searchsorted(epoch_ns, edges, side='left')
+        starts, ends = bounds[:-1], bounds[1:]
+        window_starts, window_ends = edges[:-1], edges[1:]
+        
+        non_empty = ends > starts
+        starts, ends = starts[non_empty], ends[non_empty]
+        window_starts, window_ends = window_starts[non_empty], window_ends[non_empty]
+        stats = _segment_statistics(values, starts, ends)
+        
+        # 윈도우 내 최대 공백 (실제 경과 시간): 레코드 간 간격 + 이전/다음 레코드와의 공백 중 윈도우 안 부분
+        next_gap = np.append(np.diff(epoch_ns), 0)
+        next_gap[ends - 1] = 0
+        internal_gap = np.maximum.reduceat(next_gap, starts) if len(starts) else next_gap[:0]
+        previous_time = np.maximum(epoch_ns[np.maximum(starts - 1, 0)], window_starts)
+        leading_gap = np.where(starts > 0, epoch_ns[starts] - previous_time, 0)
+        following_time = np.minimum(epoch_ns[np.minimum(ends, len(epoch_ns) - 1)], window_ends)
+        trailing_gap = np.where(ends < len(epoch_ns), following_time - epoch_ns[ends - 1], 0)
+        max_gap = np.maximum(np.maximum(internal_gap, leading_gap), trailing_gap)
+        
+        batches = self._build_batches(
+            epoch_ns, values, None, tz=self.raw_timezone, stats=stats, raw_offset=0, bounds=(starts, ends)
+        )
+        
+        start_texts = _isoformat_epoch_ns(window_starts, self.raw_timezone)
+        end_texts = _isoformat_epoch_ns(window_ends, self.raw_timezone)
+        for batch, window_start, window_end, gap in zip(batches, start_texts, end_texts, max_gap.tolist()):
+            batch['window_start'] = window_start
+            batch['window_end'] = window_end
+            batch['max_gap_seconds'] = gap / 1e9
+            batch['has_gap'] = gap > gap_ns
+        
+        self.analyzed_data = batches
+        empty_windows = int((~non_empty).sum())
+        print(f"시간 윈도우 분석 완료: {len(batches)}개 윈도우 (빈 윈도우 {empty_windows}개, "
+              f"공백 포함 {sum(batch['has_gap'] for batch in batches)}개)")
+        return self.analyzed_data
+    
+    def analyze_sliding_windows(self, window_size=100, step=1):
+        """
+        겹치는(슬라이딩) 윈도우 분석
+        - step 레코드마다 window_size 크기의 윈도우 통계를 계산 (window_size 미만인 끝부분은 제외)
+        - 평균/표준편차/기울기는 누적합, 최소/최대는 단조 덱, 중앙값은 두 개의 힙으로
+          윈도우 이동당 O(1)(중앙값은 O(log w))에 갱신
+        결과는 윈도우당 한 행인 DataFrame으로 self.sliding_windows에 저장 (라벨은 범주형 컬럼)
+        """
+        if step < 1:
+            raise ValueError("step은 1 이상이어야 합니다.")
+        
+        series = self._analysis_series()
+        if series is None:
+            raise ValueError("분석할 데이터가 없습니다.")
+        
+        epoch_ns, values = series
+        stats = _rolling_window_statistics(values, window_size, step)
+        starts = np.arange(len(stats['mean']), dtype=np.int64) * step
+        
+        self.sliding_windows = pd.DataFrame({
+            'start_index': starts,
+            'start_timestamp': _from_epoch_ns(epoch_ns[starts], self.raw_timezone),
+            'end_timestamp': _from_epoch_ns(epoch_ns[starts + window_size - 1], self.raw_timezone),
+            **{key: stats[key] for key in ('mean', 'median', 'std', 'min', 'max', 'range', 'slope')}
+        })
+        
+        # 라벨은 코드 + 조회표 형태의 범주형 컬럼으로 저장
+        label_codes = _classify_statistics(stats, np.full(len(starts), window_size), self.thresholds)
+        for field, lookup in self.label_lookups.items():
+            self.sliding_windows[field] = pd.Categorical.from_codes(label_codes[field], categories=lookup)
+        return self.sliding_windows
+    
+    def add_batch_listener(self, callback):
+        """append()에서 배치가 닫힐 때마다 callback(batch) 호출"""
+        self.batch_listeners.append(callback)
+    
+    def append(self, readings):
+        """
+        실시간 레코드 추가 및 증분 분석
+        - 저장된 원시 시계열 뒤에 readings를 붙이고 열린 마지막 윈도우만 다시 계산
+        - 새로 닫힌(window_size를 채운) 배치를 batch_listeners에 전달하고 목록으로 반환
+        - 원시 배열은 용량을 두 배씩 늘리므로 레코드당 비용은 분할상환 O(1)
+        readings: [{'timestamp', 'value'}] 목록 또는 DataFrame
+        """
+        if self.analyzed_data and self._raw_values is None:
+            raise ValueError("스트리밍 분석 결과에는 원시 데이터가 없어 append를 사용할 수 없습니다.")
+        if self.window_freq is not None:
+            raise ValueError("시간 기준 윈도우 분석 결과에는 append를 사용할 수 없습니다.")
+        
+        # 로드(또는 저장소 연결)만 하고 아직 분석하지 않은 데이터가 있으면 먼저 분석
+        if self._raw_values is None and self._data is not None and len(self.data):
+            self.analyze_temperature_characteristics(self.window_size)
+        elif self.raw_store is not None and not self.analyzed_data and len(self._raw_values):
+            self.analyze_temperature_characteristics(self.window_size)
+        
+        # 레코드 배열 결과는 딕셔너리 목록으로 바꾼 뒤 이어서 갱신
+        if self.batch_records is not None:
+            self.analyzed_data = self.analyzed_data
+        
+        frame = readings.copy() if isinstance(readings, pd.DataFrame) else pd.DataFrame(readings)
+        if len(frame) == 0:
+            return []
+        frame.columns = _resolve_column_names(frame.columns)
+        frame = _clean_frame(frame[['timestamp', 'value']], profiler=self.profiler)
+        frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        if len(frame) == 0:
+            return []
+        
+        new_timestamps = _to_epoch_ns(frame['timestamp'])
+        new_values = frame['value'].to_numpy(dtype=np.float64)
+        
+        if self._raw_values is None:
+            self.raw_timestamps = np.empty(0, dtype=np.int64)
+            self.raw_values = np.empty(0, dtype=np.float64)
+            self.raw_timezone = getattr(frame['timestamp'].dtype, 'tz', None)
+        elif len(self._raw_timestamps) and new_timestamps[0] < self._raw_timestamps.view()[-1]:
+            raise ValueError("추가 레코드가 기존 마지막 레코드보다 과거 시각입니다.")
+        
+        # 열린 마지막 윈도우는 제거 후 새 레코드와 함께 다시 계산
+        self._batch_table = None
+        tail_start = len(self._raw_values)
+        if self.analyzed_data and self.analyzed_data[-1]['record_count'] < self.window_size:
+            open_batch = self.analyzed_data.pop()
+            tail_start -= open_batch['record_count']
+        next_batch_id = self.analyzed_data[-1]['batch_id'] + 1 if self.analyzed_data else 1
+        
+        rollup_start = len(self._raw_values)
+        if self._anomaly_detector is None and self.anomalies is not None:
+            # 컬럼형 결과/캐시에서 복원한 이벤트는 저장된 원시 시계열로 감지기 상태를 다시 만든 뒤 이어서 갱신
+            self._anomaly_detector = StreamingDetector.from_series(self.raw_values, self.anomaly_params)
+        if self._forecast_state is None and self.forecast is not None:
+            self._forecast_state = ForecastState.from_series([(self.raw_timestamps, self.raw_values)], self.forecast['params'])
+        self._raw_timestamps.extend(new_timestamps)
+        self._raw_values.extend(new_values)
+        if self._anomaly_detector is not None:
+            with self.profiler.stage('anomaly_detection', rows=len(new_values)):
+                self._update_anomalies(rollup_start, new_values)
+        if self._forecast_state is not None:
+            with self.profiler.stage('forecast', rows=len(new_values)):
+                self._update_forecast(new_timestamps, new_values)
+        if self.segments:
+            self._update_segments(new_timestamps, new_values)
+        if self._sketch is not None:
+            self._sketch.update(new_values)
+        if self._rollups is not None:
+            self._rollups.update(self.raw_timestamps, self.raw_values, rollup_start)
+        if self._data is not None:
+            self._pending_frames.append(frame)
+        elif self.raw_store is None and not self.compact:
+            self._set_data_from_raw()
+        
+        with self.profiler.stage('window_analysis', rows=len(self._raw_values) - tail_start):
+            tail_batches = self._build_batches(
+                self.raw_timestamps[tail_start:],
+                np.asarray(self.raw_values[tail_start:], dtype=np.float64),
+                self.window_size,
+                tz=self.raw_timezone,
+                first_batch_id=next_batch_id,
+                raw_offset=tail_start
+            )
+        self.analyzed_data.extend(tail_batches)
+        if self.similarity_index is not None and tail_batches:
+            with self.profiler.stage('similarity_index', rows=len(tail_batches)):
+                self.similarity_index.add(BatchTable.from_batches(tail_batches), self.raw_values)
+                self._clusters_stale = True
+        
+        closed_batches = [batch for batch in tail_batches if batch['record_count'] == self.window_size]
+        for batch in closed_batches:
+            for callback in self.batch_listeners:
+                callback(batch)
+        return closed_batches
+    
+    def _set_data_from_raw(self):
+        """원시 배열로 data DataFrame 구성 (append로 처음 데이터를 받은 경우)"""
+        self.data = pd.DataFrame({
+            'timestamp': _from_epoch_ns(self.raw_timestamps, self.raw_timezone),
+            'value': self.raw_values
+        })
+    
+    def iter_csv_stream(self, source, window_size=100, chunksize=100_000):
+        """
+        대용량 CSV를 chunksize 행씩 읽으며 완성된 윈도우를 배치로 바로 분석하여 반환 (제너레이터)
+        - 청크 경계에 걸친 미완성 윈도우(window_size 미만)는 다음 청크로 이월
+        - 메모리에는 현재 청크와 이월분만 유지되므로 파일 크기와 무관하게 사용량이 일정
+        - 입력은 시간 순으로 기록되어 있어야 함 (정렬은 청크 내부에서만 수행)
+        - 전체 분위수용 KLL 스케치는 self.stream_sketch에 청크마다 누적
+        """
+        self.stream_sketch = KLLSketch(self.sketch_k)
+        carry = None
+        next_batch_id = 1
+        total_records = 0
+        last_timestamp = None
+        out_of_order_chunks = 0
+        
+        # 컬럼 매핑과 타임스탬프 형식은 헤더와 샘플 행으로 한 번만 결정하고 필요한 두 컬럼만 읽음
+        schema = _probe_csv_schema(source)
+        usecols = [schema['timestamp'], schema['value']]
+        column_names = {schema['timestamp']: 'timestamp', schema['value']: 'value'}
+        timestamp_format = schema['timestamp_format']
+        
+        reader = pd.read_csv(source, chunksize=chunksize, usecols=usecols)
+        while True:
+            # 프로파일의 각 단계는 청크마다 누적 (yield 이후 소비 측 시간은 제외)
+            with self.profiler.stage('read') as stage:
+                chunk = next(reader, None)
+                stage.rows = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            
+            chunk = chunk.rename(columns=column_names)
+            if timestamp_format is None:
+                timestamp_format = _detect_timestamp_format(chunk['timestamp'])
+            
+            chunk = _clean_frame(chunk[['timestamp', 'value']], timestamp_format, self.profiler)
+            if len(chunk) == 0:
+                continue
+            timezone = getattr(chunk['timestamp'].dtype, 'tz', None)
+            
+            with self.profiler.stage('sort', rows=len(chunk)):
+                chunk = chunk.sort_values('timestamp', kind='stable')
+            if last_timestamp is not None and chunk['timestamp'].iloc[0] < last_timestamp:
+                out_of_order_chunks += 1
+            last_timestamp = chunk['timestamp'].iloc[-1]
+            total_records += len(chunk)
+            self.stream_sketch.update(chunk['value'].to_numpy(dtype=np.float64))
+            
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            
+            n_complete = (len(chunk) // window_size) * window_size
+            if n_complete:
+                complete = chunk.iloc[:n_complete]
+                with self.profiler.stage('window_analysis', rows=n_complete):
+                    batches = self._build_batches(
+                        _to_epoch_ns(complete['timestamp']),
+                        complete['value'].to_numpy(dtype=np.float64),
+                        window_size,
+                        tz=timezone,
+                        first_batch_id=next_batch_id
+                    )
+                next_batch_id += len(batches)
+                yield from batches
+            
+            carry = chunk.iloc[n_complete:].reset_index(drop=True)
+        
+        # 파일 끝에 남은 미완성 윈도우를 마지막 배치로 처리
+        if carry is not None and len(carry) > 0:
+            yield from self._build_batches(
+                _to_epoch_ns(carry['timestamp']),
+                carry['value'].to_numpy(dtype=np.float64),
+                window_size,
+                tz=timezone,
+                first_batch_id=next_batch_id
+            )
+        
+        if out_of_order_chunks:
+            print(f"경고: 시간 순서가 맞지 않는 청크 {out_of_order_chunks}개 (청크 간 정렬은 수행하지 않음)")
+        print(f"스트리밍 분석 완료: {total_records}개 레코드")
+    
+    def analyze_csv_stream(self, source, window_size=100, chunksize=100_000):
+        """
+        대용량 CSV 스트리밍 분석 (iter_csv_stream 결과를 analyzed_data에 저장)
+        전체 원시 데이터를 보관하지 않으므로 배치에 raw_data/raw_offsets가 없음
+        """
+        try:
+            self.data = None
+            self.raw_timestamps = None
+            self.raw_values = None
+            self.window_size = window_size
+            self._clear_similarity()
+            self.analyzed_data = list(self.iter_csv_stream(source, window_size, chunksize))
+            self._sketch = self.stream_sketch
+            return True
+            
+        except Exception as e:
+            print(f"스트리밍 분석 실패: {e}")
+            return False
+
+    def get_percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        """
+        전체 온도 분위수 (KLL 스케치 기반, 전체 값 정렬 없음)
+        반환: {'p50': ..., 'p95': ..., 'p99': ..., 'count': 레코드 수, 'rank_error': 순위 오차 상한}
+        """
+        if self.value_sketch is None and self.data is not None and len(self.data):
+            self._analysis_series()
+        sketch = self.value_sketch
+        if sketch is None:
+            raise ValueError("분석할 데이터가 없습니다.")
+        value_dtype = np.float64 if self._raw_values is None else self.raw_values.dtype
+        return _percentile_summary(sketch, quantiles, value_dtype)
+
+    def query_range(self, start=None, end=None):
+        """
+        시각 구간 [start, end] 온도 집계 (롤업 피라미드 셀 합산, 원시 데이터 재스캔 없음)
+        반환: {'count', 'mean', 'std', 'min', 'max', 'cells': 사용한 롤업 셀 수}
+        """
+        rollups = self._require_rollups()
+        result = rollups.query(self._timestamp_ns(start), self._timestamp_ns(end))
+        if result['count'] and self.raw_values.dtype == np.float32:
+            # float32 원시 값(원시 저장소)의 최솟값/최댓값은 원래 십진 표기로 복원
+            result['min'], result['max'] = _value_list(np.array([result['min'], result['max']], dtype=np.float32))
+        return result
+    
+    def zoom(self, start=None, end=None, max_points=2000, level=None):
+        """
+        확대/축소 차트용 시계열 (구간 안 셀이 max_points 이하인 가장 세밀한 롤업 레벨)
+        반환 DataFrame: timestamp(셀 시작), end_timestamp, count, mean, std, min, max
+        사용한 레벨은 frame.attrs['level']
+        """
+        rollups = self._require_rollups()
+        cells = rollups.cells_between(self._timestamp_ns(start), self._timestamp_ns(end), max_points, level)
+        frame = pd.DataFrame({
+            'timestamp': _from_epoch_ns(cells['start_ns'], self.raw_timezone),
+            'end_timestamp': _from_epoch_ns(cells['end_ns'], self.raw_timezone),
+            'count': cells['count'],
+            'mean': cells['mean'],
+            'std': cells['std'],
+            'min': cells['min'],
+            'max': cells['max']
+        })
+        frame.attrs['level'] = cells['level']
+        return frame
+    
+    def _require_rollups(self):
+        """롤업 피라미드 반환 (로드만 하고 분석 전이면 원시 배열부터 구성)"""
+        if self.rollups is None and self.data is not None and len(self.data):
+            self._analysis_series()
+        if self.rollups is None:
+            raise ValueError("분석할 데이터가 없습니다.")
+        return self.rollups
+    
+    def _timestamp_ns(self, value):
+        """조회 시각(문자열/Timestamp)을 원시 배열과 같은 기준의 epoch ns로 변환 (None은 그대로)"""
+        if value is None:
+            return None
+        timestamp = pd.Timestamp(value)
+        if self.raw_timezone is None:
+            # 시간대 없는 데이터는 벽시계 시각 기준
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_localize(None)
+        elif timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(self.raw_timezone)
+        return timestamp.as_unit('ns').value
+    
+    def period_sketches(self, freq='1D'):
+        """
+        기간(벽시계 기준 freq 단위)별 KLL 스케치 {기간 시작 ISO 문자열: KLLSketch}
+        여러 기간의 스케치는 merge_sketches()로 합쳐 원시 값 재조회 없이 분위수 계산
+        """
+        if self.data is not None and len(self.data):
+            self._analysis_series()
+        if self._raw_values is None or len(self._raw_values) == 0:
+            return {}
+
+        # 시간대가 있으면 현지 벽시계 시각으로 기간을 나눔 (DST 전환일도 하루로 취급)
+        timestamps = _from_epoch_ns(np.asarray(self.raw_timestamps), self.raw_timezone)
+        if self.raw_timezone is not None:
+            timestamps = timestamps.tz_localize(None)
+        period_ns = _to_epoch_ns(timestamps.floor(freq))
+        boundaries = np.flatnonzero(np.diff(period_ns)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(period_ns)]])
+        labels = _isoformat_epoch_ns(period_ns[starts])
+
+        values = self.raw_values
+        sketches = {}
+        for label, start, end in zip(labels, starts, ends):
+            sketch = KLLSketch.from_values(values[start:end], self.sketch_k)
+            if label in sketches:
+                # DST 종료로 같은 벽시계 기간이 다시 나타나면 병합
+                sketches[label].merge(sketch)
+            else:
+                sketches[label] = sketch
+        return sketches
+
+    def _batch_starts(self):
+        """원시 위치를 가진 배치의 시작 위치 배열과 batch_id 배열 (시작 위치 오름차순)"""
+        if self.batch_records is not None:
+            return self.batch_records['raw_start'].astype(np.int64), self.batch_records['batch_id']
+        batches = [batch for batch in self.analyzed_data if 'raw_offsets' in batch]
+        batch_starts = np.array([batch['raw_offsets'][0] for batch in batches], dtype=np.int64)
+        batch_ids = np.array([batch['batch_id'] for batch in batches], dtype=np.int64)
+        return batch_starts, batch_ids
+    
+    def _current_series(self):
+        """
+        이상 감지/예측 대상 (int64 epoch ns, float64 값) 배열 (데이터가 없으면 None)
+        분석 후 원시 배열이 있으면 그대로 사용하고, 새로 로드한 DataFrame만 있으면 원시 배열로 변환
+        """
+        if self._raw_values is not None and len(self._raw_values) and (self._data is None or len(self.data) == len(self._raw_values)):
+            return np.asarray(self.raw_timestamps), np.asarray(self.raw_values, dtype=np.float64)
+        return self._analysis_series()
+    
+    def detect_anomalies(self, params=None, max_gap=DEFAULT_EVENT_GAP):
+        """
+        원시 시계열 전체에 rolling z-score, EWMA 관리도, 양측 CUSUM 감지기를 적용하여 이상 이벤트 목록 반환
+        - params: anomaly_detectors.DEFAULT_DETECTOR_PARAMS에 덮어쓸 항목 (window, z_threshold 등)
+        - 감지 레코드가 max_gap 이내로 이어지면 이벤트 하나로 묶음
+        - 이벤트: start/end/peak_timestamp, peak_value, score(최대 |z|), detectors, batch_id, raw_offsets
+        - 이후 append()로 들어오는 레코드는 같은 상태를 이어받은 스트리밍 감지기로 레코드당 O(1) 갱신
+        """
+        params = detector_params(params)
+        with self.profiler.stage('anomaly_detection') as stage:
+            series = self._current_series()
+            if series is None:
+                print("분석할 데이터가 없습니다.")
+                return []
+            epoch_ns, values = series
+            stage.rows = len(values)
+            
+            batch_starts, batch_ids = self._batch_starts()
+            scores = score_series(values, params)
+            events = anomaly_events(scores, batch_starts if len(batch_starts) else None, max_gap)
+            self.anomalies = self._anomaly_event_dicts(epoch_ns, values, events, batch_ids)
+            self.anomaly_params = params
+            self._anomaly_gap = max_gap
+            self._anomaly_pending = None
+            self._anomaly_detector = StreamingDetector.from_series(values, params, scores)
+        
+        print(f"이상 감지 완료: {len(self.anomalies)}개 이벤트")
+        return self.anomalies
+    
+    def _anomaly_event_dicts(self, epoch_ns, values, events, batch_ids):
+        """anomaly_events() 배열 결과를 JSON으로 내보낼 이벤트 딕셔너리 목록으로 변환"""
+        if len(events['start']) == 0:
+            return []
+        starts, ends, peaks = events['start'], events['end'], events['peak']
+        start_times = _isoformat_epoch_ns(epoch_ns[starts], self.raw_timezone)
+        end_times = _isoformat_epoch_ns(epoch_ns[ends], self.raw_timezone)
+        peak_times = _isoformat_epoch_ns(epoch_ns[peaks], self.raw_timezone)
+        peak_values = _value_list(np.asarray(self.raw_values)[peaks]) if self.raw_values is not None else values[peaks].tolist()
+        batch_index = events['batch_index']
+        
+        result = []
+        for idx in range(len(starts)):
+            batch_position = int(batch_index[idx])
+            result.append({
+                'start_timestamp': start_times[idx],
+                'end_timestamp': end_times[idx],
+                'peak_timestamp': peak_times[idx],
+                'peak_value': peak_values[idx],
+                'score': round(float(events['score'][idx]), 3),
+                'detectors': [name for name in DETECTOR_NAMES if events['detectors'][name][idx] > 0],
+                'batch_id': int(batch_ids[batch_position]) if batch_position >= 0 else None,
+                'raw_offsets': [int(starts[idx]), int(ends[idx]) + 1]
+            })
+        return result
+    
+    def _update_anomalies(self, first_row, values):
+        """
+        append()로 추가된 레코드를 스트리밍 감지기로 갱신하고 이벤트를 추가하거나 마지막 이벤트에 병합
+        (마지막 감지 레코드 이후 max_gap 이내 레코드의 최대 |z|는 병합될 때 최고점 후보가 되도록 보관)
+        """
+        new_events = []
+        for idx, value in enumerate(values):
+            result = self._anomaly_detector.update(value)
+            row = first_row + idx
+            score = abs(result['zscore']) if result['zscore'] is not None else 0.0
+            last = self.anomalies[-1] if self.anomalies else None
+            in_gap = last is not None and row - (last['raw_offsets'][1] - 1) <= self._anomaly_gap + 1
+            if not result['flags']:
+                if in_gap and (self._anomaly_pending is None or score > self._anomaly_pending[0]):
+                    self._anomaly_pending = (score, row, float(value))
+                continue
+            
+            pending, self._anomaly_pending = self._anomaly_pending, None
+            timestamp = _isoformat_epoch_ns(self._raw_timestamps.view()[row:row + 1], self.raw_timezone)[0]
+            if in_gap:
+                last['end_timestamp'] = timestamp
+                last['raw_offsets'][1] = row + 1
+                last['detectors'] = [name for name in DETECTOR_NAMES if name in last['detectors'] or name in result['flags']]
+                candidates = [pending, (score, row, float(value))] if pending else [(score, row, float(value))]
+                for peak_score, peak_row, peak_value in candidates:
+                    if round(peak_score, 3) > last['score']:
+                        last.update({
+                            'peak_timestamp': _isoformat_epoch_ns(self._raw_timestamps.view()[peak_row:peak_row + 1], self.raw_timezone)[0],
+                            'peak_value': peak_value,
+                            'score': round(peak_score, 3),
+                            'batch_id': peak_row // self.window_size + 1
+                        })
+                continue
+            event = {
+                'start_timestamp': timestamp,
+                'end_timestamp': timestamp,
+                'peak_timestamp': timestamp,
+                'peak_value': float(value),
+                'score': round(score, 3),
+                'detectors': list(result['flags']),
+                'batch_id': row // self.window_size + 1,
+                'raw_offsets': [row, row + 1]
+            }
+            self.anomalies.append(event)
+            new_events.append(event)
+        return new_events
+    
+    def forecast_thresholds(self, params=None, thresholds=FORECAST_THRESHOLDS):
+        """
+        최근 fit_window개 레코드로 선형/Holt 모델을 적합하여 임계 온도(기본 70/80/85/90°C) 도달 시점 예측
+        - params: forecasting.DEFAULT_FORECAST_PARAMS에 덮어쓸 항목 (fit_window, horizon, confidence 등)
+        - 결과: 모델별 현재 수준, 시간당 기울기, 임계값별 eta/earliest/latest_hours(예측 구간)와 예상 도달 시각
+        - 이후 append()로 들어오는 레코드는 전체 이력을 다시 적합하지 않고 예측 상태만 O(1)로 갱신
+        """
+        params = forecast_params(params)
+        with self.profiler.stage('forecast') as stage:
+            series = self._current_series()
+            if series is None:
+                print("분석할 데이터가 없습니다.")
+                return None
+            stage.rows = len(series[1])
+            self._forecast_state = ForecastState.from_series([series], params)
+            self.forecast = _forecast_dicts(self._forecast_state.forecast(thresholds), self.raw_timezone)[0]
         
-        # 변동성 분류
-        if std_temp < 2:
-            stability = "안정"
-        elif std_temp < 5:
-            stability = "보통"
+        crossing = _primary_crossing(self.forecast)
+        if crossing is None:
+            print("예측 완료: 탐색 범위 안에서 새로 도달하는 임계 온도가 없습니다.")
         else:
-            stability = "불안정"
+            print(f"예측 완료: {crossing['threshold']:.0f}°C 도달까지 약 {crossing['eta_hours']:.1f}시간 (Holt)")
+        return self.forecast
+    
+    def _update_forecast(self, new_timestamps, new_values):
+        """append()로 추가된 레코드를 예측 상태에 반영하고 도달 시점 다시 계산"""
+        state = self._forecast_state
+        state.update_many(np.zeros(len(new_values), dtype=np.int64), new_values, new_timestamps)
+        self.forecast = _forecast_dicts(state.forecast(self.forecast['thresholds']), self.raw_timezone)[0]
+    
+    def detect_change_points(self, params=None):
+        """
+        원시 시계열 전체를 평균/분산이 바뀌는 위치에서 나누어 운전 구간 목록 반환
+        - params: change_points.DEFAULT_CHANGE_POINT_PARAMS에 덮어쓸 항목 (method, penalty_scale, min_size 등)
+        - 기본 binseg는 누적합 기반 이진 분할로 수백만 레코드도 거의 선형 시간, method='pelt'는 벌점 비용의 정확한 최소화
+          (변화점 간격이 길면 O(n × 구간 길이)라 change_points.PELT_MAX_ROWS보다 긴 시계열은 ValueError)
+        - 벌점은 구간 잔차의 자기상관으로 보정 (autocorrelation=False면 penalty_scale × log(n)만 사용)
+        - 구간: segment_id, start/end_timestamp, raw_offsets, record_count, mean, variance, std, min, max,
+          mean_shift(직전 구간 대비 평균 변화), batch_ids(구간에 걸친 첫/마지막 배치)
+        - 이후 append()로 들어오는 레코드는 마지막 구간 통계에 합쳐짐 (새 변화점은 다시 호출하면 반영)
+        """
+        params = change_point_params(params)
+        with self.profiler.stage('change_points') as stage:
+            series = self._current_series()
+            if series is None:
+                print("분석할 데이터가 없습니다.")
+                return []
+            epoch_ns, values = series
+            stage.rows = len(values)
+            stats = segment_statistics(values, find_change_points(values, params))
+            self.segments = self._segment_dicts(epoch_ns, stats)
+            self.change_point_params = params
+        
+        print(f"변화점 탐지 완료: {len(self.segments) - 1}개 변화점, {len(self.segments)}개 구간")
+        return self.segments
+    
+    def _segment_dicts(self, epoch_ns, stats):
+        """segment_statistics() 배열 결과를 JSON으로 내보낼 구간 딕셔너리 목록으로 변환"""
+        starts, ends = stats['start'], stats['end']
+        start_times = _isoformat_epoch_ns(epoch_ns[starts], self.raw_timezone)
+        end_times = _isoformat_epoch_ns(epoch_ns[ends - 1], self.raw_timezone)
+        batch_starts, batch_ids = self._batch_starts()
+        if len(batch_starts):
+            first_batches = batch_ids[np.maximum(np.searchsorted(batch_starts, starts, side='right') - 1, 0)]
+            last_batches = batch_ids[np.maximum(np.searchsorted(batch_starts, ends - 1, side='right') - 1, 0)]
+        
+        segments = []
+        for idx in range(len(starts)):
+            mean = float(stats['mean'][idx])
+            variance = float(stats['variance'][idx])
+            segments.append({
+                'segment_id': idx + 1,
+                'start_timestamp': start_times[idx],
+                'end_timestamp': end_times[idx],
+                'raw_offsets': [int(starts[idx]), int(ends[idx])],
+                'record_count': int(stats['count'][idx]),
+                'mean': mean,
+                'variance': variance,
+                'std': float(np.sqrt(variance)),
+                'min': float(stats['min'][idx]),
+                'max': float(stats['max'][idx]),
+                'mean_shift': mean - float(stats['mean'][idx - 1]) if idx else None,
+                'batch_ids': [int(first_batches[idx]), int(last_batches[idx])] if len(batch_starts) else None
+            })
+        return segments
+    
+    def _update_segments(self, new_timestamps, new_values):
+        """append()로 추가된 레코드를 마지막 구간의 개수/평균/분산/최솟값/최댓값에 병합 (Chan 병합 공식)"""
+        last = self.segments[-1]
+        count, added = last['record_count'], len(new_values)
+        new_mean = float(new_values.mean())
+        new_variance = float(new_values.var())
+        total = count + added
+        delta = new_mean - last['mean']
+        mean = last['mean'] + delta * added / total
+        variance = (last['variance'] * count + new_variance * added + delta * delta * count * added / total) / total
+        last.update({
+            'end_timestamp': _isoformat_epoch_ns(new_timestamps[-1:], self.raw_timezone)[0],
+            'record_count': total,
+            'mean': mean,
+            'variance': variance,
+            'std': float(np.sqrt(variance)),
+            'min': min(last['min'], float(new_values.min())),
+            'max': max(last['max'], float(new_values.max()))
+        })
+        last['raw_offsets'][1] += added
+        if len(self.segments) > 1:
+            last['mean_shift'] = mean - self.segments[-2]['mean']
+        if last['batch_ids'] is not None:
+            last['batch_ids'][1] = (last['raw_offsets'][1] - 1) // self.window_size + 1
+    
+    def build_similarity_index(self, params=None):
+        """
+        전체 배치의 특징 벡터 색인과 패턴 그룹(미니배치 k-means) 생성
+        - params: batch_similarity.DEFAULT_SIMILARITY_PARAMS에 덮어쓸 항목 (n_clusters, shape_points 등)
+        - 특징: 표준화한 배치 통계 + 원시 데이터가 있으면 shape_points개 구간 평균으로 줄인 모양
+        - 그룹 요약(batch_clusters): 크기, 평균/최고 온도, 대표 라벨/경고 수준/트렌드, 대표 배치
+        - 이후 append()로 닫힌 배치는 가장 가까운 그룹에 배정하여 색인에 추가
+        """
+        params = similarity_params(params)
+        with self.profiler.stage('similarity_index') as stage:
+            table = self.batch_table() if self.analyzed_data or self.batch_records is not None else None
+            if table is None or len(table) == 0:
+                print("분석된 배치가 없습니다.")
+                return None
+            stage.rows = len(table)
+            raw_values = self.raw_values if self._raw_values is not None and 'raw_start' in table.columns else None
+            self.similarity_index = BatchSimilarityIndex.from_table(table, raw_values, params)
+            self.similarity_params = params
+            self.batch_clusters = self.similarity_index.cluster_summaries(table)
+            self._clusters_stale = False
+        
+        shape = "통계+모양" if self.similarity_index.scaling['has_shape'] else "통계"
+        print(f"배치 유사도 색인 완료: {len(table)}개 배치, {len(self.batch_clusters)}개 패턴 그룹 ({shape} 특징)")
+        return self.similarity_index
+    
+    def similar_batches(self, batch_id, k=5, n_probe=None):
+        """
+        batch_id와 패턴이 가장 비슷한 배치 k개 (색인이 없으면 먼저 생성)
+        반환: batch_id, distance, cluster_id, 시작/종료 시각, 평균/최고 온도, 온도 라벨, 경고 수준
+        """
+        if self.similarity_index is None:
+            self.build_similarity_index(self.similarity_params)
+        batches = self.analyzed_data
+        results = []
+        for match in self.similarity_index.similar(batch_id, k, n_probe):
+            batch = batches[self.similarity_index.positions[match['batch_id']]]
+            results.append({
+                **match,
+                'start_timestamp': batch['start_timestamp'],
+                'end_timestamp': batch['end_timestamp'],
+                'mean': batch['statistics']['mean'],
+                'max': batch['statistics']['max'],
+                'value_label': batch['value_label'],
+                'alert_level': batch['alert_level']
+            })
+        return results
+    
+    def pattern_groups(self):
+        """패턴 그룹 요약 (append()로 색인에 배치가 추가됐으면 다시 집계)"""
+        if self._clusters_stale and self.similarity_index is not None:
+            self.batch_clusters = self.similarity_index.cluster_summaries(self.batch_table())
+            self._clusters_stale = False
+        return self.batch_clusters
+    
+    def _clear_similarity(self):
+        """배치가 바뀌면 유사도 색인과 그룹 요약 초기화"""
+        self.similarity_index = None
+        self.batch_clusters = None
+        self._clusters_stale = False
+    
+    def discover_motifs(self, params=None, max_workers=1):
+        """
+        원시 시계열의 매트릭스 프로파일로 반복 패턴(모티프)과 가장 특이한 구간(디스코드) 탐색
+        - params: DEFAULT_MATRIX_PROFILE_PARAMS에 덮어쓸 항목 (window, top_k, max_points 등)
+        - FFT 슬라이딩 내적 + STOMP 행 갱신으로 O(n²) 연산에 메모리 O(n), max_workers > 1이면 행 구간을 프로세스 병렬 계산
+        - 레코드가 max_points보다 많으면 구간 평균으로 줄여 계산하고 위치는 원시 위치로 되돌려 보고
+          (matrix_profile_summary['step']개 레코드 단위 근사)
+        - 모티프: rank, distance, window, occurrences(start/end_timestamp, raw_offsets, batch_id, mean, max, distance)
+        - 디스코드: rank, distance, start/end_timestamp, raw_offsets, batch_id, nearest_start_timestamp, mean, max
+          (고장 직전처럼 다른 어떤 구간과도 모양이 닮지 않은 구간)
+        - append()로 들어온 레코드는 반영하지 않으므로 필요하면 다시 호출
+        """
+        params = _matrix_profile_params(params)
+        with self.profiler.stage('matrix_profile') as stage:
+            series = self._current_series()
+            if series is None:
+                print("분석할 데이터가 없습니다.")
+                return None
+            epoch_ns, values = series
+            stage.rows = len(values)
+            
+            # 긴 시계열은 factor개씩 평균 (부분 시계열이 min_window_points개 아래로 줄지 않는 범위)
+            window = min(params['window'], len(values) // 4)
+            factor = 1
+            if len(values) > params['max_points']:
+                factor = max(1, min(-(-len(values) // params['max_points']), window // params['min_window_points']))
+            reduced = values
+            if np.isnan(reduced).any():
+                reduced = pd.Series(reduced).ffill().bfill().to_numpy()
+            if factor > 1:
+                reduced = reduced[:len(reduced) // factor * factor].reshape(-1, factor).mean(axis=1)
+            window //= factor
+            if window < 4 or len(reduced) < 2 * window:
+                self.matrix_profile_summary = {'status': MOTIFS_INSUFFICIENT, 'records': len(values)}
+                print("매트릭스 프로파일을 계산하기에 레코드가 부족합니다.")
+                return None
+            
+            exclusion = -(-window // 4)
+            profile, index = _matrix_profile(reduced, window, exclusion, params['chunk_rows'], max_workers)
+            self.matrix_profile = {'profile': profile, 'index': index, 'step': factor, 'window': window}
+            self.matrix_profile_params = params
+            self.matrix_profile_summary = {'status': MOTIFS_COMPUTED, 'records': len(values), 'step': factor,
+                                           'window': window * factor}
+            
+            batch_starts, batch_ids = self._batch_starts()
+            
+            def describe(position, distance):
+                start = position * factor
+                end = min(start + window * factor, len(values))
+                batch_position = np.searchsorted(batch_starts, start, side='right') - 1
+                return {
+                    'start_timestamp': _isoformat_epoch_ns(epoch_ns[[start]], self.raw_timezone)[0],
+                    'end_timestamp': _isoformat_epoch_ns(epoch_ns[[end - 1]], self.raw_timezone)[0],
+                    'raw_offsets': [int(start), int(end)],
+                    'batch_id': int(batch_ids[max(batch_position, 0)]) if len(batch_starts) else None,
+                    'mean': float(np.nanmean(values[start:end])),
+                    'max': float(np.nanmax(values[start:end])),
+                    'distance': distance
+                }
+            
+            self.motifs = []
+            # 결과끼리는 부분 시계열이 겹치지 않도록 window 전체를 제외
+            for rank, (position, neighbor, distance) in enumerate(_top_motifs(profile, index, params['top_k'], window), 1):
+                occurrences = _motif_occurrences(reduced, window, position, max(distance, 1e-9) * params['motif_radius'],
+                                                 window, params['max_occurrences'])
+                self.motifs.append({
+                    'rank': rank,
+                    'distance': distance,
+                    'window': window * factor,
+                    'occurrences': [describe(*occurrence) for occurrence in occurrences]
+                })
+            self.discords = []
+            for rank, (position, distance) in enumerate(_top_discords(profile, params['top_k'], window), 1):
+                discord = describe(position, distance)
+                del discord['distance']
+                nearest = int(index[position]) * factor
+                self.discords.append({
+                    'rank': rank,
+                    'distance': distance,
+                    **discord,
+                    'nearest_start_timestamp': _isoformat_epoch_ns(epoch_ns[[nearest]], self.raw_timezone)[0]
+                })
+        
+        step = f", {factor}개씩 평균" if factor > 1 else ""
+        print(f"매트릭스 프로파일 완료: 부분 시계열 {window * factor}개 레코드{step}, "
+              f"모티프 {len(self.motifs)}개, 디스코드 {len(self.discords)}개")
+        return self.motifs, self.discords
+    
+    def _clear_motifs(self):
+        """원시 데이터가 바뀌면 모티프/디스코드 결과 초기화"""
+        self.motifs = None
+        self.discords = None
+        self.matrix_profile = None
+        self.matrix_profile_summary = {'status': MOTIFS_NOT_COMPUTED}
+    
+    def motif_metadata(self):
+        """모티프 탐색 상태(matrix_profile)와 결과 메타데이터 (요청 시 탐색한 뒤 화면 데이터 갱신에도 사용)"""
+        metadata = {'matrix_profile': dict(self.matrix_profile_summary)}
+        if self.motifs is not None:
+            metadata['matrix_profile_params'] = self.matrix_profile_params
+            metadata['motifs'] = self.motifs
+            metadata['discords'] = self.discords
+        return metadata
+    
+    def run_extended_analyses(self, missing_only=False):
+        """
+        배치 분석 이후의 확장 분석(이상 감지, 임계 온도 예측, 변화점, 배치 유사도)을 기본 파라미터로 실행
+        모티프 탐색(discover_motifs)은 느려서 포함하지 않음 (화면에서 요청할 때 실행)
+        - missing_only=True면 결과가 없는 분석만 실행 (캐시에서 복원한 분석기용),
+          변화점은 기본 파라미터(벌점 등)가 바뀐 뒤 저장된 결과도 다시 탐지
+        반환: 실행한 분석 이름 목록
+        """
+        steps = (
+            ('anomalies', self.anomalies is None, self.detect_anomalies),
+            ('forecast', self.forecast is None, self.forecast_thresholds),
+            ('change_points', self.segments is None or self.change_point_params != change_point_params(),
+             self.detect_change_points),
+            ('similarity', self.batch_clusters is None, self.build_similarity_index)
+        )
+        executed = []
+        for name, missing, run in steps:
+            if missing or not missing_only:
+                run()
+                executed.append(name)
+        return executed
+    
+    def anomalies_by_batch(self):
+        """batch_id별 이상 이벤트 목록 (detect_anomalies() 이후)"""
+        grouped = defaultdict(list)
+        for event in self.anomalies or []:
+            grouped[event['batch_id']].append(event)
+        return dict(grouped)
+        
+    def set_thresholds(self, thresholds=None):
+        """분류 임계값 테이블 설정 (DEFAULT_THRESHOLDS에 덮어쓸 항목만 전달)"""
+        self.thresholds = _merge_thresholds(thresholds)
+        self.label_lookups = _label_lookups(self.thresholds)
+    
+    def load_thresholds(self, path):
+        """JSON 파일에서 분류 임계값 테이블 로드"""
+        with open(path, 'r', encoding='utf-8') as f:
+            self.set_thresholds(json.load(f))
+    
+    def relabel(self, thresholds=None):
+        """
+        임계값 변경 후 기존 배치 라벨 재분류 (통계 재계산 없이 분류만 다시 수행)
+        trend 재분류에 필요한 기울기는 원시 데이터가 있을 때만 raw_offsets로 다시 계산
+        """
+        if thresholds is not None:
+            self.set_thresholds(thresholds)
+        
+        if self.batch_records is not None:
+            # compact 모드: 레코드 배열의 통계(기울기 포함)로 코드만 다시 계산
+            records = self.batch_records
+            stats = {key: records[key].astype(np.float64) for key in ('mean', 'std', 'max', 'range', 'slope')}
+            label_codes = _classify_statistics(stats, records['record_count'], self.thresholds)
+            for field in _LABEL_FIELDS:
+                records[field] = label_codes[field]
+            self._analyzed_data = None
+            self._batch_table = None
+            return
+        
+        if not self.analyzed_data:
+            return
+        
+        stats = {
+            key: np.fromiter((batch['statistics'][key] for batch in self.analyzed_data), dtype=np.float64)
+            for key in ('mean', 'std', 'max', 'range')
+        }
+        record_counts = np.fromiter((batch['record_count'] for batch in self.analyzed_data), dtype=np.int64)
         
-        # 범위 분류
-        if temp_range < 5:
-            range_category = "일정"
-        elif temp_range < 15:
-            range_category = "변동"
+        fields = ['value_label', 'stability', 'alert_level']
+        if self._raw_values is not None and all('raw_offsets' in batch for batch in self.analyzed_data):
+            offsets = np.array([batch['raw_offsets'] for batch in self.analyzed_data], dtype=np.int64)
+            stats['slope'] = _segment_statistics(self.raw_values, offsets[:, 0], offsets[:, 1])['slope']
+            fields.append('trend')
         else:
-            range_category = "급변"
+            stats['slope'] = np.zeros(len(record_counts))
         
-        return f"{temp_category}_{stability}_{range_category}"
+        label_codes = _classify_statistics(stats, record_counts, self.thresholds)
+        for field in fields:
+            lookup = self.label_lookups[field]
+            for batch, code in zip(self.analyzed_data, label_codes[field].tolist()):
+                batch[field] = lookup[code]
+        self._batch_table = None
+    
+    def _classify_single(self, field, stats, slope=0.0, record_count=2):
+        """단일 배치 분류 (벡터 분류기를 길이 1 배열로 호출)"""
+        arrays = {key: np.array([stats.get(key, 0.0)], dtype=np.float64) for key in ('mean', 'std', 'max', 'range')}
+        arrays['slope'] = np.array([slope], dtype=np.float64)
+        codes = _classify_statistics(arrays, np.array([record_count]), self.thresholds, fields=(field,))
+        return self.label_lookups[field][codes[field][0]]
+    
+    def _generate_temperature_label(self, stats):
+        """온도 통계를 바탕으로 라벨 생성"""
+        return self._classify_single('value_label', stats)
     
     def _analyze_trend(self, values):
         """온도 트렌드 분석"""
         if len(values) < 2:
-            return "불충분"
+            return self.thresholds['trend']['insufficient']
         
         # 선형 회귀를 통한 트렌드 분석
-        x = np.arange(len(values))
-        slope = np.polyfit(x, values, 1)[0]
-        
-        if slope > 0.1:
-            return "상승"
-        elif slope < -0.1:
-            return "하강"
-        else:
-            return "평형"
+        return self._classify_trend(_least_squares_slope(np.asarray(values, dtype=np.float64)), len(values))
+    
+    def _classify_trend(self, slope, record_count):
+        """회귀 기울기로 트렌드 분류"""
+        return self._classify_single('trend', {}, slope=slope, record_count=record_count)
     
     def _analyze_stability(self, stats):
         """안정성 분석"""
-        cv = stats['std'] / stats['mean'] if stats['mean'] > 0 else 0
-        
-        if cv < 0.05:
-            return "매우안정"
-        elif cv < 0.1:
-            return "안정"
-        elif cv < 0.2:
-            return "보통"
-        else:
-            return "불안정"
+        return self._classify_single('stability', stats)
     
     def _determine_alert_level(self, stats):
         """경고 수준 결정"""
-        mean_temp = stats['mean']
-        max_temp = stats['max']
-        
-        if max_temp > 90 or mean_temp > 85:
-            return "위험"
-        elif max_temp > 80 or mean_temp > 75:
-            return "주의"
-        elif max_temp > 70 or mean_temp > 65:
-            return "관찰"
-        else:
-            return "정상"
-    
-    def save_to_json(self, output_file='water_pump_analysis.json'):
-        """분석 결과를 JSON 파일로 저장"""
-        output_data = {
-            'metadata': {
-                'analysis_date': datetime.now().isoformat(),
-                'total_batches': len(self.analyzed_data),
-                'window_size': 100,
-                'data_source': 'water_pump_temperature_sensor'
-            },
-            'analysis_results': self.analyzed_data
+        return self._classify_single('alert_level', stats)
+    
+    def get_raw_data(self, batch, timestamp_texts=None, text_offset=0):
+        """
+        배치의 원시 데이터를 [{'timestamp', 'value'}] 형태로 생성
+        timestamp_texts가 주어지면 미리 변환한 ISO 문자열(text_offset부터 시작)을 사용
+        """
+        if 'raw_data' in batch:
+            return batch['raw_data']
+        
+        start, end = batch['raw_offsets']
+        if timestamp_texts is None:
+            timestamps = _isoformat_epoch_ns(self.raw_timestamps[start:end], self.raw_timezone)
+        else:
+            timestamps = timestamp_texts[start - text_offset:end - text_offset]
+        return [
+            {
+                'timestamp': timestamp,
+                'value': value
+            } for timestamp, value in zip(timestamps, _value_list(self.raw_values[start:end]))
+        ]
+    
+    def _materialize_batch(self, batch, timestamp_texts=None, text_offset=0):
+        """raw_offsets 자리에 raw_data를 채운 배치 딕셔너리 반환 (키 순서 유지)"""
+        if 'raw_offsets' not in batch:
+            return batch
+        
+        materialized = {}
+        for key, value in batch.items():
+            if key == 'raw_offsets':
+                materialized['raw_data'] = self.get_raw_data(batch, timestamp_texts, text_offset)
+            else:
+                materialized[key] = value
+        return materialized
+    
+    def materialize_raw_data(self, results=None):
+        """
+        JSON 내보내기용: 모든 배치에 raw_data를 채운 새 목록 반환
+        타임스탬프 문자열은 배치들이 걸친 구간 전체를 한 번에 벡터 변환
+        """
+        if results is None:
+            results = self.analyzed_data
+        
+        offsets = [batch['raw_offsets'] for batch in results if 'raw_offsets' in batch]
+        if not offsets:
+            return list(results)
+        
+        text_offset = min(start for start, _ in offsets)
+        text_end = max(end for _, end in offsets)
+        timestamp_texts = _isoformat_epoch_ns(self.raw_timestamps[text_offset:text_end], self.raw_timezone)
+        return [self._materialize_batch(batch, timestamp_texts, text_offset) for batch in results]
+    
+    def get_output_data(self, data_source='water_pump_temperature_sensor', include_raw=True):
+        """메타데이터와 분석 결과를 JSON 스키마 형태로 반환"""
+        if include_raw:
+            results = self.materialize_raw_data()
+        else:
+            results = [_strip_raw(batch) for batch in self.analyzed_data]
+        
+        return {
+            'metadata': self._output_metadata(data_source),
+            'analysis_results': results
+        }
+    
+    def _output_metadata(self, data_source):
+        """내보내기 메타데이터"""
+        metadata = {
+            'analysis_date': datetime.now().isoformat(),
+            'total_batches': len(self.analyzed_data),
+            'window_size': self.window_size,
+            'data_source': data_source
         }
+        # 시간 기준 윈도우는 레코드 수가 아닌 기간 (window_size 대신 window_freq)
+        if self.window_freq is not None:
+            del metadata['window_size']
+            metadata['window_freq'] = self.window_freq
+        if self.anomalies is not None:
+            metadata['anomaly_params'] = self.anomaly_params
+            metadata['anomalies'] = self.anomalies
+        if self.forecast is not None:
+            metadata['forecast'] = self.forecast
+        if self.segments is not None:
+            metadata['change_point_params'] = self.change_point_params
+            metadata['segments'] = self.segments
+        if self.batch_clusters is not None:
+            metadata['similarity_params'] = self.similarity_params
+            metadata['batch_clusters'] = self.pattern_groups()
+        metadata.update(self.motif_metadata())
+        return metadata
+    
+    def iter_json_chunks(self, data_source='water_pump_temperature_sensor', indent=2, include_raw=True, lines=False,
+                         block_rows=JSON_EXPORT_BLOCK_ROWS):
+        """
+        분석 결과 JSON을 문자열 조각으로 순차 생성 (전체 출력 딕셔너리를 만들지 않음)
+        - indent=2: 기존 json.dump(indent=2)와 같은 출력, indent=None: 공백 없는 한 줄 JSON
+        - include_raw=False: raw_data 없이 통계와 라벨만
+        - lines=True: JSON Lines (첫 줄 메타데이터, 이후 한 줄에 배치 하나)
+        raw_data는 레코드 block_rows개 분량의 배치씩만 생성하므로 추가 메모리는 데이터 크기와 무관
+        """
+        metadata = self._output_metadata(data_source)
+        if lines:
+            indent = None
+        separators = (',', ': ') if indent is not None else (',', ':')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        def dump(value, level):
+            text = json.dumps(value, ensure_ascii=False, indent=indent, separators=separators)
+            if not indent or not level:
+                return text
+            return text.replace('\n', '\n' + ' ' * (indent * level))
         
-        print(f"분석 결과가 {output_file}에 저장되었습니다.")
+        if lines:
+            yield dump({'metadata': metadata}, 0) + '\n'
+        elif indent is None:
+            yield '{"metadata":' + dump(metadata, 0) + ',"analysis_results":['
+        else:
+            pad = ' ' * indent
+            yield '{\n' + pad + '"metadata": ' + dump(metadata, 1) + ',\n' + pad + '"analysis_results": ['
+        
+        first = True
+        for block in _export_blocks(self.analyzed_data, block_rows):
+            if include_raw:
+                block = self.materialize_raw_data(block)
+            else:
+                block = [_strip_raw(batch) for batch in block]
+            
+            if lines:
+                yield ''.join(dump(batch, 0) + '\n' for batch in block)
+            elif indent is None:
+                yield ('' if first else ',') + ','.join(dump(batch, 0) for batch in block)
+            else:
+                item_pad = '\n' + ' ' * (indent * 2)
+                yield ('' if first else ',') + ','.join(item_pad + dump(batch, 2) for batch in block)
+            first = False
+        
+        if lines:
+            return
+        if indent is None:
+            yield ']}'
+        elif first:
+            yield ']\n}'
+        else:
+            yield '\n' + ' ' * indent + ']\n}'
+    
+    def save_to_json(self, output_file='water_pump_analysis.json', data_source='water_pump_temperature_sensor',
+                     indent=2, include_raw=True, lines=False):
+        """
+        분석 결과를 JSON 파일로 스트리밍 저장 (raw_data는 배치 블록 단위로 이 시점에 생성)
+        - indent=None: 압축 JSON, include_raw=False: 통계만, lines=True: JSON Lines (.jsonl)
+        프로파일 'serialize_json' 단계의 rows는 배치 수
+        """
+        with self.profiler.stage('serialize_json') as stage:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for chunk in self.iter_json_chunks(data_source, indent, include_raw, lines):
+                    f.write(chunk)
+            stage.rows = len(self.analyzed_data)
+        
+        print(f"분석 결과가 {output_file}에 저장되었습니다.")
+        return output_file
+    
+    def save_raw_store(self, name, store_dir=RAW_STORE_DIR, value_dtype=np.float32, label=None):
+        """
+        원시 시계열을 메모리 맵 저장소(store_dir/name/)로 저장 (label: 목록에 표시할 이름, 기본값 name)
+        - timestamps.npy: int64 epoch 나노초, values.npy: 온도 값 (기본 float32)
+        - header.json: 레코드 수, dtype, 시간대, 기간 등 작은 헤더
+        - rollups.npz: 저장한 값 기준 롤업 피라미드 셀 (연결 시 다시 집계하지 않음)
+        파일은 임시 파일에 쓴 뒤 교체하므로 이미 연결된 세션은 기존 파일을 계속 읽을 수 있음
+        """
+        series = self._analysis_series()
+        if series is None:
+            raise ValueError("저장할 원시 데이터가 없습니다.")
+        epoch_ns, values = series
+        
+        store_path = os.path.join(store_dir, name)
+        os.makedirs(store_path, exist_ok=True)
+        for file_name, array in (('timestamps.npy', epoch_ns.astype(np.int64, copy=False)),
+                                 ('values.npy', values.astype(value_dtype, copy=False))):
+            temp_path = os.path.join(store_path, f'.{file_name}.tmp')
+            with open(temp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(temp_path, os.path.join(store_path, file_name))
+        
+        temp_path = os.path.join(store_path, '.rollups.npz.tmp')
+        with open(temp_path, 'wb') as f:
+            RollupPyramid(epoch_ns, values.astype(value_dtype, copy=False), DEFAULT_ROLLUP_LEVELS).save(f)
+        os.replace(temp_path, os.path.join(store_path, 'rollups.npz'))
+        
+        timestamps = _isoformat_epoch_ns(epoch_ns[[0, -1]], self.raw_timezone)
+        header = {
+            'format_version': RAW_STORE_VERSION,
+            'name': name,
+            'label': name if label is None else label,
+            'rows': len(values),
+            'timestamp_dtype': 'int64',
+            'timestamp_unit': 'ns',
+            'value_dtype': np.dtype(value_dtype).name,
+            'timezone': None if self.raw_timezone is None else str(self.raw_timezone),
+            'start_timestamp': timestamps[0],
+            'end_timestamp': timestamps[1],
+            'created_at': datetime.now().isoformat()
+        }
+        temp_path = os.path.join(store_path, '.header.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(header, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, os.path.join(store_path, 'header.json'))
+        
+        print(f"원시 저장소 저장 완료: {store_path} ({len(values)}개 레코드, {header['value_dtype']})")
+        return store_path
+    
+    def attach_raw_store(self, store_path):
+        """
+        save_raw_store()로 만든 저장소를 읽기 전용 메모리 맵으로 연결 (데이터 복사 없음)
+        같은 호스트의 여러 세션이 OS 페이지 캐시를 공유하며, DataFrame(self.data)은 만들지 않음
+        연결 후 analyze_* 메서드는 메모리 맵 배열을 직접 분석
+        """
+        with open(os.path.join(store_path, 'header.json'), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get('format_version') != RAW_STORE_VERSION:
+            raise ValueError(f"지원하지 않는 원시 저장소 버전입니다: {header.get('format_version')}")
+        
+        # 빈 파일은 메모리 맵을 만들 수 없으므로 일반 배열로 로드
+        mmap_mode = 'r' if header['rows'] else None
+        timestamps = np.load(os.path.join(store_path, 'timestamps.npy'), mmap_mode=mmap_mode)
+        values = np.load(os.path.join(store_path, 'values.npy'), mmap_mode=mmap_mode)
+        if len(timestamps) != header['rows'] or len(values) != header['rows']:
+            raise ValueError("원시 저장소 헤더와 배열 길이가 일치하지 않습니다.")
+        
+        # 헤더 수정 시각을 사용 시각으로 갱신 (AnalysisCache.evict_raw_stores의 LRU 기준)
+        try:
+            os.utime(os.path.join(store_path, 'header.json'))
+        except OSError:
+            pass
+        
+        self.data = None
+        self.analyzed_data = []
+        self.window_freq = None
+        self.raw_timestamps = timestamps
+        self.raw_values = values
+        self.raw_timezone = header['timezone']
+        self.raw_store = store_path
+        self.anomalies = None
+        self.forecast = None
+        self.segments = None
+        self._clear_similarity()
+        self._clear_motifs()
+        self.load_summary = {'records': header['rows'], 'raw_store': store_path}
+        
+        # 저장 시 만든 롤업 피라미드가 있으면 메모리 맵 배열과 연결 (이전 버전 저장소는 조회 시 생성)
+        rollup_path = os.path.join(store_path, 'rollups.npz')
+        if header['rows'] and os.path.exists(rollup_path):
+            self._rollups = RollupPyramid.load(rollup_path, self.raw_timestamps, self.raw_values)
+        
+        print(f"원시 저장소 연결 완료: {store_path} ({header['rows']}개 레코드)")
+        return header
+    
+    def save_columnar(self, output_file='water_pump_analysis.npz', data_source='water_pump_temperature_sensor', file_format='auto'):
+        """
+        분석 결과를 컬럼형 바이너리 파일로 저장
+        - 배치 통계 테이블(컬럼별 배열) + 원시 시계열(int64 epoch ns / float64)을 분리 저장
+        - file_format: 'npz', 'parquet', 'feather' 또는 'auto'
+          ('auto'는 확장자로 판단, 확장자가 없으면 pyarrow 설치 시 parquet, 아니면 npz)
+        - parquet/feather는 원시 시계열을 배치별 리스트 컬럼으로 저장 (파일 하나로 업로드 가능)
+        프로파일 'serialize_columnar' 단계의 rows는 배치 수
+        """
+        with self.profiler.stage('serialize_columnar') as stage:
+            file_format = _columnar_format(output_file, file_format)
+            extension = f".{file_format}"
+            if not output_file.endswith(extension):
+                output_file += extension
+            
+            metadata = self.get_output_data(data_source, include_raw=False)['metadata']
+            metadata['format_version'] = COLUMNAR_FORMAT_VERSION
+            metadata['raw_timezone'] = None if self.raw_timezone is None else str(self.raw_timezone)
+            columns, raw_timestamps, raw_values = self._columnar_tables()
+            
+            if file_format == 'npz':
+                arrays = {'metadata': np.array(json.dumps(metadata, ensure_ascii=False))}
+                for name, column in columns.items():
+                    if isinstance(column, pd.Categorical):
+                        arrays[f'batch.{name}'] = column.codes
+                        arrays[f'batch.{name}.categories'] = np.asarray(column.categories, dtype=str)
+                    else:
+                        arrays[f'batch.{name}'] = column
+                if raw_timestamps is not None:
+                    arrays['raw.timestamp'] = raw_timestamps
+                    arrays['raw.value'] = raw_values
+                np.savez(output_file, **arrays)
+            else:
+                import pyarrow as pa
+                
+                table = pa.Table.from_pandas(pd.DataFrame({
+                    name: column for name, column in columns.items() if name not in ('raw_start', 'raw_end')
+                }), preserve_index=False)
+                if raw_timestamps is not None:
+                    offsets = pa.array(np.append(columns['raw_start'], len(raw_values)), pa.int64())
+                    table = table.append_column('raw_timestamp', pa.LargeListArray.from_arrays(offsets, pa.array(raw_timestamps)))
+                    table = table.append_column('raw_value', pa.LargeListArray.from_arrays(offsets, pa.array(raw_values)))
+                table = table.replace_schema_metadata({
+                    **(table.schema.metadata or {}),
+                    b'water_pump_metadata': json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+                })
+                
+                if file_format == 'parquet':
+                    import pyarrow.parquet as pq
+                    pq.write_table(table, output_file)
+                else:
+                    import pyarrow.feather as feather
+                    feather.write_feather(table, output_file)
+            stage.rows = len(columns['batch_id'])
+        
+        print(f"분석 결과가 {output_file}에 컬럼형({file_format})으로 저장되었습니다.")
         return output_file
+    
+    def _columnar_tables(self):
+        """
+        analyzed_data를 배치 컬럼 딕셔너리와 연속된 원시 시계열로 변환
+        원시 시계열은 배치 순서대로 이어 붙여 raw_start/raw_end가 0부터 연속되도록 정리
+        """
+        batches = self.analyzed_data
+        columns = _columns_from_batches(batches)
+        
+        if not batches or not any(key in batches[0] for key in ('raw_offsets', 'raw_data')):
+            # 스트리밍 분석 결과는 원시 데이터가 없으므로 배치 테이블만 저장
+            return columns, None, None
+        
+        if 'raw_offsets' in batches[0]:
+            offsets = np.array([batch['raw_offsets'] for batch in batches], dtype=np.int64).reshape(-1, 2)
+            starts, ends = offsets[:, 0], offsets[:, 1]
+            if np.array_equal(starts[1:], ends[:-1]):
+                raw_timestamps = self.raw_timestamps[starts[0]:ends[-1]]
+                raw_values = self.raw_values[starts[0]:ends[-1]]
+            else:
+                take = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+                raw_timestamps, raw_values = self.raw_timestamps[take], self.raw_values[take]
+            lengths = ends - starts
+        else:
+            # raw_data_mode='dict' 결과: 딕셔너리 목록을 다시 배열로 변환
+            records = [record for batch in batches for record in batch['raw_data']]
+            raw_timestamps = _to_epoch_ns(pd.to_datetime([record['timestamp'] for record in records]))
+            raw_values = np.array([record['value'] for record in records], dtype=np.float64)
+            lengths = np.array([len(batch['raw_data']) for batch in batches], dtype=np.int64)
+        
+        columns['raw_end'] = np.cumsum(lengths)
+        columns['raw_start'] = columns['raw_end'] - lengths
+        return columns, raw_timestamps, raw_values
+    
+    def load_columnar(self, source, file_format='auto'):
+        """
+        save_columnar()로 저장한 파일(경로 또는 업로드 파일 객체)을 불러와 분석 상태를 복원
+        배치는 raw_offsets를 가진 컬럼형 배치로 복원되며, JSON 스키마 형태의 딕셔너리를 반환
+        """
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        file_format = _columnar_format(name, file_format, default='npz')
+        
+        raw_timestamps = raw_values = None
+        if file_format == 'npz':
+            with np.load(source) as arrays:
+                metadata = json.loads(arrays['metadata'].item())
+                columns = {}
+                for key in arrays.files:
+                    if not key.startswith('batch.') or key.endswith('.categories'):
+                        continue
+                    column = arrays[key]
+                    if f'{key}.categories' in arrays.files:
+                        column = arrays[f'{key}.categories'][column]
+                    columns[key[len('batch.'):]] = column
+                if 'raw.timestamp' in arrays.files:
+                    raw_timestamps = arrays['raw.timestamp']
+                    raw_values = arrays['raw.value']
+        else:
+            if file_format == 'parquet':
+                import pyarrow.parquet as pq
+                table = pq.read_table(source)
+            else:
+                import pyarrow.feather as feather
+                table = feather.read_table(source)
+            
+            metadata = json.loads(table.schema.metadata[b'water_pump_metadata'].decode('utf-8'))
+            if 'raw_value' in table.column_names:
+                raw_columns = []
+                for column_name in ('raw_timestamp', 'raw_value'):
+                    lists = table.column(column_name).combine_chunks()
+                    offsets = lists.offsets.to_numpy()
+                    raw_columns.append(lists.values.to_numpy()[offsets[0]:offsets[-1]])
+                raw_timestamps, raw_values = raw_columns
+                offsets = offsets - offsets[0]
+                table = table.select([column for column in table.column_names if column not in ('raw_timestamp', 'raw_value')])
+            frame = table.to_pandas()
+            columns = {name: frame[name].to_numpy() for name in frame.columns}
+            if raw_values is not None:
+                columns['raw_start'], columns['raw_end'] = offsets[:-1], offsets[1:]
+        
+        self.window_size = metadata.get('window_size', self.window_size)
+        self.window_freq = metadata.get('window_freq')
+        self.raw_timezone = metadata.get('raw_timezone')
+        self.anomalies = metadata.get('anomalies')
+        self.anomaly_params = metadata.get('anomaly_params')
+        self._anomaly_detector = None
+        self.forecast = metadata.get('forecast')
+        self.segments = metadata.get('segments')
+        self.change_point_params = metadata.get('change_point_params')
+        self._clear_similarity()
+        self.batch_clusters = metadata.get('batch_clusters')
+        self.similarity_params = metadata.get('similarity_params')
+        self._clear_motifs()
+        self.motifs = metadata.get('motifs')
+        self.discords = metadata.get('discords')
+        self.matrix_profile_params = metadata.get('matrix_profile_params')
+        self.matrix_profile_summary = matrix_profile_summary(metadata)
+        self.raw_timestamps = raw_timestamps
+        self.raw_values = raw_values
+        self.analyzed_data = _batches_from_columns(columns)
+        self._batch_table = BatchTable(_typed_batch_columns(columns))
+        self.data = None
+        if raw_values is not None:
+            self._set_data_from_raw()
+        
+        print(f"컬럼형 분석 결과 로드 완료: {len(self.analyzed_data)}개 배치")
+        return {'metadata': metadata, 'analysis_results': self.analyzed_data}
+
+
+class WaterPumpFleetAnalyzer:
+    """
+    다수 펌프 일괄 분석
+    - pump_id 컬럼이 있는 CSV/데이터 또는 펌프별 CSV가 모인 디렉터리를 입력으로 받음
+    - 펌프 단위로 나누어 ProcessPoolExecutor에서 윈도우 분석을 병렬 실행
+    - 결과는 self.results[pump_id] = 배치 목록 형태로 저장
+    - 워커는 펌프별 최근 forecast_window개 레코드도 반환하여 forecast_thresholds()가 전체 펌프를 한 번에 예측
+    """
+    
+    def __init__(self, max_workers=None, chunksize=4, window_size=100, sketch_k=DEFAULT_SKETCH_K,
+                 forecast_window=DEFAULT_FORECAST_PARAMS['fit_window']):
+        self.max_workers = max_workers  # None이면 CPU 코어 수
+        self.chunksize = chunksize      # 워커에 한 번에 전달할 펌프 수
+        self.window_size = window_size
+        self.sketch_k = sketch_k        # 펌프별 분위수 스케치 정확도
+        self.forecast_window = forecast_window
+        self.tasks = []
+        self.results = {}
+        self.sketches = {}              # pump_id -> 온도 값 KLL 스케치
+        self.tails = {}                 # pump_id -> (epoch ns, 값, 시간대) 최근 레코드
+        self.forecasts = {}             # pump_id -> 임계 온도 도달 예측
+        self._forecast_state = None
+        self._forecast_pumps = []
+        self._forecast_state_thresholds = FORECAST_THRESHOLDS
+    
+    def load_data(self, file_path=None, data=None, directory=None, pump_column='pump_id'):
+        """
+        플릿 데이터 로드
+        - file_path/data: pump_column 기준으로 그룹화하여 펌프별 시계열 작업 생성
+        - directory: *.csv 파일 하나를 펌프 하나로 보고 (파일명 = pump_id) 워커에서 직접 로드
+        """
+        try:
+            self.tasks = []
+            
+            if directory:
+                for file_name in sorted(os.listdir(directory)):
+                    if file_name.lower().endswith('.csv'):
+                        pump_id = os.path.splitext(file_name)[0]
+                        self.tasks.append(('file', pump_id, os.path.join(directory, file_name)))
+            else:
+                if file_path:
+                    frame = pd.read_csv(file_path)
+                elif data is not None:
+                    frame = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+                else:
+                    raise ValueError("데이터 소스가 제공되지 않았습니다.")
+                
+                if pump_column not in frame.columns:
+                    raise ValueError(f"{pump_column} 컬럼을 찾을 수 없습니다.")
+                
+                pump_ids = frame[pump_column]
+                series = frame.drop(columns=[pump_column])
+                series.columns = _resolve_column_names(series.columns)
+                series = _clean_frame(series[['timestamp', 'value']])
+                series[pump_column] = pump_ids
+                
+                # 펌프별 시계열은 작은 NumPy 배열로만 워커에 전달
+                for pump_id, group in series.groupby(pump_column, sort=True):
+                    group = group.sort_values('timestamp', kind='stable')
+                    self.tasks.append((
+                        'series',
+                        pump_id,
+                        _to_epoch_ns(group['timestamp']),
+                        group['value'].to_numpy(dtype=np.float64),
+                        getattr(group['timestamp'].dtype, 'tz', None)
+                    ))
+            
+            if not self.tasks:
+                raise ValueError("분석할 펌프 데이터가 없습니다.")
+            
+            print(f"플릿 데이터 로드 완료: 펌프 {len(self.tasks)}대")
+            return True
+            
+        except Exception as e:
+            print(f"플릿 데이터 로드 실패: {e}")
+            return False
+    
+    def analyze(self):
+        """펌프별 윈도우 분석을 프로세스 풀에서 병렬 실행"""
+        self.results = {}
+        self.sketches = {}
+        self.tails = {}
+        self.forecasts = {}
+        self._forecast_state = None
+        tasks = [task + (self.forecast_window, self.sketch_k, self.window_size) for task in self.tasks]
+        
+        if self.max_workers == 1:
+            # 단일 워커는 프로세스 생성 없이 현재 프로세스에서 실행
+            outputs = map(_analyze_pump_task, tasks)
+            for pump_id, batches, sketch, tail in outputs:
+                self.results[pump_id] = batches
+                self.sketches[pump_id] = sketch
+                self.tails[pump_id] = tail
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                for pump_id, batches, sketch, tail in executor.map(_analyze_pump_task, tasks, chunksize=self.chunksize):
+                    self.results[pump_id] = batches
+                    self.sketches[pump_id] = sketch
+                    self.tails[pump_id] = tail
+        
+        print(f"플릿 분석 완료: 펌프 {len(self.results)}대")
+        return self.results
+    
+    def get_percentiles(self, quantiles=(0.5, 0.95, 0.99), pump_ids=None):
+        """
+        플릿 전체(또는 pump_ids 펌프들)의 온도 분위수
+        워커가 반환한 펌프별 스케치를 병합하므로 원시 값을 다시 모으지 않음
+        """
+        if pump_ids is None:
+            pump_ids = self.sketches.keys()
+        sketches = [self.sketches[pump_id] for pump_id in pump_ids]
+        if not sketches:
+            raise ValueError("분석된 펌프가 없습니다.")
+        return _percentile_summary(merge_sketches(sketches), quantiles)
+    
+    def forecast_thresholds(self, params=None, thresholds=FORECAST_THRESHOLDS):
+        """
+        전체 펌프의 임계 온도 도달 시점을 한 번의 배열 연산으로 예측 (analyze() 이후)
+        반환: {pump_id: 예측 딕셔너리} (WaterPumpAnalyzer.forecast_thresholds()와 같은 형식)
+        """
+        if not self.tails:
+            raise ValueError("분석된 펌프가 없습니다.")
+        self._forecast_pumps = list(self.tails)
+        series = [self.tails[pump_id][:2] for pump_id in self._forecast_pumps]
+        self._forecast_state = ForecastState.from_series(series, params)
+        self._refresh_forecasts(thresholds)
+        
+        upcoming = sum(1 for forecast in self.forecasts.values() if _primary_crossing(forecast) is not None)
+        print(f"플릿 예측 완료: 펌프 {len(self.forecasts)}대 중 {upcoming}대가 탐색 범위 안에서 임계 온도 도달 예상")
+        return self.forecasts
+    
+    def update_forecasts(self, readings, pump_column='pump_id'):
+        """
+        새 레코드(pump_id/timestamp/value 목록 또는 DataFrame)를 펌프별 예측 상태에 O(1)씩 반영하고 예측 갱신
+        forecast_thresholds() 이후 사용, 알 수 없는 pump_id의 레코드는 무시
+        """
+        if self._forecast_state is None:
+            raise ValueError("forecast_thresholds()를 먼저 실행해야 합니다.")
+        frame = readings.copy() if isinstance(readings, pd.DataFrame) else pd.DataFrame(readings)
+        if len(frame) == 0:
+            return self.forecasts
+        pump_ids = frame[pump_column]
+        series = frame.drop(columns=[pump_column])
+        series.columns = _resolve_column_names(series.columns)
+        series = _clean_frame(series[['timestamp', 'value']])
+        series[pump_column] = pump_ids
+        series = series.sort_values('timestamp', kind='stable')
+        
+        positions = {pump_id: idx for idx, pump_id in enumerate(self._forecast_pumps)}
+        pump_index = series[pump_column].map(positions)
+        known = pump_index.notna().to_numpy()
+        self._forecast_state.update_many(
+            pump_index.to_numpy()[known].astype(np.int64),
+            series['value'].to_numpy(dtype=np.float64)[known],
+            _to_epoch_ns(series['timestamp'])[known]
+        )
+        self._refresh_forecasts(self._forecast_state_thresholds)
+        return self.forecasts
+    
+    def _refresh_forecasts(self, thresholds):
+        """예측 상태로 펌프별 예측 딕셔너리 다시 생성"""
+        self._forecast_state_thresholds = thresholds
+        tz = next((tail[2] for tail in self.tails.values() if tail[2] is not None), None)
+        forecasts = _forecast_dicts(self._forecast_state.forecast(thresholds), tz)
+        self.forecasts = dict(zip(self._forecast_pumps, forecasts))
+    
+    def get_output_data(self, data_source='water_pump_fleet'):
+        """펌프별 분석 결과를 JSON 스키마 형태로 반환"""
+        metadata = {
+            'analysis_date': datetime.now().isoformat(),
+            'total_pumps': len(self.results),
+            'total_batches': sum(len(batches) for batches in self.results.values()),
+            'window_size': self.window_size,
+            'data_source': data_source
+        }
+        if self.forecasts:
+            metadata['forecasts'] = {str(pump_id): forecast for pump_id, forecast in self.forecasts.items()}
+        return {
+            'metadata': metadata,
+            'pumps': {str(pump_id): batches for pump_id, batches in self.results.items()}
+        }
+
+
+class BatchResult:
+    """
+    배치 하나의 분석 결과 (__slots__로 배치마다 키 딕셔너리를 만들지 않음)
+    통계는 mean/median/std/min/max/range 속성, to_dict()/from_dict()로 JSON 스키마 배치와 상호 변환
+    """
+    
+    __slots__ = ('batch_id', 'start_timestamp', 'end_timestamp', 'record_count',
+                 'mean', 'median', 'std', 'min', 'max', 'range',
+                 'value_label', 'trend', 'stability', 'alert_level', 'raw_offsets',
+                 'window_start', 'window_end', 'max_gap_seconds', 'has_gap')
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+    
+    @property
+    def statistics(self):
+        return {name: getattr(self, name) for name in _STATISTICS_FIELDS}
+    
+    @classmethod
+    def from_dict(cls, batch):
+        """JSON 스키마 배치 딕셔너리로 생성 (raw_data는 제외)"""
+        fields = {key: value for key, value in batch.items() if key not in ('statistics', 'raw_data')}
+        return cls(**fields, **batch['statistics'])
+    
+    def to_dict(self):
+        """JSON 스키마 배치 딕셔너리로 변환 (_build_batches와 같은 키 순서)"""
+        batch = {
+            'batch_id': self.batch_id,
+            'start_timestamp': self.start_timestamp,
+            'end_timestamp': self.end_timestamp,
+            'record_count': self.record_count,
+            'statistics': self.statistics
+        }
+        if self.raw_offsets is not None:
+            batch['raw_offsets'] = list(self.raw_offsets)
+        for name in _LABEL_FIELDS:
+            batch[name] = getattr(self, name)
+        if self.window_start is not None:
+            for name in ('window_start', 'window_end', 'max_gap_seconds', 'has_gap'):
+                batch[name] = getattr(self, name)
+        return batch
+    
+    def __repr__(self):
+        return (f"BatchResult(batch_id={self.batch_id}, start={self.start_timestamp}, "
+                f"mean={self.mean}, alert_level={self.alert_level})")
+
+
+class BatchTable:
+    """
+    배치 결과 컬럼 테이블
+    - 필드마다 NumPy 배열 하나 (통계 float64, 라벨은 pd.Categorical 코드), 배치마다 키 문자열을 반복하지 않음
+    - from_batches()/to_batches()로 JSON 스키마 배치 목록과 상호 변환
+    - 집계는 컬럼 연산 (label_counts, where, 불리언 마스크), 행 단위 접근은 BatchResult
+    """
+    
+    def __init__(self, columns):
+        self.columns = columns
+    
+    @classmethod
+    def from_batches(cls, batches):
+        """JSON 스키마 배치 딕셔너리 목록으로 생성"""
+        return cls(_columns_from_batches(batches))
+    
+    def to_batches(self):
+        """JSON 스키마 배치 딕셔너리 목록으로 변환"""
+        return _batches_from_columns(self.columns)
+    
+    def __len__(self):
+        return len(self.columns['batch_id'])
+    
+    def __getitem__(self, key):
+        """
+        문자열: 컬럼 배열, 정수: BatchResult
+        슬라이스/불리언 마스크/인덱스 배열: 해당 행만 가진 BatchTable
+        """
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, (int, np.integer)):
+            return next(iter(self[[key]]))
+        return BatchTable({name: column[key] for name, column in self.columns.items()})
+    
+    def __iter__(self):
+        """BatchResult 순회 (컬럼마다 한 번만 파이썬 값으로 변환)"""
+        lists = {name: np.asarray(column).tolist() for name, column in self.columns.items()}
+        has_raw = 'raw_start' in lists
+        names = [name for name in lists if name not in ('raw_start', 'raw_end')]
+        for idx in range(len(self)):
+            fields = {name: lists[name][idx] for name in names}
+            if has_raw:
+                fields['raw_offsets'] = (lists['raw_start'][idx], lists['raw_end'][idx])
+            yield BatchResult(**fields)
+    
+    def label_counts(self, field, labels=None):
+        """
+        라벨별 배치 수 딕셔너리 (labels 순서, 없는 라벨은 0)
+        labels에 없는 라벨이 있으면 뒤에 추가
+        """
+        column = self.columns[field]
+        counts = np.bincount(column.codes[column.codes >= 0], minlength=len(column.categories))
+        present = dict(zip(column.categories.tolist(), counts.tolist()))
+        result = {label: present.pop(label, 0) for label in (labels or [])}
+        result.update({label: count for label, count in present.items() if count})
+        return result
+    
+    def where(self, field, labels):
+        """field 라벨이 labels 중 하나인 배치만 가진 BatchTable"""
+        return self[np.asarray(self.columns[field].isin(labels))]
+    
+    @property
+    def nbytes(self):
+        """컬럼 배열 메모리 (바이트)"""
+        return sum(
+            column.nbytes if isinstance(column, pd.Categorical) else np.asarray(column).nbytes
+            for column in self.columns.values()
+        )
+
+
+def _analyze_pump_task(task):
+    """
+    프로세스 풀 워커: 펌프 하나의 시계열을 분석하여 (pump_id, 배치 목록, KLL 스케치, 최근 레코드) 반환
+    반환 배치에는 원시 데이터가 포함되지 않으며, 최근 레코드는 예측용 마지막 tail_records개 (epoch ns, 값, 시간대)
+    """
+    kind, pump_id = task[0], task[1]
+    tail_records, sketch_k, window_size = task[-3], task[-2], task[-1]
+    analyzer = WaterPumpAnalyzer(sketch_k=sketch_k)
+    
+    if kind == 'file':
+        schema = _probe_csv_schema(task[2])
+        data = _read_csv_columns(task[2], schema)
+        timestamp_format = schema['timestamp_format'] if schema['timestamp_format'] != 'mixed' else None
+        analyzer.data = _clean_frame(data, timestamp_format).sort_values('timestamp').reset_index(drop=True)
+    else:
+        epoch_ns, values, tz = task[2], task[3], task[4]
+        analyzer.data = pd.DataFrame({
+            'timestamp': _from_epoch_ns(epoch_ns, tz),
+            'value': values
+        })
+    
+    analyzer.analyze_temperature_characteristics(window_size)
+    batches = analyzer.get_output_data(include_raw=False)['analysis_results']
+    if analyzer.raw_values is not None:
+        tail = (analyzer.raw_timestamps[-tail_records:].copy(), np.asarray(analyzer.raw_values[-tail_records:], dtype=np.float64),
+                analyzer.raw_timezone)
+    else:
+        tail = (np.empty(0, dtype=np.int64), np.empty(0), None)
+    return pump_id, batches, analyzer.value_sketch or KLLSketch(sketch_k), tail
+
+
+def _keyword_columns(columns):
+    """
+    컬럼명 키워드로 (timestamp 컬럼, value 컬럼) 선택, 찾지 못한 쪽은 None
+    정확히 'timestamp'/'value'인 컬럼이 있으면 우선 사용
+    """
+    columns = [col for col in columns if isinstance(col, str)]
+    timestamp_cols = [col for col in columns if any(keyword in col.lower() for keyword in ['time', 'date', 'timestamp', '시간', '날짜'])]
+    value_cols = [col for col in columns if any(keyword in col.lower() for keyword in ['temp', 'value', 'temperature', '온도', '값'])]
+    timestamp_col = 'timestamp' if 'timestamp' in columns else next(iter(timestamp_cols), None)
+    value_col = 'value' if 'value' in columns else next((col for col in value_cols if col != timestamp_col), None)
+    return timestamp_col, value_col
+
+
+def _resolve_column_names(columns):
+    """
+    timestamp, value 컬럼명 자동 매핑
+    반환값: 정규화된 컬럼명 목록 (입력과 같은 순서)
+    """
+    columns = list(columns)
+    if 'timestamp' in columns and 'value' in columns:
+        return columns
+    
+    # 컬럼명 자동 매핑 시도
+    timestamp_col, value_col = _keyword_columns(columns)
+    if timestamp_col is not None and value_col is not None:
+        mapping = {timestamp_col: 'timestamp', value_col: 'value'}
+        return [mapping.get(col, col) for col in columns]
+    
+    # 첫 번째와 두 번째 컬럼을 timestamp, value로 가정
+    if len(columns) >= 2:
+        return ['timestamp', 'value'] + columns[2:]
+    
+    raise ValueError("timestamp와 value 컬럼을 찾을 수 없습니다.")
+
+
+def _probe_csv_schema(source, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """
+    CSV 헤더와 앞부분 sample_rows행만 읽어 timestamp/value 컬럼과 자료형 결정
+    - 컬럼명 키워드로 찾지 못한 쪽은 샘플 값으로 판별
+      (timestamp: 날짜 문자열로 파싱되는 첫 컬럼 또는 epoch 숫자 컬럼, value: timestamp가 아닌 첫 실수 컬럼)
+    - 그래도 없으면 첫 번째/두 번째 컬럼
+    반환: {'timestamp', 'value': 원래 컬럼명, 'timestamp_format', 'dtypes': read_csv dtype, 'total_columns'}
+    파일 객체는 읽기 전 위치로 되돌림
+    """
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        sample = pd.read_csv(source, nrows=sample_rows)
+    finally:
+        if position is not None:
+            source.seek(position)
+    
+    columns = list(sample.columns)
+    timestamp_col, value_col = _keyword_columns(columns)
+    if timestamp_col is None:
+        for col in columns:
+            if col == value_col or pd.api.types.is_numeric_dtype(sample[col]):
+                continue
+            if _detect_timestamp_format(sample[col]) not in (None, 'mixed'):
+                timestamp_col = col
+                break
+    if timestamp_col is None:
+        # 날짜 문자열이 없으면 epoch 초 이상 크기(1e8 이상)로 단조 증가하는 숫자 컬럼
+        for col in columns:
+            values = sample[col].dropna()
+            if (col != value_col and pd.api.types.is_numeric_dtype(values) and len(values)
+                    and values.min() >= _EPOCH_MIN_SECONDS and values.is_monotonic_increasing):
+                timestamp_col = col
+                break
+    if value_col is None:
+        numeric_cols = [col for col in columns if col != timestamp_col and pd.api.types.is_numeric_dtype(sample[col])]
+        # 실수 컬럼(센서 값)을 정수 컬럼(ID, 카운터)보다 우선
+        value_col = next((col for col in numeric_cols if pd.api.types.is_float_dtype(sample[col])), None)
+        value_col = value_col or next(iter(numeric_cols), None)
+    if timestamp_col is None or value_col is None:
+        if len(columns) < 2:
+            raise ValueError("timestamp와 value 컬럼을 찾을 수 없습니다.")
+        timestamp_col = timestamp_col or next(col for col in columns if col != value_col)
+        value_col = value_col or next(col for col in columns if col != timestamp_col)
+    
+    timestamp_format = _detect_timestamp_format(sample[timestamp_col])
+    if timestamp_format is not None and timestamp_format.startswith('epoch_'):
+        timestamp_dtype = sample[timestamp_col].dtype.name
+    else:
+        timestamp_dtype = str
+    dtypes = {timestamp_col: timestamp_dtype}
+    if pd.api.types.is_numeric_dtype(sample[value_col]):
+        dtypes[value_col] = 'float64'
+    
+    return {
+        'timestamp': timestamp_col,
+        'value': value_col,
+        'timestamp_format': timestamp_format,
+        'dtypes': dtypes,
+        'total_columns': len(columns)
+    }
+
+
+def _read_csv_columns(source, schema, csv_engine='c', all_columns=False):
+    """
+    _probe_csv_schema 결과로 필요한 두 컬럼만(all_columns=True면 전체) 지정 자료형으로 읽고
+    컬럼명을 timestamp/value로 변경
+    샘플 이후에 숫자로 읽을 수 없는 값이 있으면 자료형 지정 없이 다시 읽음 (정제 단계에서 결측 처리)
+    """
+    usecols = None if all_columns else [schema['timestamp'], schema['value']]
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        frame = pd.read_csv(source, engine=csv_engine, usecols=usecols, dtype=schema['dtypes'])
+    except (ValueError, TypeError):
+        if position is not None:
+            source.seek(position)
+        frame = pd.read_csv(source, engine=csv_engine, usecols=usecols)
+    
+    frame = frame.rename(columns={schema['timestamp']: 'timestamp', schema['value']: 'value'})
+    if usecols is not None:
+        frame = frame[['timestamp', 'value']]
+    return frame
+
+
+def _compact_frame(frame):
+    """compact 모드 DataFrame: value는 float32, timestamp 외 문자열 컬럼은 category"""
+    frame['value'] = frame['value'].astype(np.float32)
+    for column in frame.columns:
+        if column != 'timestamp' and pd.api.types.is_string_dtype(frame[column].dtype):
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def _clean_frame(frame, timestamp_format=None, profiler=None):
+    """
+    timestamp/value 타입 변환 후 결측치 제거 (timestamp_format이 없으면 샘플로 판별)
+    결측 판단은 timestamp/value만 사용하므로 나머지 컬럼을 읽었는지(usecols, keep_all_columns, data=)와 관계없이 같은 행이 남음
+    profiler가 주어지면 'parse'(타임스탬프 변환), 'clean'(값 변환/결측 제거) 단계로 기록
+    """
+    profiler = profiler or _DISABLED_PROFILER
+    with profiler.stage('parse', rows=len(frame)):
+        if timestamp_format is None:
+            timestamp_format = _detect_timestamp_format(frame['timestamp'])
+        frame['timestamp'] = _parse_timestamps(frame['timestamp'], timestamp_format)
+    with profiler.stage('clean', rows=len(frame)):
+        frame['value'] = pd.to_numeric(frame['value'], errors='coerce')
+        return frame.dropna(subset=['timestamp', 'value'])
+
+
+# profiler 인자가 없는 호출에서 사용하는 비활성 프로파일러
+_DISABLED_PROFILER = StageProfiler()
+
+
+# epoch 숫자 컬럼 단위 판별 기준 (중앙값 크기가 기준 미만이면 해당 단위)
+_EPOCH_UNIT_LIMITS = (('s', 1e11), ('ms', 1e14), ('us', 1e17), ('ns', float('inf')))
+
+
+def _detect_timestamp_format(timestamps, sample_size=1000):
+    """
+    샘플 레코드로 타임스탬프 형식을 한 번만 판별
+    반환값: 'datetime'(이미 변환됨), 'epoch_s'/'epoch_ms'/'epoch_us'/'epoch_ns',
+            strptime 형식 문자열, 'ISO8601', 'mixed' 또는 None(판별 불가, pandas 기본 동작)
+    """
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return 'datetime'
+    
+    sample = timestamps.dropna().iloc[:sample_size]
+    if len(sample) == 0:
+        return None
+    
+    if pd.api.types.is_numeric_dtype(timestamps):
+        magnitude = float(np.median(np.abs(sample.to_numpy(dtype=np.float64))))
+        for unit, limit in _EPOCH_UNIT_LIMITS:
+            if magnitude < limit:
+                return f'epoch_{unit}'
+    
+    if not isinstance(sample.iloc[0], str):
+        return None
+    
+    candidates = [guess_datetime_format(sample.iloc[0]), 'ISO8601']
+    for candidate in candidates:
+        if candidate is None:
+            continue
+        try:
+            pd.to_datetime(sample, format=candidate)
+            return candidate
+        except (ValueError, TypeError):
+            continue
+    return 'mixed'
+
+
+def _parse_timestamps(timestamps, timestamp_format):
+    """판별된 형식으로 타임스탬프 컬럼 전체를 변환 (고정 형식 실패 시 mixed로 재시도)"""
+    if timestamp_format == 'datetime':
+        return timestamps
+    if timestamp_format is None:
+        return pd.to_datetime(timestamps)
+    if timestamp_format.startswith('epoch_'):
+        return pd.to_datetime(timestamps, unit=timestamp_format[len('epoch_'):])
+    
+    try:
+        return pd.to_datetime(timestamps, format=timestamp_format)
+    except (ValueError, TypeError):
+        return pd.to_datetime(timestamps, format='mixed')
+
+
+def _pyarrow_available():
+    """pyarrow 설치 여부 (CSV 엔진, 컬럼형 결과 형식 선택용)"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _columnar_format(path, file_format='auto', default=None):
+    """컬럼형 결과 파일 형식 결정 ('auto'는 확장자 → pyarrow 설치 여부 순으로 판단)"""
+    if file_format == 'auto':
+        extension = os.path.splitext(path or '')[1].lower()
+        file_format = _COLUMNAR_EXTENSIONS.get(extension)
+        if file_format is None:
+            file_format = default or ('parquet' if _pyarrow_available() else 'npz')
+    if file_format not in ('npz', 'parquet', 'feather'):
+        raise ValueError(f"지원하지 않는 컬럼형 형식입니다: {file_format}")
+    if file_format != 'npz' and not _pyarrow_available():
+        raise ImportError(f"{file_format} 형식에는 pyarrow가 필요합니다. (pip install pyarrow)")
+    return file_format
+
+
+def _export_blocks(batches, block_rows):
+    """내보내기용 배치 블록 생성 (블록의 레코드 수 합이 block_rows를 넘지 않게, 최소 1개 배치)"""
+    block, rows = [], 0
+    for batch in batches:
+        if block and rows + batch['record_count'] > block_rows:
+            yield block
+            block, rows = [], 0
+        block.append(batch)
+        rows += batch['record_count']
+    if block:
+        yield block
+
+
+def _value_list(values):
+    """
+    온도 값 배열을 파이썬 float 목록으로 변환
+    float32 값(원시 저장소)은 float32 최단 십진 표기를 거쳐 CSV의 원래 값(예: 53.3)으로 복원
+    """
+    if values.dtype == np.float32:
+        return values.astype(str).astype(np.float64).tolist()
+    return values.tolist()
+
+
+def list_raw_stores(store_dir=RAW_STORE_DIR):
+    """store_dir 아래 원시 저장소 헤더 목록 (최근 생성 순, 각 헤더에 'path' 포함)"""
+    if not os.path.isdir(store_dir):
+        return []
+    
+    headers = []
+    for name in os.listdir(store_dir):
+        header_path = os.path.join(store_dir, name, 'header.json')
+        if os.path.isfile(header_path):
+            with open(header_path, 'r', encoding='utf-8') as f:
+                headers.append({**json.load(f), 'path': os.path.join(store_dir, name)})
+    return sorted(headers, key=lambda header: header.get('created_at', ''), reverse=True)
+
+
+def _strip_raw(batch):
+    """raw_offsets/raw_data를 뺀 배치 딕셔너리 (통계와 라벨만)"""
+    return {key: value for key, value in batch.items() if key not in ('raw_offsets', 'raw_data')}
+
+
+def _columns_from_batches(batches):
+    """
+    JSON 스키마 배치 딕셔너리 목록을 필드별 배열로 변환 (라벨은 pd.Categorical)
+    raw_offsets가 있으면 raw_start/raw_end 컬럼으로 분리
+    """
+    columns = {
+        'batch_id': np.array([batch['batch_id'] for batch in batches], dtype=np.int64),
+        'start_timestamp': np.array([batch['start_timestamp'] for batch in batches], dtype=str),
+        'end_timestamp': np.array([batch['end_timestamp'] for batch in batches], dtype=str),
+        'record_count': np.array([batch['record_count'] for batch in batches], dtype=np.int64)
+    }
+    for name in _STATISTICS_FIELDS:
+        columns[name] = np.array([batch['statistics'][name] for batch in batches], dtype=np.float64)
+    for name in _LABEL_FIELDS:
+        columns[name] = pd.Categorical([batch[name] for batch in batches])
+    if batches and 'window_start' in batches[0]:
+        columns['window_start'] = np.array([batch['window_start'] for batch in batches], dtype=str)
+        columns['window_end'] = np.array([batch['window_end'] for batch in batches], dtype=str)
+        columns['max_gap_seconds'] = np.array([batch['max_gap_seconds'] for batch in batches], dtype=np.float64)
+        columns['has_gap'] = np.array([batch['has_gap'] for batch in batches], dtype=bool)
+    if batches and 'raw_offsets' in batches[0]:
+        offsets = np.array([batch['raw_offsets'] for batch in batches], dtype=np.int64).reshape(-1, 2)
+        columns['raw_start'], columns['raw_end'] = offsets[:, 0], offsets[:, 1]
+    return columns
+
+
+def _typed_batch_columns(columns):
+    """파일에서 읽은 배치 컬럼을 _columns_from_batches()와 같은 dtype으로 변환 (라벨은 pd.Categorical)"""
+    dtypes = {'batch_id': np.int64, 'record_count': np.int64, 'raw_start': np.int64, 'raw_end': np.int64,
+              'start_timestamp': str, 'end_timestamp': str, 'window_start': str, 'window_end': str,
+              'max_gap_seconds': np.float64, 'has_gap': bool}
+    typed = {}
+    for name, column in columns.items():
+        if name in _LABEL_FIELDS:
+            typed[name] = pd.Categorical(column)
+        else:
+            typed[name] = np.asarray(column, dtype=dtypes.get(name, np.float64))
+    return typed
+
+
+def _batches_from_columns(columns):
+    """배치 컬럼 배열을 JSON 스키마의 배치 딕셔너리 목록으로 변환 (raw_start/raw_end는 raw_offsets로)"""
+    lists = {name: np.asarray(column).tolist() for name, column in columns.items()}
+    has_raw = 'raw_start' in lists
+    has_window = 'window_start' in lists
+    
+    batches = []
+    for idx in range(len(lists['batch_id'])):
+        batch = {
+            'batch_id': lists['batch_id'][idx],
+            'start_timestamp': lists['start_timestamp'][idx],
+            'end_timestamp': lists['end_timestamp'][idx],
+            'record_count': lists['record_count'][idx],
+            'statistics': {name: lists[name][idx] for name in _STATISTICS_FIELDS}
+        }
+        if has_raw:
+            batch['raw_offsets'] = [lists['raw_start'][idx], lists['raw_end'][idx]]
+        for name in _LABEL_FIELDS:
+            batch[name] = lists[name][idx]
+        if has_window:
+            for name in ('window_start', 'window_end', 'max_gap_seconds', 'has_gap'):
+                batch[name] = lists[name][idx]
+        batches.append(batch)
+    return batches
+
+
+def load_analysis_results(source, include_raw=True):
+    """
+    JSON, JSON Lines 또는 컬럼형(npz/parquet/feather) 분석 결과 파일을 JSON 스키마 딕셔너리로 로드
+    source는 파일 경로 또는 업로드 파일 객체 (.name 확장자로 형식 판단)
+    include_raw=False이면 raw_data 없이 배치 통계와 라벨만 반환
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    if name.lower().endswith('.jsonl'):
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = [json.loads(line) for line in source.read().decode('utf-8').splitlines() if line.strip()]
+        data = {'metadata': records[0]['metadata'], 'analysis_results': records[1:]}
+        if not include_raw:
+            data['analysis_results'] = [_strip_raw(batch) for batch in data['analysis_results']]
+        return data
+    
+    if name.lower().endswith('.json'):
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = json.load(source)
+        if not include_raw:
+            data['analysis_results'] = [_strip_raw(batch) for batch in data['analysis_results']]
+        return data
+    
+    analyzer = WaterPumpAnalyzer()
+    data = analyzer.load_columnar(source)
+    if include_raw:
+        data['analysis_results'] = analyzer.materialize_raw_data()
+    else:
+        data['analysis_results'] = [_strip_raw(batch) for batch in data['analysis_results']]
+    return data
+
+
+def matrix_profile_summary(metadata):
+    """
+    분석 결과 메타데이터의 모티프 탐색 상태 {'status', 'records', 'step', 'window'}
+    상태가 없는 이전 결과는 모티프 목록이 있으면 computed (step 알 수 없음), 없으면 not_computed
+    """
+    if 'matrix_profile' in metadata:
+        return metadata['matrix_profile']
+    if metadata.get('motifs') is not None:
+        return {'status': MOTIFS_COMPUTED}
+    return {'status': MOTIFS_NOT_COMPUTED}
+
+
+def describe_motif_resolution(summary):
+    """구간 평균으로 줄여 탐색한 모티프 결과의 안내 문구 (대시보드/챗봇/LLM 프롬프트 공용), 원시 레코드 그대로면 None"""
+    step = summary.get('step', 1)
+    if step <= 1:
+        return None
+    return f"레코드 {summary['records']:,}개를 {step}개씩 평균하여 탐색 (위치는 약 {step}개 레코드 단위 근사)"
+
+
+def _to_epoch_ns(timestamps):
+    """datetime 컬럼을 int64 epoch 나노초 배열로 변환 (tz-aware는 UTC 기준)"""
+    return pd.DatetimeIndex(timestamps).as_unit('ns').asi8.copy()
+
+
+def _from_epoch_ns(epoch_ns, tz=None):
+    """int64 epoch 나노초 배열을 Timestamp 인덱스로 복원"""
+    if tz is not None:
+        return pd.to_datetime(epoch_ns, unit='ns', utc=True).tz_convert(tz)
+    return pd.to_datetime(epoch_ns, unit='ns')
+
+
+def _isoformat_epoch_ns(epoch_ns, tz=None):
+    """
+    int64 epoch 나노초 배열을 Timestamp.isoformat()과 같은 문자열 목록으로 변환
+    초 단위 본문은 np.datetime_as_string으로 한 번에 만들고, UTC 오프셋은 고유값별로 한 번만 포맷
+    (초 미만 값이 있는 레코드만 Timestamp.isoformat()으로 개별 변환)
+    """
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    wall_ns = epoch_ns
+    if tz is not None:
+        wall_ns = _to_epoch_ns(_from_epoch_ns(epoch_ns, tz).tz_localize(None))
+    seconds, sub_second = np.divmod(wall_ns, 1_000_000_000)
+    texts = np.datetime_as_string(seconds.astype('datetime64[s]'), unit='s').tolist()
+    
+    if tz is not None:
+        offsets, inverse = np.unique((wall_ns - epoch_ns) // 1_000_000_000, return_inverse=True)
+        suffixes = []
+        for offset in offsets.tolist():
+            sign = '-' if offset < 0 else '+'
+            minutes, rest = divmod(abs(offset), 60)
+            suffixes.append(f"{sign}{minutes // 60:02d}:{minutes % 60:02d}" + (f":{rest:02d}" if rest else ''))
+        texts = [text + suffixes[code] for text, code in zip(texts, inverse.tolist())]
+    
+    irregular = np.flatnonzero(sub_second)
+    if len(irregular):
+        for idx, timestamp in zip(irregular.tolist(), _from_epoch_ns(epoch_ns[irregular], tz)):
+            texts[idx] = timestamp.isoformat()
+    return texts
+
+
+def _forecast_dicts(result, tz=None):
+    """ForecastState.forecast() 배열 결과를 펌프별 JSON 딕셔너리 목록으로 변환 (NaN은 None)"""
+    def number(value, digits=3):
+        return round(float(value), digits) if np.isfinite(value) else None
+    
+    last_epoch_ns = np.asarray(result['last_epoch_ns'], dtype=np.int64)
+    last_times = _isoformat_epoch_ns(last_epoch_ns, tz)
+    thresholds = result['thresholds']
+    
+    # 예상 도달 시각은 모델별로 유한한 eta만 한 번에 문자열 변환
+    eta_times = {}
+    for name in FORECAST_MODELS:
+        eta = result['models'][name]['eta_hours']
+        finite = np.isfinite(eta)
+        texts = np.full(eta.shape, None, dtype=object)
+        rows, columns = np.nonzero(finite)
+        texts[rows, columns] = _isoformat_epoch_ns(
+            last_epoch_ns[rows] + np.round(eta[rows, columns] * 3600e9).astype(np.int64), tz
+        )
+        eta_times[name] = texts
+    
+    forecasts = []
+    for row in range(len(last_epoch_ns)):
+        models = {}
+        for name in FORECAST_MODELS:
+            model = result['models'][name]
+            models[name] = {
+                'level': number(model['level'][row]),
+                'slope_per_hour': number(model['slope_per_hour'][row], 4),
+                'sigma': number(model['sigma'][row]),
+                'crossings': [
+                    {
+                        'threshold': threshold,
+                        'eta_hours': number(model['eta_hours'][row, t_idx]),
+                        'earliest_hours': number(model['earliest_hours'][row, t_idx]),
+                        'latest_hours': number(model['latest_hours'][row, t_idx]),
+                        'eta_timestamp': eta_times[name][row, t_idx]
+                    }
+                    for t_idx, threshold in enumerate(thresholds)
+                ]
+            }
+        forecasts.append({
+            'last_timestamp': last_times[row] if result['records'][row] else None,
+            'current_value': number(result['current'][row]),
+            'step_seconds': number(result['step_seconds'][row]),
+            'thresholds': thresholds,
+            'params': result['params'],
+            'models': models
+        })
+    return forecasts
+
+
+def _primary_crossing(forecast, model='holt'):
+    """아직 넘지 않은 임계값 중 탐색 범위 안에서 가장 먼저 도달할 것으로 예측된 항목 (없으면 None)"""
+    if not forecast:
+        return None
+    for crossing in forecast['models'][model]['crossings']:
+        if crossing['eta_hours']:
+            return crossing
+    return None
+
+
+def _merge_thresholds(overrides=None):
+    """DEFAULT_THRESHOLDS 복사본에 항목별로 덮어쓰기 후 구간 테이블 검증"""
+    thresholds = json.loads(json.dumps(DEFAULT_THRESHOLDS))
+    for section, values in (overrides or {}).items():
+        if section not in thresholds:
+            raise ValueError(f"알 수 없는 임계값 항목입니다: {section}")
+        thresholds[section].update(values)
+    
+    for section in ('temperature', 'variability', 'range', 'stability'):
+        bins = thresholds[section]['bins']
+        if len(thresholds[section]['labels']) != len(bins) + 1:
+            raise ValueError(f"{section}: labels 개수는 bins 개수 + 1이어야 합니다.")
+        if any(lower >= upper for lower, upper in zip(bins, bins[1:])):
+            raise ValueError(f"{section}: bins는 오름차순이어야 합니다.")
+    return thresholds
+
+
+def _label_lookups(thresholds):
+    """라벨 코드 -> 문자열 조회표 (value_label은 온도/변동성/범위 조합)"""
+    temperature = thresholds['temperature']['labels']
+    variability = thresholds['variability']['labels']
+    value_range = thresholds['range']['labels']
+    trend = thresholds['trend']
+    alert = thresholds['alert_level']
+    
+    return {
+        'value_label': [
+            f"{t}_{v}_{r}" for t in temperature for v in variability for r in value_range
+        ],
+        'trend': list(trend['labels']) + [trend['insufficient']],
+        'stability': list(thresholds['stability']['labels']),
+        'alert_level': [rule['label'] for rule in alert['rules']] + [alert['default']]
+    }
+
+
+def _bin_codes(values, bins, dtype=np.int8):
+    """
+    np.digitize(values, bins)와 같은 구간 코드 (bins[i-1] <= x < bins[i] 이면 i)
+    구간 수가 적으므로 이진 탐색 대신 비교 누적으로 계산
+    """
+    codes = np.zeros(len(values), dtype=dtype)
+    for edge in bins:
+        codes += values >= edge
+    return codes
+
+
+def _rule_codes(conditions, size, dtype=np.int8):
+    """
+    np.select와 같은 우선순위 규칙 코드 (처음 만족하는 조건의 인덱스, 없으면 len(conditions))
+    조건이 하나도 없으면 모두 기본 코드 0
+    """
+    codes = np.full(size, len(conditions), dtype=dtype)
+    for index in reversed(range(len(conditions))):
+        codes[conditions[index]] = index
+    return codes
+
+
+def _classify_statistics(stats, record_counts, thresholds, fields=('value_label', 'trend', 'stability', 'alert_level')):
+    """
+    윈도우 통계 배열 전체를 한 번에 분류하여 라벨 코드 배열 반환
+    코드는 _label_lookups 조회표의 인덱스 (value_label은 int16, 나머지는 int8)
+    """
+    mean = np.asarray(stats['mean'], dtype=np.float64)
+    codes = {}
+    
+    if 'value_label' in fields:
+        temperature = _bin_codes(mean, thresholds['temperature']['bins'], np.int16)
+        variability = _bin_codes(np.asarray(stats['std']), thresholds['variability']['bins'], np.int16)
+        value_range = _bin_codes(np.asarray(stats['range']), thresholds['range']['bins'], np.int16)
+        n_variability = len(thresholds['variability']['labels'])
+        n_range = len(thresholds['range']['labels'])
+        codes['value_label'] = (temperature * n_variability + variability) * n_range + value_range
+    
+    if 'trend' in fields:
+        trend = thresholds['trend']
+        slope = np.asarray(stats['slope'], dtype=np.float64)
+        # 코드: 0 상승, 1 하강, 2 평형, 3 불충분
+        codes['trend'] = _rule_codes([
+            slope > trend['rising_slope'],
+            slope < trend['falling_slope'],
+            np.ones(len(slope), dtype=bool)
+        ], len(slope))
+        codes['trend'][np.asarray(record_counts) < 2] = 3
+    
+    if 'stability' in fields:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cv = np.where(mean > 0, np.asarray(stats['std']) / mean, 0.0)
+        codes['stability'] = _bin_codes(cv, thresholds['stability']['bins'])
+    
+    if 'alert_level' in fields:
+        rules = thresholds['alert_level']['rules']
+        max_values = np.asarray(stats['max'], dtype=np.float64)
+        codes['alert_level'] = _rule_codes(
+            [(max_values > rule['max_above']) | (mean > rule['mean_above']) for rule in rules], len(max_values)
+        )
+    
+    return codes
+
+
+def _least_squares_slope(values):
+    """
+    x = 0..n-1 에 대한 최소제곱 기울기 (np.polyfit(x, y, 1)[0]의 닫힌 형태)
+    values가 2차원이면 행(윈도우)마다 기울기를 계산
+    """
+    n = values.shape[-1]
+    if n < 2:
+        return np.full(values.shape[:-1], np.nan)
+    
+    # sum((x - x̄)(y - ȳ)) / sum((x - x̄)^2), sum(x - x̄) = 0 이므로 ȳ 항은 사라짐
+    centered_x = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    return (values @ centered_x) / (n * (n * n - 1) / 12.0)
+
+
+def _rolling_window_statistics(values, window_size, step=1):
+    """
+    슬라이딩 윈도우 통계 (윈도우 시작 위치 0, step, 2*step, ...)
+    - mean/std/slope: 누적합 차분으로 윈도우당 O(1)
+    - min/max: 단조 덱, median: 두 개의 힙 (지연 삭제)
+    """
+    if window_size < 1:
+        raise ValueError("window_size는 1 이상이어야 합니다.")
+    
+    values = np.asarray(values, dtype=np.float64)
+    n_windows = (len(values) - window_size) // step + 1 if len(values) >= window_size else 0
+    if n_windows == 0:
+        empty = np.empty(0)
+        return {key: empty for key in ('mean', 'median', 'std', 'min', 'max', 'range', 'slope')}
+    
+    starts = np.arange(n_windows) * step
+    ends = starts + window_size
+    
+    # 누적합 정밀도를 위해 전체 평균을 빼고 계산 (분산/기울기는 이동에 불변)
+    shift = values.mean()
+    shifted = values - shift
+    index = np.arange(len(values), dtype=np.float64)
+    prefix_sum = np.concatenate(([0.0], np.cumsum(shifted)))
+    prefix_sq = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    prefix_xy = np.concatenate(([0.0], np.cumsum(index * shifted)))
+    
+    window_sum = prefix_sum[ends] - prefix_sum[starts]
+    window_sq = prefix_sq[ends] - prefix_sq[starts]
+    window_xy = prefix_xy[ends] - prefix_xy[starts]
+    
+    mean = window_sum / window_size
+    variance = np.maximum(window_sq / window_size - mean * mean, 0.0)
+    
+    if window_size >= 2:
+        # sum((j - x̄) y) = sum(i y) - (start + x̄) sum(y)
+        x_bar = (window_size - 1) / 2.0
+        numerator = window_xy - (starts + x_bar) * window_sum
+        slope = numerator / (window_size * (window_size * window_size - 1) / 12.0)
+    else:
+        slope = np.full(n_windows, np.nan)
+    
+    mins, maxs = _rolling_extrema(values, window_size, step)
+    
+    return {
+        'mean': mean + shift,
+        'median': _rolling_median(values, window_size, step),
+        'std': np.sqrt(variance),
+        'min': mins,
+        'max': maxs,
+        'range': maxs - mins,
+        'slope': slope
+    }
+
+
+def _rolling_extrema(values, window_size, step=1):
+    """단조 덱으로 슬라이딩 윈도우 최소/최대 계산 (원소당 분할상환 O(1))"""
+    n_windows = (len(values) - window_size) // step + 1
+    mins = np.empty(n_windows)
+    maxs = np.empty(n_windows)
+    min_queue = deque()  # 값이 증가하는 인덱스 덱
+    max_queue = deque()  # 값이 감소하는 인덱스 덱
+    
+    values_list = values.tolist()
+    for i, value in enumerate(values_list):
+        while min_queue and values_list[min_queue[-1]] >= value:
+            min_queue.pop()
+        min_queue.append(i)
+        while max_queue and values_list[max_queue[-1]] <= value:
+            max_queue.pop()
+        max_queue.append(i)
+        
+        start = i - window_size + 1
+        if start < 0 or start % step:
+            continue
+        if start // step >= n_windows:
+            break
+        
+        # 윈도우 밖으로 나간 인덱스 제거
+        while min_queue[0] < start:
+            min_queue.popleft()
+        while max_queue[0] < start:
+            max_queue.popleft()
+        mins[start // step] = values_list[min_queue[0]]
+        maxs[start // step] = values_list[max_queue[0]]
+    
+    return mins, maxs
+
+
+def _rolling_median(values, window_size, step=1):
+    """
+    두 개의 힙(하위 절반 최대 힙 + 상위 절반 최소 힙)으로 슬라이딩 중앙값 계산
+    윈도우에서 빠지는 값은 지연 삭제하여 원소당 O(log w)
+    """
+    n_windows = (len(values) - window_size) // step + 1
+    medians = np.empty(n_windows)
+    low, high = [], []  # low는 부호를 뒤집어 최대 힙으로 사용
+    low_size = high_size = 0
+    delayed = defaultdict(int)
+    
+    def prune(heap, sign):
+        while heap and delayed.get(sign * heap[0], 0):
+            value = sign * heapq.heappop(heap)
+            delayed[value] -= 1
+            if not delayed[value]:
+                del delayed[value]
+    
+    def rebalance():
+        nonlocal low_size, high_size
+        if low_size > high_size + 1:
+            heapq.heappush(high, -heapq.heappop(low))
+            low_size -= 1
+            high_size += 1
+            prune(low, -1)
+        elif low_size < high_size:
+            heapq.heappush(low, -heapq.heappop(high))
+            low_size += 1
+            high_size -= 1
+            prune(high, 1)
+    
+    values_list = values.tolist()
+    for i, value in enumerate(values_list):
+        if not low or value <= -low[0]:
+            heapq.heappush(low, -value)
+            low_size += 1
+        else:
+            heapq.heappush(high, value)
+            high_size += 1
+        rebalance()
+        
+        if i >= window_size:
+            # 윈도우 밖으로 나간 값 지연 삭제
+            outgoing = values_list[i - window_size]
+            delayed[outgoing] += 1
+            if outgoing <= -low[0]:
+                low_size -= 1
+                if outgoing == -low[0]:
+                    prune(low, -1)
+            else:
+                high_size -= 1
+                if high and outgoing == high[0]:
+                    prune(high, 1)
+            rebalance()
+        
+        start = i - window_size + 1
+        if start < 0 or start % step:
+            continue
+        if start // step >= n_windows:
+            break
+        
+        if window_size % 2:
+            medians[start // step] = -low[0]
+        else:
+            medians[start // step] = (-low[0] + high[0]) / 2
+    
+    return medians
+
+
+def _segment_statistics(values, starts, ends):
+    """
+    임의 구간 [starts[k], ends[k]) 통계를 반복문 없이 계산 (빈 구간은 허용하지 않음)
+    - 합계/최소/최대는 ufunc.reduceat, 분산과 기울기는 구간 평균을 펼쳐 두 번째 패스로 계산
+    - 중앙값은 (구간 번호, 값) lexsort 후 가운데 원소 선택
+    반환값은 _window_statistics와 같은 키 구성
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    counts = ends - starts
+    if len(counts) == 0:
+        empty = np.empty(0)
+        return {key: empty for key in ('mean', 'median', 'std', 'min', 'max', 'range', 'slope')}
+    if np.any(counts <= 0):
+        raise ValueError("빈 구간은 통계를 계산할 수 없습니다.")
+    
+    # 구간에 속한 원소 위치와 구간 번호, 구간 내 순번
+    segment_ids = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    local_index = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    segment_values = values[np.repeat(starts, counts) + local_index]
+    
+    sums = np.add.reduceat(segment_values, offsets[:-1])
+    mean = sums / counts
+    deviation = segment_values - np.repeat(mean, counts)
+    variance = np.add.reduceat(deviation * deviation, offsets[:-1]) / counts
+    
+    # sum((j - x̄)(y - ȳ)) / sum((j - x̄)^2)
+    x_bar = (counts - 1) / 2.0
+    centered_x = local_index - np.repeat(x_bar, counts)
+    numerator = np.add.reduceat(centered_x * deviation, offsets[:-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(counts >= 2, numerator / (counts * (counts * counts - 1) / 12.0), np.nan)
+    
+    mins = np.minimum.reduceat(segment_values, offsets[:-1])
+    maxs = np.maximum.reduceat(segment_values, offsets[:-1])
+    
+    sorted_values = segment_values[np.lexsort((segment_values, segment_ids))]
+    lower = sorted_values[offsets[:-1] + (counts - 1) // 2]
+    upper = sorted_values[offsets[:-1] + counts // 2]
+    
+    return {
+        'mean': mean,
+        'median': (lower + upper) / 2,
+        'std': np.sqrt(variance),
+        'min': mins,
+        'max': maxs,
+        'range': maxs - mins,
+        'slope': slope
+    }
+
+
+def _matrix_profile_params(overrides=None):
+    """기본 매트릭스 프로파일 파라미터에 overrides를 덮어쓴 사본 (값 검증 포함)"""
+    params = dict(DEFAULT_MATRIX_PROFILE_PARAMS)
+    if overrides:
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"알 수 없는 매트릭스 프로파일 파라미터입니다: {sorted(unknown)}")
+        params.update(overrides)
+    for key in ('window', 'top_k', 'max_points', 'min_window_points', 'chunk_rows', 'max_occurrences'):
+        params[key] = int(params[key])
+    if params['window'] < 4:
+        raise ValueError("window는 4 이상이어야 합니다.")
+    return params
+
+
+def _sliding_dot_product(query, values):
+    """values의 길이 len(query)인 모든 부분 시계열과 query의 내적 (FFT 합성곱, O(n log n))"""
+    window, n = len(query), len(values)
+    size = 1 << (n + window - 1).bit_length()
+    product = np.fft.irfft(np.fft.rfft(values, size) * np.fft.rfft(query[::-1], size), size)
+    return product[window - 1:n]
+
+
+def _moving_mean_std(values, window, block_rows=4096):
+    """
+    길이 window 부분 시계열의 평균과 표준편차 (누적합)
+    누적합 분산의 상쇄 오차(약 √(ε·n/window)·max|x|)보다 작은 표준편차는 구간 값으로 다시 계산하고,
+    값이 모두 같은(평평한) 구간의 표준편차는 정확히 0
+    """
+    prefix = np.concatenate(([0.0], np.cumsum(values)))
+    prefix_sq = np.concatenate(([0.0], np.cumsum(values * values)))
+    mean = (prefix[window:] - prefix[:-window]) / window
+    variance = (prefix_sq[window:] - prefix_sq[:-window]) / window - mean * mean
+    std = np.sqrt(np.maximum(variance, 0.0))
+    
+    tolerance = 4.0 * np.sqrt(np.finfo(np.float64).eps * len(values) / window) * float(np.abs(values).max())
+    suspect = np.flatnonzero(std <= tolerance)
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    for block_start in range(0, len(suspect), block_rows):
+        rows = suspect[block_start:block_start + block_rows]
+        block = windows[rows]
+        std[rows] = block.std(axis=1)
+        std[rows[block.max(axis=1) == block.min(axis=1)]] = 0.0
+    return mean, std
+
+
+def _matrix_profile_task(task):
+    """
+    매트릭스 프로파일 [start, stop) 행 계산 (STOMP, 프로세스 풀 작업 단위)
+    - 첫 행은 FFT 슬라이딩 내적, 이후 행은 QT[i, j] = QT[i-1, j-1] - T[i-1]T[j-1] + T[i+m-1]T[j+m-1]로 O(l) 갱신
+    - 행마다 z 정규화 거리 대신 상관계수 최대 위치를 찾고 그 한 점만 거리로 변환
+    - 평평한(표준편차 0) 부분 시계열끼리는 거리 0, 평평한 구간과 나머지는 거리 √m
+      (z 정규화 결과를 0 벡터로 보는 것과 같음, 상관계수로는 1과 0.5)
+    반환: (start, 행별 최근접 거리, 최근접 위치)
+    """
+    values, window, start, stop, exclusion = task
+    length = len(values) - window + 1
+    mean, std = _moving_mean_std(values, window)
+    inv_std = np.divide(1.0, std, out=np.zeros_like(std), where=std > 0)
+    mean_scaled = mean * inv_std
+    flat = np.flatnonzero(std == 0)
+    
+    first_row = _sliding_dot_product(values[:window], values)
+    qt = _sliding_dot_product(values[start:start + window], values)
+    following = np.empty(length)
+    product = np.empty(length - 1)
+    corr = np.empty(length)
+    head, tail = values[:length - 1], values[window:]
+    profile = np.empty(stop - start)
+    index = np.empty(stop - start, dtype=np.int64)
+    
+    for row in range(start, stop):
+        if row > start:
+            np.multiply(tail, values[row + window - 1], out=following[1:])
+            following[1:] += qt[:-1]
+            np.multiply(head, values[row - 1], out=product)
+            following[1:] -= product
+            following[0] = first_row[row]
+            qt, following = following, qt
+        # scale * 상관계수 = QT * (1/σ_j) - m μ_i (μ_j/σ_j) (scale = m σ_i), 자기 자신 주변(exclusion)은 제외
+        if std[row] == 0:
+            scale = 1.0
+            corr.fill(0.5)
+            corr[flat] = 1.0
+        else:
+            scale = window * std[row]
+            np.multiply(qt, inv_std, out=corr)
+            corr -= (window * mean[row]) * mean_scaled
+            corr[flat] = 0.5 * scale
+        corr[max(0, row - exclusion):row + exclusion + 1] = -np.inf
+        best = int(np.argmax(corr))
+        r = min(corr[best] / scale, 1.0)
+        profile[row - start] = np.sqrt(max(2.0 * window * (1.0 - r), 0.0))
+        index[row - start] = best
+    return start, profile, index
+
+
+def _matrix_profile(values, window, exclusion, chunk_rows=8192, max_workers=1):
+    """
+    z 정규화 유클리드 거리 매트릭스 프로파일과 최근접 위치 (부분 시계열 시작 위치별)
+    chunk_rows 행씩 나누어 max_workers > 1이면 ProcessPoolExecutor에서 병렬 계산 (메모리는 작업당 O(n))
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values - values.mean()
+    length = len(values) - window + 1
+    tasks = [(values, window, start, min(start + chunk_rows, length), exclusion) for start in range(0, length, chunk_rows)]
+    profile = np.empty(length)
+    index = np.empty(length, dtype=np.int64)
+    
+    if max_workers == 1 or len(tasks) == 1:
+        outputs = map(_matrix_profile_task, tasks)
+        for start, chunk_profile, chunk_index in outputs:
+            profile[start:start + len(chunk_profile)] = chunk_profile
+            index[start:start + len(chunk_index)] = chunk_index
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for start, chunk_profile, chunk_index in executor.map(_matrix_profile_task, tasks):
+                profile[start:start + len(chunk_profile)] = chunk_profile
+                index[start:start + len(chunk_index)] = chunk_index
+    return profile, index
+
+
+def _top_motifs(profile, index, top_k, exclusion):
+    """거리가 가장 짧은 모티프 쌍 top_k개 (서로 exclusion 이내인 쌍과 이미 고른 쌍의 exclusion 이내 위치는 제외)"""
+    taken = np.zeros(len(profile), dtype=bool)
+    motifs = []
+    for position in np.argsort(profile, kind='stable').tolist():
+        if len(motifs) == top_k or not np.isfinite(profile[position]):
+            break
+        neighbor = int(index[position])
+        if taken[position] or taken[neighbor] or abs(position - neighbor) < exclusion:
+            continue
+        motifs.append((position, neighbor, float(profile[position])))
+        for offset in (position, neighbor):
+            taken[max(0, offset - exclusion):offset + exclusion + 1] = True
+    return motifs
+
+
+def _top_discords(profile, top_k, exclusion):
+    """최근접 거리가 가장 먼(가장 특이한) 부분 시계열 top_k개 (서로 exclusion 이내는 제외)"""
+    taken = np.zeros(len(profile), dtype=bool)
+    discords = []
+    for position in np.argsort(-profile, kind='stable').tolist():
+        if len(discords) == top_k:
+            break
+        if taken[position] or not np.isfinite(profile[position]):
+            continue
+        discords.append((position, float(profile[position])))
+        taken[max(0, position - exclusion):position + exclusion + 1] = True
+    return discords
+
+
+def _motif_occurrences(values, window, position, radius, exclusion, limit):
+    """position 부분 시계열과의 z 정규화 거리가 radius 이내인 위치 (가까운 순, 서로 겹치지 않게 최대 limit개)"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values - values.mean()
+    mean, std = _moving_mean_std(values, window)
+    inv_std = np.divide(1.0, std, out=np.zeros_like(std), where=std > 0)
+    qt = _sliding_dot_product(values[position:position + window], values)
+    corr = (qt - window * mean[position] * mean) * inv_std * inv_std[position] / window
+    # 평평한 구간끼리는 상관계수 1, 평평한 구간과 나머지는 0.5 (_matrix_profile_task와 같은 규칙)
+    flat = std == 0
+    corr[flat] = 0.5
+    if flat[position]:
+        corr[~flat] = 0.5
+        corr[flat] = 1.0
+    distances = np.sqrt(np.maximum(2.0 * window * (1.0 - np.minimum(corr, 1.0)), 0.0))
+    
+    taken = np.zeros(len(distances), dtype=bool)
+    occurrences = []
+    for candidate in np.flatnonzero(distances <= radius)[np.argsort(distances[distances <= radius], kind='stable')].tolist():
+        if len(occurrences) == limit:
+            break
+        if taken[candidate]:
+            continue
+        occurrences.append((candidate, float(distances[candidate])))
+        taken[max(0, candidate - exclusion):candidate + exclusion + 1] = True
+    return sorted(occurrences)
+
+
+def _percentile_summary(sketch, quantiles=(0.5, 0.95, 0.99), value_dtype=np.float64):
+    """스케치 분위수를 {'p50': ..., 'count': ..., 'rank_error': ...} 형태로 변환"""
+    values = _value_list(sketch.quantiles(quantiles).astype(value_dtype))
+    summary = {f"p{q * 100:g}": value for q, value in zip(quantiles, values)}
+    summary['count'] = sketch.n
+    summary['rank_error'] = sketch.rank_error
+    return summary
+
+
+def _window_statistics(values, window_size):
+    """
+    고정 크기 윈도우 통계를 한 번의 NumPy 연산으로 계산
+    - 완전한 윈도우는 (n_windows x window_size) 2차원 뷰로 reshape 하여 행 단위 집계
+    - 마지막 불완전 윈도우는 별도로 계산하여 뒤에 붙임
+    반환값: mean/median/std/min/max/range/slope 배열 딕셔너리 (윈도우 순서)
+    """
+    if window_size < 1:
+        raise ValueError("window_size는 1 이상이어야 합니다.")
+    
+    values = np.asarray(values, dtype=np.float64)
+    n_full = len(values) // window_size
+    
+    parts = []
+    if n_full:
+        parts.append(values[:n_full * window_size].reshape(n_full, window_size))
+    if len(values) % window_size:
+        parts.append(values[n_full * window_size:].reshape(1, -1))
+    
+    stats = {key: [] for key in ('mean', 'median', 'std', 'min', 'max', 'slope')}
+    for block in parts:
+        stats['mean'].append(block.mean(axis=1))
+        stats['median'].append(np.median(block, axis=1))
+        stats['std'].append(block.std(axis=1))
+        stats['min'].append(block.min(axis=1))
+        stats['max'].append(block.max(axis=1))
+        stats['slope'].append(_least_squares_slope(block))
+    
+    stats = {
+        key: np.concatenate(arrays) if arrays else np.empty(0)
+        for key, arrays in stats.items()
+    }
+    stats['range'] = stats['max'] - stats['min']
+    return stats
+
 
 # 사용 예제
 if __name__ == "__main__":